@@ -1,7 +1,7 @@
 # en apps/appointments/admin.py
 
 from django.contrib import admin
-from .models import Appointment, PsychologistAvailability
+from .models import Appointment, PsychologistAvailability, SlotHold
 
 class AppointmentAdmin(admin.ModelAdmin):
     list_display = ('patient', 'psychologist', 'appointment_date', 'start_time', 'status', 'is_paid')
@@ -17,6 +17,11 @@ class PsychologistAvailabilityAdmin(admin.ModelAdmin):
         return obj.get_weekday_display()
     get_weekday_display.short_description = 'Día de la Semana'
 
+class SlotHoldAdmin(admin.ModelAdmin):
+    list_display = ('psychologist', 'patient', 'appointment_date', 'start_time', 'expires_at', 'stripe_session_id')
+    list_filter = ('psychologist', 'appointment_date')
+    readonly_fields = ('created_at',)
+
 # NO registrar en el admin por defecto - se registran en admin sites específicos
 # admin.site.register(Appointment, AppointmentAdmin)
 # admin.site.register(PsychologistAvailability, PsychologistAvailabilityAdmin)
@@ -24,4 +29,5 @@ class PsychologistAvailabilityAdmin(admin.ModelAdmin):
 # Registrar también en el tenant admin
 from config.tenant_admin import tenant_admin_site
 tenant_admin_site.register(Appointment, AppointmentAdmin)
-tenant_admin_site.register(PsychologistAvailability, PsychologistAvailabilityAdmin)
\ No newline at end of file
+tenant_admin_site.register(PsychologistAvailability, PsychologistAvailabilityAdmin)
+tenant_admin_site.register(SlotHold, SlotHoldAdmin)
@@ -0,0 +1,202 @@
+# apps/appointments/holds.py
+"""
+Reservas temporales de horarios durante el pago (SlotHold).
+
+El flujo de checkout ya no crea una cita "pendiente" que luego hay que
+borrar si el pago se abandona:
+
+1. `acquire_hold` reserva el horario con un único INSERT ... ON CONFLICT:
+   la restricción única (psicólogo, fecha, hora) impide dos reservas y la
+   cláusula WHERE solo deja reemplazar una reserva vencida (o del mismo
+   paciente que reintenta). Sin carreras y sin borrados. Si el mismo
+   paciente reintenta con la reserva vigente, conserva su sesión de Stripe:
+   esa sesión se puede seguir pagando y tiene que poder confirmarse.
+2. La sesión de Stripe vence un poco antes que la reserva, así que no se
+   puede pagar una reserva ya vencida.
+3. `confirm_hold` convierte la reserva en la cita al confirmarse el pago.
+4. Las reservas vencidas dejan de ocupar el horario al instante (las
+   lecturas filtran por `expires_at`); sus filas se borran con el webhook
+   `checkout.session.expired` o con `expire_slot_holds`.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Appointment, SlotHold
+
+# Margen entre el vencimiento de la sesión de Stripe y el de la reserva
+STRIPE_SESSION_MARGIN = timedelta(minutes=2)
+# Stripe exige que una sesión dure al menos 30 minutos
+STRIPE_MIN_SESSION = timedelta(minutes=30)
+
+_HOLD_COLUMNS = (
+    'psychologist_id', 'patient_id', 'appointment_date', 'start_time', 'end_time',
+    'appointment_type', 'reason_for_visit', 'notes', 'consultation_fee',
+    'stripe_session_id', 'expires_at', 'created_at',
+)
+# Identidad del checkout en curso: se conserva si la reserva sigue vigente
+_CHECKOUT_COLUMNS = ('stripe_session_id', 'expires_at', 'created_at')
+
+
+def hold_duration():
+    return timedelta(minutes=getattr(settings, 'SLOT_HOLD_MINUTES', 35))
+
+
+def acquire_hold(patient, data):
+    """
+    Reserva el horario de `data` (validated_data de AppointmentCreateSerializer).
+    Devuelve la SlotHold o None si otro paciente tiene una reserva vigente.
+
+    Con una reserva vigente del mismo paciente se actualizan los datos de
+    la cita pero se mantienen la sesión de pago, `created_at` y
+    `expires_at`: la SlotHold devuelta trae `stripe_session_id` si ya hay
+    una sesión abierta para el horario.
+    """
+    now = timezone.now()
+    fields = {
+        'psychologist_id': data['psychologist'].pk,
+        'patient_id': patient.pk,
+        'appointment_date': data['appointment_date'],
+        'start_time': data['start_time'],
+        'end_time': data['end_time'],
+        'appointment_type': data.get('appointment_type') or 'in_person',
+        'reason_for_visit': data.get('reason_for_visit', ''),
+        'notes': data.get('notes', ''),
+        'consultation_fee': data.get('consultation_fee'),
+        'stripe_session_id': '',
+        'expires_at': now + hold_duration(),
+        'created_at': now,
+    }
+    table = connection.ops.quote_name(SlotHold._meta.db_table)
+    updates = []
+    for column in _HOLD_COLUMNS:
+        if column in ('psychologist_id', 'appointment_date', 'start_time'):
+            continue
+        if column in _CHECKOUT_COLUMNS:
+            # Reserva vigente (solo puede ser del mismo paciente): se conserva
+            updates.append(
+                f"{column} = CASE WHEN {table}.expires_at > %s "
+                f"THEN {table}.{column} ELSE EXCLUDED.{column} END"
+            )
+        else:
+            updates.append(f"{column} = EXCLUDED.{column}")
+    sql = (
+        f"INSERT INTO {table} ({', '.join(_HOLD_COLUMNS)}) "
+        f"VALUES ({', '.join(['%s'] * len(_HOLD_COLUMNS))}) "
+        f"ON CONFLICT (psychologist_id, appointment_date, start_time) DO UPDATE SET {', '.join(updates)} "
+        f"WHERE {table}.expires_at <= %s OR {table}.patient_id = EXCLUDED.patient_id "
+        f"RETURNING id, {', '.join(_CHECKOUT_COLUMNS)}"
+    )
+    params = [fields[column] for column in _HOLD_COLUMNS] + [now] * (len(_CHECKOUT_COLUMNS) + 1)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    hold_id, *checkout = row
+    fields.update(zip(_CHECKOUT_COLUMNS, checkout))
+    return SlotHold(id=hold_id, **fields)
+
+
+def stripe_session_expiry(hold):
+    """Vencimiento (timestamp) para la sesión de Stripe, o None si la reserva es demasiado corta."""
+    expires_at = hold.expires_at - STRIPE_SESSION_MARGIN
+    if expires_at - timezone.now() < STRIPE_MIN_SESSION:
+        return None
+    return int(expires_at.timestamp())
+
+
+def attach_session(hold, session_id):
+    """
+    Asocia la sesión de pago a la reserva si todavía no tiene otra. Devuelve
+    False si otra petición ya asoció una sesión distinta o la reserva ya no
+    es del paciente: la sesión de esta petición nunca podría confirmarse y
+    hay que anularla.
+    """
+    attached = SlotHold.objects.filter(
+        pk=hold.pk, patient_id=hold.patient_id, stripe_session_id__in=('', session_id)
+    ).update(stripe_session_id=session_id)
+    if attached:
+        hold.stripe_session_id = session_id
+    return bool(attached)
+
+
+def release_hold(hold_id, session_id=None):
+    """
+    Libera la reserva (pago abandonado o fallido). Devuelve True si existía.
+    Con `session_id` solo si la reserva sigue siendo de esa sesión ('' =
+    reserva aún sin sesión de pago).
+    """
+    holds = SlotHold.objects.filter(pk=hold_id)
+    if session_id is not None:
+        # Si otro paciente ya reemplazó la reserva, su sesión es otra
+        holds = holds.filter(stripe_session_id=session_id)
+    deleted, _ = holds.delete()
+    return bool(deleted)
+
+
+def confirm_hold(hold_id, session_id):
+    """
+    Crea la cita confirmada y pagada a partir de la reserva de `session_id`.
+    Lanza SlotHold.DoesNotExist si la reserva ya no es de esa sesión.
+    """
+    with transaction.atomic():
+        hold = SlotHold.objects.select_for_update().get(pk=hold_id, stripe_session_id=session_id)
+        appointment = Appointment.objects.create(
+            patient_id=hold.patient_id,
+            psychologist_id=hold.psychologist_id,
+            appointment_date=hold.appointment_date,
+            start_time=hold.start_time,
+            end_time=hold.end_time,
+            appointment_type=hold.appointment_type,
+            reason_for_visit=hold.reason_for_visit,
+            notes=hold.notes,
+            consultation_fee=hold.consultation_fee,
+            status='confirmed',
+            is_paid=True,
+        )
+        hold.delete()
+    return appointment
+
+
+def held_intervals(psychologist, dates, exclude_patient=None):
+    """
+    Reservas vigentes del psicólogo en `dates` (una fecha o un rango
+    (inicio, fin)): {fecha: [(inicio, fin), ...]}.
+    """
+    holds = SlotHold.objects.active().filter(psychologist=psychologist)
+    if isinstance(dates, tuple):
+        holds = holds.filter(appointment_date__range=dates)
+    else:
+        holds = holds.filter(appointment_date=dates)
+    if exclude_patient is not None:
+        holds = holds.exclude(patient=exclude_patient)
+
+    intervals = {}
+    for appointment_date, start_time, end_time in holds.values_list('appointment_date', 'start_time', 'end_time'):
+        intervals.setdefault(appointment_date, []).append((start_time, end_time))
+    return intervals
+
+
+def is_held(psychologist, appointment_date, start_time, end_time, exclude_patient=None):
+    """¿Hay una reserva vigente que se solape con el horario?"""
+    holds = SlotHold.objects.active().filter(
+        psychologist=psychologist,
+        appointment_date=appointment_date,
+        start_time__lt=end_time,
+        end_time__gt=start_time,
+    )
+    if exclude_patient is not None:
+        holds = holds.exclude(patient=exclude_patient)
+    return holds.exists()
+
+
+def sweep_expired_holds(grace=timedelta(minutes=10)):
+    """
+    Borra las reservas vencidas hace más de `grace` (margen para webhooks
+    de pago que lleguen tarde). Devuelve cuántas borró.
+    """
+    deleted, _ = SlotHold.objects.expired(grace).delete()
+    return deleted
@@ -0,0 +1,52 @@
+"""
+Comando para borrar las reservas de horario (SlotHold) vencidas.
+Las reservas vencidas ya no ocupan el horario; esto solo limpia las filas
+de pagos abandonados cuyo webhook `checkout.session.expired` no llegó.
+Pensado para ejecutarse periódicamente (cron de Render).
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.utils import schema_context
+from apps.tenants.models import Clinic
+from apps.appointments.holds import sweep_expired_holds
+
+
+class Command(BaseCommand):
+    help = 'Borra las reservas de horario vencidas de cada clínica'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            type=str,
+            help='Schema del tenant específico (ej: mindcare, bienestar)',
+            default=None
+        )
+        parser.add_argument(
+            '--grace-minutes',
+            type=int,
+            default=10,
+            help='Minutos tras el vencimiento antes de borrar (pagos que llegan tarde)'
+        )
+
+    def handle(self, *args, **options):
+        specific_tenant = options.get('tenant')
+        grace = timedelta(minutes=options['grace_minutes'])
+
+        if specific_tenant:
+            tenants = Clinic.objects.filter(schema_name=specific_tenant)
+            if not tenants.exists():
+                raise CommandError(f'Tenant "{specific_tenant}" no encontrado')
+        else:
+            tenants = Clinic.objects.exclude(schema_name='public')
+
+        total = 0
+        for tenant in tenants:
+            with schema_context(tenant.schema_name):
+                deleted = sweep_expired_holds(grace)
+            total += deleted
+            if deleted:
+                self.stdout.write(f'🧹 {tenant.schema_name}: {deleted} reservas vencidas borradas')
+
+        self.stdout.write(self.style.SUCCESS(f'✅ {total} reservas vencidas borradas'))
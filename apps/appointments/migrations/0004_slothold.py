@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-18 22:34
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0003_referral'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('appointment_date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('appointment_type', models.CharField(choices=[('online', 'En línea'), ('in_person', 'Presencial')], default='in_person', max_length=20)),
+                ('reason_for_visit', models.TextField(blank=True)),
+                ('notes', models.TextField(blank=True)),
+                ('consultation_fee', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('stripe_session_id', models.CharField(blank=True, max_length=255)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('patient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='patient_slot_holds', to=settings.AUTH_USER_MODEL)),
+                ('psychologist', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Reserva temporal',
+                'verbose_name_plural': 'Reservas temporales',
+                'constraints': [models.UniqueConstraint(fields=('psychologist', 'appointment_date', 'start_time'), name='unique_slot_hold')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 22:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0005_appointment_patient_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='psychologistavailability',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -33,6 +33,7 @@ class PsychologistAvailability(models.Model):
     
     # Para bloqueos específicos (vacaciones, etc)
     blocked_dates = models.JSONField(default=list, blank=True)  # Lista de fechas bloqueadas
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         unique_together = ['psychologist', 'weekday', 'start_time']
@@ -123,6 +124,11 @@ class Appointment(models.Model):
     class Meta:
         ordering = ['-appointment_date', '-start_time']
         unique_together = ['psychologist', 'appointment_date', 'start_time']
+        indexes = [
+            # Listados del paciente paginados por (fecha, hora, id); los del
+            # psicólogo usan el índice de unique_together
+            models.Index(fields=['patient', 'appointment_date', 'start_time'], name='appointment_patient_date_idx'),
+        ]
         verbose_name = 'Cita'
         verbose_name_plural = 'Citas'
     
@@ -190,6 +196,69 @@ class Appointment(models.Model):
         return f"{self.patient.get_full_name()} con {self.psychologist.get_full_name()} - {self.appointment_date} {self.start_time}"
 
 
+class SlotHoldQuerySet(models.QuerySet):
+    def active(self):
+        """Reservas vigentes: ocupan el horario."""
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self, grace=timedelta(0)):
+        return self.filter(expires_at__lte=timezone.now() - grace)
+
+
+class SlotHold(models.Model):
+    """
+    Reserva temporal de un horario mientras el paciente paga en Stripe.
+
+    La cita solo se crea al confirmarse el pago (ver apps/appointments/holds.py).
+    Una reserva vencida no ocupa el horario aunque su fila siga existiendo:
+    la restricción única permite que otra reserva la reemplace en el mismo
+    INSERT, y las filas vencidas se borran con el webhook de sesión expirada
+    o con `expire_slot_holds`.
+    """
+    psychologist = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='slot_holds'
+    )
+    patient = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='patient_slot_holds'
+    )
+    appointment_date = models.DateField()
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    # Datos con los que se creará la cita
+    appointment_type = models.CharField(max_length=20, choices=Appointment.APPOINTMENT_TYPE, default='in_person')
+    reason_for_visit = models.TextField(blank=True)
+    notes = models.TextField(blank=True)
+    consultation_fee = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    stripe_session_id = models.CharField(max_length=255, blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = SlotHoldQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['psychologist', 'appointment_date', 'start_time'],
+                name='unique_slot_hold'
+            ),
+        ]
+        verbose_name = 'Reserva temporal'
+        verbose_name_plural = 'Reservas temporales'
+
+    @property
+    def is_active(self):
+        return self.expires_at > timezone.now()
+
+    def __str__(self):
+        return f"Reserva {self.psychologist_id} {self.appointment_date} {self.start_time} (vence {self.expires_at})"
+
+
 class TimeSlot(models.Model):
     """
     Modelo auxiliar para generar slots de tiempo disponibles
@@ -0,0 +1,113 @@
+# apps/appointments/pagination.py
+from datetime import date, time
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class AppointmentKeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) de citas sobre (appointment_date,
+    start_time, id), apoyada en los índices (psicólogo|paciente, fecha, hora).
+
+    Es opcional: se activa con `cursor` o `paginate=true`. Sin ellos los
+    listados mantienen su formato anterior (ver `legacy_response`).
+
+    Parámetros soportados:
+    - cursor=<fecha>,<hora>,<id>: citas posteriores a la indicada en el
+      orden del listado (el valor viene en `next` de la página anterior)
+    - limit=<n>: tamaño de página (por defecto 30, máximo 100)
+    - paginate=true: primera página por cursor
+
+    A diferencia de la paginación por número de página no hay COUNT ni
+    OFFSET: el coste de una página no depende de cuántas citas haya antes.
+    El orden lo fija la vista con `descending` (historial: más recientes
+    primero; próximas: más cercanas primero). Las filas son diccionarios de
+    `.values()` que incluyen los campos del orden (AppointmentValuesSerializer).
+    """
+    default_limit = 30
+    max_limit = 100
+    ordering_fields = ('appointment_date', 'start_time', 'id')
+
+    def __init__(self, descending=True):
+        self.descending = descending
+
+    def legacy_response(self, request):
+        """¿El cliente espera el formato anterior (sin paginación por cursor)?"""
+        params = request.query_params
+        if params.get('cursor') not in (None, ''):
+            return False
+        return params.get('paginate', 'false').lower() != 'true'
+
+    def get_limit(self, request):
+        raw = request.query_params.get('limit')
+        if not raw:
+            return self.default_limit
+        try:
+            limit = int(raw)
+        except ValueError:
+            raise ValidationError({'limit': 'Debe ser un número entero.'})
+        return max(1, min(limit, self.max_limit))
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get('cursor')
+        if not raw:
+            return None
+        try:
+            day, start, pk = raw.split(',')
+            return date.fromisoformat(day), time.fromisoformat(start), int(pk)
+        except ValueError:
+            raise ValidationError({'cursor': 'Cursor inválido.'})
+
+    def encode_cursor(self, row):
+        return f"{row['appointment_date'].isoformat()},{row['start_time'].isoformat()},{row['id']}"
+
+    def _after(self, cursor):
+        day, start, pk = cursor
+        op = 'lt' if self.descending else 'gt'
+        return (
+            Q(**{f'appointment_date__{op}': day}) |
+            Q(appointment_date=day, **{f'start_time__{op}': start}) |
+            Q(appointment_date=day, start_time=start, **{f'id__{op}': pk})
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Solo se leen limit + 1 filas para saber si hay más."""
+        self.request = request
+        limit = self.get_limit(request)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(self._after(cursor))
+
+        prefix = '-' if self.descending else ''
+        rows = list(queryset.order_by(*(prefix + field for field in self.ordering_fields))[:limit + 1])
+        self.has_more = len(rows) > limit
+        self.page = rows[:limit]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_more or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, 'cursor', self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'results': data,
+            'has_more': self.has_more,
+            'next': self.get_next_link(),
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'results': schema,
+                'has_more': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+            },
+        }
@@ -2,9 +2,11 @@
 
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from .holds import held_intervals, is_held
 from .models import Appointment, PsychologistAvailability, TimeSlot
 from apps.professionals.serializers import ProfessionalProfileSerializer
 from datetime import datetime, timedelta
+from config.values_serializer import ValuesSerializer, full_name
 
 User = get_user_model()
 
@@ -41,7 +43,25 @@ class TimeSlotSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'psychologist_name']
 
 
-class AppointmentSerializer(serializers.ModelSerializer):
+class SparseFieldsetMixin:
+    """
+    Permite al cliente pedir solo algunos campos con `?fields=a,b,c`
+    (p. ej. la app móvil solo pinta fecha, hora y nombre). Los nombres
+    desconocidos se ignoran; sin el parámetro se devuelven todos.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        raw = request.query_params.get('fields') if request is not None else None
+        if not raw or request.method != 'GET':
+            return
+        requested = {name.strip() for name in raw.split(',') if name.strip()}
+        for name in set(self.fields) - requested:
+            self.fields.pop(name)
+
+
+class AppointmentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     patient_name = serializers.CharField(source='patient.get_full_name', read_only=True)
     psychologist_name = serializers.CharField(source='psychologist.get_full_name', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
@@ -126,12 +146,32 @@ class AppointmentSerializer(serializers.ModelSerializer):
             if self.instance:
                 conflicting_appointments = conflicting_appointments.exclude(pk=self.instance.pk)
             
-            if conflicting_appointments.exists():
+            if conflicting_appointments.exists() or is_held(
+                psychologist, appointment_date, start_time, calculated_end_time
+            ):
                 raise serializers.ValidationError(
                     "Ya existe una cita en este horario"
                 )
         
         return data
+
+
+class AppointmentValuesSerializer(ValuesSerializer):
+    """
+    Listados de citas: misma salida que AppointmentSerializer (incluido
+    `?fields=`), desde .values().
+    """
+    serializer_class = AppointmentSerializer
+    extra_values = ('patient__first_name', 'patient__last_name',
+                    'psychologist__first_name', 'psychologist__last_name')
+
+    def get_patient_name(self, row):
+        return full_name(row, 'patient')
+
+    def get_psychologist_name(self, row):
+        return full_name(row, 'psychologist')
+
+
 class AppointmentCreateSerializer(serializers.ModelSerializer):
     """Serializer específico para crear citas"""
     
@@ -211,6 +251,14 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Ya existe una cita en este horario"
             )
+
+        # Reservas de pago en curso de otros pacientes (la propia se puede retomar)
+        request = self.context.get('request')
+        patient = request.user if request and request.user.is_authenticated else None
+        if is_held(psychologist, appointment_date, start_time, calculated_end_time, exclude_patient=patient):
+            raise serializers.ValidationError(
+                "Este horario está reservado mientras otro paciente completa el pago"
+            )
         
         return data
 
@@ -269,6 +317,14 @@ class AvailablePsychologistSerializer(serializers.ModelSerializer):
             is_active=True
         )
         
+        # Citas activas y reservas vigentes del día: dos consultas en total
+        booked = list(Appointment.objects.filter(
+            psychologist=obj,
+            appointment_date=search_date,
+            status__in=['pending', 'confirmed']
+        ).values_list('start_time', 'end_time'))
+        booked += held_intervals(obj, search_date).get(search_date, [])
+
         slots = []
         for availability in availabilities:
             # Verificar si la fecha está bloqueada
@@ -289,13 +345,10 @@ class AvailablePsychologistSerializer(serializers.ModelSerializer):
                 slot_end = (current_time + timedelta(minutes=duration)).time()
                 
                 # Verificar si el slot está ocupado
-                is_booked = Appointment.objects.filter(
-                    psychologist=obj,
-                    appointment_date=search_date,
-                    start_time__lt=slot_end,
-                    end_time__gt=slot_start,
-                    status__in=['pending', 'confirmed']
-                ).exists()
+                is_booked = any(
+                    start < slot_end and end > slot_start
+                    for start, end in booked
+                )
                 
                 if not is_booked:
                     slots.append({
@@ -0,0 +1,15 @@
+# apps/appointments/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from config.response_cache import invalidate_tags
+
+from .models import Appointment, PsychologistAvailability, SlotHold
+
+
+@receiver([post_save, post_delete], sender=PsychologistAvailability)
+@receiver([post_save, post_delete], sender=Appointment)
+@receiver([post_save, post_delete], sender=SlotHold)
+def invalidate_cached_schedule(sender, instance, **kwargs):
+    # Disponibilidad, citas y reservas determinan el horario del psicólogo
+    invalidate_tags(f'psychologist:{instance.psychologist_id}')
@@ -1,3 +1,74 @@
-from django.test import TestCase
+from datetime import date, time, timedelta
 
-# Create your tests here.
+from django.test import SimpleTestCase
+from django_tenants.test.cases import TenantTestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.users.models import CustomUser
+from .models import Appointment
+from .pagination import AppointmentKeysetPagination
+from .views import AppointmentViewSet
+
+
+class AppointmentResponseShapeTests(SimpleTestCase):
+    """Formato anterior o página por cursor, según los parámetros."""
+
+    def legacy(self, **params):
+        request = Request(APIRequestFactory().get('/', params))
+        return AppointmentKeysetPagination().legacy_response(request)
+
+    def test_previous_format_by_default(self):
+        self.assertTrue(self.legacy())
+        self.assertTrue(self.legacy(limit='20'))
+        self.assertTrue(self.legacy(paginate='false', cursor=''))
+
+    def test_cursor_with_a_cursor_or_paginate_true(self):
+        for params in ({'cursor': '2030-01-01,10:00:00,5'}, {'paginate': 'true'}, {'paginate': 'True'}):
+            with self.subTest(**params):
+                self.assertFalse(self.legacy(**params))
+
+
+class AppointmentListingTests(TenantTestCase):
+    """Los listados mantienen su formato salvo que se pida el cursor."""
+
+    def setUp(self):
+        self.patient = CustomUser.objects.create_user(
+            email='paciente@test.com', password='password123',
+            first_name='Ana', last_name='Paciente', user_type='patient'
+        )
+        psychologist = CustomUser.objects.create_user(
+            email='psicologo@test.com', password='password123',
+            first_name='Luis', last_name='Psicólogo', user_type='professional'
+        )
+        for days in range(1, 13):
+            Appointment.objects.create(
+                patient=self.patient, psychologist=psychologist,
+                appointment_date=date.today() + timedelta(days=days),
+                start_time=time(10, 0), end_time=time(11, 0), status='confirmed'
+            )
+
+    def get(self, action, **params):
+        request = APIRequestFactory().get('/', params, HTTP_HOST=self.domain.domain)
+        force_authenticate(request, user=self.patient)
+        return AppointmentViewSet.as_view({'get': action})(request)
+
+    def test_list_keeps_page_number_format(self):
+        data = self.get('list').data
+        self.assertEqual(data['count'], 12)
+        self.assertIn('previous', data)
+        self.assertEqual(len(data['results']), 12)
+
+    def test_upcoming_is_a_list_of_ten(self):
+        data = self.get('upcoming').data
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), 10)
+
+    def test_history_is_a_list(self):
+        self.assertIsInstance(self.get('history').data, list)
+
+    def test_paginate_true_uses_cursor(self):
+        data = self.get('upcoming', paginate='true', limit='5').data
+        self.assertEqual(len(data['results']), 5)
+        self.assertTrue(data['has_more'])
+        self.assertEqual(data['results'][0]['appointment_date'], str(date.today() + timedelta(days=1)))
@@ -4,13 +4,19 @@ from rest_framework import status, viewsets, permissions
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db.models import Count, Max, OuterRef, Q
 from datetime import datetime, timedelta
-from .models import Appointment, PsychologistAvailability, TimeSlot
+import logging
+from config.async_api import async_api_view, api_response
+from config.conditional import add_validators, conditional, count_and_latest, not_modified
+from config.response_cache import cache_response
+from .models import Appointment, PsychologistAvailability, TimeSlot, Referral, SlotHold
+from .pagination import AppointmentKeysetPagination
 from apps.professionals.models import ProfessionalProfile
 from apps.professionals.models import ProfessionalProfile
 from .serializers import (
     AppointmentSerializer,
+    AppointmentValuesSerializer,
     AppointmentCreateSerializer,
     AppointmentUpdateSerializer,
     PsychologistAvailabilitySerializer,
@@ -19,6 +25,7 @@ from .serializers import (
     ReferralCreateSerializer
 )
 
+logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
@@ -41,14 +48,21 @@ class IsPsychologist(permissions.BasePermission):
         return request.user.is_authenticated and request.user.user_type == 'professional' # <-- CAMBIO AQUÍ
 class AppointmentViewSet(viewsets.ModelViewSet):
     """
-    ViewSet para gestionar citas
+    ViewSet para gestionar citas.
+    Los listados (list, upcoming, history) aceptan `?fields=` para devolver
+    solo algunos campos y mantienen su formato: list pagina por número de
+    página ({count, next, previous, results}); upcoming (10 citas) e
+    history devuelven una lista. Con `?cursor=` o `?paginate=true` se
+    paginan por cursor ({results, has_more, next}, ver
+    AppointmentKeysetPagination), sin COUNT ni OFFSET.
     """
     serializer_class = AppointmentSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrPsychologist]
     
     def get_queryset(self):
         user = self.request.user
-        queryset = Appointment.objects.all()
+        # Nombres de paciente y psicólogo en la misma consulta (sin N+1)
+        queryset = Appointment.objects.select_related('patient', 'psychologist')
         
         # Filtrar por tipo de usuario
         if user.user_type == 'patient':
@@ -69,7 +83,43 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         if date_to:
             queryset = queryset.filter(appointment_date__lte=date_to)
         
-        return queryset.order_by('-appointment_date', '-start_time')
+        return queryset.order_by('-appointment_date', '-start_time', '-id')
+
+    def not_modified(self, queryset, *extra):
+        """
+        304 si el listado no cambió: recuento y último updated_at de las
+        citas filtradas (una consulta agregada, sin serializar la página).
+        """
+        stats = queryset.aggregate(total=Count('id'), last=Max('updated_at'))
+        return not_modified(self.request, (self.request.user.pk, *extra, stats['total'], stats['last']))
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        response, etag, modified = self.not_modified(queryset)
+        if response is None:
+            response = self.paginate(queryset, descending=True, legacy_pages=True)
+        return add_validators(response, etag, modified)
+
+    def paginate(self, queryset, descending, legacy_pages=False, legacy_limit=None):
+        """
+        Serializa desde .values() (mismo formato que AppointmentSerializer).
+        Por cursor si el cliente lo pide; si no, con el formato anterior:
+        páginas numeradas (`legacy_pages`) o una lista, en el orden de
+        get_queryset y acotada a `legacy_limit`.
+        """
+        paginator = AppointmentKeysetPagination(descending=descending)
+        serializer = AppointmentValuesSerializer(context=self.get_serializer_context())
+        rows = serializer.values(queryset, *paginator.ordering_fields)
+        if paginator.legacy_response(self.request):
+            if legacy_pages:
+                page = self.paginate_queryset(rows)
+                return self.get_paginated_response(serializer.serialize(page))
+            if legacy_limit:
+                rows = rows[:legacy_limit]
+            return Response(serializer.serialize(rows))
+
+        page = paginator.paginate_queryset(rows, self.request, view=self)
+        return paginator.get_paginated_response(serializer.serialize(page))
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -199,28 +249,33 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK
         )
     
+    def paginated_list(self, queryset, descending, legacy_limit=None):
+        # Dependen de la fecha de hoy: cambia el ETag al cambiar el día
+        response, etag, modified = self.not_modified(queryset, datetime.now().date())
+        if response is not None:
+            return add_validators(response, etag, modified)
+
+        response = self.paginate(queryset, descending, legacy_limit=legacy_limit)
+        return add_validators(response, etag, modified)
+
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
-        """Obtener próximas citas"""
+        """Obtener próximas citas (por cursor, las más cercanas primero)"""
         today = datetime.now().date()
         appointments = self.get_queryset().filter(
             appointment_date__gte=today,
             status__in=['pending', 'confirmed']
-        )[:10]
-        
-        serializer = AppointmentSerializer(appointments, many=True)
-        return Response(serializer.data)
+        )
+        return self.paginated_list(appointments, descending=False, legacy_limit=10)
     
     @action(detail=False, methods=['get'])
     def history(self, request):
-        """Obtener historial de citas"""
+        """Obtener historial de citas (las más recientes primero)"""
         today = datetime.now().date()
         appointments = self.get_queryset().filter(
             Q(appointment_date__lt=today) | Q(status='completed')
         )
-        
-        serializer = AppointmentSerializer(appointments, many=True)
-        return Response(serializer.data)
+        return self.paginated_list(appointments, descending=True)
 
     @action(detail=True, methods=['post'], url_path='refer')
     def refer_appointment(self, request, pk=None):
@@ -509,43 +564,101 @@ def search_available_psychologists(request):
 
 # en apps/appointments/views.py
 
-@api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
-def get_psychologist_schedule(request, psychologist_id):
+def _week_start(request):
+    """Fecha de inicio de `week_start` (por defecto, hoy)."""
+    date_str = request.GET.get('week_start')
+    if date_str:
+        try:
+            return datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError:
+            pass
+    return datetime.now().date()
+
+
+async def _schedule_validators(request, psychologist_id):
+    week_start = _week_start(request)
+    week_range = (week_start, week_start + timedelta(days=6))
+    owner = OuterRef('user_id')
+
+    # Perfil, disponibilidades, citas y reservas de la semana en una consulta
+    availability_total, availability_last = count_and_latest(
+        PsychologistAvailability.objects.filter(psychologist_id=owner), 'updated_at'
+    )
+    appointments_total, appointments_last = count_and_latest(
+        Appointment.objects.filter(psychologist_id=owner, appointment_date__range=week_range), 'updated_at'
+    )
+    # Las reservas vencidas dejan de contar sin cambiar ninguna fila
+    holds_total, holds_last = count_and_latest(
+        SlotHold.objects.active().filter(psychologist_id=owner, appointment_date__range=week_range), 'created_at'
+    )
+    row = await ProfessionalProfile.objects.filter(user_id=psychologist_id).annotate(
+        availability_total=availability_total, availability_last=availability_last,
+        appointments_total=appointments_total, appointments_last=appointments_last,
+        holds_total=holds_total, holds_last=holds_last,
+    ).values_list(
+        'updated_at', 'user__updated_at',
+        'availability_total', 'availability_last',
+        'appointments_total', 'appointments_last',
+        'holds_total', 'holds_last',
+    ).afirst()
+    if row is None:
+        return None
+    # Solo ETag: que venza una reserva no cambia ningún updated_at
+    return (week_start, *row), None
+
+
+@async_api_view(authenticated=True)
+# TTL corto: que venza una reserva no dispara ninguna señal
+@cache_response(timeout=30, tags=['psychologist:{psychologist_id}'])
+@conditional(_schedule_validators)
+async def get_psychologist_schedule(request, psychologist_id):
     """
     Obtener el horario completo de un psicólogo para una semana
     """
-    try: # <-- La indentación aquí está corregida
+    try:
         # Buscamos el PERFIL PROFESIONAL por el ID del usuario, no por el ID del perfil
-        profile = ProfessionalProfile.objects.get(user_id=psychologist_id)
+        profile = await ProfessionalProfile.objects.select_related('user').aget(user_id=psychologist_id)
         psychologist = profile.user
     except ProfessionalProfile.DoesNotExist:
-        return Response(
+        return api_response(
             {'error': 'Perfil de Psicólogo no encontrado'},
             status=status.HTTP_404_NOT_FOUND
         )
 
     # Obtener fecha de inicio (por defecto, esta semana)
-    date_str = request.query_params.get('week_start')
-    if date_str:
-        try:
-            week_start = datetime.strptime(date_str, '%Y-%m-%d').date()
-        except ValueError:
-            week_start = datetime.now().date()
-    else:
-        week_start = datetime.now().date()
+    week_start = _week_start(request)
+    week_end = week_start + timedelta(days=6)
+
+    # Disponibilidades, citas activas y reservas de toda la semana: tres consultas en total
+    availabilities_by_weekday = {}
+    async for availability in PsychologistAvailability.objects.filter(
+        psychologist=psychologist,
+        is_active=True
+    ):
+        availabilities_by_weekday.setdefault(availability.weekday, []).append(availability)
+
+    booked_by_date = {}
+    async for appointment_date, start_time, end_time in Appointment.objects.filter(
+        psychologist=psychologist,
+        appointment_date__range=(week_start, week_end),
+        status__in=['pending', 'confirmed']
+    ).values_list('appointment_date', 'start_time', 'end_time'):
+        booked_by_date.setdefault(appointment_date, []).append((start_time, end_time))
+    # Horarios reservados por pagos en curso
+    async for appointment_date, start_time, end_time in SlotHold.objects.active().filter(
+        psychologist=psychologist,
+        appointment_date__range=(week_start, week_end)
+    ).values_list('appointment_date', 'start_time', 'end_time'):
+        booked_by_date.setdefault(appointment_date, []).append((start_time, end_time))
+
+    duration = profile.session_duration
 
     # Generar el horario de la semana
     schedule = []
     for i in range(7):
         current_date = week_start + timedelta(days=i)
         weekday = current_date.weekday()
-
-        availabilities = PsychologistAvailability.objects.filter(
-            psychologist=psychologist,
-            weekday=weekday,
-            is_active=True
-        )
+        booked = booked_by_date.get(current_date, [])
 
         day_schedule = {
             'date': current_date.strftime('%Y-%m-%d'),
@@ -556,7 +669,7 @@ def get_psychologist_schedule(request, psychologist_id):
             'time_slots': []
         }
 
-        for availability in availabilities:
+        for availability in availabilities_by_weekday.get(weekday, []):
             if str(current_date) in availability.blocked_dates:
                 day_schedule['blocked'] = True
                 continue
@@ -566,21 +679,15 @@ def get_psychologist_schedule(request, psychologist_id):
             current_time = datetime.combine(current_date, availability.start_time)
             end_time = datetime.combine(current_date, availability.end_time)
 
-            duration = 60
-            if hasattr(psychologist, 'professional_profile'):
-                duration = psychologist.professional_profile.session_duration
-
             while current_time + timedelta(minutes=duration) <= end_time:
                 slot_start = current_time.time()
                 slot_end = (current_time + timedelta(minutes=duration)).time()
 
-                is_booked = Appointment.objects.filter(
-                    psychologist=psychologist,
-                    appointment_date=current_date,
-                    start_time__lt=slot_end,
-                    end_time__gt=slot_start,
-                    status__in=['pending', 'confirmed']
-                ).exists()
+                # Solapamiento con alguna cita pendiente o confirmada, o una reserva
+                is_booked = any(
+                    start < slot_end and end > slot_start
+                    for start, end in booked
+                )
 
                 day_schedule['time_slots'].append({
                     'start_time': slot_start.strftime('%H:%M'),
@@ -593,13 +700,13 @@ def get_psychologist_schedule(request, psychologist_id):
 
         schedule.append(day_schedule)
 
-    return Response({
+    return api_response({
         'psychologist': {
             'id': psychologist.id,
             'name': psychologist.get_full_name(),
             'email': psychologist.email
         },
         'week_start': week_start.strftime('%Y-%m-%d'),
-        'week_end': (week_start + timedelta(days=6)).strftime('%Y-%m-%d'),
+        'week_end': week_end.strftime('%Y-%m-%d'),
         'schedule': schedule
     })
\ No newline at end of file
@@ -1,17 +1,35 @@
 # apps/auditlog/filters.py
 import logging
 
-# Almacenamiento local para el hilo actual (guarda la request de forma segura)
+from django.utils.functional import empty
+
+# Almacenamiento local del contexto actual (guarda la request de forma segura)
 from .local import get_current_request
 
+
+def _loaded_user(request):
+    """
+    Usuario de la request solo si ya está cargado: evaluar el usuario
+    perezoso de AuthenticationMiddleware consulta la BD, y eso no está
+    permitido desde una vista async.
+    """
+    user = request.__dict__.get('user')
+    if user is None:
+        return None
+    if getattr(user, '_wrapped', None) is empty:
+        return None
+    return user
+
+
 class RequestInfoFilter(logging.Filter):
     def filter(self, record):
         request = get_current_request()
         if request:
             # Añadir IP y usuario al registro de log
             record.ip_address = request.META.get('REMOTE_ADDR')
-            if hasattr(request, 'user') and request.user.is_authenticated:
-                record.user = request.user
+            user = _loaded_user(request)
+            if user is not None and user.is_authenticated:
+                record.user = user
             else:
                 record.user = None
         else:
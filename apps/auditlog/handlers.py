@@ -1,23 +1,70 @@
 # apps/auditlog/handlers.py
+import asyncio
 import logging
 
+from asgiref.sync import sync_to_async
+from django_tenants.utils import get_public_schema_name, schema_context
+
+from .local import get_current_request
+
+# Tareas de escritura pendientes (referencia fuerte para que no se recolecten)
+_pending_writes = set()
+
+
+def _save_entry(**fields):
+    # Importación tardía para evitar problemas de dependencia circular
+    from .models import LogEntry
+    LogEntry.objects.create(**fields)
+
+
+def _save_entry_quietly(schema_name, **fields):
+    try:
+        # El hilo de sync_to_async no tiene el tenant de la request: la
+        # escritura va explícitamente en el schema capturado
+        with schema_context(schema_name):
+            _save_entry(**fields)
+    except Exception:
+        pass
+
+
+def _request_schema():
+    """Schema del tenant de la request en curso (None fuera de una request)."""
+    tenant = getattr(get_current_request(), 'tenant', None)
+    return getattr(tenant, 'schema_name', None)
+
+
 class DatabaseLogHandler(logging.Handler):
     def emit(self, record):
         try:
-            # Importación tardía para evitar problemas de dependencia circular
-            from .models import LogEntry
-            
             # Obtener el usuario y la IP de la solicitud si están disponibles
             user = getattr(record, 'user', None)
             ip_address = getattr(record, 'ip_address', None)
 
-            # Crear la entrada en la base de datos
-            LogEntry.objects.create(
+            fields = dict(
                 user=user,
                 ip_address=ip_address,
                 level=record.levelname,
                 action=self.format(record)  # El mensaje formateado
             )
+
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                loop = None
+
+            if loop is None:
+                # Crear la entrada en la base de datos
+                _save_entry(**fields)
+            else:
+                # Desde una vista async no se puede usar el ORM sync: se
+                # guarda en segundo plano. La bitácora vive en los schemas
+                # de las clínicas; sin tenant conocido no se escribe.
+                schema_name = _request_schema()
+                if schema_name in (None, get_public_schema_name()):
+                    return
+                task = loop.create_task(sync_to_async(_save_entry_quietly)(schema_name, **fields))
+                _pending_writes.add(task)
+                task.add_done_callback(_pending_writes.discard)
         except Exception:
             # Evitar bucles infinitos si hay un error al guardar en la BD
-            pass
\ No newline at end of file
+            pass
@@ -1,19 +1,39 @@
 # apps/auditlog/local.py
-import threading
+import contextvars
 
-_request_storage = threading.local()
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+# contextvars en lugar de threading.local: bajo ASGI varias requests
+# comparten hilo, y el valor se propaga a sync_to_async/async_to_sync, así
+# el log de una vista async sigue viendo su request.
+_current_request = contextvars.ContextVar('current_request', default=None)
 
 def get_current_request():
-    return getattr(_request_storage, 'request', None)
+    return _current_request.get()
 
 class RequestLocalStorageMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        _request_storage.request = request
-        response = self.get_response(request)
-        # Limpiar después de que la petición termine
-        if hasattr(_request_storage, 'request'):
-            del _request_storage.request
-        return response
\ No newline at end of file
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = _current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            # Limpiar después de que la petición termine
+            _current_request.reset(token)
+
+    async def __acall__(self, request):
+        token = _current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current_request.reset(token)
@@ -1,5 +1,6 @@
 # apps/auditlog/serializers.py
 from rest_framework import serializers
+from config.values_serializer import ValuesSerializer, full_name
 from .models import LogEntry
 
 class LogEntrySerializer(serializers.ModelSerializer):
@@ -25,4 +26,15 @@ class LogEntrySerializer(serializers.ModelSerializer):
     def get_user_name(self, obj):
         if obj.user:
             return f"{obj.user.first_name} {obj.user.last_name}".strip()
-        return "Sistema"
\ No newline at end of file
+        return "Sistema"
+
+
+class LogEntryValuesSerializer(ValuesSerializer):
+    """Bitácora: misma salida que LogEntrySerializer, desde .values()."""
+    serializer_class = LogEntrySerializer
+    extra_values = ('user__first_name', 'user__last_name')
+
+    def get_user_name(self, row):
+        if row['user'] is None:
+            return "Sistema"
+        return full_name(row, 'user')
@@ -13,7 +13,7 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from io import BytesIO
 from .models import LogEntry
-from .serializers import LogEntrySerializer
+from .serializers import LogEntrySerializer, LogEntryValuesSerializer
 from apps.clinic_admin.permissions import IsClinicAdmin
 
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
@@ -43,6 +43,15 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
 
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        # Misma salida que LogEntrySerializer, desde .values() (usuario en la misma consulta)
+        serializer = LogEntryValuesSerializer(context=self.get_serializer_context())
+        rows = serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.serialize(page))
+        return Response(serializer.serialize(rows))
+
     @action(detail=False, methods=['get'], url_path='export-pdf')
     def export_pdf(self, request):
         """
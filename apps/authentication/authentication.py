@@ -0,0 +1,44 @@
+# apps/authentication/authentication.py
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from .token_cache import get_token
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication de DRF con caché por tenant.
+    Evita la consulta a authtoken_token + users en cada request.
+    """
+
+    def authenticate_credentials(self, key):
+        token = get_token(key)
+        if token is None:
+            raise AuthenticationFailed('Token inválido.')
+
+        if not token.user.is_active:
+            raise AuthenticationFailed('Usuario inactivo o eliminado.')
+
+        return (token.user, token)
+
+
+async def aauthenticate_token(request):
+    """
+    Equivalente async de CachedTokenAuthentication para vistas async
+    (DRF no soporta vistas async). Devuelve el usuario o None.
+    """
+    from asgiref.sync import sync_to_async
+    from rest_framework.authentication import get_authorization_header
+
+    auth = get_authorization_header(request).split()
+    if len(auth) != 2 or auth[0].lower() != b'token':
+        return None
+    try:
+        key = auth[1].decode()
+    except UnicodeError:
+        return None
+
+    token = await sync_to_async(get_token)(key)
+    if token is None or not token.user.is_active:
+        return None
+    return token.user
@@ -0,0 +1,19 @@
+# apps/authentication/signals.py
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .token_cache import invalidate_token, invalidate_user
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Cubre desactivaciones (delete_account, admin de clínica, Django admin)
+    # y cualquier cambio de datos del usuario cacheado.
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    invalidate_token(instance.key)
@@ -0,0 +1,61 @@
+# apps/authentication/token_cache.py
+"""
+Caché token → usuario compartida por la autenticación REST (DRF) y el
+middleware de WebSocket del chat.
+
+Las claves incluyen el schema del tenant activo, porque cada clínica tiene
+su propia tabla de tokens y de usuarios. El TTL es corto a propósito: la
+invalidación explícita (logout, cambio de contraseña, desactivación) cubre
+el proceso actual y el TTL acota la ventana en el resto de workers.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from rest_framework.authtoken.models import Token
+
+TOKEN_CACHE_TTL = getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60)
+
+
+def _schema():
+    return getattr(connection, 'schema_name', 'public')
+
+
+def _token_cache_key(key, schema=None):
+    return f"authtoken:{schema or _schema()}:{key}"
+
+
+def _user_cache_key(user_id, schema=None):
+    return f"authtoken-user:{schema or _schema()}:{user_id}"
+
+
+def get_token(key):
+    """
+    Devuelve el Token (con su usuario ya cargado) o None si no existe.
+    Un acierto en caché no toca la base de datos.
+    """
+    cache_key = _token_cache_key(key)
+    token = cache.get(cache_key)
+    if token is not None:
+        return token
+
+    try:
+        token = Token.objects.select_related('user').get(key=key)
+    except Token.DoesNotExist:
+        return None
+
+    cache.set(cache_key, token, TOKEN_CACHE_TTL)
+    # Índice inverso para poder invalidar por usuario sin consultar la BD
+    cache.set(_user_cache_key(token.user_id), key, TOKEN_CACHE_TTL)
+    return token
+
+
+def invalidate_token(key):
+    cache.delete(_token_cache_key(key))
+
+
+def invalidate_user(user_id):
+    """Invalida el token cacheado de un usuario (logout, contraseña, desactivación)."""
+    user_key = _user_cache_key(user_id)
+    key = cache.get(user_key)
+    if key:
+        cache.delete_many([_token_cache_key(key), user_key])
@@ -22,6 +22,7 @@ from .serializers import (
     PasswordResetConfirmSerializer,
     ChangePasswordSerializer
 )
+from .token_cache import invalidate_user
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -127,6 +128,7 @@ def login_user(request):
 def logout_user(request):
     try:
         request.user.auth_token.delete()
+        invalidate_user(request.user.pk)
         return Response({'message': 'Sesión cerrada exitosamente'}, status=status.HTTP_200_OK)
     except:
         return Response({'error': 'Error al cerrar sesión'}, status=status.HTTP_400_BAD_REQUEST)
@@ -224,6 +226,7 @@ def change_password(request):
             request.user.auth_token.delete()
         except:
             pass
+        invalidate_user(request.user.pk)
         token = Token.objects.create(user=request.user)
         
         return Response({
@@ -1,15 +1,43 @@
 # apps/chat/consumers.py
+import asyncio
 import json
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
+from .membership import can_join_room, room_group_name
+from .middleware import scope_schema
+from .presence import presence_registry, presence_ttl, CoalescingEmitter
+
+# Ventana mínima entre frames de typing/lectura (~3 frames por segundo)
+EPHEMERAL_EVENT_INTERVAL = 0.3
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
+    """
+    Chat de una cita. Además del texto, transporta por el mismo grupo
+    (`chat_<schema>_<appointment_id>`, ver membership):
+    - presence: {"type": "presence", "user_id", "status": "online"|"offline"}
+    - typing:   {"type": "typing", "user_id", "is_typing"}
+    - read:     {"type": "read", "user_id", "message_id"}
+
+    Cada evento se serializa una sola vez al hacer group_send; los
+    receptores reenvían el texto ya serializado.
+
+    La autorización se resuelve una vez al conectar y vale para toda la
+    conexión; si la cita se cancela o deriva, la sala recibe `chat_revoke`.
+    """
+
     async def connect(self):
         self.appointment_id = self.scope['url_route']['kwargs']['appointment_id']
-        self.room_group_name = f'chat_{self.appointment_id}'
+        # Los ids de cita se repiten entre clínicas: sala y consulta van con el schema
+        self.schema_name = scope_schema(self.scope)
+        self.room_group_name = room_group_name(self.appointment_id, self.schema_name)
         self.user = self.scope.get('user')
 
         if self.user.is_anonymous:
             await self.close()
+        elif not await database_sync_to_async(can_join_room)(self.user, self.appointment_id, self.schema_name):
+            # Solo el paciente y el psicólogo de la cita pueden entrar
+            await self.close(code=4403)
         else:
             # Unirse al grupo de la sala
             await self.channel_layer.group_add(
@@ -18,7 +46,34 @@ class ChatConsumer(AsyncWebsocketConsumer):
             )
             await self.accept()
 
+            self.ephemeral = CoalescingEmitter(self.broadcast, EPHEMERAL_EVENT_INTERVAL)
+
+            # Estado actual de la sala para quien acaba de entrar
+            await self.send(text_data=json.dumps({
+                'type': 'presence_snapshot',
+                'online': await presence_registry.online(self.room_group_name),
+            }))
+            joined = await presence_registry.join(self.room_group_name, self.user.id, self.channel_name)
+            self.heartbeat = asyncio.ensure_future(self.keep_presence())
+            if joined:
+                await self.broadcast({
+                    'type': 'presence',
+                    'user_id': self.user.id,
+                    'status': 'online',
+                })
+
     async def disconnect(self, close_code):
+        if hasattr(self, 'ephemeral'):
+            self.ephemeral.cancel()
+            if hasattr(self, 'heartbeat'):
+                self.heartbeat.cancel()
+            if await presence_registry.leave(self.room_group_name, self.user.id, self.channel_name):
+                await self.broadcast({
+                    'type': 'presence',
+                    'user_id': self.user.id,
+                    'status': 'offline',
+                })
+
         # Salir del grupo de la sala
         await self.channel_layer.group_discard(
             self.room_group_name,
@@ -28,26 +83,64 @@ class ChatConsumer(AsyncWebsocketConsumer):
     # Recibir mensaje desde WebSocket
     async def receive(self, text_data):
         text_data_json = json.loads(text_data)
-        message = text_data_json['message']
-        sender_name = self.user.first_name if self.user.first_name else self.user.username
+        event_type = text_data_json.get('type', 'message')
 
-        # Enviar mensaje al grupo de la sala
+        if event_type == 'typing':
+            self.ephemeral.push('typing', {
+                'type': 'typing',
+                'user_id': self.user.id,
+                'is_typing': bool(text_data_json.get('is_typing', True)),
+            })
+        elif event_type == 'read':
+            message_id = text_data_json.get('message_id')
+            if not isinstance(message_id, int):
+                return
+            # Solo importa el último mensaje leído dentro de la ventana
+            self.ephemeral.push('read', {
+                'type': 'read',
+                'user_id': self.user.id,
+                'message_id': message_id,
+            }, merge=lambda old, new: new if new['message_id'] > old['message_id'] else old)
+        else:
+            message = text_data_json['message']
+            sender_name = self.user.first_name if self.user.first_name else self.user.username
+
+            # Enviar mensaje al grupo de la sala
+            await self.broadcast({
+                'type': 'message',
+                'message': message,
+                'sender': sender_name,
+            })
+
+    async def keep_presence(self):
+        """Renueva la presencia de esta conexión antes de que caduque."""
+        interval = presence_ttl() / 3
+        while True:
+            await asyncio.sleep(interval)
+            await presence_registry.refresh(self.room_group_name, self.user.id, self.channel_name)
+
+    async def broadcast(self, payload):
+        """Serializa una vez y reparte el texto al grupo de la sala."""
         await self.channel_layer.group_send(
             self.room_group_name,
             {
                 'type': 'chat_message',
-                'message': message,
-                'sender': sender_name
+                'text': json.dumps(payload),
+                'origin': self.channel_name,
+                'ephemeral': payload['type'] != 'message',
             }
         )
 
     # Recibir mensaje desde el grupo de la sala
     async def chat_message(self, event):
-        message = event['message']
-        sender = event['sender']
-
-        # Enviar mensaje al WebSocket
-        await self.send(text_data=json.dumps({
-            'message': message,
-            'sender': sender
-        }))
\ No newline at end of file
+        # Typing/presencia/lectura no se devuelven a la conexión que los originó
+        if event.get('ephemeral') and event.get('origin') == self.channel_name:
+            return
+
+        # Enviar mensaje al WebSocket (ya serializado por el emisor)
+        await self.send(text_data=event['text'])
+
+    # La cita fue cancelada o derivada: cerrar la conexión
+    async def chat_revoke(self, event):
+        await self.send(text_data=json.dumps({'type': 'revoked'}))
+        await self.close(code=4403)
@@ -0,0 +1,117 @@
+# apps/chat/membership.py
+"""
+Resolución de miembros de la sala de chat de una cita.
+
+La sala de una cita solo admite al paciente y al psicólogo de la cita. La
+consulta se hace una vez (al conectar el WebSocket o al pedir el
+historial) y se cachea; cuando la cita se cancela o se deriva se invalida
+la caché y se expulsan las conexiones abiertas.
+
+Los ids de cita se repiten entre clínicas (cada schema tiene su
+secuencia), así que la caché y el grupo de Channels van siempre con el
+schema: `chat_<schema>_<appointment_id>`. En HTTP el schema es el de la
+conexión (CustomTenantMiddleware); el consumer pasa el de su scope.
+"""
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.db import connection
+from django_tenants.utils import schema_context
+
+MEMBERSHIP_CACHE_TTL = 300
+
+# Estados en los que la sala deja de aceptar conexiones en vivo
+CLOSED_STATUSES = ('cancelled',)
+
+
+def _current_schema():
+    return getattr(connection, 'schema_name', 'public')
+
+
+def _cache_key(appointment_id, schema_name):
+    return f"chat-room:{schema_name}:{appointment_id}"
+
+
+def room_group_name(appointment_id, schema_name=None):
+    """Grupo de Channels de la sala de una cita en una clínica."""
+    return f"chat_{schema_name or _current_schema()}_{appointment_id}"
+
+
+def get_room_membership(appointment_id, schema_name=None):
+    """
+    Devuelve {'members': {patient_id, psychologist_id}, 'status': ...}
+    o None si la cita no existe.
+    """
+    try:
+        appointment_id = int(appointment_id)
+    except (TypeError, ValueError):
+        return None
+
+    schema_name = schema_name or _current_schema()
+    if schema_name == 'public':
+        # Las citas solo existen en los schemas de las clínicas
+        return None
+
+    key = _cache_key(appointment_id, schema_name)
+    membership = cache.get(key)
+    if membership is not None:
+        return membership or None
+
+    from apps.appointments.models import Appointment
+
+    with schema_context(schema_name):
+        row = Appointment.objects.filter(id=appointment_id).values_list(
+            'patient_id', 'psychologist_id', 'status'
+        ).first()
+    if row is None:
+        # Se cachea también la ausencia para no repetir la consulta
+        cache.set(key, {}, MEMBERSHIP_CACHE_TTL)
+        return None
+
+    patient_id, psychologist_id, appointment_status = row
+    membership = {
+        'members': {patient_id, psychologist_id},
+        'status': appointment_status,
+    }
+    cache.set(key, membership, MEMBERSHIP_CACHE_TTL)
+    return membership
+
+
+def is_room_member(user, appointment_id, schema_name=None):
+    membership = get_room_membership(appointment_id, schema_name)
+    return bool(membership) and user.id in membership['members']
+
+
+def can_join_room(user, appointment_id, schema_name=None):
+    """Miembro de la cita y la cita sigue activa (para el WebSocket)."""
+    membership = get_room_membership(appointment_id, schema_name)
+    return (
+        bool(membership)
+        and user.id in membership['members']
+        and membership['status'] not in CLOSED_STATUSES
+    )
+
+
+def invalidate_room(appointment_id, schema_name=None):
+    cache.delete(_cache_key(appointment_id, schema_name or _current_schema()))
+
+
+def revoke_room(appointment_id, schema_name=None):
+    """
+    Invalida la caché y cierra las conexiones vivas de la sala.
+
+    El aviso viaja por el channel layer: con InMemoryChannelLayer (sin
+    REDIS_URL) solo llega a los sockets del mismo proceso. Con varios
+    workers hace falta REDIS_URL (RedisChannelLayer, ver settings); en el
+    resto, la caché invalidada impide reconectar pero las conexiones ya
+    abiertas siguen hasta que se cierren.
+    """
+    schema_name = schema_name or _current_schema()
+    invalidate_room(appointment_id, schema_name)
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    async_to_sync(channel_layer.group_send)(
+        room_group_name(appointment_id, schema_name),
+        {'type': 'chat_revoke'}
+    )
@@ -1,24 +1,78 @@
 # apps/chat/middleware.py
+from channels.auth import AuthMiddleware, get_user as get_session_user
 from channels.db import database_sync_to_async
+from channels.sessions import CookieMiddleware, SessionMiddleware
 from django.contrib.auth.models import AnonymousUser
-from django.contrib.auth import get_user_model
-from rest_framework.authtoken.models import Token
+from django_tenants.utils import schema_context
 from urllib.parse import parse_qs
-User = get_user_model()
+from apps.authentication.token_cache import get_token
+from apps.tenants.custom_tenant_middleware import get_tenant_for_hostname
+from apps.tenants.tenant_cache import get_cached_tenant
+
+
+def scope_schema(scope):
+    """Schema del tenant de la conexión (lo fija TenantWebsocketMiddleware)."""
+    return scope['tenant'].schema_name
+
 
 @database_sync_to_async  # <--- ¡UNA SOLA VEZ!
-def get_user(token_key):
-    try:
-        token = Token.objects.get(key=token_key)
-        # --- 3. CAMBIO ---
-        # En lugar de devolver token.user (que puede ser perezoso),
-        # buscamos al usuario completo por su ID para asegurar que funcione.
-        user = User.objects.get(id=token.user_id)
-        return user
-        # --------------------
-    except (Token.DoesNotExist, User.DoesNotExist):
+def get_user(token_key, schema_name):
+    # Caché compartida con la autenticación REST: un acierto no toca la BD,
+    # y un fallo resuelve token + usuario en una sola consulta (select_related).
+    # Cada clínica tiene sus propios tokens: la consulta va en su schema.
+    with schema_context(schema_name):
+        token = get_token(token_key)
+    if token is None or not token.user.is_active:
         return AnonymousUser()
-        
+    return token.user
+
+
+class TenantWebsocketMiddleware:
+    """
+    Resuelve el tenant de la conexión WebSocket por el Host, como
+    CustomTenantMiddleware en HTTP, y lo deja en scope['tenant'].
+
+    En WebSocket no hay una conexión a la BD configurada por request: los
+    hilos de database_sync_to_async conservan el search_path de lo último
+    que ejecutaron. Todo acceso a la BD de la pila del chat se hace dentro
+    de schema_context(scope_schema(scope)).
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    async def __call__(self, scope, receive, send):
+        hostname = self.get_hostname(scope)
+        tenant = get_cached_tenant(hostname)
+        if tenant is None:
+            tenant = await database_sync_to_async(self.resolve)(hostname)
+        return await self.inner(dict(scope, tenant=tenant), receive, send)
+
+    @staticmethod
+    def get_hostname(scope):
+        for name, value in scope.get('headers', []):
+            if name == b'host':
+                return value.decode('latin-1').split(':')[0].lower()
+        return ''
+
+    @staticmethod
+    def resolve(hostname):
+        with schema_context('public'):
+            return get_tenant_for_hostname(hostname)
+
+
+class TenantAuthMiddleware(AuthMiddleware):
+    """AuthMiddleware de Channels (sesión) con la sesión y el usuario del schema del tenant."""
+
+    async def resolve_scope(self, scope):
+        scope['user']._wrapped = await get_tenant_session_user(scope)
+
+
+@database_sync_to_async
+def get_tenant_session_user(scope):
+    with schema_context(scope_schema(scope)):
+        return get_session_user.func(scope)
+
 
 class TokenAuthMiddleware:
     def __init__(self, inner):
@@ -34,8 +88,15 @@ class TokenAuthMiddleware:
         token_key = query_params.get("token", [None])[0]
 
         if token_key:
-            scope['user'] = await get_user(token_key)
+            scope['user'] = await get_user(token_key, scope_schema(scope))
         else:
             scope['user'] = AnonymousUser()
-        
-        return await self.inner(scope, receive, send)
\ No newline at end of file
+
+        return await self.inner(scope, receive, send)
+
+
+def TenantAuthMiddlewareStack(inner):
+    """Tenant por Host, luego sesión (web) y luego token (móvil)."""
+    return TenantWebsocketMiddleware(
+        CookieMiddleware(SessionMiddleware(TenantAuthMiddleware(TokenAuthMiddleware(inner))))
+    )
@@ -10,6 +10,10 @@ class ChatMessage(models.Model):
     
     class Meta:
         ordering = ['timestamp']
+        indexes = [
+            # Historial por cita: filtro por appointment_id + paginación por timestamp
+            models.Index(fields=['appointment_id', 'timestamp'], name='chat_appt_timestamp_idx'),
+        ]
     
     def __str__(self):
         return f"{self.sender.username}: {self.message[:50]}"
\ No newline at end of file
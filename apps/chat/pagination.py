@@ -0,0 +1,100 @@
+# apps/chat/pagination.py
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+
+class ChatKeysetPagination:
+    """
+    Paginación por cursor (keyset) para el historial de chat de una cita.
+
+    Parámetros soportados:
+    - before=<id>: mensajes anteriores al mensaje indicado (scroll hacia atrás)
+    - after=<id>: mensajes posteriores al mensaje indicado
+    - since=<id>: sincronización incremental para clientes que se reconectan
+    - limit=<n>: tamaño de página (por defecto 50, máximo 200)
+    - paginate=true: respuesta paginada sin cursor (la última página)
+
+    Con un cursor o `paginate=true` la respuesta es
+    {results, has_more, before, after}. Sin ellos se mantiene el formato
+    anterior, una lista de mensajes (ver `legacy_response`), pero acotada a
+    los últimos `limit` mensajes (por defecto 200, el máximo) en lugar de la
+    conversación completa.
+    Los resultados siempre se devuelven en orden cronológico ascendente,
+    como filas de `.values()` (ChatMessageValuesSerializer).
+    """
+    default_limit = 50
+    max_limit = 200
+    cursor_params = ('before', 'after', 'since')
+
+    def legacy_response(self, request):
+        """¿El cliente espera el formato anterior (lista sin envoltorio)?"""
+        params = request.query_params
+        if any(params.get(name) not in (None, '') for name in self.cursor_params):
+            return False
+        return params.get('paginate', 'false').lower() != 'true'
+
+    def get_limit(self, request, default=None):
+        raw = request.query_params.get('limit')
+        if not raw:
+            return default or self.default_limit
+        try:
+            limit = int(raw)
+        except ValueError:
+            raise ValidationError({'limit': 'Debe ser un número entero.'})
+        return max(1, min(limit, self.max_limit))
+
+    def get_cursor(self, request, name):
+        raw = request.query_params.get(name)
+        if raw in (None, ''):
+            return None
+        try:
+            return int(raw)
+        except ValueError:
+            raise ValidationError({name: 'El cursor debe ser el ID de un mensaje.'})
+
+    def paginate_queryset(self, queryset, request, default_limit=None):
+        """
+        Devuelve (mensajes, has_more). Solo se leen limit + 1 filas,
+        apoyándose en el índice (appointment_id, timestamp).
+        """
+        limit = self.get_limit(request, default_limit)
+        since = self.get_cursor(request, 'since')
+        before = self.get_cursor(request, 'before')
+        after = self.get_cursor(request, 'after')
+
+        if since is not None:
+            # Los IDs son crecientes: todo lo insertado después de `since`
+            rows = list(queryset.filter(id__gt=since).order_by('id')[:limit + 1])
+            return rows[:limit], len(rows) > limit
+
+        if after is not None:
+            anchor = self._anchor_filter(queryset, after, newer=True)
+            rows = list(queryset.filter(anchor).order_by('timestamp', 'id')[:limit + 1])
+            return rows[:limit], len(rows) > limit
+
+        if before is not None:
+            queryset = queryset.filter(self._anchor_filter(queryset, before, newer=False))
+
+        # Última página (o la anterior a `before`): se lee en orden descendente
+        # y se invierte para entregar la conversación en orden cronológico.
+        rows = list(queryset.order_by('-timestamp', '-id')[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        rows.reverse()
+        return rows, has_more
+
+    def _anchor_filter(self, queryset, message_id, newer):
+        timestamp = queryset.filter(id=message_id).values_list('timestamp', flat=True).first()
+        if timestamp is None:
+            raise ValidationError({'cursor': 'El mensaje indicado no pertenece a esta conversación.'})
+        if newer:
+            return Q(timestamp__gt=timestamp) | Q(timestamp=timestamp, id__gt=message_id)
+        return Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=message_id)
+
+    def get_paginated_data(self, messages, has_more, data):
+        return {
+            'results': data,
+            'has_more': has_more,
+            'before': messages[0]['id'] if messages else None,
+            'after': messages[-1]['id'] if messages else None,
+        }
@@ -0,0 +1,188 @@
+# apps/chat/presence.py
+"""
+Presencia, indicadores de escritura y confirmaciones de lectura del chat.
+
+La presencia (quién está conectado a cada sala) se guarda donde la vean
+todos los workers: en Redis si hay REDIS_URL (el mismo que usa el
+RedisChannelLayer) y en memoria del proceso si no, igual que el
+InMemoryChannelLayer, que tampoco sale del proceso.
+
+Cada conexión se registra con una caducidad que el consumer renueva cada
+CHAT_PRESENCE_TTL / 3 segundos: si un worker muere sin cerrar sus sockets,
+sus usuarios dejan de aparecer como conectados al cabo de CHAT_PRESENCE_TTL.
+
+Typing y lectura no guardan estado: viajan por el channel layer y los
+agrupa CoalescingEmitter en cada conexión.
+"""
+import asyncio
+import time
+
+from django.conf import settings
+
+
+def presence_ttl():
+    return getattr(settings, 'CHAT_PRESENCE_TTL', 60)
+
+
+def _other_connection(entries, user_id, channel_name):
+    """¿Tiene el usuario otra conexión viva además de `channel_name`?"""
+    return any(uid == user_id and channel != channel_name for uid, channel in entries)
+
+
+class PresenceRegistry:
+    """
+    Conexiones vivas por sala en memoria del proceso (un usuario puede
+    tener varias pestañas). Sirve con un solo worker.
+    """
+
+    def __init__(self):
+        # sala → {(user_id, channel_name): caduca_en}
+        self._rooms = {}
+
+    def _live(self, room):
+        now = time.monotonic()
+        connections = self._rooms.get(room, {})
+        for key in [key for key, expires in connections.items() if expires <= now]:
+            del connections[key]
+        if not connections:
+            self._rooms.pop(room, None)
+        return connections
+
+    async def join(self, room, user_id, channel_name):
+        """Registra una conexión. Devuelve True si el usuario acaba de conectarse."""
+        connections = self._live(room)
+        first = not _other_connection(connections, user_id, channel_name)
+        self._rooms.setdefault(room, connections)[(user_id, channel_name)] = time.monotonic() + presence_ttl()
+        return first
+
+    async def refresh(self, room, user_id, channel_name):
+        self._live(room)
+        self._rooms.setdefault(room, {})[(user_id, channel_name)] = time.monotonic() + presence_ttl()
+
+    async def leave(self, room, user_id, channel_name):
+        """Quita una conexión. Devuelve True si era la última del usuario."""
+        connections = self._live(room)
+        connections.pop((user_id, channel_name), None)
+        if not connections:
+            self._rooms.pop(room, None)
+        return not _other_connection(connections, user_id, channel_name)
+
+    async def online(self, room):
+        return sorted({user_id for user_id, _ in self._live(room)})
+
+
+class RedisPresenceRegistry:
+    """
+    Conexiones vivas por sala en un sorted set de Redis,
+    `presence:<sala>`, con miembros "<user_id>:<canal>" y como puntuación
+    el instante en que caducan. Cada operación va en una transacción
+    (MULTI/EXEC), así que dos workers no se pisan al decidir si un usuario
+    acaba de conectarse o se ha ido.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self._clients = {}
+
+    def _client(self):
+        # redis.asyncio queda ligado al event loop en el que se conecta
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            import redis.asyncio
+
+            client = self._clients[loop] = redis.asyncio.from_url(self.url)
+        return client
+
+    @staticmethod
+    def _key(room):
+        return f"presence:{room}"
+
+    @staticmethod
+    def _entries(members):
+        entries = []
+        for member in members:
+            user_id, _, channel_name = member.decode().partition(':')
+            entries.append((int(user_id), channel_name))
+        return entries
+
+    async def _write(self, room, add=None, remove=None):
+        """Aplica el cambio y devuelve las conexiones vivas de antes de aplicarlo."""
+        key, now, ttl = self._key(room), time.time(), presence_ttl()
+        async with self._client().pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(key, '-inf', now)
+            pipe.zrange(key, 0, -1)
+            if add:
+                pipe.zadd(key, {add: now + ttl})
+            if remove:
+                pipe.zrem(key, remove)
+            # La clave desaparece sola si nadie renueva
+            pipe.expire(key, ttl)
+            results = await pipe.execute()
+        return self._entries(results[1])
+
+    async def join(self, room, user_id, channel_name):
+        before = await self._write(room, add=f"{user_id}:{channel_name}")
+        return not _other_connection(before, user_id, channel_name)
+
+    async def refresh(self, room, user_id, channel_name):
+        await self._write(room, add=f"{user_id}:{channel_name}")
+
+    async def leave(self, room, user_id, channel_name):
+        before = await self._write(room, remove=f"{user_id}:{channel_name}")
+        return not _other_connection(before, user_id, channel_name)
+
+    async def online(self, room):
+        members = await self._client().zrangebyscore(self._key(room), time.time(), '+inf')
+        return sorted({user_id for user_id, _ in self._entries(members)})
+
+
+def _build_registry():
+    if getattr(settings, 'REDIS_URL', ''):
+        return RedisPresenceRegistry(settings.REDIS_URL)
+    return PresenceRegistry()
+
+
+presence_registry = _build_registry()
+
+
+class CoalescingEmitter:
+    """
+    Agrupa eventos frecuentes (typing, read) y los emite como máximo una vez
+    por `interval` segundos. Dentro de la ventana solo sobrevive el último
+    valor de cada clave, combinado con `merge` si se indica.
+    """
+
+    def __init__(self, emit, interval=0.3):
+        self.emit = emit
+        self.interval = interval
+        self._pending = {}
+        self._last_flush = 0.0
+        self._task = None
+
+    def push(self, key, payload, merge=None):
+        if merge and key in self._pending:
+            payload = merge(self._pending[key], payload)
+        self._pending[key] = payload
+
+        if self._task is None or self._task.done():
+            delay = max(0.0, self._last_flush + self.interval - time.monotonic())
+            self._task = asyncio.ensure_future(self._flush_after(delay))
+
+    async def _flush_after(self, delay):
+        while True:
+            if delay:
+                await asyncio.sleep(delay)
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            for payload in pending.values():
+                await self.emit(payload)
+            # Lo que llegó mientras se emitía sale en la siguiente ventana
+            if not self._pending:
+                return
+            delay = self.interval
+
+    def cancel(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._pending = {}
@@ -1,5 +1,6 @@
 # apps/chat/serializers.py
 from rest_framework import serializers
+from config.values_serializer import ValuesSerializer
 from .models import ChatMessage
 
 class ChatMessageSerializer(serializers.ModelSerializer):
@@ -8,4 +9,9 @@ class ChatMessageSerializer(serializers.ModelSerializer):
     class Meta:
         model = ChatMessage
         fields = ['id', 'appointment_id', 'sender', 'sender_name', 'message', 'timestamp']
-        read_only_fields = ['sender', 'timestamp']
\ No newline at end of file
+        read_only_fields = ['sender', 'timestamp']
+
+
+class ChatMessageValuesSerializer(ValuesSerializer):
+    """Historial de chat: misma salida que ChatMessageSerializer, desde .values()."""
+    serializer_class = ChatMessageSerializer
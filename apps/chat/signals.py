@@ -0,0 +1,19 @@
+# apps/chat/signals.py
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from apps.appointments.models import Appointment
+from .membership import CLOSED_STATUSES, invalidate_room, revoke_room
+
+
+@receiver(post_save, sender=Appointment)
+def refresh_chat_room(sender, instance, **kwargs):
+    # cancel y refer_appointment dejan la cita en 'cancelled':
+    # se expulsan las conexiones vivas una vez confirmada la transacción.
+    # El schema se toma ahora: al confirmar, la conexión puede estar en otro.
+    schema_name = connection.schema_name
+    if instance.status in CLOSED_STATUSES:
+        transaction.on_commit(lambda: revoke_room(instance.pk, schema_name))
+    else:
+        invalidate_room(instance.pk, schema_name)
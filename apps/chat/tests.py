@@ -1,3 +1,223 @@
-from django.test import TestCase
+# apps/chat/tests.py
+import asyncio
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase
+from django_tenants.test.cases import TenantTestCase
+from django_tenants.utils import schema_context, tenant_context
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .membership import _cache_key, can_join_room, get_room_membership, revoke_room, room_group_name
+from .pagination import ChatKeysetPagination
+from .presence import PresenceRegistry
+
+
+class RoomIsolationTests(SimpleTestCase):
+    """Salas y caché de miembros por schema, sin base de datos."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_group_names_include_schema(self):
+        self.assertEqual(room_group_name(7, 'clinica_a'), 'chat_clinica_a_7')
+        self.assertNotEqual(room_group_name(7, 'clinica_a'), room_group_name(7, 'clinica_b'))
+
+    def test_membership_cache_is_per_schema(self):
+        # Mismo id de cita en dos clínicas, con miembros distintos
+        cache.set(_cache_key(7, 'clinica_a'), {'members': {1, 2}, 'status': 'confirmed'})
+        cache.set(_cache_key(7, 'clinica_b'), {'members': {3, 4}, 'status': 'confirmed'})
+        user = SimpleNamespace(id=1)
+
+        self.assertTrue(can_join_room(user, 7, 'clinica_a'))
+        self.assertFalse(can_join_room(user, 7, 'clinica_b'))
+
+    def test_public_schema_has_no_rooms(self):
+        # Sin consulta: las citas no existen en el schema público
+        self.assertIsNone(get_room_membership(7, 'public'))
+
+    def test_revoke_reaches_only_its_tenant(self):
+        async def scenario():
+            layer = get_channel_layer()
+            channel_a = await layer.new_channel()
+            channel_b = await layer.new_channel()
+            await layer.group_add(room_group_name(7, 'clinica_a'), channel_a)
+            await layer.group_add(room_group_name(7, 'clinica_b'), channel_b)
+
+            await sync_to_async(revoke_room)(7, 'clinica_b')
+
+            self.assertEqual(await asyncio.wait_for(layer.receive(channel_b), 1), {'type': 'chat_revoke'})
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(layer.receive(channel_a), 0.1)
+
+        async_to_sync(scenario)()
+
+
+class PresenceRegistryTests(SimpleTestCase):
+    """Registro en memoria: la misma semántica que el de Redis."""
+
+    def run_async(self, coroutine):
+        return asyncio.run(coroutine)
+
+    def test_tabs_count_once(self):
+        registry = PresenceRegistry()
+        self.assertTrue(self.run_async(registry.join('sala', 1, 'canal-a')))
+        self.assertFalse(self.run_async(registry.join('sala', 1, 'canal-b')))
+        self.assertTrue(self.run_async(registry.join('sala', 2, 'canal-c')))
+        self.assertEqual(self.run_async(registry.online('sala')), [1, 2])
+
+        self.assertFalse(self.run_async(registry.leave('sala', 1, 'canal-a')))
+        self.assertTrue(self.run_async(registry.leave('sala', 1, 'canal-b')))
+        self.assertEqual(self.run_async(registry.online('sala')), [2])
+
+    def test_connections_expire_without_refresh(self):
+        registry = PresenceRegistry()
+        with mock.patch('apps.chat.presence.time.monotonic', return_value=100.0):
+            self.run_async(registry.join('sala', 1, 'canal-a'))
+            self.run_async(registry.join('sala', 2, 'canal-b'))
+        with mock.patch('apps.chat.presence.time.monotonic', return_value=140.0):
+            self.run_async(registry.refresh('sala', 2, 'canal-b'))
+        with mock.patch('apps.chat.presence.time.monotonic', return_value=170.0):
+            # El worker de canal-a dejó de renovar: ya no cuenta
+            self.assertEqual(self.run_async(registry.online('sala')), [2])
+            self.assertTrue(self.run_async(registry.join('sala', 1, 'canal-d')))
+
+
+class ChatResponseShapeTests(SimpleTestCase):
+    """Lista (formato anterior) o página con cursores, según los parámetros."""
+
+    def legacy(self, **params):
+        request = Request(APIRequestFactory().get('/', params))
+        return ChatKeysetPagination().legacy_response(request)
+
+    def test_list_by_default(self):
+        self.assertTrue(self.legacy())
+        self.assertTrue(self.legacy(limit='20'))
+        self.assertTrue(self.legacy(paginate='false', before=''))
+
+    def test_page_with_a_cursor_or_paginate_true(self):
+        for params in ({'before': '5'}, {'after': '5'}, {'since': '0'}, {'paginate': 'true'}, {'paginate': 'True'}):
+            with self.subTest(**params):
+                self.assertFalse(self.legacy(**params))
+
+
+class ChatTenantWebsocketTests(TenantTestCase):
+    """
+    El WebSocket del chat con dos clínicas que tienen una cita con el mismo
+    id: el tenant sale del Host y la autorización y la expulsión no cruzan
+    de una clínica a otra.
+    """
+    appointment_id = 1000
+    other_domain = 'otra.test.com'
+
+    @classmethod
+    def setup_tenant(cls, tenant):
+        tenant.name = 'Clínica Chat'
+
+    @classmethod
+    def setUpClass(cls):
+        from apps.tenants.models import Clinic, Domain
+
+        super().setUpClass()
+        with schema_context('public'):
+            cls.other = Clinic(schema_name='chat_other', name='Otra Clínica')
+            cls.other.save(verbosity=0)
+            cls.other_domain_obj = Domain.objects.create(tenant=cls.other, domain=cls.other_domain)
+
+        cls.tokens = {
+            cls.tenant.schema_name: cls.seed_room(cls.tenant),
+            cls.other.schema_name: cls.seed_room(cls.other),
+        }
+        connection.set_tenant(cls.tenant)
+
+    @classmethod
+    def tearDownClass(cls):
+        connection.set_schema_to_public()
+        cls.other_domain_obj.delete()
+        cls.other.delete(force_drop=True)
+        super().tearDownClass()
+
+    @classmethod
+    def seed_room(cls, tenant):
+        """Cita `appointment_id` de la clínica; devuelve el token de su paciente."""
+        from rest_framework.authtoken.models import Token
+        from apps.appointments.models import Appointment
+        from apps.users.models import CustomUser
+
+        with tenant_context(tenant):
+            patient = CustomUser.objects.create_user(
+                email=f'paciente@{tenant.schema_name}.test', password='password123',
+                first_name='Paciente', last_name=tenant.schema_name, user_type='patient'
+            )
+            psychologist = CustomUser.objects.create_user(
+                email=f'psicologo@{tenant.schema_name}.test', password='password123',
+                first_name='Psicólogo', last_name=tenant.schema_name, user_type='professional'
+            )
+            Appointment.objects.create(
+                id=cls.appointment_id, patient=patient, psychologist=psychologist,
+                appointment_date=date.today() + timedelta(days=1),
+                start_time=time(10, 0), end_time=time(11, 0), status='confirmed'
+            )
+            token, _ = Token.objects.get_or_create(user=patient)
+            return token.key
+
+    def setUp(self):
+        cache.clear()
+        # database_sync_to_async cierra las conexiones "viejas" al entrar y
+        # salir; en un TestCase esa conexión es la de la transacción del test
+        patcher = mock.patch('channels.db.close_old_connections')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def communicator(self, host, schema_name):
+        from config.asgi import application
+
+        return WebsocketCommunicator(
+            application,
+            f'/ws/chat/{self.appointment_id}/?token={self.tokens[schema_name]}',
+            headers=[(b'host', host.encode())],
+        )
+
+    async def connect(self, host, schema_name):
+        communicator = self.communicator(host, schema_name)
+        connected, _ = await communicator.connect()
+        if connected:
+            snapshot = await communicator.receive_json_from()
+            self.assertEqual(snapshot['type'], 'presence_snapshot')
+        return communicator, connected
+
+    async def test_join_uses_the_host_tenant(self):
+        # La conexión principal del test está en self.tenant: la otra
+        # clínica solo se autoriza bien si la consulta va en su schema
+        own, own_ok = await self.connect(self.domain.domain, self.tenant.schema_name)
+        other, other_ok = await self.connect(self.other_domain, self.other.schema_name)
+        self.assertTrue(own_ok)
+        self.assertTrue(other_ok)
+
+        # El token de una clínica no existe en la otra
+        crossed, crossed_ok = await self.connect(self.other_domain, self.tenant.schema_name)
+        self.assertFalse(crossed_ok)
+
+        await own.disconnect()
+        await other.disconnect()
+
+    async def test_revoke_only_closes_its_tenant_room(self):
+        own, _ = await self.connect(self.domain.domain, self.tenant.schema_name)
+        other, _ = await self.connect(self.other_domain, self.other.schema_name)
+
+        await sync_to_async(revoke_room)(self.appointment_id, self.other.schema_name)
+
+        self.assertEqual(await other.receive_json_from(), {'type': 'revoked'})
+        self.assertEqual((await other.receive_output())['type'], 'websocket.close')
+        self.assertTrue(await own.receive_nothing())
+
+        await sync_to_async(revoke_room)(self.appointment_id, self.tenant.schema_name)
+        self.assertEqual(await own.receive_json_from(), {'type': 'revoked'})
+        await own.disconnect()
@@ -4,16 +4,33 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from .models import ChatMessage
-from .serializers import ChatMessageSerializer
+from .serializers import ChatMessageSerializer, ChatMessageValuesSerializer
+from .pagination import ChatKeysetPagination
+from .membership import is_room_member
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
 def chat_messages_view(request, appointment_id):
+    # Solo el paciente y el psicólogo de la cita (resultado cacheado)
+    if not is_room_member(request.user, appointment_id):
+        return Response(
+            {'error': 'No tienes acceso a este chat'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
     if request.method == 'GET':
-        # Obtener todos los mensajes de esta cita
-        messages = ChatMessage.objects.filter(appointment_id=appointment_id)
-        serializer = ChatMessageSerializer(messages, many=True)
-        return Response(serializer.data)
+        # Historial paginado por cursor (before/after/since) en lugar de
+        # devolver la conversación completa en cada carga.
+        # Filas de .values() con el mismo formato que ChatMessageSerializer
+        serializer = ChatMessageValuesSerializer()
+        queryset = serializer.values(ChatMessage.objects.filter(appointment_id=appointment_id))
+        paginator = ChatKeysetPagination()
+        if paginator.legacy_response(request):
+            # Clientes anteriores a la paginación: lista de los últimos mensajes
+            messages, _ = paginator.paginate_queryset(queryset, request, default_limit=paginator.max_limit)
+            return Response(serializer.serialize(messages))
+        messages, has_more = paginator.paginate_queryset(queryset, request)
+        return Response(paginator.get_paginated_data(messages, has_more, serializer.serialize(messages)))
     
     elif request.method == 'POST':
         # Crear nuevo mensaje
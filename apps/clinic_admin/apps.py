@@ -5,3 +5,6 @@ class ClinicAdminConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.clinic_admin'
     verbose_name = 'Administración de Clínica'
+
+    def ready(self):
+        from . import signals  # noqa: F401 - mantenimiento de ClinicMetrics
@@ -0,0 +1,65 @@
+"""
+Comando para reconciliar el resumen diario ClinicMetrics de cada clínica.
+Pensado para ejecutarse cada noche (cron de Render).
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django_tenants.utils import schema_context
+from apps.tenants.models import Clinic
+from apps.clinic_admin import metrics
+
+
+class Command(BaseCommand):
+    help = 'Recalcula las métricas diarias (ClinicMetrics) desde las tablas de cada clínica'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            type=str,
+            help='Schema del tenant específico (ej: mindcare, bienestar)',
+            default=None
+        )
+        parser.add_argument(
+            '--date',
+            type=str,
+            help='Día a reconciliar (YYYY-MM-DD). Por defecto hoy.',
+            default=None
+        )
+
+    def handle(self, *args, **options):
+        specific_tenant = options.get('tenant')
+        day = None
+        if options.get('date'):
+            try:
+                day = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Formato de fecha inválido. Use YYYY-MM-DD')
+
+        if specific_tenant:
+            tenants = Clinic.objects.filter(schema_name=specific_tenant)
+            if not tenants.exists():
+                raise CommandError(f'Tenant "{specific_tenant}" no encontrado')
+        else:
+            tenants = Clinic.objects.exclude(schema_name='public')
+
+        self.stdout.write(self.style.SUCCESS('📊 Reconciliando métricas de clínicas'))
+
+        failures = 0
+        for tenant in tenants:
+            try:
+                with schema_context(tenant.schema_name):
+                    row = metrics.reconcile(day)
+                self.stdout.write(
+                    f'✅ {tenant.name} ({tenant.schema_name}) {row.date}: '
+                    f'{row.total_users} usuarios, {row.total_appointments} citas, '
+                    f'ingresos {row.revenue}'
+                )
+            except Exception as e:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'❌ {tenant.schema_name}: {e}'))
+
+        if failures:
+            raise CommandError(f'{failures} clínica(s) no se pudieron reconciliar')
+        self.stdout.write(self.style.SUCCESS('✅ Métricas reconciliadas'))
@@ -0,0 +1,207 @@
+# apps/clinic_admin/metrics.py
+"""
+Mantenimiento del resumen diario ClinicMetrics.
+
+Cada modelo seguido tiene un "clasificador" que indica a qué contadores
+aporta una fila (p. ej. una cita confirmada aporta a
+`appointments_confirmed`). Antes de guardar se lee la clasificación que
+tiene la fila en la BD (solo si se guardan los campos que la deciden);
+al guardar o borrar se aplica la diferencia con F() sobre la fila del
+día, sin volver a contar tablas.
+
+Los ingresos no se mantienen aquí: la fuente es RevenueDaily
+(apps/payment_system/revenue.py, pagos completados por fecha de pago) y
+`revenue` se lee de ahí al consultar el resumen.
+
+Las escrituras que no disparan señales (update(), bulk_create) se corrigen
+con la reconciliación nocturna (`reconcile_clinic_metrics`).
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django_tenants.utils import get_public_schema_name
+
+from .models import ClinicMetrics
+
+logger = logging.getLogger(__name__)
+
+STOCK_FIELDS = [
+    'patients', 'professionals', 'admins',
+    'professional_profiles', 'verified_professionals',
+    'appointments_pending', 'appointments_confirmed', 'appointments_cancelled',
+    'appointments_completed', 'appointments_no_show',
+    'reviews', 'documents', 'clinical_histories',
+]
+
+USER_TYPE_FIELDS = {
+    'patient': 'patients',
+    'professional': 'professionals',
+    'admin': 'admins',
+}
+
+
+# --- Clasificadores ---
+# Reciben un dict campo → valor (el __dict__ de la instancia o una fila de
+# .values()), así que nunca disparan consultas por campos diferidos.
+
+def classify_user(values):
+    field = USER_TYPE_FIELDS.get(values.get('user_type'))
+    return {field} if field else set()
+
+
+def classify_appointment(values):
+    status = values.get('status')
+    return {f'appointments_{status}'} if status else set()
+
+
+def classify_professional_profile(values):
+    keys = {'professional_profiles'}
+    if values.get('is_verified'):
+        keys.add('verified_professionals')
+    return keys
+
+
+def classify_review(values):
+    return {'reviews'}
+
+
+def classify_document(values):
+    return {'documents'}
+
+
+def classify_clinical_history(values):
+    return {'clinical_histories'}
+
+
+# --- Escritura de la fila del día ---
+
+def is_tenant_schema():
+    return getattr(connection, 'schema_name', None) not in (None, get_public_schema_name())
+
+
+def compute_snapshot():
+    """Totales actuales calculados desde las tablas (usado al reconciliar)."""
+    from apps.users.models import CustomUser
+    from apps.appointments.models import Appointment
+    from apps.professionals.models import ProfessionalProfile, Review
+    from apps.clinical_history.models import ClinicalDocument, ClinicalHistory
+
+    snapshot = CustomUser.objects.aggregate(
+        patients=Count('id', filter=Q(user_type='patient')),
+        professionals=Count('id', filter=Q(user_type='professional')),
+        admins=Count('id', filter=Q(user_type='admin')),
+    )
+    snapshot.update(Appointment.objects.aggregate(**{
+        f'appointments_{status}': Count('id', filter=Q(status=status))
+        for status, _ in Appointment.STATUS_CHOICES
+    }))
+    snapshot.update(ProfessionalProfile.objects.aggregate(
+        professional_profiles=Count('id'),
+        verified_professionals=Count('id', filter=Q(is_verified=True)),
+    ))
+    snapshot['reviews'] = Review.objects.count()
+    snapshot['documents'] = ClinicalDocument.objects.count()
+    snapshot['clinical_histories'] = ClinicalHistory.objects.count()
+    return snapshot
+
+
+def compute_daily_movements(day):
+    from apps.appointments.models import Appointment
+
+    return {
+        'new_appointments': Appointment.objects.filter(created_at__date=day).count(),
+    }
+
+
+def revenue_on(day):
+    """Ingresos del día desde RevenueDaily (sin reembolsados ni pendientes)."""
+    from apps.payment_system.models import RevenueDaily
+
+    total = RevenueDaily.objects.filter(date=day).aggregate(total=Sum('gross_amount'))['total']
+    return total or Decimal('0')
+
+
+def with_revenue(queryset):
+    """Anota `revenue` en cada fila de ClinicMetrics con una subconsulta a RevenueDaily."""
+    from apps.payment_system.models import RevenueDaily
+
+    day_total = RevenueDaily.objects.filter(date=OuterRef('date')).order_by().values('date').annotate(
+        total=Sum('gross_amount')
+    ).values('total')
+    return queryset.annotate(revenue=Coalesce(
+        Subquery(day_total), Value(Decimal('0')),
+        output_field=DecimalField(max_digits=12, decimal_places=2)
+    ))
+
+
+def _get_or_start_today():
+    """
+    Devuelve (fila de hoy, calculada_desde_cero). Si aún no existe se
+    arrastran los totales del último día registrado, o se calculan desde
+    las tablas si la clínica no tiene historial.
+    """
+    today = timezone.localdate()
+    metrics = ClinicMetrics.objects.filter(date=today).first()
+    if metrics is not None:
+        return metrics, False
+
+    previous = ClinicMetrics.objects.filter(date__lt=today).order_by('-date').first()
+    if previous is not None:
+        totals = {field: getattr(previous, field) for field in STOCK_FIELDS}
+    else:
+        totals = compute_snapshot()
+    metrics, created = ClinicMetrics.objects.get_or_create(date=today, defaults=totals)
+    return metrics, created and previous is None
+
+
+def get_today_metrics():
+    """Fila de hoy (se crea al primer acceso del día), con `revenue`."""
+    metrics = _get_or_start_today()[0]
+    metrics.revenue = revenue_on(metrics.date)
+    return metrics
+
+
+def apply_delta(**deltas):
+    """Suma los deltas a la fila de hoy con una sola UPDATE atómica."""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas or not is_tenant_schema():
+        return
+    try:
+        # Savepoint: un fallo aquí no debe abortar la transacción del negocio
+        with transaction.atomic():
+            metrics, from_snapshot = _get_or_start_today()
+            if from_snapshot:
+                # El recuento desde las tablas ya incluye este cambio
+                return
+            ClinicMetrics.objects.filter(pk=metrics.pk).update(
+                **{field: F(field) + value for field, value in deltas.items()}
+            )
+    except Exception:
+        logger.exception("No se pudieron actualizar las métricas de la clínica")
+
+
+def reconcile(day=None):
+    """
+    Recalcula la fila de `day` (por defecto hoy) desde las tablas.
+    Los totales solo se pueden recalcular para hoy; para días pasados se
+    corrigen únicamente los movimientos (citas nuevas e ingresos).
+    """
+    today = timezone.localdate()
+    day = day or today
+    values = compute_snapshot() if day == today else {}
+    values.update(compute_daily_movements(day))
+    values['reconciled_at'] = timezone.now()
+    metrics, _ = ClinicMetrics.objects.update_or_create(date=day, defaults=values)
+    metrics.revenue = revenue_on(day)
+    return metrics
+
+
+def trend(days=30):
+    """Serie diaria de los últimos `days` días (orden cronológico), con `revenue`."""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return list(with_revenue(ClinicMetrics.objects.filter(date__gte=since)).order_by('date'))
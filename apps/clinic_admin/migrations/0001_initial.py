@@ -0,0 +1,44 @@
+# Generated by Django 5.1.4 on 2026-10-18 22:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClinicMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('patients', models.IntegerField(default=0)),
+                ('professionals', models.IntegerField(default=0)),
+                ('admins', models.IntegerField(default=0)),
+                ('professional_profiles', models.IntegerField(default=0)),
+                ('verified_professionals', models.IntegerField(default=0)),
+                ('appointments_pending', models.IntegerField(default=0)),
+                ('appointments_confirmed', models.IntegerField(default=0)),
+                ('appointments_cancelled', models.IntegerField(default=0)),
+                ('appointments_completed', models.IntegerField(default=0)),
+                ('appointments_no_show', models.IntegerField(default=0)),
+                ('reviews', models.IntegerField(default=0)),
+                ('documents', models.IntegerField(default=0)),
+                ('clinical_histories', models.IntegerField(default=0)),
+                ('new_appointments', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Métricas de la Clínica',
+                'verbose_name_plural': 'Métricas de la Clínica',
+                'db_table': 'clinic_metrics',
+                'ordering': ['-date'],
+            },
+        ),
+    ]
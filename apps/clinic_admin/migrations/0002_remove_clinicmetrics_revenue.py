@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 23:32
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinic_admin', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='clinicmetrics',
+            name='revenue',
+        ),
+    ]
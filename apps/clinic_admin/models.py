@@ -0,0 +1,63 @@
+# apps/clinic_admin/models.py
+from django.db import models
+
+
+class ClinicMetrics(models.Model):
+    """
+    Resumen diario de la clínica (una fila por día).
+
+    Los contadores de usuarios, citas, reseñas y documentos son totales al
+    cierre del día; `new_appointments` es el movimiento de ese día. Se
+    mantiene de forma incremental con señales (ver metrics.py) y se
+    reconcilia cada noche con `reconcile_clinic_metrics`. Los ingresos del
+    día salen de RevenueDaily (`metrics.with_revenue` / `revenue_on`).
+    """
+    date = models.DateField(unique=True)
+
+    # Usuarios por tipo
+    patients = models.IntegerField(default=0)
+    professionals = models.IntegerField(default=0)
+    admins = models.IntegerField(default=0)
+
+    # Perfiles profesionales
+    professional_profiles = models.IntegerField(default=0)
+    verified_professionals = models.IntegerField(default=0)
+
+    # Citas por estado
+    appointments_pending = models.IntegerField(default=0)
+    appointments_confirmed = models.IntegerField(default=0)
+    appointments_cancelled = models.IntegerField(default=0)
+    appointments_completed = models.IntegerField(default=0)
+    appointments_no_show = models.IntegerField(default=0)
+
+    # Contenido clínico
+    reviews = models.IntegerField(default=0)
+    documents = models.IntegerField(default=0)
+    clinical_histories = models.IntegerField(default=0)
+
+    # Movimientos del día
+    new_appointments = models.IntegerField(default=0)
+
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'clinic_metrics'
+        ordering = ['-date']
+        verbose_name = 'Métricas de la Clínica'
+        verbose_name_plural = 'Métricas de la Clínica'
+
+    def __str__(self):
+        return f"Métricas del {self.date}"
+
+    @property
+    def total_users(self):
+        return self.patients + self.professionals + self.admins
+
+    @property
+    def total_appointments(self):
+        return (
+            self.appointments_pending + self.appointments_confirmed +
+            self.appointments_cancelled + self.appointments_completed +
+            self.appointments_no_show
+        )
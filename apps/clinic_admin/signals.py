@@ -0,0 +1,69 @@
+# apps/clinic_admin/signals.py
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from apps.appointments.models import Appointment
+from apps.clinical_history.models import ClinicalDocument, ClinicalHistory
+from apps.professionals.models import ProfessionalProfile, Review
+from apps.users.models import CustomUser
+from . import metrics
+
+# Modelo → (clasificador, campos de los que depende la clasificación)
+TRACKED_MODELS = {
+    CustomUser: (metrics.classify_user, ('user_type',)),
+    Appointment: (metrics.classify_appointment, ('status',)),
+    ProfessionalProfile: (metrics.classify_professional_profile, ('is_verified',)),
+    Review: (metrics.classify_review, ()),
+    ClinicalDocument: (metrics.classify_document, ()),
+    ClinicalHistory: (metrics.classify_clinical_history, ()),
+}
+
+# El guardado no toca ningún campo que decida la clasificación
+UNCHANGED = object()
+
+
+def remember_counters(sender, instance, update_fields=None, **kwargs):
+    """
+    Antes de guardar una fila existente, lee de la BD los campos que
+    deciden su clasificación. Solo cuesta una consulta cuando se guarda
+    alguno de ellos (p. ej. no en el `last_login` del login).
+    """
+    _, fields = TRACKED_MODELS[sender]
+    if instance._state.adding:
+        instance._metrics_previous = None
+        return
+    saved = set(fields) if update_fields is None else set(fields) & set(update_fields)
+    if not saved:
+        instance._metrics_previous = UNCHANGED
+        return
+    # None si la fila ya no existe: se cuenta como nueva
+    instance._metrics_previous = sender._base_manager.filter(pk=instance.pk).values(*fields).first()
+
+
+def update_counters(sender, instance, created, **kwargs):
+    classify, fields = TRACKED_MODELS[sender]
+    previous = instance.__dict__.pop('_metrics_previous', None)
+    deltas = {}
+    if created and sender is Appointment:
+        deltas['new_appointments'] = 1
+
+    if previous is not UNCHANGED:
+        # Los campos diferidos (no cargados) no se guardaron: conservan su valor
+        loaded = {field: instance.__dict__[field] for field in fields if field in instance.__dict__}
+        if created or previous is None:
+            old_keys, new_keys = set(), classify(loaded)
+        else:
+            old_keys, new_keys = classify(previous), classify({**previous, **loaded})
+        deltas.update({key: 1 for key in new_keys - old_keys})
+        deltas.update({key: -1 for key in old_keys - new_keys})
+    metrics.apply_delta(**deltas)
+
+
+def discount_counters(sender, instance, **kwargs):
+    classify, _ = TRACKED_MODELS[sender]
+    metrics.apply_delta(**{key: -1 for key in classify(instance.__dict__)})
+
+
+for model in TRACKED_MODELS:
+    pre_save.connect(remember_counters, sender=model, dispatch_uid=f'metrics_pre_save_{model.__name__}')
+    post_save.connect(update_counters, sender=model, dispatch_uid=f'metrics_save_{model.__name__}')
+    post_delete.connect(discount_counters, sender=model, dispatch_uid=f'metrics_delete_{model.__name__}')
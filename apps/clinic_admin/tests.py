@@ -0,0 +1,60 @@
+# apps/clinic_admin/tests.py
+from unittest import mock
+
+from django.db.models.base import ModelBase
+from django.test import SimpleTestCase
+
+from apps.appointments.models import Appointment
+from apps.professionals.models import Review
+from apps.users.models import CustomUser
+from . import signals
+
+
+class CounterSignalTests(SimpleTestCase):
+    """Deltas de ClinicMetrics al guardar, sin base de datos."""
+
+    def setUp(self):
+        patcher = mock.patch.object(signals.metrics, 'apply_delta')
+        self.apply_delta = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def save(self, sender, instance, previous_row=None, created=False, update_fields=None):
+        """Simula pre_save + post_save; `previous_row` es la fila de la BD."""
+        instance._state.adding = created
+        queryset = mock.Mock()
+        queryset.filter.return_value.values.return_value.first.return_value = previous_row
+        # _base_manager es una propiedad de la metaclase
+        with mock.patch.object(ModelBase, '_base_manager', new_callable=mock.PropertyMock, return_value=queryset):
+            signals.remember_counters(sender, instance, update_fields=update_fields)
+        signals.update_counters(sender, instance, created=created)
+        return queryset
+
+    def test_status_change_moves_one_counter(self):
+        appointment = Appointment(pk=1, status='confirmed')
+        self.save(Appointment, appointment, previous_row={'status': 'pending'})
+        self.apply_delta.assert_called_once_with(appointments_confirmed=1, appointments_pending=-1)
+
+    def test_new_appointment(self):
+        self.save(Appointment, Appointment(status='pending'), created=True)
+        self.apply_delta.assert_called_once_with(new_appointments=1, appointments_pending=1)
+
+    def test_unrelated_update_fields_skip_the_lookup(self):
+        user = CustomUser(pk=1, user_type='patient')
+        queryset = self.save(CustomUser, user, previous_row={'user_type': 'admin'}, update_fields=['last_login'])
+        queryset.filter.assert_not_called()
+        self.apply_delta.assert_called_once_with()
+
+    def test_models_without_classifying_fields_never_query(self):
+        queryset = self.save(Review, Review(pk=1), previous_row={})
+        queryset.filter.assert_not_called()
+        self.apply_delta.assert_called_once_with()
+
+    def test_deferred_field_keeps_the_stored_value(self):
+        user = CustomUser(pk=1, user_type='patient')
+        del user.__dict__['user_type']  # como si se hubiera cargado con .only()
+        self.save(CustomUser, user, previous_row={'user_type': 'professional'})
+        self.apply_delta.assert_called_once_with()
+
+    def test_missing_row_counts_as_new(self):
+        self.save(CustomUser, CustomUser(pk=1, user_type='admin'), previous_row=None)
+        self.apply_delta.assert_called_once_with(admins=1)
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import UserManagementViewSet
+from .views import UserManagementViewSet, revenue_report
 
 router = DefaultRouter()
 router.register(r'users', UserManagementViewSet, basename='clinic-users')
 
 urlpatterns = [
+    path('revenue/', revenue_report, name='clinic-revenue'),
     path('', include(router.urls)),
 ]
@@ -1,11 +1,15 @@
+from datetime import datetime, timedelta
+
 from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from django.db.models import Q
+from django.utils import timezone
 
 from apps.users.models import CustomUser
 from apps.users.serializers import UserDetailSerializer
 from apps.professionals.models import ProfessionalProfile
+from apps.payment_system import revenue
 from .permissions import IsClinicAdmin
 
 from apps.professionals.models import VerificationDocument 
@@ -79,3 +83,40 @@ class UserManagementViewSet(viewsets.ModelViewSet):
         setattr(profile, 'is_verified', True)
         profile.save(update_fields=['is_verified'])
         return Response({'status': 'Perfil profesional verificado con éxito.'})
+
+
+REVENUE_MAX_DAYS = 366
+
+
+@api_view(['GET'])
+@permission_classes([IsClinicAdmin])
+def revenue_report(request):
+    """
+    Ingresos de la clínica en un rango de fechas, leídos de los agregados
+    diarios (RevenueDaily) sin recorrer las transacciones.
+
+    Parámetros: start y end (YYYY-MM-DD, por defecto los últimos 30 días)
+    y psychologist (id) para filtrar por profesional.
+    """
+    today = timezone.localdate()
+    try:
+        end = datetime.strptime(request.query_params['end'], '%Y-%m-%d').date() \
+            if request.query_params.get('end') else today
+        start = datetime.strptime(request.query_params['start'], '%Y-%m-%d').date() \
+            if request.query_params.get('start') else end - timedelta(days=29)
+    except ValueError:
+        return Response({'error': 'Formato de fecha inválido. Use YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+    if start > end:
+        return Response({'error': 'La fecha de inicio es posterior a la de fin.'}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days >= REVENUE_MAX_DAYS:
+        return Response(
+            {'error': f'El rango no puede superar {REVENUE_MAX_DAYS} días.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    psychologist_id = request.query_params.get('psychologist')
+    if psychologist_id is not None and not psychologist_id.isdigit():
+        return Response({'error': 'psychologist debe ser un id numérico.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = revenue.report(start, end, int(psychologist_id) if psychologist_id else None)
+    return Response({'start': start, 'end': end, **data})
@@ -1,7 +1,7 @@
 # apps/clinical_history/admin.py
 
 from django.contrib import admin
-from .models import SessionNote, ClinicalDocument
+from .models import SessionNote, ClinicalDocument, ClinicalHistoryRevision
 
 # ❌ NO USAR @admin.register() - Interfiere con multi-tenancy
 # Los modelos se registran manualmente en config/admin_site.py
@@ -38,3 +38,26 @@ class ClinicalDocumentAdmin(admin.ModelAdmin):
     def file_name(self, obj):
         return obj.file.name.split('/')[-1] if obj.file else 'N/A'
     file_name.short_description = 'Archivo'
+
+
+class ClinicalHistoryRevisionAdmin(admin.ModelAdmin):
+    """Solo lectura: las revisiones son el registro de auditoría del historial."""
+    list_display = ('history', 'number', 'author', 'created_at', 'is_snapshot')
+    list_filter = ('created_at',)
+    search_fields = ('history__patient__first_name', 'history__patient__last_name')
+    list_select_related = ('history__patient', 'author')
+    readonly_fields = ('history', 'number', 'author', 'created_at', 'changed_fields', 'patch', 'snapshot')
+
+    def is_snapshot(self, obj):
+        return obj.snapshot is not None
+    is_snapshot.boolean = True
+    is_snapshot.short_description = 'Snapshot'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -6,8 +6,8 @@ from django.core.management.base import BaseCommand
 from apps.clinical_history.models import ClinicalHistory
 from apps.users.models import CustomUser
 from apps.tenants.models import Clinic
+from apps.clinic_admin.metrics import get_today_metrics
 from django_tenants.utils import schema_context
-from django.db.models import Count
 
 class Command(BaseCommand):
     help = 'Mostrar estadísticas de los historiales clínicos'
@@ -50,11 +50,13 @@ class Command(BaseCommand):
             self.stdout.write('-' * 50)
             
             with schema_context(tenant.schema_name):
-                # Estadísticas básicas
-                histories_count = ClinicalHistory.objects.count()
-                patients_count = CustomUser.objects.filter(user_type='patient').count()
-                patients_with_history = ClinicalHistory.objects.values('patient').distinct().count()
-                professionals_count = CustomUser.objects.filter(user_type='professional').count()
+                # Estadísticas básicas desde el resumen diario (ClinicMetrics)
+                metrics = get_today_metrics()
+                histories_count = metrics.clinical_histories
+                patients_count = metrics.patients
+                # ClinicalHistory usa al paciente como PK: un historial por paciente
+                patients_with_history = metrics.clinical_histories
+                professionals_count = metrics.professionals
                 
                 total_histories += histories_count
                 total_patients_with_history += patients_with_history
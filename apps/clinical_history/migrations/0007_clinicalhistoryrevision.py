@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-18 22:57
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clinical_history', '0006_moodjournal'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClinicalHistoryRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(help_text='Número de revisión dentro del historial (desde 1).')),
+                ('patch', models.JSONField(default=list, help_text='Operaciones que llevan de la revisión anterior a esta.')),
+                ('changed_fields', models.JSONField(default=list, help_text='Secciones del historial que cambian.')),
+                ('snapshot', models.JSONField(blank=True, help_text='Documento completo (solo en las revisiones de snapshot).', null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='clinical_history_revisions', to=settings.AUTH_USER_MODEL)),
+                ('history', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='clinical_history.clinicalhistory')),
+            ],
+            options={
+                'verbose_name': 'Revisión de Historial Clínico',
+                'verbose_name_plural': 'Revisiones de Historial Clínico',
+                'db_table': 'clinical_history_revisions',
+                'ordering': ['-number'],
+                'indexes': [models.Index(fields=['history', 'created_at'], name='clinical_rev_history_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('history', 'number'), name='clinical_revision_unique_number')],
+            },
+        ),
+    ]
@@ -4,6 +4,7 @@ from django.db import models
 from django.conf import settings
 from apps.appointments.models import Appointment
 from .storage import ClinicalDocumentS3Storage
+from django.utils import timezone
 from datetime import date
 
 class SessionNote(models.Model):
@@ -135,6 +136,51 @@ class ClinicalHistory(models.Model):
     def __str__(self):
         return f"Historial Clínico de {self.patient.get_full_name()}"
 
+
+class ClinicalHistoryRevision(models.Model):
+    """
+    Revisión (solo de inserción) del historial clínico: el parche respecto a
+    la revisión anterior y, cada CLINICAL_HISTORY_SNAPSHOT_EVERY revisiones,
+    el documento completo. Ver apps/clinical_history/revisions.py.
+    """
+    history = models.ForeignKey(
+        ClinicalHistory,
+        on_delete=models.CASCADE,
+        related_name='revisions'
+    )
+    number = models.PositiveIntegerField(help_text="Número de revisión dentro del historial (desde 1).")
+    patch = models.JSONField(default=list, help_text="Operaciones que llevan de la revisión anterior a esta.")
+    changed_fields = models.JSONField(default=list, help_text="Secciones del historial que cambian.")
+    snapshot = models.JSONField(null=True, blank=True, help_text="Documento completo (solo en las revisiones de snapshot).")
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='clinical_history_revisions'
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-number']
+        verbose_name = 'Revisión de Historial Clínico'
+        verbose_name_plural = 'Revisiones de Historial Clínico'
+        db_table = 'clinical_history_revisions'
+        constraints = [
+            models.UniqueConstraint(fields=['history', 'number'], name='clinical_revision_unique_number'),
+        ]
+        indexes = [
+            models.Index(fields=['history', 'created_at'], name='clinical_rev_history_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Revisión {self.number} del historial {self.history_id}"
+
+    def save(self, *args, **kwargs):
+        # Las revisiones no se modifican: son el registro de auditoría
+        if not self._state.adding:
+            raise ValueError("Las revisiones del historial clínico no se pueden modificar.")
+        super().save(*args, **kwargs)
+
 # apps/clinical_history/models.py
 # ... (después de la clase ClinicalHistory) ...
 
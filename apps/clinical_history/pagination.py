@@ -0,0 +1,75 @@
+# apps/clinical_history/pagination.py
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class RevisionKeysetPagination(BasePagination):
+    """
+    Paginación por cursor (keyset) de las revisiones de un historial, de la
+    más reciente a la más antigua, sobre el índice único (historial, número).
+
+    Parámetros soportados:
+    - cursor=<número>: revisiones anteriores a la indicada (el valor viene
+      en `next` de la página anterior)
+    - limit=<n>: tamaño de página (por defecto 30, máximo 100)
+    """
+    default_limit = 30
+    max_limit = 100
+
+    def get_limit(self, request):
+        raw = request.query_params.get('limit')
+        if not raw:
+            return self.default_limit
+        try:
+            limit = int(raw)
+        except ValueError:
+            raise ValidationError({'limit': 'Debe ser un número entero.'})
+        return max(1, min(limit, self.max_limit))
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get('cursor')
+        if not raw:
+            return None
+        try:
+            return int(raw)
+        except ValueError:
+            raise ValidationError({'cursor': 'Cursor inválido.'})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Solo se leen limit + 1 filas para saber si hay más."""
+        self.request = request
+        limit = self.get_limit(request)
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            queryset = queryset.filter(number__lt=cursor)
+
+        rows = list(queryset.order_by('-number')[:limit + 1])
+        self.has_more = len(rows) > limit
+        self.page = rows[:limit]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_more or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, 'cursor', self.page[-1].number)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'results': data,
+            'has_more': self.has_more,
+            'next': self.get_next_link(),
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'results': schema,
+                'has_more': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+            },
+        }
@@ -0,0 +1,272 @@
+# apps/clinical_history/revisions.py
+"""
+Versionado del historial clínico con diffs compactos.
+
+Cada actualización de un ClinicalHistory guarda una ClinicalHistoryRevision
+con el parche (operaciones estilo JSON Patch, RFC 6902) que lleva el
+documento de la revisión anterior a la nueva. Cada SNAPSHOT_EVERY
+revisiones (y en la primera) se guarda además el documento completo, así
+que reconstruir cualquier revisión cuesta dos consultas: el último
+snapshot anterior y como mucho SNAPSHOT_EVERY - 1 parches.
+
+Operaciones:
+- add / remove / replace: las de RFC 6902 con rutas JSON Pointer. Los
+  diccionarios se comparan clave a clave y las listas por el tramo que
+  cambia, no se reemplazan enteros.
+- splice: extensión para los textos largos (relato de la enfermedad,
+  antecedentes...): `{"op": "splice", "path": ..., "at": i, "remove": n,
+  "insert": "..."}` sustituye n caracteres desde la posición i. Así editar
+  una frase de un texto de varias páginas guarda la frase, no el texto.
+
+El tamaño de lo guardado crece con lo editado, no con el documento.
+"""
+import copy
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import ClinicalHistory, ClinicalHistoryRevision
+
+# Campos con contenido clínico que se versionan (los metadatos no)
+VERSIONED_FIELDS = (
+    'consultation_reason',
+    'history_of_illness',
+    'personal_pathological_history',
+    'family_history',
+    'personal_non_pathological_history',
+    'mental_examination',
+    'complementary_tests',
+    'diagnoses',
+    'therapeutic_plan',
+    'risk_assessment',
+    'sensitive_topics',
+)
+
+# Por debajo de este tamaño un texto cambiado se reemplaza entero
+SPLICE_MIN_LENGTH = 64
+
+
+def snapshot_every():
+    return getattr(settings, 'CLINICAL_HISTORY_SNAPSHOT_EVERY', 20)
+
+
+def document(history):
+    """Contenido versionado de un historial como diccionario JSON."""
+    return {name: copy.deepcopy(getattr(history, name)) for name in VERSIONED_FIELDS}
+
+
+def empty_document():
+    return {name: ClinicalHistory._meta.get_field(name).get_default() for name in VERSIONED_FIELDS}
+
+
+# --- JSON Pointer ---
+
+def _escape(token):
+    return str(token).replace('~', '~0').replace('/', '~1')
+
+
+def _unescape(token):
+    return token.replace('~1', '/').replace('~0', '~')
+
+
+def _split(path):
+    if not path.startswith('/'):
+        raise ValueError(f'Ruta JSON Pointer inválida: {path!r}')
+    return [_unescape(token) for token in path[1:].split('/')]
+
+
+# --- Diff ---
+
+def _identical(old, new):
+    """Igualdad JSON: en Python 1 == True == 1.0, en el documento no."""
+    if type(old) is not type(new):
+        return False
+    if isinstance(old, dict):
+        return old.keys() == new.keys() and all(_identical(old[key], new[key]) for key in old)
+    if isinstance(old, list):
+        return len(old) == len(new) and all(map(_identical, old, new))
+    return old == new
+
+
+def make_patch(old, new):
+    """Operaciones que transforman `old` en `new`."""
+    ops = []
+    _diff(old, new, '', ops)
+    return ops
+
+
+def _diff(old, new, path, ops):
+    # `==` primero: descarta rápido lo distinto antes de comparar tipos
+    if old == new and _identical(old, new):
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key in old:
+            if key not in new:
+                ops.append({'op': 'remove', 'path': f'{path}/{_escape(key)}'})
+        for key, value in new.items():
+            if key not in old:
+                ops.append({'op': 'add', 'path': f'{path}/{_escape(key)}', 'value': value})
+            else:
+                _diff(old[key], value, f'{path}/{_escape(key)}', ops)
+    elif isinstance(old, list) and isinstance(new, list):
+        _diff_list(old, new, path, ops)
+    elif isinstance(old, str) and isinstance(new, str) and len(new) >= SPLICE_MIN_LENGTH:
+        ops.append(_splice(old, new, path))
+    else:
+        ops.append({'op': 'replace', 'path': path, 'value': new})
+
+
+def _diff_list(old, new, path, ops):
+    # Se recorta el principio y el final comunes y solo se toca el tramo central
+    start = 0
+    while start < len(old) and start < len(new) and _identical(old[start], new[start]):
+        start += 1
+    end_old, end_new = len(old), len(new)
+    while end_old > start and end_new > start and _identical(old[end_old - 1], new[end_new - 1]):
+        end_old -= 1
+        end_new -= 1
+
+    changed_old, changed_new = old[start:end_old], new[start:end_new]
+    common = min(len(changed_old), len(changed_new))
+    for offset in range(common):
+        _diff(changed_old[offset], changed_new[offset], f'{path}/{start + offset}', ops)
+    for _ in range(len(changed_old) - common):
+        ops.append({'op': 'remove', 'path': f'{path}/{start + common}'})
+    for offset in range(common, len(changed_new)):
+        ops.append({'op': 'add', 'path': f'{path}/{start + offset}', 'value': changed_new[offset]})
+
+
+def _splice(old, new, path):
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end = 0
+    while end < limit - start and old[-end - 1] == new[-end - 1]:
+        end += 1
+    return {
+        'op': 'splice',
+        'path': path,
+        'at': start,
+        'remove': len(old) - start - end,
+        'insert': new[start:len(new) - end],
+    }
+
+
+# --- Aplicación ---
+
+def apply_patch(doc, ops):
+    """Documento resultante de aplicar `ops` sobre una copia de `doc`."""
+    doc = copy.deepcopy(doc)
+    for op in ops:
+        tokens = _split(op['path'])
+        parent = doc
+        for token in tokens[:-1]:
+            parent = parent[int(token)] if isinstance(parent, list) else parent[token]
+        key = tokens[-1]
+        if isinstance(parent, list):
+            key = len(parent) if key == '-' else int(key)
+
+        kind = op['op']
+        if kind == 'add':
+            if isinstance(parent, list):
+                parent.insert(key, copy.deepcopy(op['value']))
+            else:
+                parent[key] = copy.deepcopy(op['value'])
+        elif kind == 'remove':
+            del parent[key]
+        elif kind == 'replace':
+            parent[key] = copy.deepcopy(op['value'])
+        elif kind == 'splice':
+            text = parent[key]
+            parent[key] = text[:op['at']] + op['insert'] + text[op['at'] + op['remove']:]
+        else:
+            raise ValueError(f"Operación de parche no soportada: {kind!r}")
+    return doc
+
+
+def changed_fields(ops):
+    """Campos de primer nivel que toca un parche."""
+    return list(dict.fromkeys(_split(op['path'])[0] for op in ops))
+
+
+# --- Persistencia ---
+
+def _create(history, number, before, after, author_id, created_at=None):
+    ops = make_patch(before, after)
+    revision = ClinicalHistoryRevision(
+        history=history,
+        number=number,
+        patch=ops,
+        changed_fields=changed_fields(ops),
+        snapshot=after if number == 1 or number % snapshot_every() == 0 else None,
+        author_id=author_id,
+    )
+    if created_at is not None:
+        revision.created_at = created_at
+    revision.save()
+    return revision
+
+
+def record_revision(history, before, author=None, baseline=(None, None)):
+    """
+    Guarda la revisión de `history` (ya guardado) respecto a `before`.
+    Llamar dentro de la transacción que bloquea la fila del historial
+    (select_for_update) para que la numeración no se cruce. `baseline` es
+    (id del autor, fecha) de `before`, para los historiales anteriores al
+    versionado. Devuelve la revisión, o None si el contenido no cambió.
+    """
+    after = document(history)
+    if _identical(after, before):
+        return None
+
+    last = (
+        ClinicalHistoryRevision.objects.filter(history=history)
+        .order_by('-number').values_list('number', flat=True).first()
+    )
+    if last is None:
+        last = 0
+        if before != empty_document():
+            # Historial anterior al versionado: su estado previo es la revisión base
+            _create(history, 1, empty_document(), before, *baseline)
+            last = 1
+    return _create(history, last + 1, before, after, getattr(author, 'pk', None))
+
+
+def reconstruct(history_id, number):
+    """
+    Documento del historial tal como quedó en la revisión `number`, o None
+    si no existe. Dos consultas: el snapshot anterior y los parches siguientes.
+    """
+    revisions = ClinicalHistoryRevision.objects.filter(history_id=history_id)
+    base = (
+        revisions.filter(number__lte=number, snapshot__isnull=False)
+        .order_by('-number').values('number', 'snapshot').first()
+    )
+    if base is None:
+        return None
+    patches = list(
+        revisions.filter(number__gt=base['number'], number__lte=number)
+        .order_by('number').values_list('number', 'patch')
+    )
+    if base['number'] + len(patches) != number:
+        return None
+    doc = base['snapshot']
+    for _, ops in patches:
+        doc = apply_patch(doc, ops)
+    return doc
+
+
+@transaction.atomic
+def save_with_revision(serializer, author):
+    """
+    Guarda el serializer de ClinicalHistory y su revisión en una transacción,
+    con la fila bloqueada para que dos ediciones simultáneas no compartan
+    número ni parche base.
+    """
+    locked = ClinicalHistory.objects.select_for_update().get(pk=serializer.instance.pk)
+    before = document(locked)
+    baseline = (locked.last_updated_by_id or locked.created_by_id, locked.updated_at)
+    serializer.instance = locked
+    history = serializer.save(last_updated_by=author)
+    return history, record_revision(history, before, author, baseline)
@@ -1,7 +1,7 @@
 # apps/clinical_history/serializers.py
 
 from rest_framework import serializers
-from .models import SessionNote, ClinicalDocument, ClinicalHistory, InitialTriage, MoodJournal  # <-- 1. IMPORTA EL NUEVO MODELO
+from .models import SessionNote, ClinicalDocument, ClinicalHistory, ClinicalHistoryRevision, InitialTriage, MoodJournal  # <-- 1. IMPORTA EL NUEVO MODELO
 from apps.users.models import CustomUser
 
 class SessionNoteSerializer(serializers.ModelSerializer):
@@ -105,6 +105,19 @@ class ClinicalHistorySerializer(serializers.ModelSerializer):
         # Hacemos que ciertos campos sean de solo lectura para proteger los datos
         read_only_fields = ['patient', 'created_by', 'created_at', 'updated_at']
 
+class ClinicalHistoryRevisionSerializer(serializers.ModelSerializer):
+    """
+    Revisión del historial para el listado: quién, cuándo, qué secciones y
+    el parche. El documento completo se reconstruye en el detalle.
+    """
+    author_name = serializers.CharField(source='author.get_full_name', read_only=True)
+
+    class Meta:
+        model = ClinicalHistoryRevision
+        fields = ['number', 'created_at', 'author', 'author_name', 'changed_fields', 'patch']
+        read_only_fields = fields
+
+
 # apps/clinical_history/serializers.py
 # ... (después de la clase ClinicalHistorySerializer) ...
 
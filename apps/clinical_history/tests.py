@@ -1,3 +1,244 @@
-from django.test import TestCase
+# apps/clinical_history/tests.py
+import json
+import random
+from datetime import datetime, timezone as dt_timezone
 
-# Create your tests here.
+from django.test import SimpleTestCase, override_settings
+from django_tenants.test.cases import TenantTestCase
+
+from apps.users.models import CustomUser
+from . import revisions
+from .models import ClinicalHistory, ClinicalHistoryRevision
+from .revisions import apply_patch, changed_fields, make_patch
+
+
+class PatchTests(SimpleTestCase):
+    """make_patch / apply_patch sin base de datos."""
+
+    def assertRoundTrip(self, old, new):
+        ops = make_patch(old, new)
+        # Comparación como JSON: en Python 1 == True y no distinguiría tipos
+        self.assertEqual(json.dumps(apply_patch(old, ops), sort_keys=True), json.dumps(new, sort_keys=True))
+        return ops
+
+    def test_identical_documents_have_empty_patch(self):
+        doc = {'a': [1, {'b': 'texto'}], 'c': None}
+        self.assertEqual(self.assertRoundTrip(doc, {'a': [1, {'b': 'texto'}], 'c': None}), [])
+
+    def test_dict_add_remove_replace(self):
+        old = {'sleep': 'bien', 'diet': {'meals': 3, 'notes': 'x'}, 'smoker': False}
+        new = {'sleep': 'mal', 'diet': {'meals': 3, 'water': 2}, 'alcohol': 'ocasional'}
+        ops = self.assertRoundTrip(old, new)
+
+        self.assertIn({'op': 'replace', 'path': '/sleep', 'value': 'mal'}, ops)
+        self.assertIn({'op': 'remove', 'path': '/diet/notes'}, ops)
+        self.assertIn({'op': 'add', 'path': '/diet/water', 'value': 2}, ops)
+        self.assertIn({'op': 'remove', 'path': '/smoker'}, ops)
+        # Lo que no cambia no aparece en el parche
+        self.assertNotIn('/diet/meals', [op['path'] for op in ops])
+
+    def test_type_change_is_a_replace(self):
+        ops = self.assertRoundTrip({'a': 1}, {'a': True})
+        self.assertEqual(ops, [{'op': 'replace', 'path': '/a', 'value': True}])
+        self.assertRoundTrip({'a': [1, 2]}, {'a': {'0': 1}})
+        self.assertRoundTrip({'a': [1, 0]}, {'a': [True, False]})
+        self.assertRoundTrip({'a': 1}, {'a': 1.0})
+
+    def test_list_edits_touch_only_the_changed_span(self):
+        old = [{'code': 'F41.1'}, {'code': 'F32.0'}, {'code': 'Z63.0'}]
+        new = [{'code': 'F41.1'}, {'code': 'F32.1', 'main': True}, {'code': 'G47.0'}, {'code': 'Z63.0'}]
+        ops = self.assertRoundTrip(old, new)
+
+        self.assertTrue(all(op['path'].startswith(('/1', '/2')) for op in ops), ops)
+
+    def test_list_insert_remove_and_append(self):
+        self.assertRoundTrip([1, 2, 3], [0, 1, 2, 3])
+        self.assertRoundTrip([1, 2, 3], [1, 3])
+        self.assertRoundTrip([1, 2, 3], [1, 2, 3, 4, 5])
+        self.assertRoundTrip([1, 2, 3], [])
+        self.assertRoundTrip([], ['a'])
+        self.assertRoundTrip([1, 1, 1], [1, 1])
+
+    def test_long_text_edit_is_a_splice(self):
+        old = 'Paciente refiere insomnio desde hace seis meses. ' * 40
+        new = old.replace('seis meses', 'ocho meses', 1)
+        ops = self.assertRoundTrip({'history_of_illness': old}, {'history_of_illness': new})
+
+        self.assertEqual(len(ops), 1)
+        self.assertEqual(ops[0]['op'], 'splice')
+        self.assertEqual(ops[0]['path'], '/history_of_illness')
+        self.assertLessEqual(len(ops[0]['insert']), len('ocho'))
+
+    def test_splice_edges(self):
+        text = 'x' * revisions.SPLICE_MIN_LENGTH
+        for old, new in (
+            (text, 'inicio ' + text),
+            (text, text + ' final'),
+            (text + ' final', text),
+            ('', text),
+            ('abc' + text, text + 'abc'),
+            (text, text.replace('x', 'y', 1)),
+        ):
+            with self.subTest(old=old[:10], new=new[:10]):
+                ops = self.assertRoundTrip({'t': old}, {'t': new})
+                self.assertEqual(ops[0]['op'], 'splice')
+
+    def test_short_text_is_replaced(self):
+        ops = self.assertRoundTrip({'t': 'corto'}, {'t': 'breve'})
+        self.assertEqual(ops, [{'op': 'replace', 'path': '/t', 'value': 'breve'}])
+
+    def test_apply_does_not_modify_its_input(self):
+        old = {'a': [1, {'b': 2}]}
+        new = {'a': [1, {'b': 3}, 4]}
+        apply_patch(old, make_patch(old, new))
+        self.assertEqual(old, {'a': [1, {'b': 2}]})
+
+    def test_random_documents_round_trip(self):
+        rng = random.Random(50)
+        long_text = 'La paciente describe episodios de angustia nocturna. ' * 3
+
+        def value(depth=0):
+            kind = rng.choice(['int', 'text', 'long', 'list', 'dict', 'none'] if depth < 3 else ['int', 'text'])
+            if kind == 'int':
+                return rng.choice([0, 1, 2, True, False, 1.0])
+            if kind == 'text':
+                return rng.choice(['a', 'b', 'c/d', 'e~f'])
+            if kind == 'long':
+                cut = rng.randint(0, len(long_text))
+                return long_text[:cut] + rng.choice(['', 'X', 'YY']) + long_text[cut:]
+            if kind == 'list':
+                return [value(depth + 1) for _ in range(rng.randint(0, 4))]
+            if kind == 'dict':
+                return {rng.choice(['k', 'm/n', 'p~q', '']): value(depth + 1) for _ in range(rng.randint(0, 3))}
+            return None
+
+        for _ in range(300):
+            old, new = value(), value()
+            self.assertRoundTrip({'doc': old}, {'doc': new})
+
+
+class JsonPointerTests(SimpleTestCase):
+    def test_keys_with_tilde_and_slash_are_escaped(self):
+        old = {'a/b': 1, 'm~n': 2, '~/': 3, '': 4}
+        new = {'a/b': 10, 'm~n': 20, '~/': 30, '': 40, '~1': 5}
+        ops = make_patch(old, new)
+
+        paths = {op['path'] for op in ops}
+        self.assertEqual(paths, {'/a~1b', '/m~0n', '/~0~1', '/', '/~01'})
+        self.assertEqual(apply_patch(old, ops), new)
+
+    def test_escaped_keys_in_nested_paths(self):
+        old = {'risk': {'auto/hetero': {'nivel~alto': 'no'}}}
+        new = {'risk': {'auto/hetero': {'nivel~alto': 'sí'}}}
+        ops = make_patch(old, new)
+
+        self.assertEqual(ops, [{'op': 'replace', 'path': '/risk/auto~1hetero/nivel~0alto', 'value': 'sí'}])
+        self.assertEqual(apply_patch(old, ops), new)
+        self.assertEqual(changed_fields(ops), ['risk'])
+
+    def test_changed_fields_unescapes_top_level(self):
+        ops = [{'op': 'add', 'path': '/a~1b/0', 'value': 1}, {'op': 'remove', 'path': '/a~1b/1'}]
+        self.assertEqual(changed_fields(ops), ['a/b'])
+
+    def test_append_token(self):
+        self.assertEqual(apply_patch({'l': [1]}, [{'op': 'add', 'path': '/l/-', 'value': 2}]), {'l': [1, 2]})
+
+    def test_invalid_pointer_and_operation(self):
+        with self.assertRaises(ValueError):
+            apply_patch({'a': 1}, [{'op': 'replace', 'path': 'a', 'value': 2}])
+        with self.assertRaises(ValueError):
+            apply_patch({'a': 1}, [{'op': 'move', 'path': '/a'}])
+
+
+@override_settings(CLINICAL_HISTORY_SNAPSHOT_EVERY=3)
+class RevisionHistoryTests(TenantTestCase):
+    """Revisiones guardadas y reconstrucción (necesita PostgreSQL)."""
+
+    def setUp(self):
+        self.patient = CustomUser.objects.create_user(
+            email='paciente@test.com', password='password123',
+            first_name='Ana', last_name='Paciente', user_type='patient'
+        )
+        self.psychologist = CustomUser.objects.create_user(
+            email='psicologo@test.com', password='password123',
+            first_name='Luis', last_name='Psicólogo', user_type='professional'
+        )
+
+    def edit(self, history, **changes):
+        before = revisions.document(history)
+        for name, value in changes.items():
+            setattr(history, name, value)
+        history.save()
+        return revisions.record_revision(history, before, self.psychologist)
+
+    def test_reconstruct_across_snapshot_boundaries(self):
+        history = ClinicalHistory.objects.create(patient=self.patient, created_by=self.psychologist)
+        expected = {}
+        for number in range(1, 8):
+            revision = self.edit(
+                history,
+                consultation_reason=f'Motivo {number}',
+                diagnoses=[{'code': f'F4{index}'} for index in range(number)],
+            )
+            self.assertEqual(revision.number, number)
+            expected[number] = revisions.document(history)
+
+        snapshots = ClinicalHistoryRevision.objects.filter(
+            history=history, snapshot__isnull=False
+        ).values_list('number', flat=True)
+        self.assertEqual(sorted(snapshots), [1, 3, 6])
+
+        for number, doc in expected.items():
+            with self.subTest(number=number), self.assertNumQueries(2):
+                self.assertEqual(revisions.reconstruct(history.pk, number), doc)
+
+        self.assertIsNone(revisions.reconstruct(history.pk, 8))
+
+    def test_reconstruct_with_a_missing_patch(self):
+        history = ClinicalHistory.objects.create(patient=self.patient, created_by=self.psychologist)
+        for number in range(1, 6):
+            self.edit(history, consultation_reason=f'Motivo {number}')
+
+        ClinicalHistoryRevision.objects.filter(history=history, number=4).delete()
+        self.assertIsNotNone(revisions.reconstruct(history.pk, 3))
+        self.assertIsNone(revisions.reconstruct(history.pk, 5))
+
+    def test_no_change_no_revision(self):
+        history = ClinicalHistory.objects.create(patient=self.patient, created_by=self.psychologist)
+        self.assertIsNone(self.edit(history))
+        self.assertFalse(ClinicalHistoryRevision.objects.filter(history=history).exists())
+
+    def test_history_created_before_versioning_gets_a_baseline(self):
+        # Historial con contenido y sin revisiones (anterior al versionado)
+        history = ClinicalHistory.objects.create(
+            patient=self.patient, created_by=self.psychologist,
+            consultation_reason='Ansiedad', diagnoses=[{'code': 'F41.1'}],
+        )
+        original = revisions.document(history)
+        baseline_date = datetime(2025, 1, 15, 12, 0, tzinfo=dt_timezone.utc)
+
+        before = revisions.document(history)
+        history.consultation_reason = 'Ansiedad y problemas de sueño'
+        history.save()
+        revision = revisions.record_revision(
+            history, before, self.psychologist, baseline=(self.psychologist.pk, baseline_date)
+        )
+
+        self.assertEqual(revision.number, 2)
+        baseline = ClinicalHistoryRevision.objects.get(history=history, number=1)
+        self.assertEqual(baseline.snapshot, original)
+        self.assertEqual(baseline.author_id, self.psychologist.pk)
+        self.assertEqual(baseline.created_at, baseline_date)
+        self.assertEqual(baseline.patch, make_patch(revisions.empty_document(), original))
+
+        self.assertEqual(revisions.reconstruct(history.pk, 1), original)
+        self.assertEqual(revisions.reconstruct(history.pk, 2), revisions.document(history))
+        self.assertEqual(revision.changed_fields, ['consultation_reason'])
+
+    def test_empty_history_starts_at_revision_one(self):
+        history = ClinicalHistory.objects.create(patient=self.patient, created_by=self.psychologist)
+        revision = self.edit(history, consultation_reason='Primera consulta')
+
+        self.assertEqual(revision.number, 1)
+        self.assertEqual(revision.snapshot, revisions.document(history))
+        self.assertEqual(ClinicalHistoryRevision.objects.filter(history=history).count(), 1)
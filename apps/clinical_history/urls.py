@@ -16,5 +16,8 @@ urlpatterns = [
 
     # --- 👇 AÑADE ESTA NUEVA LÍNEA 👇 ---
     path('patient/<int:patient_id>/', views.ClinicalHistoryDetailView.as_view(), name='clinical-history-detail'),
+    path('patient/<int:patient_id>/revisions/', views.ClinicalHistoryRevisionListView.as_view(), name='clinical-history-revisions'),
+    path('patient/<int:patient_id>/revisions/at/', views.ClinicalHistoryRevisionDetailView.as_view(), name='clinical-history-revision-at'),
+    path('patient/<int:patient_id>/revisions/<int:number>/', views.ClinicalHistoryRevisionDetailView.as_view(), name='clinical-history-revision-detail'),
     path('triage/', views.InitialTriageView.as_view(), name='initial-triage'),
 ]
\ No newline at end of file
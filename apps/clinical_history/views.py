@@ -4,12 +4,17 @@ import logging
 import os
 from rest_framework import viewsets, permissions, status, generics
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from django.http import FileResponse, Http404
 from django.conf import settings
-from .models import SessionNote, ClinicalDocument, ClinicalHistory, InitialTriage, MoodJournal  # <-- IMPORTA ClinicalHistory
-from .serializers import SessionNoteSerializer, ClinicalDocumentSerializer, PsychologistPatientSerializer, ClinicalHistorySerializer, InitialTriageSubmitSerializer, MoodJournalSerializer  # <-- IMPORTA ClinicalHistorySerializer
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import SessionNote, ClinicalDocument, ClinicalHistory, ClinicalHistoryRevision, InitialTriage, MoodJournal  # <-- IMPORTA ClinicalHistory
+from .serializers import SessionNoteSerializer, ClinicalDocumentSerializer, PsychologistPatientSerializer, ClinicalHistorySerializer, ClinicalHistoryRevisionSerializer, InitialTriageSubmitSerializer, MoodJournalSerializer  # <-- IMPORTA ClinicalHistorySerializer
+from .pagination import RevisionKeysetPagination
+from . import revisions
 from apps.appointments.models import Appointment
 from apps.users.models import CustomUser
 from datetime import date
@@ -218,12 +223,79 @@ class ClinicalHistoryDetailView(generics.RetrieveUpdateAPIView):
         return history
 
     def perform_update(self, serializer):
-        # Asigna automáticamente al profesional que está realizando la última actualización.
+        # Asigna automáticamente al profesional que está realizando la última actualización
+        # y guarda la revisión (solo el diff) en la misma transacción.
+        # Los valores no se registran en el log: son datos clínicos.
         logger.info(f"📝 [ClinicalHistory] Usuario {self.request.user.id} actualizando historia clínica del paciente {self.kwargs.get('patient_id')}")
-        logger.debug(f"   Campos recibidos: {serializer.validated_data.keys()}")
-        logger.debug(f"   Valores: {serializer.validated_data}")
-        serializer.save(last_updated_by=self.request.user)
-        logger.info(f"✅ [ClinicalHistory] Historia clínica actualizada exitosamente")
+        logger.debug(f"   Campos recibidos: {list(serializer.validated_data.keys())}")
+        history, revision = revisions.save_with_revision(serializer, self.request.user)
+        if revision is None:
+            logger.info(f"✅ [ClinicalHistory] Historia clínica guardada sin cambios de contenido")
+        else:
+            logger.info(f"✅ [ClinicalHistory] Historia clínica actualizada (revisión {revision.number}: {', '.join(revision.changed_fields)})")
+
+
+class ClinicalHistoryRevisionListView(generics.ListAPIView):
+    """
+    Revisiones del historial clínico de un paciente, de la más reciente a la
+    más antigua, paginadas por cursor. Cada una trae su parche, no el documento.
+    """
+    serializer_class = ClinicalHistoryRevisionSerializer
+    permission_classes = [permissions.IsAuthenticated, IsOwnerOrAssociatedProfessional]
+    pagination_class = RevisionKeysetPagination
+
+    def get_queryset(self):
+        return (
+            ClinicalHistoryRevision.objects
+            .filter(history_id=self.kwargs['patient_id'])
+            .select_related('author')
+            .defer('snapshot')
+        )
+
+
+class ClinicalHistoryRevisionDetailView(generics.GenericAPIView):
+    """
+    El historial clínico tal como estaba en una revisión
+    (`revisions/<número>/`) o en un momento dado (`revisions/at/?at=<ISO 8601>`),
+    reconstruido desde el último snapshot anterior.
+    """
+    permission_classes = [permissions.IsAuthenticated, IsOwnerOrAssociatedProfessional]
+
+    def get_revision(self):
+        revisions_qs = (
+            ClinicalHistoryRevision.objects
+            .filter(history_id=self.kwargs['patient_id'])
+            .select_related('author')
+            .defer('snapshot')
+        )
+        if 'number' in self.kwargs:
+            return get_object_or_404(revisions_qs, number=self.kwargs['number'])
+
+        try:
+            at = parse_datetime(self.request.query_params.get('at') or '')
+        except ValueError:
+            at = None
+        if at is None:
+            raise ValidationError({'at': 'Debe ser una fecha y hora ISO 8601.'})
+        if timezone.is_naive(at):
+            at = timezone.make_aware(at)
+        revision = revisions_qs.filter(created_at__lte=at).order_by('-created_at', '-number').first()
+        if revision is None:
+            raise Http404("No hay revisiones del historial anteriores a esa fecha.")
+        return revision
+
+    def get(self, request, patient_id, number=None):
+        revision = self.get_revision()
+        document = revisions.reconstruct(patient_id, revision.number)
+        if document is None:
+            logger.error(f"❌ [ClinicalHistory] No se pudo reconstruir la revisión {revision.number} del paciente {patient_id}")
+            return Response(
+                {"error": "No se pudo reconstruir esta revisión."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        data = ClinicalHistoryRevisionSerializer(revision).data
+        data['document'] = document
+        return Response(data)
 
 
 class DownloadDocumentView(generics.RetrieveAPIView):
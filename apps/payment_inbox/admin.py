@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import StripeEvent
+
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'event_type', 'tenant_schema', 'status', 'attempts', 'stripe_created')
+    list_filter = ('status', 'event_type', 'tenant_schema')
+    search_fields = ('event_id', 'ordering_key')
+    readonly_fields = ('payload', 'last_error', 'received_at', 'processed_at')
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class PaymentInboxConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.payment_inbox'
+    verbose_name = 'Bandeja de eventos de Stripe'
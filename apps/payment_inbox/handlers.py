@@ -0,0 +1,49 @@
+# apps/payment_inbox/handlers.py
+"""
+Procesado de cada tipo de evento de Stripe dentro del schema de la clínica.
+
+Cada handler recibe el `data.object` del evento y debe ser idempotente:
+un evento puede procesarse más de una vez si el worker cae a mitad.
+Devuelve True si hizo algo y False si el evento no aplica (se marca como
+ignorado).
+"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def checkout_session_completed(session):
+    """Pago confirmado: crear la cita desde la reserva y registrar la transacción."""
+    from apps.payment_system.services import record_paid_session
+
+    record_paid_session(session)
+    return True
+
+
+def checkout_session_expired(session):
+    """
+    Sesión de pago abandonada: liberar la reserva del horario. Las sesiones
+    anteriores a las reservas liberan su cita preliminar si sigue sin pagar.
+    """
+    from apps.appointments.holds import release_hold
+    from apps.appointments.models import Appointment
+
+    metadata = session.get('metadata') or {}
+    if metadata.get('hold_id'):
+        released = release_hold(metadata['hold_id'], session_id=session['id'])
+        target = f"la reserva {metadata['hold_id']}"
+    else:
+        deleted, _ = Appointment.objects.filter(
+            id=metadata.get('appointment_id'), status='pending', is_paid=False
+        ).delete()
+        released = bool(deleted)
+        target = f"la cita {metadata.get('appointment_id')}"
+    if released:
+        logger.info(f"Sesión {session['id']} expirada: liberado el horario de {target}")
+    return released
+
+
+HANDLERS = {
+    'checkout.session.completed': checkout_session_completed,
+    'checkout.session.expired': checkout_session_expired,
+}
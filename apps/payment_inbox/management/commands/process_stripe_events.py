@@ -0,0 +1,62 @@
+"""
+Comando para procesar la bandeja de eventos de Stripe.
+
+El webhook ya procesa cada evento en segundo plano al recibirlo; este
+comando recoge los reintentos pendientes y lo que quedó sin procesar si el
+proceso web se reinició. En producción corre con --loop como worker de
+Render (servicio psico-stripe-events en render.yaml).
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.payment_inbox.models import StripeEvent
+from apps.payment_inbox.worker import process_pending
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Procesa los eventos de Stripe pendientes o con reintento vencido'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help='Eventos por pasada')
+        parser.add_argument('--loop', action='store_true', help='Seguir procesando indefinidamente')
+        parser.add_argument('--interval', type=float, default=5.0, help='Segundos entre pasadas con --loop')
+        parser.add_argument(
+            '--retry-dead',
+            action='store_true',
+            help='Volver a encolar los eventos descartados (dead) antes de procesar'
+        )
+
+    def handle(self, *args, **options):
+        if options['retry_dead']:
+            requeued = StripeEvent.objects.filter(status='dead').update(
+                status='failed', attempts=0, next_attempt_at=timezone.now()
+            )
+            self.stdout.write(f'🔁 {requeued} eventos descartados vueltos a encolar')
+
+        while True:
+            try:
+                summary = process_pending(limit=options['limit'])
+            except Exception:
+                if not options['loop']:
+                    raise
+                # Un fallo de una pasada (p. ej. la BD se reinicia) no debe
+                # tumbar el worker: los eventos siguen en la bandeja
+                logger.exception("❌ Error procesando la bandeja de Stripe; se reintenta")
+                summary = None
+            if summary:
+                detail = ', '.join(f'{state}={count}' for state, count in sorted(summary.items()))
+                self.stdout.write(f'💳 Eventos de Stripe: {detail}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+            close_old_connections()
+
+        dead = StripeEvent.objects.filter(status='dead').count()
+        if dead:
+            self.stdout.write(self.style.WARNING(f'⚠️ {dead} eventos descartados requieren revisión'))
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-18 22:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StripeEvent',
+            fields=[
+                ('event_id', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('event_type', models.CharField(max_length=100)),
+                ('stripe_created', models.DateTimeField()),
+                ('payload', models.JSONField()),
+                ('tenant_schema', models.CharField(blank=True, max_length=63)),
+                ('ordering_key', models.CharField(blank=True, max_length=150)),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('failed', 'Fallido (se reintentará)'), ('processed', 'Procesado'), ('ignored', 'Ignorado'), ('dead', 'Descartado (sin más reintentos)')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField()),
+                ('last_error', models.TextField(blank=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Evento de Stripe',
+                'verbose_name_plural': 'Eventos de Stripe',
+                'db_table': 'stripe_events',
+                'ordering': ['stripe_created', 'received_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='stripe_event_due_idx'), models.Index(fields=['ordering_key', 'stripe_created'], name='stripe_event_order_idx')],
+            },
+        ),
+    ]
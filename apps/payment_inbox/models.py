@@ -0,0 +1,52 @@
+# apps/payment_inbox/models.py
+
+from django.db import models
+
+
+class StripeEvent(models.Model):
+    """
+    Bandeja de entrada de los webhooks de Stripe (schema público).
+
+    El webhook solo verifica la firma y guarda el evento aquí; el trabajo
+    en la base de datos de la clínica lo hace después el worker
+    (apps/payment_inbox/worker.py). La clave primaria es el id del evento
+    de Stripe, así que los reintentos de Stripe no duplican el trabajo.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('failed', 'Fallido (se reintentará)'),
+        ('processed', 'Procesado'),
+        ('ignored', 'Ignorado'),
+        ('dead', 'Descartado (sin más reintentos)'),
+    ]
+    # Estados que el worker todavía tiene que procesar
+    OPEN_STATUSES = ('pending', 'failed')
+
+    event_id = models.CharField(max_length=255, primary_key=True)
+    event_type = models.CharField(max_length=100)
+    # Momento en que Stripe creó el evento: define el orden de procesado
+    stripe_created = models.DateTimeField()
+    payload = models.JSONField()
+    tenant_schema = models.CharField(max_length=63, blank=True)
+    # Eventos con la misma clave se procesan en orden (p. ej. 'bienestar:42')
+    ordering_key = models.CharField(max_length=150, blank=True)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'stripe_events'
+        ordering = ['stripe_created', 'received_at']
+        verbose_name = 'Evento de Stripe'
+        verbose_name_plural = 'Eventos de Stripe'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='stripe_event_due_idx'),
+            models.Index(fields=['ordering_key', 'stripe_created'], name='stripe_event_order_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.event_id} ({self.status})"
@@ -0,0 +1,121 @@
+# apps/payment_inbox/tests.py
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from django_tenants.test.cases import TenantTestCase
+
+from apps.users.models import CustomUser
+from . import worker
+from .handlers import HANDLERS
+from .models import StripeEvent
+
+TEST_EVENT = 'test.event'
+
+
+class RetryDelayTests(SimpleTestCase):
+    def test_delay_doubles_per_attempt(self):
+        self.assertEqual(worker._retry_delay(1), timedelta(seconds=worker.RETRY_BASE_SECONDS))
+        self.assertEqual(worker._retry_delay(2), timedelta(seconds=worker.RETRY_BASE_SECONDS * 2))
+        self.assertEqual(worker._retry_delay(4), timedelta(seconds=worker.RETRY_BASE_SECONDS * 8))
+
+    def test_delay_is_capped(self):
+        self.assertEqual(worker._retry_delay(30), timedelta(seconds=worker.RETRY_MAX_SECONDS))
+
+
+class StripeInboxTests(TenantTestCase):
+    """Bandeja de eventos de Stripe: deduplicación, orden, reintentos y savepoints."""
+
+    def setUp(self):
+        self.created = int(timezone.now().timestamp())
+
+    def stripe_event(self, event_id, created_offset=0, hold_id='1'):
+        return {
+            'id': event_id,
+            'type': TEST_EVENT,
+            'created': self.created + created_offset,
+            'data': {'object': {
+                'id': f'cs_{event_id}',
+                'metadata': {'tenant_schema_name': self.tenant.schema_name, 'hold_id': hold_id},
+            }},
+        }
+
+    def handle(self, handler):
+        return mock.patch.dict(HANDLERS, {TEST_EVENT: handler})
+
+    def make_due(self, event_id):
+        StripeEvent.objects.filter(pk=event_id).update(next_attempt_at=timezone.now())
+
+    def test_duplicate_event_is_recorded_once(self):
+        self.assertTrue(worker.record_event(self.stripe_event('evt_1')))
+        self.assertFalse(worker.record_event(self.stripe_event('evt_1')))
+        self.assertEqual(StripeEvent.objects.filter(pk='evt_1').count(), 1)
+
+    def test_event_waits_for_earlier_event_with_same_key(self):
+        worker.record_event(self.stripe_event('evt_first', created_offset=0))
+        worker.record_event(self.stripe_event('evt_second', created_offset=5))
+        # Otra reserva: no comparte clave y no espera
+        worker.record_event(self.stripe_event('evt_other', created_offset=5, hold_id='2'))
+
+        with self.handle(lambda payload: True):
+            self.assertIsNone(worker.process_event('evt_second'))
+            self.assertEqual(worker.process_event('evt_other'), 'processed')
+
+            self.assertEqual(worker.process_event('evt_first'), 'processed')
+            self.assertEqual(worker.process_event('evt_second'), 'processed')
+
+    def test_failure_schedules_retry_with_backoff(self):
+        worker.record_event(self.stripe_event('evt_1'))
+
+        def fail(payload):
+            raise RuntimeError('Stripe caído')
+
+        before = timezone.now()
+        with self.handle(fail):
+            self.assertEqual(worker.process_event('evt_1'), 'failed')
+
+        event = StripeEvent.objects.get(pk='evt_1')
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(event.last_error, 'RuntimeError: Stripe caído')
+        self.assertGreaterEqual(event.next_attempt_at, before + worker._retry_delay(1))
+        # Todavía no le toca
+        with self.handle(fail):
+            self.assertIsNone(worker.process_event('evt_1'))
+
+    @override_settings(STRIPE_EVENT_MAX_ATTEMPTS=2)
+    def test_event_is_dead_after_max_attempts(self):
+        worker.record_event(self.stripe_event('evt_1'))
+
+        def fail(payload):
+            raise RuntimeError('Sin arreglo')
+
+        with self.handle(fail):
+            self.assertEqual(worker.process_event('evt_1'), 'failed')
+            self.make_due('evt_1')
+            self.assertEqual(worker.process_event('evt_1'), 'dead')
+            self.make_due('evt_1')
+            self.assertIsNone(worker.process_event('evt_1'))
+
+        event = StripeEvent.objects.get(pk='evt_1')
+        self.assertEqual(event.status, 'dead')
+        self.assertEqual(event.attempts, 2)
+
+    def test_handler_failure_rolls_back_only_its_savepoint(self):
+        worker.record_event(self.stripe_event('evt_1'))
+
+        def half_done(payload):
+            CustomUser.objects.create_user(
+                email='parcial@test.com', password='password123',
+                first_name='A', last_name='B', user_type='patient'
+            )
+            raise RuntimeError('Falla a mitad')
+
+        with self.handle(half_done):
+            self.assertEqual(worker.process_event('evt_1'), 'failed')
+
+        # El trabajo del handler se deshizo; el intento quedó anotado
+        self.assertFalse(CustomUser.objects.filter(email='parcial@test.com').exists())
+        event = StripeEvent.objects.get(pk='evt_1')
+        self.assertEqual(event.status, 'failed')
+        self.assertEqual(event.attempts, 1)
@@ -0,0 +1,164 @@
+# apps/payment_inbox/worker.py
+"""
+Worker de la bandeja de eventos de Stripe.
+
+- `record_event`: lo usa el webhook. Guarda el evento por su id; un
+  reintento de Stripe encuentra la fila y no hace nada más.
+- `process_event`: bloquea la fila (SKIP LOCKED, así varios procesos no
+  pisan el mismo evento), ejecuta el handler en el schema de la clínica y
+  anota el resultado. Los fallos se reintentan con espera exponencial y,
+  tras STRIPE_EVENT_MAX_ATTEMPTS intentos, el evento queda 'dead'.
+- Orden: un evento no se procesa mientras haya otro anterior (según la
+  fecha de creación en Stripe) con la misma `ordering_key` sin terminar.
+
+Tras guardar un evento se procesa enseguida en un hilo del propio proceso;
+el comando `process_stripe_events` (worker de Render, ver render.yaml)
+recoge reintentos y lo que quedara pendiente tras un reinicio.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from django_tenants.utils import schema_context
+
+from .handlers import HANDLERS
+from .models import StripeEvent
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 60 * 60
+
+_executor = None
+
+
+def _max_attempts():
+    return getattr(settings, 'STRIPE_EVENT_MAX_ATTEMPTS', 8)
+
+
+def record_event(event):
+    """
+    Guarda el evento (dict del JSON ya verificado por firma).
+    Devuelve True si es nuevo.
+    """
+    obj = event['data']['object']
+    metadata = obj.get('metadata') or {}
+    schema_name = metadata.get('tenant_schema_name') or ''
+    # Reserva de horario (o cita, en sesiones antiguas) a la que se refiere
+    target = f"hold-{metadata['hold_id']}" if metadata.get('hold_id') else metadata.get('appointment_id')
+
+    _, created = StripeEvent.objects.get_or_create(
+        event_id=event['id'],
+        defaults={
+            'event_type': event['type'],
+            'stripe_created': datetime.fromtimestamp(event['created'], tz=dt_timezone.utc),
+            'payload': obj,
+            'tenant_schema': schema_name,
+            'ordering_key': f"{schema_name}:{target}" if target else obj.get('id', ''),
+            'next_attempt_at': timezone.now(),
+        }
+    )
+    return created
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def _has_earlier_open_event(event):
+    if not event.ordering_key:
+        return False
+    return StripeEvent.objects.filter(
+        ordering_key=event.ordering_key,
+        stripe_created__lt=event.stripe_created,
+        status__in=StripeEvent.OPEN_STATUSES,
+    ).exists()
+
+
+def _dispatch(event):
+    handler = HANDLERS.get(event.event_type)
+    if handler is None:
+        return False
+    if not event.tenant_schema:
+        logger.warning(f"Evento {event.event_id} sin tenant_schema_name en metadata")
+        return False
+
+    from apps.tenants.models import Clinic
+    if not Clinic.objects.filter(schema_name=event.tenant_schema).exists():
+        raise LookupError(f"Clínica '{event.tenant_schema}' no encontrada")
+    with schema_context(event.tenant_schema):
+        return handler(event.payload)
+
+
+def process_event(event_id):
+    """
+    Procesa un evento si está pendiente y le toca. Devuelve el estado final,
+    o None si otro worker lo tiene bloqueado o todavía no le toca.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        event = StripeEvent.objects.select_for_update(skip_locked=True).filter(
+            pk=event_id, status__in=StripeEvent.OPEN_STATUSES, next_attempt_at__lte=now
+        ).first()
+        if event is None or _has_earlier_open_event(event):
+            return None
+
+        event.attempts += 1
+        try:
+            # Savepoint: si el handler falla se deshace solo su trabajo
+            with transaction.atomic():
+                handled = _dispatch(event)
+        except Exception as e:
+            event.last_error = f"{type(e).__name__}: {e}"
+            if event.attempts >= _max_attempts():
+                event.status = 'dead'
+                logger.error(f"💀 Evento {event.event_id} ({event.event_type}) descartado tras {event.attempts} intentos: {e}")
+            else:
+                event.status = 'failed'
+                event.next_attempt_at = now + _retry_delay(event.attempts)
+                logger.warning(f"⚠️ Evento {event.event_id} falló (intento {event.attempts}): {e}")
+        else:
+            event.status = 'processed' if handled else 'ignored'
+            event.last_error = ''
+            event.processed_at = timezone.now()
+        event.save(update_fields=['status', 'attempts', 'next_attempt_at', 'last_error', 'processed_at'])
+        return event.status
+
+
+def process_pending(limit=100):
+    """Procesa los eventos vencidos en orden. Devuelve {estado: cantidad}."""
+    due = list(StripeEvent.objects.filter(
+        status__in=StripeEvent.OPEN_STATUSES, next_attempt_at__lte=timezone.now()
+    ).order_by('stripe_created', 'received_at').values_list('event_id', flat=True)[:limit])
+
+    summary = {}
+    for event_id in due:
+        result = process_event(event_id) or 'skipped'
+        summary[result] = summary.get(result, 0) + 1
+    return summary
+
+
+# --- Procesado inmediato en segundo plano ---
+
+def _process_in_thread(event_id):
+    try:
+        process_event(event_id)
+    except Exception:
+        logger.exception(f"Error procesando el evento de Stripe {event_id}")
+    finally:
+        # El hilo no pasa por request_finished: cerrar sus conexiones
+        connections.close_all()
+
+
+def enqueue_event(event_id):
+    """Procesa el evento tras el commit, fuera de la request del webhook."""
+    global _executor
+    if not getattr(settings, 'STRIPE_EVENT_INLINE_WORKER', True):
+        return
+    if _executor is None:
+        # Un solo hilo: dentro del proceso los eventos salen en orden de llegada
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='stripe-events')
+    transaction.on_commit(lambda: _executor.submit(_process_in_thread, event_id))
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PaymentSystemConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.payment_system'
+
+    def ready(self):
+        from . import signals  # noqa: F401 - mantenimiento de RevenueDaily
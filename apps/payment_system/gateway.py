@@ -0,0 +1,233 @@
+# apps/payment_system/gateway.py
+"""
+Pasarela de pagos: todas las llamadas de red a Stripe pasan por aquí.
+
+- `StripeGateway`: un único StripeClient por proceso con su propia sesión
+  HTTP (requests.Session, conexiones keep-alive reutilizadas entre
+  requests), timeouts de conexión/lectura, reintentos de red y claves de
+  idempotencia, así un reintento no crea dos sesiones de pago.
+- `FakeGateway`: pasarela local en memoria para tests y benchmarks. No
+  hace llamadas de red; las sesiones se marcan como pagadas con
+  `mark_paid`, que también genera su movimiento de saldo (comisión).
+
+La pasarela se elige con el setting PAYMENT_GATEWAY ('stripe' o 'fake')
+y se obtiene con `get_gateway()`. Cada llamada registra su latencia en
+el logger del módulo.
+"""
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from decimal import Decimal
+from functools import lru_cache
+
+import requests
+import stripe
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentGateway(ABC):
+    """Interfaz común. Los errores de la pasarela son stripe.error.StripeError."""
+
+    name = None
+
+    @abstractmethod
+    def create_checkout_session(self, params, idempotency_key=None):
+        ...
+
+    @abstractmethod
+    def retrieve_checkout_session(self, session_id):
+        ...
+
+    @abstractmethod
+    def expire_checkout_session(self, session_id):
+        """Anula una sesión abierta: ya no se puede pagar."""
+
+    @abstractmethod
+    def list_balance_transactions(self, params):
+        """Una página de movimientos de saldo (params de la API de Stripe)."""
+
+    def iter_balance_transactions(self, created_gte, created_lt, page_size=100):
+        """
+        Movimientos de saldo creados en [created_gte, created_lt) (timestamps),
+        página a página, con el cargo expandido en `source`.
+        """
+        params = {
+            'created': {'gte': created_gte, 'lt': created_lt},
+            'limit': page_size,
+            'expand': ['data.source'],
+        }
+        while True:
+            page = self.list_balance_transactions(params)
+            yield from page.data
+            if not page.has_more or not page.data:
+                return
+            params['starting_after'] = page.data[-1].id
+
+    def _timed(self, operation, call, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            logger.info(f"⏱️ {self.name}.{operation}: {elapsed:.0f}ms")
+
+
+class StripeGateway(PaymentGateway):
+    name = 'stripe'
+
+    def __init__(self, api_key, timeout=(3.05, 10), max_network_retries=2):
+        self.session = requests.Session()
+        self.client = stripe.StripeClient(
+            api_key,
+            max_network_retries=max_network_retries,
+            http_client=stripe.RequestsClient(timeout=timeout, session=self.session),
+        )
+
+    def create_checkout_session(self, params, idempotency_key=None):
+        options = {'idempotency_key': idempotency_key} if idempotency_key else {}
+        return self._timed(
+            'create_checkout_session', self.client.checkout.sessions.create,
+            params=params, options=options
+        )
+
+    def retrieve_checkout_session(self, session_id):
+        return self._timed(
+            'retrieve_checkout_session', self.client.checkout.sessions.retrieve, session_id
+        )
+
+    def expire_checkout_session(self, session_id):
+        return self._timed(
+            'expire_checkout_session', self.client.checkout.sessions.expire, session_id
+        )
+
+    def list_balance_transactions(self, params):
+        return self._timed(
+            'list_balance_transactions', self.client.balance_transactions.list, params=params
+        )
+
+
+class FakeGateway(PaymentGateway):
+    """Sesiones de pago en memoria del proceso, con la forma de las de Stripe."""
+
+    name = 'fake'
+
+    # Comisión simulada: 2,9% + 30 centavos, como una tarjeta en Stripe
+    FEE_PERCENT = Decimal('0.029')
+    FEE_FIXED = 30
+
+    def __init__(self):
+        self.sessions = {}
+        self.balance_transactions = []
+        self._idempotent = {}
+
+    def create_checkout_session(self, params, idempotency_key=None):
+        if idempotency_key in self._idempotent:
+            return self._idempotent[idempotency_key]
+
+        session_id = f"cs_fake_{uuid.uuid4().hex}"
+        amount_total = sum(
+            item['price_data']['unit_amount'] * item.get('quantity', 1)
+            for item in params.get('line_items', [])
+        )
+        session = stripe.checkout.Session.construct_from({
+            'id': session_id,
+            'object': 'checkout.session',
+            'url': params['success_url'].replace('{CHECKOUT_SESSION_ID}', session_id),
+            'status': 'open',
+            'payment_status': 'unpaid',
+            'payment_intent': None,
+            'amount_total': amount_total,
+            'currency': params['line_items'][0]['price_data']['currency'] if params.get('line_items') else 'usd',
+            'expires_at': params.get('expires_at'),
+            'metadata': {key: str(value) for key, value in (params.get('metadata') or {}).items()},
+        }, None)
+        self.sessions[session_id] = session
+        if idempotency_key:
+            self._idempotent[idempotency_key] = session
+        return session
+
+    def retrieve_checkout_session(self, session_id):
+        try:
+            return self.sessions[session_id]
+        except KeyError:
+            raise stripe.error.InvalidRequestError(
+                f"No such checkout.session: '{session_id}'", 'id', http_status=404
+            )
+
+    def expire_checkout_session(self, session_id):
+        session = self.retrieve_checkout_session(session_id)
+        if session['status'] != 'open':
+            raise stripe.error.InvalidRequestError(
+                "Only Checkout Sessions with a status of 'open' can be expired.", None, http_status=400
+            )
+        session['status'] = 'expired'
+        return session
+
+    def mark_paid(self, session_id):
+        """Simula que el paciente completó el pago."""
+        session = self.sessions[session_id]
+        session['status'] = 'complete'
+        session['payment_status'] = 'paid'
+        session['payment_intent'] = f"pi_fake_{uuid.uuid4().hex}"
+
+        amount = session['amount_total']
+        fee = int((amount * self.FEE_PERCENT).quantize(Decimal('1'))) + self.FEE_FIXED
+        self.balance_transactions.append(stripe.BalanceTransaction.construct_from({
+            'id': f"txn_fake_{uuid.uuid4().hex}",
+            'object': 'balance_transaction',
+            'type': 'charge',
+            'amount': amount,
+            'fee': fee,
+            'net': amount - fee,
+            'currency': session['currency'],
+            'created': int(time.time()),
+            'source': {'id': f"ch_fake_{uuid.uuid4().hex}", 'object': 'charge',
+                       'payment_intent': session['payment_intent']},
+        }, None))
+        return session
+
+    def list_balance_transactions(self, params):
+        created = params.get('created', {})
+        # Como Stripe: más recientes primero
+        matching = [
+            txn for txn in reversed(self.balance_transactions)
+            if created.get('gte', 0) <= txn.created < created.get('lt', float('inf'))
+        ]
+        if params.get('starting_after'):
+            ids = [txn.id for txn in matching]
+            matching = matching[ids.index(params['starting_after']) + 1:]
+        limit = params.get('limit', 10)
+        return stripe.ListObject.construct_from({
+            'object': 'list',
+            'data': matching[:limit],
+            'has_more': len(matching) > limit,
+        }, None)
+
+
+@lru_cache(maxsize=None)
+def _build_gateway(name):
+    if name == 'fake':
+        return FakeGateway()
+    if name == 'stripe':
+        return StripeGateway(
+            settings.STRIPE_SECRET_KEY,
+            timeout=(settings.STRIPE_CONNECT_TIMEOUT, settings.STRIPE_READ_TIMEOUT),
+            max_network_retries=settings.STRIPE_MAX_NETWORK_RETRIES,
+        )
+    raise ValueError(f"PAYMENT_GATEWAY desconocida: '{name}'")
+
+
+def get_gateway():
+    """Pasarela configurada (una instancia por proceso y tipo)."""
+    return _build_gateway(getattr(settings, 'PAYMENT_GATEWAY', 'stripe'))
+
+
+def checkout_idempotency_key(hold, schema_name):
+    """
+    Clave de idempotencia de la sesión de pago de una reserva: la misma
+    reserva (misma adquisición) no genera dos sesiones aunque se reintente.
+    """
+    return f"checkout-{schema_name}-{hold.id}-{int(hold.created_at.timestamp() * 1000)}"
@@ -0,0 +1,92 @@
+"""
+Comando para conciliar los pagos con Stripe.
+
+Descarga una sola vez (en páginas) los movimientos de saldo de la cuenta
+de Stripe de los últimos días, rellena comisión y neto de las
+transacciones de cada clínica y recalcula sus ingresos diarios
+(RevenueDaily). Pensado para ejecutarse cada noche (cron de Render).
+Con PAYMENT_GATEWAY=fake funciona sin red.
+"""
+
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django_tenants.utils import schema_context
+from apps.tenants.models import Clinic
+from apps.payment_system import revenue
+from apps.payment_system.gateway import get_gateway
+
+
+class Command(BaseCommand):
+    help = 'Concilia los pagos con Stripe (comisiones y neto) y recalcula los ingresos diarios'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            type=str,
+            help='Schema del tenant específico (ej: mindcare, bienestar)',
+            default=None
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='Días hacia atrás de movimientos de Stripe a descargar'
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=100,
+            help='Movimientos por página de la API de Stripe (máximo 100)'
+        )
+        parser.add_argument(
+            '--rebuild-from',
+            type=str,
+            default=None,
+            help='Recalcular los ingresos diarios desde esta fecha (YYYY-MM-DD), p. ej. el historial previo'
+        )
+
+    def handle(self, *args, **options):
+        rebuild_from = None
+        if options.get('rebuild_from'):
+            try:
+                rebuild_from = datetime.strptime(options['rebuild_from'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('Formato de fecha inválido. Use YYYY-MM-DD')
+
+        specific_tenant = options.get('tenant')
+        if specific_tenant:
+            tenants = Clinic.objects.filter(schema_name=specific_tenant)
+            if not tenants.exists():
+                raise CommandError(f'Tenant "{specific_tenant}" no encontrado')
+        else:
+            tenants = Clinic.objects.exclude(schema_name='public')
+
+        until = timezone.now()
+        since = until - timedelta(days=options['days'])
+        fees = revenue.fetch_balance_fees(
+            get_gateway(), since, until, page_size=min(options['page_size'], 100)
+        )
+        self.stdout.write(f'💳 {len(fees)} cargos de Stripe desde {since:%Y-%m-%d %H:%M}')
+
+        first_day = min(timezone.localdate(since), rebuild_from or timezone.localdate(since))
+        today = timezone.localdate()
+        failures = 0
+        for tenant in tenants:
+            try:
+                with schema_context(tenant.schema_name):
+                    days = revenue.backfill_fees(fees)
+                    # También los días de pagos antiguos que se acaban de conciliar
+                    buckets = revenue.rebuild(min(days | {first_day}), today)
+                self.stdout.write(
+                    f'✅ {tenant.name} ({tenant.schema_name}): '
+                    f'{len(days)} días con pagos conciliados, {buckets} filas de ingresos'
+                )
+            except Exception as e:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'❌ {tenant.schema_name}: {e}'))
+
+        if failures:
+            raise CommandError(f'{failures} clínica(s) no se pudieron conciliar')
+        self.stdout.write(self.style.SUCCESS('✅ Pagos conciliados'))
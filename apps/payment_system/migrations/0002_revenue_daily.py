@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-18 22:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_slothold'),
+        ('payment_system', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevenueDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('transactions', models.IntegerField(default=0)),
+                ('gross_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('stripe_fee', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('net_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('unreconciled', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Ingreso Diario',
+                'verbose_name_plural': 'Ingresos Diarios',
+                'db_table': 'revenue_daily',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='paymenttransaction',
+            index=models.Index(fields=['status', 'paid_at'], name='payment_status_paid_idx'),
+        ),
+        migrations.AddField(
+            model_name='revenuedaily',
+            name='psychologist',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_revenue', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='revenuedaily',
+            index=models.Index(fields=['psychologist', 'date'], name='revenue_psychologist_date_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='revenuedaily',
+            constraint=models.UniqueConstraint(fields=('date', 'psychologist'), name='unique_revenue_day_psychologist'),
+        ),
+    ]
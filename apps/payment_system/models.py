@@ -55,6 +55,49 @@ class PaymentTransaction(models.Model):
         verbose_name = 'Transacción de Pago'
         verbose_name_plural = 'Transacciones de Pago'
         ordering = ['-created_at']
+        indexes = [
+            # Reportes de ingresos: pagos completados en un rango de fechas
+            models.Index(fields=['status', 'paid_at'], name='payment_status_paid_idx'),
+        ]
     
     def __str__(self):
         return f"Pago {self.stripe_session_id} - {self.amount} {self.currency}"
+
+
+class RevenueDaily(models.Model):
+    """
+    Ingresos de un psicólogo en un día (pagos completados por fecha de pago).
+
+    Los reportes de ingresos leen estas filas en lugar de recorrer las
+    transacciones. Se mantienen desde las señales de PaymentTransaction y
+    se recalculan al reconciliar con Stripe (`reconcile_payments`).
+    Ver apps/payment_system/revenue.py.
+    """
+    date = models.DateField()
+    psychologist = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='daily_revenue'
+    )
+    transactions = models.IntegerField(default=0)
+    gross_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Comisiones y neto solo de los pagos ya reconciliados con Stripe
+    stripe_fee = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    net_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    unreconciled = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'revenue_daily'
+        ordering = ['-date']
+        verbose_name = 'Ingreso Diario'
+        verbose_name_plural = 'Ingresos Diarios'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'psychologist'], name='unique_revenue_day_psychologist'),
+        ]
+        indexes = [
+            models.Index(fields=['psychologist', 'date'], name='revenue_psychologist_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"Ingresos {self.date} - {self.psychologist_id}: {self.gross_amount}"
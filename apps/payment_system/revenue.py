@@ -0,0 +1,185 @@
+# apps/payment_system/revenue.py
+"""
+Ingresos de la clínica: conciliación con Stripe y agregados diarios.
+
+- `fetch_balance_fees`: recorre los movimientos de saldo de la pasarela en
+  páginas y devuelve comisión y neto por PaymentIntent. La cuenta de Stripe
+  es una sola para todas las clínicas: se descarga una vez y se aplica en
+  cada schema.
+- `backfill_fees`: rellena `stripe_fee`/`net_amount` de las transacciones
+  que aún no los tienen.
+- `rebuild`: recalcula RevenueDaily (psicólogo x día) de un rango de fechas
+  con una sola consulta agrupada. Las señales (signals.py) lo usan para el
+  día de cada transacción guardada; la conciliación, para todo el rango.
+  Cada recálculo toma antes un advisory lock por día del tenant: dos pagos
+  del mismo día que se confirman a la vez se recalculan uno detrás de otro
+  y el segundo ya ve el pago del primero.
+- `report`: totales y series de un rango leídos solo de RevenueDaily.
+
+RevenueDaily es la única fuente de ingresos: el resumen ClinicMetrics lee
+de aquí los ingresos de cada día (apps/clinic_admin/metrics.py).
+"""
+import logging
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import PaymentTransaction, RevenueDaily
+
+logger = logging.getLogger(__name__)
+
+AGGREGATE_FIELDS = ['transactions', 'gross_amount', 'stripe_fee', 'net_amount', 'unreconciled']
+
+
+def _day_bounds(start, end):
+    """[inicio de `start`, inicio del día siguiente a `end`) en la zona local."""
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz),
+    )
+
+
+def _cents(value):
+    return Decimal(value) / 100  # Stripe usa centavos
+
+
+# --- Conciliación con la pasarela ---
+
+def fetch_balance_fees(gateway, since, until, page_size=100):
+    """{payment_intent: (comisión, neto)} de los cargos creados en [since, until)."""
+    fees = {}
+    for txn in gateway.iter_balance_transactions(
+        int(since.timestamp()), int(until.timestamp()), page_size=page_size
+    ):
+        source = txn.get('source')
+        payment_intent = source.get('payment_intent') if hasattr(source, 'get') else None
+        if payment_intent:
+            fees[payment_intent] = (_cents(txn['fee']), _cents(txn['net']))
+    return fees
+
+
+def backfill_fees(fees):
+    """
+    Completa comisión y neto de las transacciones pendientes de conciliar.
+    Devuelve los días (de pago) afectados.
+    """
+    pending = list(PaymentTransaction.objects.filter(
+        stripe_payment_intent_id__in=list(fees), stripe_fee__isnull=True
+    ).only('id', 'stripe_payment_intent_id', 'paid_at'))
+    for payment in pending:
+        payment.stripe_fee, payment.net_amount = fees[payment.stripe_payment_intent_id]
+    PaymentTransaction.objects.bulk_update(pending, ['stripe_fee', 'net_amount'], batch_size=500)
+    return {timezone.localdate(payment.paid_at) for payment in pending if payment.paid_at}
+
+
+# --- Agregados diarios ---
+
+def lock_days(days):
+    """
+    Advisory lock de transacción por (schema, día), en orden ascendente
+    para que dos recálculos con días en común no se bloqueen en cruz. Se
+    libera al terminar la transacción exterior (la del pago), así que el
+    siguiente recálculo del día lee con el pago ya confirmado.
+    """
+    keys = sorted(f"revenue_daily:{connection.schema_name}:{day.isoformat()}" for day in days)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_advisory_xact_lock(hashtext(key)) FROM unnest(%s::text[]) AS key ORDER BY key',
+            [keys]
+        )
+
+
+def rebuild(start, end, psychologist_id=None):
+    """Recalcula las filas de RevenueDaily entre `start` y `end` (inclusive)."""
+    lower, upper = _day_bounds(start, end)
+    payments = PaymentTransaction.objects.filter(
+        status='completed', paid_at__gte=lower, paid_at__lt=upper
+    )
+    rows = RevenueDaily.objects.filter(date__range=(start, end))
+    if psychologist_id is not None:
+        payments = payments.filter(appointment__psychologist_id=psychologist_id)
+        rows = rows.filter(psychologist_id=psychologist_id)
+
+    with transaction.atomic():
+        # El lock va antes de leer los pagos: la lectura ya ve lo que
+        # confirmó quien tenía el día bloqueado
+        lock_days(start + timedelta(days=offset) for offset in range((end - start).days + 1))
+        buckets = [
+            RevenueDaily(
+                date=bucket['day'],
+                psychologist_id=bucket['appointment__psychologist_id'],
+                transactions=bucket['count'],
+                gross_amount=bucket['gross'] or 0,
+                stripe_fee=bucket['fee'] or 0,
+                net_amount=bucket['net'] or 0,
+                unreconciled=bucket['pending'],
+            )
+            for bucket in payments.annotate(day=TruncDate('paid_at')).values(
+                'day', 'appointment__psychologist_id'
+            ).annotate(
+                # Alias distintos de los campos: annotate no admite nombres de campos
+                count=Count('id'),
+                gross=Sum('amount'),
+                fee=Sum('stripe_fee'),
+                net=Sum('net_amount'),
+                pending=Count('id', filter=Q(stripe_fee__isnull=True)),
+            )
+        ]
+
+        # Borrar y reinsertar el rango; el upsert cubre filas que otra
+        # transacción haya creado entretanto
+        rows.delete()
+        RevenueDaily.objects.bulk_create(
+            buckets,
+            update_conflicts=True,
+            unique_fields=['date', 'psychologist'],
+            update_fields=AGGREGATE_FIELDS + ['updated_at'],
+        )
+    return len(buckets)
+
+
+def refresh_days(days, psychologist_id):
+    """Recalcula las filas (psicólogo, día) sin abortar la transacción del negocio."""
+    try:
+        with transaction.atomic():
+            # Todos los días bloqueados a la vez y en orden (ver lock_days)
+            lock_days(days)
+            for day in days:
+                rebuild(day, day, psychologist_id)
+    except Exception:
+        logger.exception(f"No se pudieron actualizar los ingresos de {', '.join(map(str, days))}")
+
+
+# --- Reporte ---
+
+def report(start, end, psychologist_id=None):
+    """Totales, serie diaria y desglose por psicólogo de [start, end]."""
+    rows = RevenueDaily.objects.filter(date__range=(start, end))
+    if psychologist_id is not None:
+        rows = rows.filter(psychologist_id=psychologist_id)
+    sums = {f'total_{field}': Sum(field) for field in AGGREGATE_FIELDS}
+
+    def totals_of(row):
+        return {field: row[f'total_{field}'] or 0 for field in AGGREGATE_FIELDS}
+
+    by_day = rows.values('date').annotate(**sums).order_by('date')
+    by_psychologist = rows.values(
+        'psychologist_id', 'psychologist__first_name', 'psychologist__last_name'
+    ).annotate(**sums).order_by('-total_gross_amount')
+    return {
+        'totals': totals_of(rows.aggregate(**sums)),
+        'by_day': [{'date': row['date'], **totals_of(row)} for row in by_day],
+        'by_psychologist': [
+            {
+                'psychologist_id': row['psychologist_id'],
+                'psychologist_name': f"{row['psychologist__first_name']} {row['psychologist__last_name']}".strip(),
+                **totals_of(row),
+            }
+            for row in by_psychologist
+        ],
+    }
@@ -2,6 +2,7 @@
 import stripe
 from rest_framework import serializers
 from django.conf import settings
+from .gateway import get_gateway
 from .models import PaymentTransaction
 from apps.appointments.models import Appointment
 
@@ -40,27 +41,22 @@ class PaymentConfirmationSerializer(serializers.Serializer):
         
         try:
             # 1. Validamos la sesión con Stripe
-            session = stripe.checkout.Session.retrieve(session_id)
+            session = get_gateway().retrieve_checkout_session(session_id)
             if session.payment_status != 'paid':
                 raise serializers.ValidationError("El pago no ha sido completado.")
             
-            # 2. Obtenemos la cita de los metadatos
-            metadata = session.get('metadata', {})
-            appointment_id = metadata.get('appointment_id')
-            if not appointment_id:
-                raise serializers.ValidationError("ID de cita no encontrado en la sesión de Stripe.")
+            # 2. La sesión debe referirse a una reserva (o a una cita, en sesiones antiguas)
+            metadata = session.get('metadata') or {}
+            if not metadata.get('hold_id') and not metadata.get('appointment_id'):
+                raise serializers.ValidationError("ID de reserva no encontrado en la sesión de Stripe.")
             
-            # 3. Buscamos la cita en nuestra BD
-            appointment = Appointment.objects.get(id=appointment_id)
-            
-            # 4. ¡LA CLAVE! Guardamos todo en validated_data para que la vista lo use
+            # 3. La vista crea la cita y la transacción a partir de la sesión
             data['stripe_session'] = session
-            data['appointment'] = appointment
             
             return data
         
-        except Appointment.DoesNotExist:
-            raise serializers.ValidationError("La cita asociada a este pago no fue encontrada.")
+        except serializers.ValidationError:
+            raise
         except stripe.error.StripeError as e:
             raise serializers.ValidationError(f"Error de Stripe: {str(e)}")
         except Exception as e:
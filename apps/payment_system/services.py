@@ -0,0 +1,64 @@
+# apps/payment_system/services.py
+"""
+Registro de un pago confirmado, común al webhook (apps/payment_inbox) y a
+la confirmación desde el frontend (ConfirmPaymentView). Es idempotente:
+la segunda vía que llegue encuentra la transacción y no repite nada.
+"""
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
+
+from apps.appointments.holds import confirm_hold
+from apps.appointments.models import Appointment, SlotHold
+from .models import PaymentTransaction
+
+logger = logging.getLogger(__name__)
+
+
+def record_paid_session(session):
+    """
+    Crea la cita (desde la reserva) y la transacción de una sesión pagada.
+    Devuelve (cita, creada). Las sesiones anteriores a las reservas llevan
+    `appointment_id` en metadata y solo marcan la cita como pagada.
+    """
+    metadata = session.get('metadata') or {}
+    with transaction.atomic():
+        existing = PaymentTransaction.objects.select_related('appointment').filter(
+            stripe_session_id=session['id']
+        ).first()
+        if existing:
+            return existing.appointment, False
+
+        if metadata.get('hold_id'):
+            try:
+                appointment = confirm_hold(metadata['hold_id'], session['id'])
+            except SlotHold.DoesNotExist:
+                # La otra vía confirmó la reserva mientras esperábamos su
+                # bloqueo: ya hizo el commit de la cita y la transacción
+                existing = PaymentTransaction.objects.select_related('appointment').filter(
+                    stripe_session_id=session['id']
+                ).first()
+                if existing is None:
+                    raise
+                return existing.appointment, False
+        else:
+            appointment = Appointment.objects.get(id=metadata.get('appointment_id'))
+            appointment.is_paid = True
+            appointment.status = 'confirmed'
+            appointment.save()
+        logger.info(f"Pago confirmado para cita {appointment.id}")
+
+        PaymentTransaction.objects.create(
+            stripe_session_id=session['id'],
+            appointment=appointment,
+            patient_id=appointment.patient_id,
+            stripe_payment_intent_id=session.get('payment_intent'),
+            amount=Decimal(session.get('amount_total') or 0) / 100,  # Stripe usa centavos
+            currency=(session.get('currency') or 'usd').upper(),
+            status='completed',
+            paid_at=timezone.now()
+        )
+        logger.info(f"Transacción de pago registrada: {session['id']}")
+    return appointment, True
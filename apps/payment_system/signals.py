@@ -0,0 +1,58 @@
+# apps/payment_system/signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import revenue
+from .models import PaymentTransaction
+
+# Campos que deciden en qué día de RevenueDaily cuenta un pago
+REVENUE_FIELDS = ('status', 'paid_at')
+
+
+def _revenue_day(values):
+    paid_at = values.get('paid_at')
+    if values.get('status') != 'completed' or paid_at is None:
+        return None
+    return timezone.localdate(paid_at)
+
+
+def _psychologist_id(instance):
+    if PaymentTransaction.appointment.is_cached(instance):
+        return instance.appointment.psychologist_id
+    from apps.appointments.models import Appointment
+    return Appointment.objects.filter(pk=instance.appointment_id).values_list(
+        'psychologist_id', flat=True
+    ).first()
+
+
+@receiver(pre_save, sender=PaymentTransaction)
+def remember_revenue_day(sender, instance, update_fields=None, **kwargs):
+    """
+    Día en el que el pago cuenta antes de guardarlo, leído de la BD. Sin
+    consulta si es nuevo o si el guardado no toca status/paid_at (p. ej.
+    la conciliación de comisiones).
+    """
+    if instance._state.adding:
+        instance._revenue_day = None
+    elif update_fields is not None and not set(REVENUE_FIELDS) & set(update_fields):
+        instance._revenue_day = _revenue_day(instance.__dict__)
+    else:
+        previous = sender._base_manager.filter(pk=instance.pk).values(*REVENUE_FIELDS).first()
+        instance._revenue_day = _revenue_day(previous) if previous else None
+
+
+@receiver(post_save, sender=PaymentTransaction)
+def refresh_revenue(sender, instance, **kwargs):
+    """Recalcula la fila RevenueDaily del día anterior y del nuevo del pago."""
+    days = {instance.__dict__.pop('_revenue_day', None), _revenue_day(instance.__dict__)} - {None}
+    if not days:
+        return
+    revenue.refresh_days(sorted(days), _psychologist_id(instance))
+
+
+@receiver(post_delete, sender=PaymentTransaction)
+def discount_revenue(sender, instance, **kwargs):
+    day = _revenue_day(instance.__dict__)
+    if day is not None:
+        revenue.refresh_days([day], _psychologist_id(instance))
@@ -1,3 +1,176 @@
-from django.test import TestCase
+# apps/payment_system/tests.py
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.db.models.base import ModelBase
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django_tenants.test.cases import TenantTestCase
+
+from apps.appointments.holds import acquire_hold, attach_session, release_hold
+from apps.appointments.models import Appointment, SlotHold
+from apps.users.models import CustomUser
+from . import signals
+from .models import PaymentTransaction
+from .services import record_paid_session
+
+
+class CheckoutRaceTests(TenantTestCase):
+    """
+    Carreras del checkout con reservas (SlotHold): el reintento del mismo
+    paciente y la confirmación simultánea por webhook y por confirm-payment.
+    """
+
+    def setUp(self):
+        self.patient = CustomUser.objects.create_user(
+            email='paciente@test.com', password='password123',
+            first_name='Ana', last_name='Paciente', user_type='patient'
+        )
+        self.psychologist = CustomUser.objects.create_user(
+            email='psicologo@test.com', password='password123',
+            first_name='Luis', last_name='Psicólogo', user_type='professional'
+        )
+        self.slot = {
+            'psychologist': self.psychologist,
+            'appointment_date': date.today() + timedelta(days=3),
+            'start_time': time(10, 0),
+            'end_time': time(11, 0),
+            'consultation_fee': Decimal('50.00'),
+        }
+
+    def paid_session(self, hold, session_id):
+        return {
+            'id': session_id,
+            'payment_intent': f'pi_{session_id}',
+            'amount_total': 5000,
+            'currency': 'usd',
+            'metadata': {'hold_id': str(hold.id), 'patient_id': str(self.patient.id)},
+        }
+
+    def test_same_patient_retry_keeps_the_open_session(self):
+        hold = acquire_hold(self.patient, self.slot)
+        self.assertTrue(attach_session(hold, 'cs_first'))
+
+        # El paciente vuelve a pulsar "pagar" con la reserva vigente
+        retry = acquire_hold(self.patient, dict(self.slot, notes='Reintento'))
+        self.assertEqual(retry.id, hold.id)
+        self.assertEqual(retry.stripe_session_id, 'cs_first')
+        self.assertEqual(retry.created_at, hold.created_at)
+        self.assertEqual(SlotHold.objects.get(pk=hold.id).notes, 'Reintento')
+
+        # Una segunda sesión no desplaza a la primera (la vista la anula)
+        self.assertFalse(attach_session(retry, 'cs_second'))
+
+        # Pagar la primera sesión sigue creando la cita
+        appointment, created = record_paid_session(self.paid_session(hold, 'cs_first'))
+        self.assertTrue(created)
+        self.assertTrue(appointment.is_paid)
+        self.assertFalse(SlotHold.objects.filter(pk=hold.id).exists())
+
+    def test_expired_hold_is_replaced_with_a_clean_session(self):
+        other = CustomUser.objects.create_user(
+            email='otro@test.com', password='password123',
+            first_name='Otro', last_name='Paciente', user_type='patient'
+        )
+        hold = acquire_hold(self.patient, self.slot)
+        attach_session(hold, 'cs_expired')
+        SlotHold.objects.filter(pk=hold.id).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        replaced = acquire_hold(other, self.slot)
+        self.assertEqual(replaced.id, hold.id)
+        self.assertEqual(replaced.stripe_session_id, '')
+        self.assertGreater(replaced.expires_at, timezone.now())
+
+        # El webhook de la sesión vencida ya no libera la reserva del otro paciente
+        self.assertFalse(release_hold(hold.id, session_id='cs_expired'))
+        self.assertTrue(attach_session(replaced, 'cs_other'))
+
+    def test_checkout_failure_does_not_release_a_payable_hold(self):
+        hold = acquire_hold(self.patient, self.slot)
+        attach_session(hold, 'cs_first')
+
+        self.assertFalse(release_hold(hold.id, session_id=''))
+        self.assertTrue(SlotHold.objects.filter(pk=hold.id).exists())
+
+    def test_confirmation_that_loses_the_race_returns_the_existing_payment(self):
+        hold = acquire_hold(self.patient, self.slot)
+        attach_session(hold, 'cs_paid')
+        session = self.paid_session(hold, 'cs_paid')
+
+        # Primera vía (p. ej. el webhook): crea la cita y la transacción
+        appointment, created = record_paid_session(session)
+        self.assertTrue(created)
+
+        # Segunda vía (confirm-payment): comprobó la transacción antes de que
+        # la primera hiciera commit y luego espera el bloqueo de la reserva,
+        # que ya no existe cuando lo obtiene
+        lookup = PaymentTransaction.objects.select_related
+        calls = []
+
+        def stale_first_lookup(*fields):
+            calls.append(fields)
+            queryset = lookup(*fields)
+            return queryset.none() if len(calls) == 1 else queryset
+
+        with mock.patch.object(PaymentTransaction.objects, 'select_related', side_effect=stale_first_lookup):
+            again, created_again = record_paid_session(session)
+
+        self.assertEqual(len(calls), 2)
+        self.assertFalse(created_again)
+        self.assertEqual(again.id, appointment.id)
+        self.assertEqual(Appointment.objects.filter(patient=self.patient).count(), 1)
+        self.assertEqual(PaymentTransaction.objects.filter(stripe_session_id='cs_paid').count(), 1)
+
+    def test_unknown_hold_still_raises(self):
+        hold = acquire_hold(self.patient, self.slot)
+        attach_session(hold, 'cs_first')
+
+        with self.assertRaises(SlotHold.DoesNotExist):
+            record_paid_session(self.paid_session(hold, 'cs_other'))
+
+
+class RevenueSignalTests(SimpleTestCase):
+    """Qué días de RevenueDaily se recalculan al guardar un pago, sin BD."""
+
+    paid_at = datetime(2026, 3, 2, 15, 0, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        patcher = mock.patch.object(signals.revenue, 'refresh_days')
+        self.refresh_days = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(signals, '_psychologist_id', return_value=4)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def save(self, payment, previous_row=None, created=False, update_fields=None):
+        payment._state.adding = created
+        queryset = mock.Mock()
+        queryset.filter.return_value.values.return_value.first.return_value = previous_row
+        # _base_manager es una propiedad de la metaclase
+        with mock.patch.object(ModelBase, '_base_manager', new_callable=mock.PropertyMock, return_value=queryset):
+            signals.remember_revenue_day(PaymentTransaction, payment, update_fields=update_fields)
+        signals.refresh_revenue(PaymentTransaction, payment)
+        return queryset
+
+    def day(self):
+        return timezone.localdate(self.paid_at)
+
+    def test_completed_payment_refreshes_its_paid_day(self):
+        self.save(PaymentTransaction(status='completed', paid_at=self.paid_at), created=True)
+        self.refresh_days.assert_called_once_with([self.day()], 4)
+
+    def test_refund_refreshes_the_day_it_counted_in(self):
+        payment = PaymentTransaction(pk=1, status='refunded', paid_at=self.paid_at)
+        self.save(payment, previous_row={'status': 'completed', 'paid_at': self.paid_at})
+        self.refresh_days.assert_called_once_with([self.day()], 4)
+
+    def test_fee_reconciliation_does_not_query_the_old_row(self):
+        payment = PaymentTransaction(pk=1, status='completed', paid_at=self.paid_at)
+        queryset = self.save(payment, update_fields=['stripe_fee', 'net_amount'])
+        queryset.filter.assert_not_called()
+        self.refresh_days.assert_called_once_with([self.day()], 4)
+
+    def test_pending_payment_touches_nothing(self):
+        self.save(PaymentTransaction(pk=1, status='pending'), previous_row={'status': 'pending', 'paid_at': None})
+        self.refresh_days.assert_not_called()
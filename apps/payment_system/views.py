@@ -1,18 +1,22 @@
 # apps/payment_system/views.py
 
+import json
+
 import stripe
 from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions, generics
-from apps.appointments.models import Appointment
+from apps.appointments.models import Appointment, SlotHold
 from apps.appointments.serializers import AppointmentCreateSerializer
 from django.shortcuts import get_object_or_404
 from apps.users.models import CustomUser
-from django_tenants.utils import tenant_context  # <-- IMPORTAR TENANT_CONTEXT
-from apps.tenants.models import Clinic  # <-- IMPORTAR CLÍNICA
+from apps.appointments.holds import acquire_hold, attach_session, release_hold, stripe_session_expiry
+from apps.payment_inbox.worker import enqueue_event, record_event
 from .models import PaymentTransaction
 from .serializers import PaymentTransactionSerializer, PaymentConfirmationSerializer
+from .gateway import checkout_idempotency_key, get_gateway
+from .services import record_paid_session
 from django.utils import timezone
 from decimal import Decimal
 import logging
@@ -20,16 +24,14 @@ import logging
 # Configurar el logger
 logger = logging.getLogger(__name__)
 
-# Configurar Stripe con la clave secreta
-stripe.api_key = settings.STRIPE_SECRET_KEY
-
 class CreateCheckoutSessionView(APIView):
     """
     Vista para crear una sesión de pago en Stripe.
     Proceso:
-    1. Valida y crea una cita preliminar en estado 'pending'
-    2. Crea la sesión de pago en Stripe
+    1. Valida el horario y lo reserva temporalmente (SlotHold, sin crear la cita)
+    2. Crea la sesión de pago en Stripe, que vence antes que la reserva
     3. Retorna el sessionId para redirigir al usuario
+    La cita se crea al confirmarse el pago (webhook o confirm-payment).
     """
     permission_classes = [permissions.IsAuthenticated]
 
@@ -45,31 +47,11 @@ class CreateCheckoutSessionView(APIView):
         
         validated_data = serializer.validated_data
 
-        # --- CORRECCIÓN PARA ELIMINAR CITAS "FANTASMA" ---
-        # Antes de crear la nueva cita, buscamos y eliminamos cualquier cita "fantasma"
-        # (pendiente y no pagada) que ocupe el mismo horario.
-        # Esto libera el espacio si un pago anterior fue abandonado.
-        citas_fantasma_eliminadas = Appointment.objects.filter(
-            psychologist=validated_data['psychologist'],
-            appointment_date=validated_data['appointment_date'],
-            start_time=validated_data['start_time'],
-            status='pending',
-            is_paid=False
-        ).delete()
-        
-        if citas_fantasma_eliminadas[0] > 0:
-            logger.info(f"Eliminadas {citas_fantasma_eliminadas[0]} citas fantasma para liberar el horario")
-        # --- FIN DE LA CORRECCIÓN ---
-
-        # Ahora que el espacio está libre, creamos la nueva cita preliminar de forma segura
-        appointment = serializer.save(status='pending', is_paid=False)
-
         # 2. Obtener el precio de la consulta del psicólogo
         psychologist = validated_data['psychologist']  # Usar los datos ya validados
         
         # Verificar que el psicólogo tenga perfil profesional
         if not hasattr(psychologist, 'professional_profile'):
-            appointment.delete()  # Limpiar la cita creada
             return Response({
                 'error': 'Este usuario no tiene un perfil profesional configurado.'
             }, status=status.HTTP_400_BAD_REQUEST)
@@ -77,12 +59,24 @@ class CreateCheckoutSessionView(APIView):
         fee = psychologist.professional_profile.consultation_fee
         
         if not fee or fee <= 0:
-            appointment.delete()  # Limpiar la cita creada
             return Response({
                 'error': 'Este profesional no tiene una tarifa configurada.'
             }, status=status.HTTP_400_BAD_REQUEST)
 
+        # Reservar el horario: un único INSERT que falla si otro paciente
+        # tiene una reserva vigente (la restricción única lo garantiza)
+        hold = acquire_hold(request.user, validated_data)
+        if hold is None:
+            return Response({
+                'error': 'Este horario está reservado mientras otro paciente completa el pago. Inténtalo en unos minutos.'
+            }, status=status.HTTP_409_CONFLICT)
+
         try:
+            if hold.stripe_session_id:
+                # Reintento del mismo paciente con la reserva vigente: se
+                # devuelve su sesión, que es la única que puede confirmarse
+                return self.existing_session_response(hold, fee)
+
             # --- CORRECCIÓN PARA REDIRECCIÓN AL FRONTEND ---
             backend_host = request.get_host()
             
@@ -106,78 +100,117 @@ class CreateCheckoutSessionView(APIView):
             logger.info(f"Redirigiendo pagos desde {backend_host} hacia {protocol}://{frontend_host}")
             # --- FIN DE LA CORRECCIÓN ---
             
-            # 3. Crear la sesión de pago en Stripe
-            checkout_session = stripe.checkout.Session.create(
-                payment_method_types=['card'],
-                line_items=[
+            # 3. Crear la sesión de pago en la pasarela (Stripe)
+            session_params = {
+                'payment_method_types': ['card'],
+                'line_items': [
                     {
                         'price_data': {
                             'currency': 'usd',  # Puedes cambiar a 'bob' para bolivianos
                             'product_data': {
                                 'name': f'Consulta con {psychologist.get_full_name()}',
-                                'description': f'Cita agendada para el {appointment.appointment_date} a las {appointment.start_time}',
+                                'description': f'Cita agendada para el {hold.appointment_date} a las {hold.start_time}',
                             },
                             'unit_amount': int(fee * 100),  # Stripe maneja los montos en centavos
                         },
                         'quantity': 1,
                     },
                 ],
-                mode='payment',
+                'mode': 'payment',
                 # URLs de redirección con protocolo correcto (http local, https producción)
-                success_url=f"{protocol}://{frontend_host}/payment-success?session_id={{CHECKOUT_SESSION_ID}}",
-                cancel_url=f"{protocol}://{frontend_host}/payment-cancel",
-                # Guardamos el ID de nuestra cita para saber qué actualizar después
-                metadata={
-                    'appointment_id': appointment.id,
+                'success_url': f"{protocol}://{frontend_host}/payment-success?session_id={{CHECKOUT_SESSION_ID}}",
+                'cancel_url': f"{protocol}://{frontend_host}/payment-cancel",
+                # Guardamos el ID de la reserva para crear la cita al confirmarse el pago
+                'metadata': {
+                    'hold_id': hold.id,
                     'patient_id': request.user.id,
                     'psychologist_id': psychologist.id,
                     'tenant_schema_name': request.tenant.schema_name  # <-- GUARDAR EL SCHEMA
-                }
+                },
+            }
+            session_expiry = stripe_session_expiry(hold)
+            if session_expiry:
+                # La sesión vence antes que la reserva: no se paga un horario ya liberado
+                session_params['expires_at'] = session_expiry
+            checkout_session = get_gateway().create_checkout_session(
+                session_params,
+                idempotency_key=checkout_idempotency_key(hold, request.tenant.schema_name)
             )
+            if not attach_session(hold, checkout_session.id):
+                # Otra petición del paciente asoció antes su sesión (o la
+                # reserva ya no es suya): esta sesión se anula para que no
+                # se pueda cobrar sin cita
+                get_gateway().expire_checkout_session(checkout_session.id)
+                logger.warning(f"Sesión de pago {checkout_session.id} anulada: la reserva {hold.id} ya tiene otra")
+                return Response({
+                    'error': 'Ya hay un pago en curso para este horario. Inténtalo de nuevo.'
+                }, status=status.HTTP_409_CONFLICT)
             
-            logger.info(f"Sesión de pago creada: {checkout_session.id} para cita {appointment.id}")
+            logger.info(f"Sesión de pago creada: {checkout_session.id} para la reserva {hold.id}")
             
             # --- CORRECCIÓN: Devolver URL directa en lugar de solo sessionId ---
             return Response({
                 'sessionId': checkout_session.id,
                 'checkout_url': checkout_session.url,  # <-- URL directa para redirigir
-                'appointment_id': appointment.id,
+                'hold_id': hold.id,
+                'hold_expires_at': hold.expires_at,
                 'amount': fee,
                 'currency': 'USD'
             })
 
         except stripe.error.StripeError as e:
-            # Si Stripe falla, borramos la cita preliminar para liberar el horario
-            appointment.delete()
+            # Si Stripe falla, liberamos la reserva del horario (salvo que
+            # ya tenga una sesión que se pueda pagar)
+            release_hold(hold.id, session_id='')
             logger.error(f"Error de Stripe: {str(e)}")
             return Response({
                 'error': f'Error del servicio de pagos: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         except Exception as e:
             # Error general
-            appointment.delete()
+            release_hold(hold.id, session_id='')
             logger.error(f"Error general en checkout: {str(e)}")
             return Response({
                 'error': 'Error interno del servidor'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def existing_session_response(self, hold, fee):
+        checkout_session = get_gateway().retrieve_checkout_session(hold.stripe_session_id)
+        if checkout_session.status != 'open':
+            # Pagada (se está confirmando) o vencida (su webhook libera la reserva)
+            return Response({
+                'error': 'Este horario tiene un pago en proceso. Revisa tus citas en unos minutos.'
+            }, status=status.HTTP_409_CONFLICT)
+
+        logger.info(f"Sesión de pago {checkout_session.id} reutilizada para la reserva {hold.id}")
+        return Response({
+            'sessionId': checkout_session.id,
+            'checkout_url': checkout_session.url,
+            'hold_id': hold.id,
+            'hold_expires_at': hold.expires_at,
+            'amount': fee,
+            'currency': 'USD'
+        })
+
 
 class StripeWebhookView(APIView):
     """
     Vista para recibir eventos de Stripe.
-    Maneja la confirmación de pagos exitosos.
+    Solo verifica la firma y guarda el evento en la bandeja
+    (apps/payment_inbox): responde 200 en cuanto está guardado y el
+    worker hace el trabajo (confirmar la cita, liberar horarios...).
     """
     permission_classes = [permissions.AllowAny]
 
     def post(self, request, *args, **kwargs):
         payload = request.body
         sig_header = request.META.get('HTTP_STRIPE_SIGNATURE')
-        event = None
 
         try:
-            event = stripe.Webhook.construct_event(
+            stripe.Webhook.construct_event(
                 payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
             )
+            event = json.loads(payload)
         except ValueError as e:
             logger.error(f"Payload inválido en webhook: {str(e)}")
             return Response(status=status.HTTP_400_BAD_REQUEST)
@@ -185,49 +218,11 @@ class StripeWebhookView(APIView):
             logger.error(f"Firma inválida en webhook: {str(e)}")
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        # Manejar el evento checkout.session.completed
-        if event['type'] == 'checkout.session.completed':
-            session = event['data']['object']
-            metadata = session.get('metadata', {})
-            appointment_id = metadata.get('appointment_id')
-            schema_name = metadata.get('tenant_schema_name')
-
-            if appointment_id and schema_name:
-                try:
-                    tenant = Clinic.objects.get(schema_name=schema_name)
-
-                    with tenant_context(tenant):
-                        # --- (PASO 1: ACTUALIZAR LA CITA - Esto ya lo tenías) ---
-                        appointment = Appointment.objects.get(id=appointment_id)
-                        appointment.is_paid = True
-                        appointment.status = 'confirmed'
-                        appointment.save()
-                        logger.info(f"Pago confirmado para cita {appointment_id} en schema {schema_name}")
-
-                        # --- 👇 INICIO DE LA NUEVA IDEA 👇 ---
-                        # (PASO 2: CREAR EL REGISTRO DE TRANSACCIÓN)
-
-                        PaymentTransaction.objects.update_or_create(
-                            stripe_session_id=session.id,
-                            defaults={
-                                'appointment': appointment,
-                                'patient': appointment.patient,
-                                'stripe_payment_intent_id': session.get('payment_intent'),
-                                'amount': Decimal(session.get('amount_total', 0) / 100.0), # Stripe usa centavos
-                                'currency': session.get('currency', 'usd').upper(),
-                                'status': 'completed',
-                                'paid_at': timezone.now()
-                            }
-                        )
-                        logger.info(f"Transacción de pago registrada: {session.id}")
-                        # --- 👆 FIN DE LA NUEVA IDEA 👆 ---
-
-                except (Clinic.DoesNotExist, Appointment.DoesNotExist) as e:
-                    logger.error(f"No se encontró la clínica o cita desde el webhook: schema={schema_name}, appt_id={appointment_id}, error={e}")
-            else:
-                logger.warning(f"Webhook recibido sin datos completos: appointment_id={appointment_id}, schema_name={schema_name}")
-
-        # ... (tu lógica de 'checkout.session.expired' no cambia) ...
+        if record_event(event):
+            enqueue_event(event['id'])
+        else:
+            # Reintento de Stripe de un evento que ya tenemos
+            logger.debug("Evento de Stripe duplicado: %s", event['id'])
 
         return Response(status=status.HTTP_200_OK)
 
@@ -302,41 +297,13 @@ class ConfirmPaymentView(generics.GenericAPIView):
             logger.error(f"🚨 Error de validación en confirmación de pago: {e}")
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # --- 2. ¡EL CAMBIO CLAVE! ---
-        #    Leemos desde validated_data, NO desde self.context
-        validated_data = serializer.validated_data
-        session = validated_data.get('stripe_session')
-        appointment = validated_data.get('appointment')
+        session = serializer.validated_data['stripe_session']
 
-        if not session or not appointment:
-            logger.error("🚨 Serializer no devolvió session o appointment después de validar")
-            return Response(
-                {"error": "No se pudo validar la sesión de pago (datos faltantes)."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # 3. El resto de tu lógica para crear la PaymentTransaction...
+        # 2. Crear la cita desde la reserva y la transacción (idempotente:
+        #    el webhook puede haberlo hecho ya)
         try:
-            # Creamos el registro en 'payment_transactions'
-            transaction, created = PaymentTransaction.objects.update_or_create(
-                stripe_session_id=session.id,
-                defaults={
-                    'appointment': appointment,
-                    'patient': appointment.patient,
-                    'stripe_payment_intent_id': session.get('payment_intent'),
-                    'amount': Decimal(session.get('amount_total', 0) / 100.0),
-                    'currency': session.get('currency', 'usd').upper(),
-                    'status': 'completed',
-                    'paid_at': timezone.now()
-                }
-            )
-            logger.info(f"✅ Transacción creada: {transaction.id}. Nuevo: {created}")
-
-            # Actualizamos la cita
-            appointment.is_paid = True
-            appointment.status = 'confirmed'
-            appointment.save()
-            logger.info(f"✅ Cita actualizada: {appointment.id}")
+            appointment, created = record_paid_session(session)
+            logger.info(f"✅ Pago confirmado para la cita {appointment.id}. Nuevo: {created}")
 
             # Devolvemos los datos de la cita (como espera el frontend)
             appointment_data = {
@@ -349,6 +316,12 @@ class ConfirmPaymentView(generics.GenericAPIView):
             return Response({"appointment": appointment_data}, 
                             status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
+        except (SlotHold.DoesNotExist, Appointment.DoesNotExist):
+            logger.error(f"🚨 La reserva de la sesión {session.id} ya no existe")
+            return Response(
+                {"error": "La reserva asociada a este pago no fue encontrada."},
+                status=status.HTTP_404_NOT_FOUND
+            )
         except Exception as e:
             logger.error(f"🚨 Error al crear la transacción o confirmar la cita: {e}", exc_info=True)
             return Response(
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProfessionalsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.professionals'
+
+    def ready(self):
+        from . import signals  # noqa: F401 - invalidación de la caché de respuestas
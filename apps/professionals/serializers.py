@@ -2,6 +2,7 @@
 
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from config.values_serializer import ValuesSerializer, full_name
 from .models import ProfessionalProfile, Specialization, WorkingHours, Review, VerificationDocument
 
 User = get_user_model()
@@ -108,6 +109,37 @@ class ProfessionalPublicSerializer(serializers.ModelSerializer):
         ]
 
 
+class SpecializationValuesSerializer(ValuesSerializer):
+    serializer_class = SpecializationSerializer
+
+
+class WorkingHoursValuesSerializer(ValuesSerializer):
+    serializer_class = WorkingHoursSerializer
+
+
+class ProfessionalPublicValuesSerializer(ValuesSerializer):
+    """Directorio: misma salida que ProfessionalPublicSerializer, desde .values()."""
+    serializer_class = ProfessionalPublicSerializer
+    extra_values = ('user__first_name', 'user__last_name')
+
+    def get_full_name(self, row):
+        return full_name(row, 'user')
+
+    def related(self, ids):
+        return {
+            'specializations': (
+                SpecializationValuesSerializer(),
+                Specialization.objects.filter(professionalprofile__in=ids),
+                'professionalprofile',
+            ),
+            'working_hours': (
+                WorkingHoursValuesSerializer(),
+                WorkingHours.objects.filter(professional_id__in=ids),
+                'professional_id',
+            ),
+        }
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     """
     Serializer para crear y mostrar reseñas.
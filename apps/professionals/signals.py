@@ -0,0 +1,51 @@
+# apps/professionals/signals.py
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from config.response_cache import invalidate_tags
+
+from .models import ProfessionalProfile, Review, Specialization, WorkingHours
+
+
+def _profile_tags(profile_id, user_id):
+    return f'professional:{profile_id}', f'psychologist:{user_id}', 'professionals'
+
+
+@receiver([post_save, post_delete], sender=ProfessionalProfile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    invalidate_tags(*_profile_tags(instance.pk, instance.user_id))
+
+
+@receiver(m2m_changed, sender=ProfessionalProfile.specializations.through)
+def invalidate_cached_profile_specializations(sender, instance, action, **kwargs):
+    if action.startswith('post_') and isinstance(instance, ProfessionalProfile):
+        invalidate_tags(*_profile_tags(instance.pk, instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=WorkingHours)
+def invalidate_cached_working_hours(sender, instance, **kwargs):
+    # El horario aparece en el perfil público y en el directorio
+    invalidate_tags(f'professional:{instance.professional_id}', 'professionals')
+
+
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_cached_reviews(sender, instance, **kwargs):
+    # El promedio se guarda en el perfil (update_rating), que invalida el resto
+    invalidate_tags(f'professional:{instance.professional_id}')
+
+
+@receiver([post_save, post_delete], sender=Specialization)
+def invalidate_cached_specializations(sender, instance, **kwargs):
+    invalidate_tags('specializations')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_professional_user(sender, instance, update_fields=None, **kwargs):
+    # Nombre y foto del psicólogo salen en sus respuestas públicas; el login
+    # solo toca last_login y no cambia nada visible
+    if instance.user_type != 'professional' or update_fields == frozenset({'last_login'}):
+        return
+    profile_id = ProfessionalProfile.objects.filter(user_id=instance.pk).values_list('id', flat=True).first()
+    if profile_id is not None:
+        invalidate_tags(*_profile_tags(profile_id, instance.pk))
@@ -7,18 +7,22 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db.models import Count, Max, Q
 from .models import ProfessionalProfile, Specialization, Review
 from .serializers import (
     ProfessionalProfileSerializer,
     ProfessionalProfileUpdateSerializer,
     ProfessionalPublicSerializer,
+    ProfessionalPublicValuesSerializer,
     SpecializationSerializer,
     ReviewSerializer
 )
 from apps.appointments.models import Appointment
 from django.conf import settings
 from supabase import create_client, Client
+from config.async_api import async_api_view, api_response
+from config.conditional import conditional, latest
+from config.response_cache import cache_response
 from rest_framework.parsers import MultiPartParser, FormParser
 from apps.appointments.views import IsPsychologist
 from .models import VerificationDocument
@@ -27,8 +31,27 @@ from .serializers import VerificationDocumentSerializer
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+def _professional_profile_validators(request):
+    user = request.user
+    if user.user_type == 'admin':
+        prof_id = request.query_params.get('professional_id')
+        if not prof_id or not prof_id.isdigit():
+            return None
+        profiles = ProfessionalProfile.objects.filter(user_id=prof_id, user__user_type='professional')
+    elif user.user_type == 'professional':
+        profiles = ProfessionalProfile.objects.filter(user=user)
+    else:
+        return None
+    row = profiles.values_list('id', 'updated_at', 'user__updated_at').first()
+    if row is None:
+        # Sin perfil: la vista responde el 404 como siempre
+        return None
+    return (user.pk, *row), latest(*row[1:])
+
+
 @api_view(['GET', 'POST', 'PUT', 'PATCH'])
 @permission_classes([permissions.IsAuthenticated])
+@conditional(_professional_profile_validators)
 def professional_profile_detail(request):
     """
     CU-06: Completar Perfil Profesional
@@ -130,107 +153,107 @@ def professional_profile_detail(request):
                 'error': 'Perfil profesional no encontrado'
             }, status=status.HTTP_404_NOT_FOUND)
 
-@api_view(['GET'])
-@permission_classes([permissions.AllowAny])
-def list_professionals(request):
+def _public_profiles():
+    """Perfiles visibles públicamente, con todo lo que usa ProfessionalPublicSerializer."""
+    return ProfessionalProfile.objects.filter(
+        is_active=True,
+        profile_completed=True
+    ).select_related('user').prefetch_related('specializations', 'working_hours')
+
+
+@async_api_view()
+@cache_response(tags=['professionals', 'specializations'])
+async def list_professionals(request):
     """
     CU-08: Buscar y Filtrar Profesionales
     """
-    logger.info(f"🔍 [Professionals] Listando profesionales - Parámetros: {request.query_params.dict()}")
+    params = request.GET
+    logger.info(f"🔍 [Professionals] Listando profesionales - Parámetros: {params.dict()}")
     
     # Filtros disponibles
-    specialization = request.query_params.get('specialization')
-    city = request.query_params.get('city')
-    max_fee = request.query_params.get('max_fee')
-    min_rating = request.query_params.get('min_rating')
-    accepts_online = request.query_params.get('accepts_online')
-    search = request.query_params.get('search')
+    specialization = params.get('specialization')
+    city = params.get('city')
+    max_fee = params.get('max_fee')
+    min_rating = params.get('min_rating')
+    accepts_online = params.get('accepts_online')
+    search = params.get('search')
     
     # Query base: solo perfiles activos (quitamos is_verified para testing)
-    profiles = ProfessionalProfile.objects.filter(
-        is_active=True,
-        profile_completed=True
-    )
-    logger.debug(f"   Perfiles base (activos + completados): {profiles.count()}")
+    profiles = _public_profiles()
     
     # Aplicar filtros
     if specialization:
         profiles = profiles.filter(specializations__name__icontains=specialization)
-        logger.debug(f"   Después de filtro especialización: {profiles.count()}")
     
     if city:
         profiles = profiles.filter(city__icontains=city)
-        logger.debug(f"   Después de filtro ciudad: {profiles.count()}")
     
     if max_fee:
         try:
             profiles = profiles.filter(consultation_fee__lte=float(max_fee))
-            logger.debug(f"   Después de filtro tarifa máxima: {profiles.count()}")
         except ValueError:
             logger.warning(f"   ⚠️ Valor inválido para max_fee: {max_fee}")
-            pass
     
     if min_rating:
         try:
             profiles = profiles.filter(average_rating__gte=float(min_rating))
-            logger.debug(f"   Después de filtro rating mínimo: {profiles.count()}")
         except ValueError:
             logger.warning(f"   ⚠️ Valor inválido para min_rating: {min_rating}")
-            pass
     
     if accepts_online:
         profiles = profiles.filter(accepts_online_sessions=True)
-        logger.debug(f"   Después de filtro sesiones online: {profiles.count()}")
     
     if search:
         profiles = profiles.filter(
             Q(user__first_name__icontains=search) |
             Q(user__last_name__icontains=search)
         )
-        logger.debug(f"   Después de búsqueda por nombre: {profiles.count()}")
     
-    serializer = ProfessionalPublicSerializer(profiles, many=True)
-    logger.info(f"✅ [Professionals] Retornando {profiles.count()} profesionales")
+    # Filas de .values() + una consulta por relación anidada, con el mismo
+    # formato que ProfessionalPublicSerializer
+    serializer = ProfessionalPublicValuesSerializer()
+    rows = [row async for row in serializer.values(profiles)]
+    data = await serializer.aserialize(rows)
+    logger.info(f"✅ [Professionals] Retornando {len(rows)} profesionales")
     
-    return Response({
-        'count': profiles.count(),
-        'professionals': serializer.data
-    }, status=status.HTTP_200_OK)
+    return api_response({
+        'count': len(rows),
+        'professionals': data
+    })
 
-@api_view(['GET'])
-@permission_classes([permissions.AllowAny])
-def professional_public_detail(request, professional_id):
+@async_api_view()
+@cache_response(tags=['professional:{professional_id}', 'specializations'])
+async def professional_public_detail(request, professional_id):
     """
     CU-09: Ver Perfil Público Profesional
     Vista pública de un psicólogo específico
     """
     try:
-        profile = get_object_or_404(
-            ProfessionalProfile.objects.filter(
-                is_active=True,
-                profile_completed=True
-            ),
-            id=professional_id
-        )
-        
-        serializer = ProfessionalPublicSerializer(profile)
-        return Response(serializer.data, status=status.HTTP_200_OK)
-        
+        profile = await _public_profiles().aget(id=professional_id)
     except ProfessionalProfile.DoesNotExist:
-        return Response({
+        return api_response({
             'error': 'Profesional no encontrado'
         }, status=status.HTTP_404_NOT_FOUND)
 
-@api_view(['GET'])
-@permission_classes([permissions.AllowAny])
-def list_specializations(request):
+    serializer = ProfessionalPublicSerializer(profile)
+    return api_response(serializer.data)
+
+async def _specializations_validators(request):
+    stats = await Specialization.objects.aaggregate(total=Count('id'), last=Max('updated_at'))
+    # Listado: solo ETag (un borrado no cambia el máximo de updated_at)
+    return (stats['total'], stats['last']), None
+
+
+@async_api_view()
+@cache_response(tags=['specializations'])
+@conditional(_specializations_validators)
+async def list_specializations(request):
     """
     Listar todas las especialidades disponibles
     """
-    specializations = Specialization.objects.all()
+    specializations = [s async for s in Specialization.objects.all()]
     serializer = SpecializationSerializer(specializations, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
-
+    return api_response(serializer.data)
 
 class CanReviewAppointment(permissions.BasePermission):
     """
@@ -272,28 +295,32 @@ class ReviewCreateView(generics.CreateAPIView):
         )
 
 
-@api_view(['GET'])
-@permission_classes([permissions.AllowAny])
-def professional_reviews(request, professional_id):
+@async_api_view()
+@cache_response(tags=['professional:{professional_id}'])
+async def professional_reviews(request, professional_id):
     """
     Lista las reseñas de un profesional específico (vista pública)
     """
     try:
-        professional = get_object_or_404(ProfessionalProfile, id=professional_id)
-        reviews = Review.objects.filter(professional=professional).order_by('-created_at')
-        serializer = ReviewSerializer(reviews, many=True)
-        return Response({
-            'professional_id': professional_id,
-            'total_reviews': reviews.count(),
-            'average_rating': professional.average_rating,
-            'reviews': serializer.data
-        }, status=status.HTTP_200_OK)
-        
+        professional = await ProfessionalProfile.objects.aget(id=professional_id)
     except ProfessionalProfile.DoesNotExist:
-        return Response({
+        return api_response({
             'error': 'Profesional no encontrado'
         }, status=status.HTTP_404_NOT_FOUND)
 
+    reviews = [
+        review async for review in Review.objects.filter(
+            professional=professional
+        ).select_related('patient').order_by('-created_at')
+    ]
+    serializer = ReviewSerializer(reviews, many=True)
+    return api_response({
+        'professional_id': professional_id,
+        'total_reviews': len(reviews),
+        'average_rating': professional.average_rating,
+        'reviews': serializer.data
+    })
+
 # apps/professionals/views.py
 # ... (después de la función professional_reviews) ...
 
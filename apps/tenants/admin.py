@@ -1,7 +1,7 @@
 # apps/tenants/admin.py
 
 from django.contrib import admin
-from .models import Clinic, Domain, PublicUser
+from .models import Clinic, Domain, PublicUser, TenantProvisioningJob
 
 # Registros simples - el admin personalizado está en config/admin_site.py
 # Estos registros son para el admin estándar de Django en los tenants
@@ -12,4 +12,10 @@ class ClinicAdmin(admin.ModelAdmin):
 
 @admin.register(Domain)
 class DomainAdmin(admin.ModelAdmin):
-    list_display = ('domain', 'tenant', 'is_primary')
\ No newline at end of file
+    list_display = ('domain', 'tenant', 'is_primary')
+
+@admin.register(TenantProvisioningJob)
+class TenantProvisioningJobAdmin(admin.ModelAdmin):
+    list_display = ('subdomain', 'clinic_name', 'status', 'step', 'schema_method', 'created_at')
+    list_filter = ('status', 'schema_method')
+    readonly_fields = ('clinic', 'error', 'started_at', 'updated_at', 'finished_at')
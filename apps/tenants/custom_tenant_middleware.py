@@ -1,60 +1,107 @@
 # apps/tenants/custom_tenant_middleware.py
 import logging
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.db import connection
 from django_tenants.utils import get_tenant_model, get_tenant_domain_model
+from .request_tenant import bind_request_tenant, unbind_request_tenant
+from .tenant_cache import cache_tenant, get_cached_tenant
 
 logger = logging.getLogger(__name__)
 
+
+def resolve_tenant(hostname):
+    """Tenant del hostname (el público si el dominio no está registrado)."""
+    Domain = get_tenant_domain_model()
+
+    try:
+        domain = Domain.objects.select_related('tenant').get(domain=hostname)
+        tenant = domain.tenant
+
+        logger.info("✅ Tenant: %s (ID: %s) para %s", tenant.schema_name, tenant.id, hostname)
+        return tenant
+
+    except Domain.DoesNotExist:
+        logger.warning(f"⚠️ Dominio '{hostname}' no encontrado")
+        logger.warning(f"📋 Dominios registrados: {list(Domain.objects.values_list('domain', flat=True))}")
+
+        # Si no se encuentra, usar el tenant público
+        try:
+            tenant = get_tenant_model().objects.get(schema_name='public')
+            logger.info(f"🏢 Usando tenant público por defecto")
+            return tenant
+        except Exception as e:
+            logger.error(f"❌ Error crítico: {e}")
+            raise
+
+
+def get_tenant_for_hostname(hostname):
+    """Como resolve_tenant, pasando por la caché en memoria hostname → tenant."""
+    tenant = get_cached_tenant(hostname)
+    if tenant is None:
+        tenant = resolve_tenant(hostname)
+        cache_tenant(hostname, tenant)
+    return tenant
+
+
 class CustomTenantMiddleware:
     """
     REEMPLAZO COMPLETO de TenantMainMiddleware de django-tenants.
     Detecta el tenant por hostname y configura la conexión a la BD correctamente.
+
+    Es híbrido sync/async. En modo sync (WSGI) llama a `set_tenant` sobre
+    la conexión del hilo de la request. En modo async no puede hacerlo:
+    las conexiones son por hilo y el ORM async consulta desde otro hilo
+    (sync_to_async). Deja el tenant en un ContextVar y el backend lo aplica
+    a la conexión del hilo que hace la consulta (ver request_tenant.py).
+    El tenant de cada hostname sale de una caché en memoria, así que el
+    camino async solo salta a un hilo cuando el hostname no está cacheado.
     """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        hostname = request.get_host().split(':')[0].lower()
-        
-        logger.info(f"🔍 [CustomTenantMiddleware] Hostname: {hostname}")
-        
-        Domain = get_tenant_domain_model()
-        
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        tenant = get_tenant_for_hostname(self.get_hostname(request))
+        self.activate(request, tenant)
+
+        # CONFIGURAR la conexión PostgreSQL al schema correcto
+        connection.set_tenant(tenant)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        hostname = self.get_hostname(request)
+        tenant = get_cached_tenant(hostname)
+        if tenant is None:
+            tenant = await sync_to_async(get_tenant_for_hostname)(hostname)
+        self.activate(request, tenant)
+
+        # La conexión del hilo que consulte tomará este tenant
+        token = bind_request_tenant(tenant)
         try:
-            domain = Domain.objects.select_related('tenant').get(domain=hostname)
-            tenant = domain.tenant
-            
-            logger.info(f"✅ Tenant: {tenant.schema_name} (ID: {tenant.id})")
-            
-            # ESTABLECER el tenant en el request
-            request.tenant = tenant
-            
-            # CONFIGURAR la conexión PostgreSQL al schema correcto
-            connection.set_tenant(tenant)
-            
-            logger.info(f"🗄️ PostgreSQL schema activado: {connection.schema_name}")
-            
-        except Domain.DoesNotExist:
-            logger.warning(f"⚠️ Dominio '{hostname}' no encontrado")
-            logger.warning(f"📋 Dominios registrados: {list(Domain.objects.values_list('domain', flat=True))}")
-            
-            # Si no se encuentra, usar el tenant público
-            try:
-                tenant = get_tenant_model().objects.get(schema_name='public')
-                request.tenant = tenant
-                connection.set_tenant(tenant)
-                logger.info(f"🏢 Usando tenant público por defecto")
-            except Exception as e:
-                logger.error(f"❌ Error crítico: {e}")
-                raise
-        
+            return await self.get_response(request)
+        finally:
+            unbind_request_tenant(token)
+
+    def get_hostname(self, request):
+        hostname = request.get_host().split(':')[0].lower()
+        logger.debug("🔍 [CustomTenantMiddleware] Hostname: %s", hostname)
+        return hostname
+
+    def activate(self, request, tenant):
+        # ESTABLECER el tenant en el request
+        request.tenant = tenant
+        logger.debug("🗄️ PostgreSQL schema activado: %s", tenant.schema_name)
+
         # FORZAR el URLConf correcto según el tipo de tenant
-        if request.tenant.schema_name == 'public':
+        if tenant.schema_name == 'public':
             request.urlconf = 'config.urls_public'
-            logger.info(f"🌐 URLConf: config.urls_public (Admin Público)")
         else:
             request.urlconf = 'config.urls'
-            logger.info(f"🏢 URLConf: config.urls (Admin de Tenant)")
-        
-        response = self.get_response(request)
-        return response
+        logger.debug("🌐 URLConf: %s", request.urlconf)
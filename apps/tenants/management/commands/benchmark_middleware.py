@@ -0,0 +1,160 @@
+"""
+Benchmark del coste de la cadena de middlewares configurada (settings.MIDDLEWARE)
+bajo ASGI.
+
+Monta la cadena con las mismas reglas que BaseHandler.load_middleware
+(is_async=True), delante de una vista async vacía, y mide µs por request.
+Informa además de dónde la cadena cambia de modo sync↔async: cada cambio
+es un salto de hilo (sync_to_async / async_to_sync) por request. Los
+middlewares del proyecto y WhiteNoise (config.whitenoise_middleware) son
+híbridos, así que la cadena configurada corre entera en el event loop.
+
+Con --compare mide también la misma cadena con los middlewares del
+proyecto forzados a solo-sync y el WhiteNoise original, que es como estaba
+antes: un salto a la entrada y otro de vuelta a async delante de los
+middlewares de Django.
+
+No necesita base de datos: el tenant se precarga en la caché de hostnames.
+"""
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.base import BaseHandler
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils.module_loading import import_string
+from django_tenants.utils import get_public_schema_name, get_tenant_model
+
+from apps.tenants.tenant_cache import cache_tenant, invalidate_tenant_cache
+
+BENCH_HOSTNAME = 'localhost'
+
+# Sustitutos solo-sync para --compare
+SYNC_REPLACEMENTS = {
+    'config.whitenoise_middleware.AsyncWhiteNoiseMiddleware': 'whitenoise.middleware.WhiteNoiseMiddleware',
+}
+PROJECT_PREFIXES = ('apps.', 'config.')
+
+
+async def _view(request):
+    return HttpResponse('ok')
+
+
+def build_chain(middleware_paths, sync_only=()):
+    """
+    Monta la cadena igual que BaseHandler.load_middleware(is_async=True).
+    Los paths de `sync_only` se tratan como solo-sync aunque sean híbridos.
+    Devuelve (handler async, lista de fronteras sync↔async).
+    """
+    base = BaseHandler()
+    handler = _view
+    handler_is_async = True
+    inner_name = 'vista'
+    switches = []
+    for middleware_path in reversed(middleware_paths):
+        middleware_class = import_string(middleware_path)
+        middleware_can_sync = getattr(middleware_class, 'sync_capable', True)
+        middleware_can_async = (
+            getattr(middleware_class, 'async_capable', False)
+            and middleware_path not in sync_only
+        )
+        if not middleware_can_sync:
+            middleware_is_async = True
+        elif not middleware_can_async:
+            middleware_is_async = False
+        else:
+            middleware_is_async = handler_is_async
+        try:
+            adapted = base.adapt_method_mode(middleware_is_async, handler, handler_is_async)
+            middleware = middleware_class(adapted)
+        except MiddlewareNotUsed:
+            continue
+        if middleware_is_async != handler_is_async:
+            switches.append(f"{middleware_class.__name__} → {inner_name}")
+        handler = middleware
+        handler_is_async = middleware_is_async
+        inner_name = middleware_class.__name__
+    if not handler_is_async:
+        switches.append(f"ASGI → {inner_name}")
+    return base.adapt_method_mode(True, handler, handler_is_async), switches
+
+
+def sync_only_chain(middleware_paths):
+    """La cadena de settings tal y como era sin los caminos async del proyecto."""
+    paths = [SYNC_REPLACEMENTS.get(path, path) for path in middleware_paths]
+    return paths, {path for path in paths if path.startswith(PROJECT_PREFIXES)}
+
+
+class Command(BaseCommand):
+    help = 'Mide la sobrecarga por request de settings.MIDDLEWARE bajo ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests a medir')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests simultáneas')
+        parser.add_argument(
+            '--with-logging',
+            action='store_true',
+            help='No silenciar los logs de los middlewares durante la medición'
+        )
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='Medir también la cadena con los middlewares del proyecto solo-sync'
+        )
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        concurrency = max(1, options['concurrency'])
+
+        # Tenant de prueba en la caché: no se consulta la base de datos
+        tenant = get_tenant_model()(schema_name=get_public_schema_name(), name='benchmark')
+        cache_tenant(BENCH_HOSTNAME, tenant)
+
+        chains = [('configurada', *build_chain(settings.MIDDLEWARE))]
+        if options['compare']:
+            paths, sync_only = sync_only_chain(settings.MIDDLEWARE)
+            chains.append(('solo-sync', *build_chain(paths, sync_only)))
+
+        if not options['with_logging']:
+            logging.disable(logging.CRITICAL)
+        try:
+            results = [
+                (label, switches, asyncio.run(self._run(chain, total, concurrency)))
+                for label, chain, switches in chains
+            ]
+        finally:
+            logging.disable(logging.NOTSET)
+            invalidate_tenant_cache()
+
+        self.stdout.write(
+            f"⏱️ {len(settings.MIDDLEWARE)} middlewares, {total} requests, concurrencia {concurrency}"
+        )
+        for label, switches, elapsed in results:
+            self.stdout.write(f"   [{label}] {len(switches)} cambios sync↔async por request:")
+            for switch in switches:
+                self.stdout.write(f"     - {switch}")
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ [{label}] {elapsed / total * 1e6:.1f} µs/request"
+            ))
+
+    async def _run(self, chain, total, concurrency):
+        factory = RequestFactory()
+
+        async def one():
+            response = await chain(factory.get('/', HTTP_HOST=BENCH_HOSTNAME))
+            assert response.status_code == 200
+
+        # Calentamiento (importaciones, primeras conexiones del pool de hilos)
+        await asyncio.gather(*(one() for _ in range(concurrency)))
+
+        start = time.perf_counter()
+        remaining = total
+        while remaining > 0:
+            batch = min(concurrency, remaining)
+            await asyncio.gather(*(one() for _ in range(batch)))
+            remaining -= batch
+        return time.perf_counter() - start
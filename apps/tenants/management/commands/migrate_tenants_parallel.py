@@ -0,0 +1,131 @@
+"""
+Comando para migrar los schemas de las clínicas en paralelo.
+
+A diferencia de `migrate_schemas`, primero averigua con una sola consulta
+qué schemas tienen migraciones pendientes (apps/tenants/migration_state.py)
+y solo migra esos, repartidos en un pool acotado de procesos. Un tenant
+que falla no detiene al resto: se informa al final con su error.
+
+Debe ejecutarse después de `migrate_schemas --shared` (lo hace build.sh).
+"""
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django_tenants.utils import schema_exists
+
+from apps.tenants.migration_state import pending_migration_counts
+from apps.tenants.models import Clinic
+from apps.tenants.provisioning import template_schema_name
+
+
+def migrate_schema(schema_name, verbosity=0):
+    """Migra un schema en el proceso actual. Devuelve (segundos, error)."""
+    start = time.perf_counter()
+    # Proceso hijo: no reutilizar la conexión heredada del padre
+    connections.close_all()
+    try:
+        call_command(
+            'migrate_schemas', tenant=True, schema_name=schema_name,
+            interactive=False, verbosity=verbosity, stdout=StringIO()
+        )
+        return time.perf_counter() - start, None
+    except Exception:
+        return time.perf_counter() - start, traceback.format_exc(limit=5)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Migra en paralelo solo los schemas de clínicas con migraciones pendientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Procesos en paralelo')
+        parser.add_argument(
+            '--tenant',
+            action='append',
+            dest='tenants',
+            help='Schema concreto (repetible). Por defecto todas las clínicas y la plantilla.'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Migrar también los schemas que parecen al día'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo mostrar qué schemas tienen migraciones pendientes'
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        schemas = options['tenants'] or list(
+            Clinic.objects.exclude(schema_name='public').values_list('schema_name', flat=True)
+        )
+        template = template_schema_name()
+        if template and not options['tenants'] and schema_exists(template):
+            # La plantilla de altas nuevas se mantiene al día igual que una clínica
+            schemas.append(template)
+        if not schemas:
+            self.stdout.write('ℹ️ No hay schemas de clínicas que migrar')
+            return
+
+        pending = pending_migration_counts(schemas)
+        targets = schemas if options['force'] else [s for s in schemas if pending[s] > 0]
+        self.stdout.write(
+            f'📊 {len(schemas)} schemas, {len(targets)} con migraciones pendientes '
+            f'({len(schemas) - len(targets)} al día)'
+        )
+        for schema_name in targets:
+            self.stdout.write(f'   {schema_name}: {pending[schema_name]} pendientes')
+        if options['dry_run'] or not targets:
+            return
+
+        workers = max(1, min(options['workers'], len(targets)))
+        verbosity = max(0, options['verbosity'] - 1)
+        results = {}
+        if workers == 1:
+            for schema_name in targets:
+                results[schema_name] = migrate_schema(schema_name, verbosity)
+                self.report(schema_name, *results[schema_name])
+        else:
+            # Cerrar antes de crear los procesos: un socket compartido entre
+            # padre e hijos corrompe el protocolo de PostgreSQL
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(migrate_schema, schema_name, verbosity): schema_name
+                    for schema_name in targets
+                }
+                for future in as_completed(futures):
+                    schema_name = futures[future]
+                    try:
+                        results[schema_name] = future.result()
+                    except Exception as e:
+                        # El proceso murió (p. ej. sin memoria)
+                        results[schema_name] = (0.0, repr(e))
+                    self.report(schema_name, *results[schema_name])
+
+        failed = {name: error for name, (_, error) in results.items() if error}
+        elapsed = time.perf_counter() - start
+        slowest = max(results.items(), key=lambda item: item[1][0])
+        self.stdout.write(
+            f'⏱️ {len(results)} schemas en {elapsed:.1f}s con {workers} procesos '
+            f'(más lento: {slowest[0]} {slowest[1][0]:.1f}s)'
+        )
+        if failed:
+            for schema_name, error in failed.items():
+                self.stderr.write(f'❌ {schema_name}:\n{error}')
+            raise CommandError(f'{len(failed)} schema(s) fallaron: {", ".join(sorted(failed))}')
+        self.stdout.write(self.style.SUCCESS('✅ Migraciones de tenants completadas'))
+
+    def report(self, schema_name, elapsed, error):
+        if error:
+            self.stdout.write(self.style.ERROR(f'❌ {schema_name} ({elapsed:.1f}s)'))
+        else:
+            self.stdout.write(f'✅ {schema_name} ({elapsed:.1f}s)')
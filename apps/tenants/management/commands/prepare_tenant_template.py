@@ -0,0 +1,50 @@
+"""
+Comando para crear o actualizar el schema plantilla de nuevas clínicas.
+
+Las clínicas nuevas se crean clonando este schema (ver
+apps/tenants/provisioning.py), así que debe ejecutarse después de cada
+`migrate_schemas` (lo hace build.sh).
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tenants.provisioning import (
+    missing_template_migrations, prepare_template_schema, template_schema_name
+)
+
+
+class Command(BaseCommand):
+    help = 'Crea o migra el schema plantilla que se clona al dar de alta una clínica'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Solo comprobar si la plantilla está al día (sale con error si no)'
+        )
+
+    def handle(self, *args, **options):
+        template = template_schema_name()
+        if not template:
+            raise CommandError('TENANT_TEMPLATE_SCHEMA no está configurado')
+
+        missing = missing_template_migrations(template)
+        if options['check']:
+            if missing is None:
+                raise CommandError(f"La plantilla '{template}' no existe")
+            if missing:
+                raise CommandError(f"La plantilla '{template}' tiene {len(missing)} migraciones pendientes")
+            self.stdout.write(self.style.SUCCESS(f"✅ Plantilla '{template}' al día"))
+            return
+
+        if missing == set():
+            self.stdout.write(self.style.SUCCESS(f"✅ Plantilla '{template}' ya estaba al día"))
+            return
+
+        self.stdout.write(f"🧬 Preparando plantilla '{template}'...")
+        start = time.perf_counter()
+        prepare_template_schema(verbosity=max(0, options['verbosity'] - 1))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Plantilla '{template}' lista en {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,47 @@
+"""
+Comando para recoger las altas de clínicas que el proceso web no terminó.
+
+El registro ejecuta cada alta en un hilo del proceso web; si el proceso se
+reinicia, el job se queda 'pending' o 'running' y su subdominio bloqueado.
+Este comando (cron de Render, servicio psico-provisioning-jobs en
+render.yaml) da por fallidos los 'running' sin latido, liberando su
+subdominio, y ejecuta los 'pending'.
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.tenants.provisioning import fail_stale_jobs, process_pending_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta las altas de clínicas pendientes y da por fallidas las interrumpidas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10, help='Altas por pasada')
+        parser.add_argument('--loop', action='store_true', help='Seguir procesando indefinidamente')
+        parser.add_argument('--interval', type=float, default=10.0, help='Segundos entre pasadas con --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                failed = fail_stale_jobs()
+                summary = process_pending_jobs(limit=options['limit'])
+            except Exception:
+                if not options['loop']:
+                    raise
+                logger.exception("❌ Error procesando las altas de clínicas; se reintenta")
+                failed, summary = 0, None
+            if failed:
+                self.stdout.write(self.style.WARNING(f'⚠️ {failed} altas interrumpidas marcadas como fallidas'))
+            if summary:
+                detail = ', '.join(f'{state}={count}' for state, count in sorted(summary.items()))
+                self.stdout.write(f'🏗️ Altas de clínicas: {detail}')
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+            close_old_connections()
@@ -0,0 +1,72 @@
+# apps/tenants/migration_state.py
+"""
+Estado de migraciones de los schemas de tenant sin cambiar de search_path.
+
+`migrate_schemas` entra en cada schema aunque no tenga nada pendiente. Aquí
+se compara, con una consulta UNION ALL sobre las tablas django_migrations
+de todos los schemas, cuántas de las migraciones en disco tiene aplicadas
+cada uno (mismo enfoque que apps/tenants/stats.py).
+"""
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+
+
+@lru_cache(maxsize=1)
+def expected_tenant_migrations():
+    """
+    Migraciones en disco de las apps de TENANT_APPS: {(app_label, nombre)}.
+    No cambian mientras vive el proceso, así que se leen una sola vez.
+    """
+    labels = {
+        config.label for config in apps.get_app_configs()
+        if config.name in settings.TENANT_APPS
+    }
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    return frozenset(key for key in loader.disk_migrations if key[0] in labels)
+
+
+def _schemas_with_migrations_table(schema_names):
+    """Una consulta al catálogo: schemas que ya tienen django_migrations."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT table_schema FROM information_schema.tables "
+            "WHERE table_name = 'django_migrations' AND table_schema = ANY(%s)",
+            [list(schema_names)]
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def pending_migration_counts(schema_names):
+    """
+    {schema: migraciones pendientes}. Un schema sin tabla de migraciones
+    (recién creado o vacío) cuenta todas como pendientes.
+    """
+    expected = sorted(f"{app}.{name}" for app, name in expected_tenant_migrations())
+    available = _schemas_with_migrations_table(schema_names)
+
+    parts = []
+    params = []
+    for schema_name in schema_names:
+        if schema_name not in available:
+            continue
+        parts.append(
+            "SELECT %s, COUNT(*) "
+            f"FROM {connection.ops.quote_name(schema_name)}.django_migrations "
+            "WHERE app || '.' || name = ANY(%s)"
+        )
+        params.extend([schema_name, expected])
+
+    applied = {}
+    if parts:
+        with connection.cursor() as cursor:
+            cursor.execute(" UNION ALL ".join(parts), params)
+            applied = dict(cursor.fetchall())
+
+    return {
+        schema_name: len(expected) - applied.get(schema_name, 0)
+        for schema_name in schema_names
+    }
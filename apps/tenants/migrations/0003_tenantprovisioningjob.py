@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-18 22:27
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_publicuser'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantProvisioningJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('subdomain', models.CharField(db_index=True, max_length=63)),
+                ('clinic_name', models.CharField(max_length=100)),
+                ('admin_email', models.EmailField(max_length=254)),
+                ('admin_phone', models.CharField(blank=True, max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En curso'), ('completed', 'Completada'), ('failed', 'Fallida')], default='pending', max_length=10)),
+                ('step', models.CharField(blank=True, max_length=50)),
+                ('progress', models.PositiveSmallIntegerField(default=0)),
+                ('schema_method', models.CharField(blank=True, max_length=20)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('clinic', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='tenants.clinic')),
+            ],
+            options={
+                'verbose_name': 'Alta de clínica',
+                'verbose_name_plural': 'Altas de clínicas',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
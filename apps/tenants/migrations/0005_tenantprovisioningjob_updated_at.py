@@ -0,0 +1,20 @@
+# Generated by Django 5.1.4 on 2026-10-18 23:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0004_clinic_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenantprovisioningjob',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -1,5 +1,7 @@
 # apps/tenants/models.py
 
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django_tenants.models import TenantMixin, DomainMixin
@@ -88,6 +90,7 @@ class Clinic(TenantMixin):
     """
     name = models.CharField(max_length=100)
     created_on = models.DateField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     # auto_create_schema se asegura de que django-tenants cree automáticamente
     # un nuevo esquema en la base de datos cuando se crea una nueva clínica.
@@ -96,8 +99,65 @@ class Clinic(TenantMixin):
     def __str__(self):
         return self.name
 
+    def create_schema(self, check_if_exists=False, sync_schema=True, verbosity=1):
+        """
+        Clona el schema plantilla ya migrado en lugar de ejecutar todas las
+        migraciones (ver apps/tenants/provisioning.py). Si no hay plantilla
+        o está desactualizada, se usa el camino normal de django-tenants.
+        """
+        from .provisioning import clone_template_schema
+
+        if sync_schema and clone_template_schema(self.schema_name, check_if_exists):
+            return True
+        return super().create_schema(check_if_exists, sync_schema, verbosity)
+
 class Domain(DomainMixin):
     """
     Este modelo representa los dominios o subdominios asociados a cada clínica.
     """
-    pass
\ No newline at end of file
+    pass
+
+
+class TenantProvisioningJob(models.Model):
+    """
+    Alta de una clínica desde el registro público, ejecutada en segundo
+    plano. El frontend consulta su estado con el id devuelto por el registro.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('running', 'En curso'),
+        ('completed', 'Completada'),
+        ('failed', 'Fallida'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subdomain = models.CharField(max_length=63, db_index=True)
+    clinic_name = models.CharField(max_length=100)
+    admin_email = models.EmailField()
+    admin_phone = models.CharField(max_length=20, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    step = models.CharField(max_length=50, blank=True)
+    progress = models.PositiveSmallIntegerField(default=0)
+    # 'template' (clonado) o 'migrations' (plantilla ausente o desactualizada)
+    schema_method = models.CharField(max_length=20, blank=True)
+    error = models.TextField(blank=True)
+    clinic = models.ForeignKey(Clinic, null=True, blank=True, on_delete=models.SET_NULL)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Latido: se actualiza en cada paso (ver provisioning.fail_stale_jobs)
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Alta de clínica'
+        verbose_name_plural = 'Altas de clínicas'
+
+    def __str__(self):
+        return f"{self.subdomain} ({self.status})"
+
+    @property
+    def duration_ms(self):
+        if self.started_at and self.finished_at:
+            return round((self.finished_at - self.started_at).total_seconds() * 1000)
+        return None
@@ -0,0 +1,126 @@
+# apps/tenants/postgresql_backend/base.py
+"""
+Backend de PostgreSQL para django-tenants que recuerda el search_path
+aplicado en la conexión física.
+
+django-tenants marca el search_path como "pendiente" en cada
+`connection.set_tenant()`, aunque el schema no cambie, y lo vuelve a
+enviar en el siguiente cursor. Con conexiones persistentes
+(conn_max_age > 0: WSGI, comandos, el worker de Stripe y los cron) la
+conexión suele seguir en el schema correcto, así que aquí se omite ese
+`SET search_path` redundante. En el servicio web ASGI (conn_max_age=0)
+cada request abre su conexión y siempre envía el primer SET.
+
+El search_path es transaccional en PostgreSQL: si la transacción o un
+savepoint se revierte, el valor recordado se descarta.
+
+Además aplica el tenant de la request async (apps/tenants/request_tenant.py)
+a la conexión del hilo en el que corre el ORM: `tenant` y `schema_name`
+lo ajustan antes de devolverse, y `_cursor` lee `schema_name`.
+"""
+import threading
+
+from django.conf import settings
+from django_tenants.postgresql_backend.base import DatabaseWrapper as TenantDatabaseWrapper
+from django_tenants.utils import get_limit_set_calls
+
+from apps.tenants.request_tenant import current_request_tenant
+
+
+class SearchPathStats:
+    """Contadores por proceso de SET search_path enviados y omitidos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.issued = 0
+        self.skipped = 0
+
+    def record(self, issued):
+        with self._lock:
+            if issued:
+                self.issued += 1
+            else:
+                self.skipped += 1
+
+    def as_dict(self):
+        return {'search_path_set': self.issued, 'search_path_skipped': self.skipped}
+
+
+search_path_stats = SearchPathStats()
+
+
+class DatabaseWrapper(TenantDatabaseWrapper):
+
+    def __init__(self, *args, **kwargs):
+        # search_path realmente vigente en la sesión de la conexión física
+        self.applied_search_path = None
+        self.request_tenant = None
+        super().__init__(*args, **kwargs)
+        # El set_schema_to_public() del constructor no cuenta como explícito
+        self.request_tenant = None
+
+    # --- Tenant de la request async ---
+
+    def _apply_request_tenant(self):
+        bound = current_request_tenant()
+        if bound is not None and bound is not self.__dict__.get('request_tenant'):
+            self.set_tenant(bound.tenant)
+
+    @property
+    def tenant(self):
+        self._apply_request_tenant()
+        return self.__dict__.get('_tenant')
+
+    @tenant.setter
+    def tenant(self, value):
+        self.__dict__['_tenant'] = value
+
+    @property
+    def schema_name(self):
+        self._apply_request_tenant()
+        return self.__dict__.get('_schema_name')
+
+    @schema_name.setter
+    def schema_name(self, value):
+        self.__dict__['_schema_name'] = value
+
+    def set_tenant(self, tenant, include_public=True):
+        # A partir de aquí, en esta request, manda este tenant (p. ej. el
+        # de un schema_context) y no el del middleware
+        self.request_tenant = current_request_tenant()
+        super().set_tenant(tenant, include_public)
+        if not getattr(settings, 'TENANT_SKIP_REDUNDANT_SEARCH_PATH', True):
+            return
+        if self.applied_search_path is not None and self.connection is not None:
+            if self._get_cursor_search_paths() == self.applied_search_path:
+                # Misma ruta que la sesión ya tiene: no hace falta otro SET
+                self.search_path_set_schemas = self.applied_search_path
+
+    def _cursor(self, name=None):
+        # Sin TENANT_LIMIT_SET_CALLS django-tenants envía el SET en cada cursor
+        issued = not self.search_path_set_schemas or not get_limit_set_calls()
+        cursor = super()._cursor(name=name)
+        search_path_stats.record(issued=issued)
+        if issued:
+            self.applied_search_path = self.search_path_set_schemas
+        return cursor
+
+    def _forget_search_path(self):
+        self.applied_search_path = None
+        self.search_path_set_schemas = None
+
+    def close(self):
+        self._forget_search_path()
+        super().close()
+
+    def connect(self):
+        self._forget_search_path()
+        super().connect()
+
+    def _rollback(self):
+        self._forget_search_path()
+        return super()._rollback()
+
+    def _savepoint_rollback(self, sid):
+        self._forget_search_path()
+        return super()._savepoint_rollback(sid)
@@ -0,0 +1,279 @@
+# apps/tenants/provisioning.py
+"""
+Alta rápida de clínicas a partir de un schema plantilla.
+
+Migrar un schema nuevo desde cero tarda muchos segundos. En su lugar se
+mantiene un schema plantilla (TENANT_TEMPLATE_SCHEMA) con todas las
+migraciones de TENANT_APPS aplicadas y sin datos de negocio, y cada
+clínica nueva se crea clonándolo con la función `clone_schema` de
+django-tenants (tablas, secuencias y la tabla django_migrations).
+
+La plantilla se prepara en el build con `prepare_tenant_template`. Si
+falta o le faltan migraciones, `Clinic.create_schema` vuelve al camino
+normal (CREATE SCHEMA + migrate_schemas) y deja un aviso en el log.
+
+El registro público ejecuta el alta en segundo plano
+(`start_provisioning_job`) y el frontend consulta el progreso. Cada job
+se reclama con SELECT ... FOR UPDATE SKIP LOCKED, así que lo puede
+ejecutar el hilo del proceso web o el comando `process_provisioning_jobs`
+(cron de Render), nunca los dos. Ese comando recoge los jobs pendientes
+que el proceso web no llegó a ejecutar y da por fallidos los que se
+quedaron 'running' sin avanzar (el proceso murió a medias), borrando la
+clínica a medio crear para que el subdominio se pueda volver a registrar.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from django_tenants.clone import CloneSchema
+from django_tenants.utils import schema_context, schema_exists
+
+from .migration_state import expected_tenant_migrations
+
+logger = logging.getLogger(__name__)
+
+TEMPORARY_ADMIN_PASSWORD = 'Admin123!'
+
+_executor = None
+
+
+def template_schema_name():
+    return getattr(settings, 'TENANT_TEMPLATE_SCHEMA', None)
+
+
+def missing_template_migrations(schema_name=None):
+    """
+    Migraciones que le faltan a la plantilla. Devuelve None si la plantilla
+    no existe o no tiene tabla de migraciones.
+    """
+    schema_name = schema_name or template_schema_name()
+    if not schema_name:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [f'"{schema_name}".django_migrations'])
+        if cursor.fetchone()[0] is None:
+            return None
+        cursor.execute(f'SELECT app, name FROM "{schema_name}".django_migrations')
+        applied = set(cursor.fetchall())
+    return set(expected_tenant_migrations()) - applied
+
+
+def clone_template_schema(schema_name, check_if_exists=False):
+    """
+    Crea `schema_name` clonando la plantilla. Devuelve False (sin hacer
+    nada) si no hay plantilla utilizable, para que el llamador migre.
+    """
+    template = template_schema_name()
+    if not template or schema_name == template:
+        return False
+    if check_if_exists and schema_exists(schema_name):
+        return True
+
+    missing = missing_template_migrations(template)
+    if missing is None:
+        logger.warning("⚠️ Plantilla '%s' no encontrada: se migra '%s' desde cero", template, schema_name)
+        return False
+    if missing:
+        logger.warning(
+            "⚠️ Plantilla '%s' desactualizada (%d migraciones pendientes): se migra '%s' desde cero. "
+            "Ejecuta `prepare_tenant_template`.", template, len(missing), schema_name
+        )
+        return False
+
+    start = time.perf_counter()
+    CloneSchema().clone_schema(template, schema_name)
+    connection.set_schema_to_public()
+    logger.info(
+        "🧬 Schema '%s' clonado de '%s' en %.0fms",
+        schema_name, template, (time.perf_counter() - start) * 1000
+    )
+    return True
+
+
+def prepare_template_schema(verbosity=1):
+    """Crea la plantilla si no existe y le aplica las migraciones pendientes."""
+    template = template_schema_name()
+    if not template:
+        return False
+    if not schema_exists(template):
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE SCHEMA "{template}"')
+    call_command(
+        'migrate_schemas', tenant=True, schema_name=template,
+        interactive=False, verbosity=verbosity
+    )
+    connection.set_schema_to_public()
+    return True
+
+
+# --- Alta en segundo plano ---
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'TENANT_PROVISIONING_WORKERS', 2),
+            thread_name_prefix='tenant-provisioning'
+        )
+    return _executor
+
+
+def _stale_after():
+    return timedelta(minutes=getattr(settings, 'TENANT_PROVISIONING_STALE_MINUTES', 30))
+
+
+def _update(job, **fields):
+    for name, value in fields.items():
+        setattr(job, name, value)
+    # updated_at hace de latido: un job 'running' que no avanza está muerto
+    job.save(update_fields=[*fields, 'updated_at'])
+
+
+def claim_job(job_id):
+    """
+    Pasa el job de 'pending' a 'running'. Devuelve None si ya lo reclamó
+    otro proceso (o lo tiene bloqueado en este momento).
+    """
+    from .models import TenantProvisioningJob
+
+    with transaction.atomic():
+        job = TenantProvisioningJob.objects.select_for_update(skip_locked=True).filter(
+            pk=job_id, status='pending'
+        ).first()
+        if job is None:
+            return None
+        _update(job, status='running', step='schema', progress=10, started_at=timezone.now())
+    return job
+
+
+def _discard_partial_clinic(job):
+    """Borra la clínica (y su schema) que el job dejó a medio crear."""
+    from .models import Clinic
+
+    connection.set_schema_to_public()
+    # El registro rechaza subdominios con clínica, así que una clínica con
+    # este schema creada desde el alta es de este job
+    for clinic in Clinic.objects.filter(
+        schema_name=job.subdomain, created_on__gte=job.created_at.date()
+    ):
+        clinic.delete(force_drop=True)
+        logger.warning("🧹 Clínica a medio crear '%s' eliminada (alta %s)", job.subdomain, job.pk)
+
+
+def run_provisioning_job(job_id):
+    """Crea clínica, dominio y administrador, publicando el progreso en el job."""
+    from apps.users.models import CustomUser
+    from .models import Clinic, Domain
+    from .stats import invalidate_tenant_stats
+
+    job = claim_job(job_id)
+    if job is None:
+        return None
+    try:
+        uses_template = not missing_template_migrations() if template_schema_name() else False
+        _update(job, schema_method='template' if uses_template else 'migrations')
+
+        clinic = Clinic(schema_name=job.subdomain, name=job.clinic_name)
+        clinic.save()
+        _update(job, clinic=clinic, step='domain', progress=60)
+
+        Domain.objects.create(
+            domain=f"{job.subdomain}.psicoadmin.xyz",
+            tenant=clinic,
+            is_primary=True
+        )
+        _update(job, step='admin', progress=80)
+
+        with schema_context(clinic.schema_name):
+            CustomUser.objects.create_user(
+                email=job.admin_email,
+                password=TEMPORARY_ADMIN_PASSWORD,
+                username=job.admin_email.split('@')[0],
+                first_name='Admin',
+                last_name=job.clinic_name[:150],
+                phone=job.admin_phone,
+                user_type='admin',
+                is_staff=True,
+                is_superuser=True,
+            )
+
+        invalidate_tenant_stats()
+        _update(job, status='completed', step='done', progress=100, finished_at=timezone.now())
+        logger.info(
+            "✅ Nueva clínica registrada: %s (%s) en %sms [%s]",
+            job.clinic_name, job.subdomain, job.duration_ms, job.schema_method
+        )
+    except Exception as e:
+        logger.exception("❌ Error en registro de tenant %s", job.subdomain)
+        try:
+            _discard_partial_clinic(job)
+        except Exception:
+            logger.exception("❌ No se pudo borrar la clínica a medio crear %s", job.subdomain)
+        _update(job, status='failed', error=str(e), clinic=None, finished_at=timezone.now())
+    finally:
+        connection.set_schema_to_public()
+    return job.status
+
+
+def fail_stale_jobs():
+    """
+    Da por fallidos los jobs 'running' sin latido desde hace
+    TENANT_PROVISIONING_STALE_MINUTES y libera su subdominio.
+    Devuelve cuántos.
+    """
+    from .models import TenantProvisioningJob
+
+    cutoff = timezone.now() - _stale_after()
+    failed = 0
+    with transaction.atomic():
+        stale = TenantProvisioningJob.objects.select_for_update(skip_locked=True).filter(
+            status='running', updated_at__lt=cutoff
+        )
+        for job in stale:
+            _discard_partial_clinic(job)
+            _update(
+                job, status='failed', clinic=None, finished_at=timezone.now(),
+                error=f"Alta interrumpida en el paso '{job.step}' (el proceso se reinició)"
+            )
+            logger.warning("⚠️ Alta %s (%s) interrumpida: marcada como fallida", job.pk, job.subdomain)
+            failed += 1
+    return failed
+
+
+def process_pending_jobs(limit=10):
+    """Ejecuta los jobs pendientes por orden de llegada. Devuelve {estado: cantidad}."""
+    from .models import TenantProvisioningJob
+
+    pending = list(TenantProvisioningJob.objects.filter(
+        status='pending'
+    ).order_by('created_at').values_list('pk', flat=True)[:limit])
+
+    summary = {}
+    for job_id in pending:
+        result = run_provisioning_job(job_id) or 'skipped'
+        summary[result] = summary.get(result, 0) + 1
+    return summary
+
+
+def _run_in_thread(job_id):
+    try:
+        run_provisioning_job(job_id)
+    finally:
+        # El hilo no pasa por request_finished: cerrar sus conexiones
+        connections.close_all()
+
+
+def start_provisioning_job(job):
+    """Encola el alta; si TENANT_PROVISIONING_ASYNC es False se ejecuta ya."""
+    if getattr(settings, 'TENANT_PROVISIONING_ASYNC', True):
+        # Tras el commit: el hilo tiene que poder leer el job
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job.pk))
+    else:
+        run_provisioning_job(job.pk)
+        job.refresh_from_db()
+    return job
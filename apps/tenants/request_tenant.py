@@ -0,0 +1,43 @@
+# apps/tenants/request_tenant.py
+"""
+Tenant de la request en curso para el camino async de CustomTenantMiddleware.
+
+Las conexiones de Django son por hilo y, bajo ASGI, el ORM async lanza las
+consultas en un hilo distinto del event loop (sync_to_async). Llamar a
+`connection.set_tenant()` desde el middleware async configuraría la
+conexión del hilo equivocado.
+
+En su lugar el middleware deja el tenant en un ContextVar, que asgiref
+copia al hilo de cada sync_to_async. El backend
+(apps/tenants/postgresql_backend) lo aplica a la conexión del hilo que
+la usa, antes de leer su schema o de abrir un cursor. Un `set_tenant`
+explícito (schema_context, tenant_context) dentro de la request manda
+sobre el del middleware.
+"""
+import contextvars
+
+
+class RequestTenant:
+    """Un objeto por request: la conexión recuerda a cuál ya se ajustó."""
+
+    __slots__ = ('tenant',)
+
+    def __init__(self, tenant):
+        self.tenant = tenant
+
+
+_request_tenant = contextvars.ContextVar('request_tenant', default=None)
+
+
+def bind_request_tenant(tenant):
+    """Fija el tenant de la request en el contexto; devuelve el token para `unbind`."""
+    return _request_tenant.set(RequestTenant(tenant))
+
+
+def unbind_request_tenant(token):
+    _request_tenant.reset(token)
+
+
+def current_request_tenant():
+    """RequestTenant de la request en curso (None fuera del camino async)."""
+    return _request_tenant.get()
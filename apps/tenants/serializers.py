@@ -2,8 +2,7 @@
 
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from django.db import transaction
-from .models import Clinic, Domain
+from .models import Clinic, Domain, TenantProvisioningJob
 import re
 
 User = get_user_model()
@@ -138,6 +137,14 @@ class TenantRegistrationSerializer(serializers.Serializer):
             raise serializers.ValidationError(
                 f"El subdominio '{value}' ya está en uso. Por favor, elige otro."
             )
+
+        # Ni que haya un alta en curso con el mismo subdominio
+        if TenantProvisioningJob.objects.filter(
+            subdomain=value, status__in=['pending', 'running']
+        ).exists():
+            raise serializers.ValidationError(
+                f"El subdominio '{value}' ya está en uso. Por favor, elige otro."
+            )
         
         return value
 
@@ -153,58 +160,32 @@ class TenantRegistrationSerializer(serializers.Serializer):
         
         return value
 
-    @transaction.atomic
     def create(self, validated_data):
         """
-        Crear el tenant, dominio y usuario administrador
+        Registrar el alta de la clínica. El tenant, el dominio y el usuario
+        administrador se crean en segundo plano (ver provisioning.py).
         """
-        clinic_name = validated_data['clinic_name']
-        subdomain = validated_data['subdomain']
-        admin_email = validated_data['admin_email']
-        admin_phone = validated_data.get('admin_phone', '')
-        address = validated_data.get('address', '')
-        
-        # 1. Crear el tenant (clínica)
-        tenant = Clinic.objects.create(
-            schema_name=subdomain,
-            name=clinic_name,
-            address=address,
-            phone=admin_phone,
-        )
-        
-        # 2. Crear el dominio
-        domain = Domain.objects.create(
-            domain=f"{subdomain}.psicoadmin.xyz",
-            tenant=tenant,
-            is_primary=True
+        from .provisioning import start_provisioning_job
+
+        job = TenantProvisioningJob.objects.create(
+            subdomain=validated_data['subdomain'],
+            clinic_name=validated_data['clinic_name'],
+            admin_email=validated_data['admin_email'],
+            admin_phone=validated_data.get('admin_phone', ''),
         )
-        
-        # 3. Crear usuario administrador en el schema del tenant
-        from django_tenants.utils import schema_context
-        
-        with schema_context(tenant.schema_name):
-            admin_user = User.objects.create_user(
-                username=admin_email.split('@')[0],
-                email=admin_email,
-                first_name='Admin',
-                last_name=clinic_name,
-                phone=admin_phone,
-                role='admin',
-                is_staff=True,
-                is_superuser=True,
-            )
-            # Establecer contraseña temporal
-            admin_user.set_password('Admin123!')
-            admin_user.save()
-        
-        return {
-            'tenant': tenant,
-            'domain': domain,
-            'admin_user': admin_user,
-            'subdomain': subdomain,
-            'admin_email': admin_email,
-            'temporary_password': 'Admin123!'
-        }
+        return start_provisioning_job(job)
+
+
+class TenantProvisioningJobSerializer(serializers.ModelSerializer):
+    """Estado de un alta de clínica (lo consulta el frontend tras registrar)."""
+    duration_ms = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = TenantProvisioningJob
+        fields = [
+            'id', 'subdomain', 'clinic_name', 'status', 'step', 'progress',
+            'schema_method', 'error', 'created_at', 'finished_at', 'duration_ms'
+        ]
 
 
 class SubdomainCheckSerializer(serializers.Serializer):
@@ -0,0 +1,17 @@
+# apps/tenants/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from config.response_cache import invalidate_tags
+
+from .models import Clinic, Domain
+from .tenant_cache import invalidate_tenant_cache
+
+
+@receiver([post_save, post_delete], sender=Clinic)
+@receiver([post_save, post_delete], sender=Domain)
+def invalidate_cached_tenants(sender, instance, **kwargs):
+    # Un cambio de dominio o de clínica puede cambiar el tenant de un hostname
+    invalidate_tenant_cache()
+    # Listado público de clínicas (cacheado en el schema público)
+    invalidate_tags('clinics', schema='public')
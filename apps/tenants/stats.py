@@ -0,0 +1,102 @@
+# apps/tenants/stats.py
+"""
+Estadísticas globales de usuarios por clínica.
+
+En lugar de cambiar de schema por cada clínica y lanzar varios COUNT,
+se construye una sola consulta UNION ALL con conteos condicionales sobre
+la tabla de usuarios de cada schema. El resultado se cachea unos segundos
+para el dashboard global, el admin público y la API.
+"""
+import logging
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db import connection
+
+from .models import Clinic, Domain
+
+logger = logging.getLogger(__name__)
+
+TENANT_STATS_CACHE_KEY = 'tenant-stats:user-counts'
+TENANT_STATS_CACHE_TTL = 60
+
+EMPTY_COUNTS = {'total_users': 0, 'patients': 0, 'professionals': 0, 'admins': 0}
+
+
+def _schemas_with_users_table(schema_names, table):
+    """Una consulta al catálogo para descartar schemas sin migrar."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT table_schema FROM information_schema.tables "
+            "WHERE table_name = %s AND table_schema = ANY(%s)",
+            [table, list(schema_names)]
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def _query_user_counts(schema_names):
+    from apps.users.models import CustomUser
+
+    table = CustomUser._meta.db_table
+    available = _schemas_with_users_table(schema_names, table)
+
+    parts = []
+    params = []
+    for schema_name in schema_names:
+        if schema_name not in available:
+            continue
+        parts.append(
+            "SELECT %s, COUNT(*), "
+            "COUNT(*) FILTER (WHERE user_type = 'patient'), "
+            "COUNT(*) FILTER (WHERE user_type = 'professional'), "
+            "COUNT(*) FILTER (WHERE user_type = 'admin') "
+            f"FROM {connection.ops.quote_name(schema_name)}.{connection.ops.quote_name(table)}"
+        )
+        params.append(schema_name)
+
+    counts = {}
+    if parts:
+        with connection.cursor() as cursor:
+            cursor.execute(" UNION ALL ".join(parts), params)
+            for schema_name, total, patients, professionals, admins in cursor.fetchall():
+                counts[schema_name] = {
+                    'total_users': total,
+                    'patients': patients,
+                    'professionals': professionals,
+                    'admins': admins,
+                }
+
+    for schema_name in schema_names:
+        if schema_name not in counts:
+            counts[schema_name] = dict(EMPTY_COUNTS, error='Schema sin tabla de usuarios')
+    return counts
+
+
+def get_tenant_user_counts(use_cache=True):
+    """
+    Devuelve {schema_name: {'total_users', 'patients', 'professionals', 'admins'}}
+    para todas las clínicas reales (sin el schema público).
+    """
+    if use_cache:
+        counts = cache.get(TENANT_STATS_CACHE_KEY)
+        if counts is not None:
+            return counts
+
+    schema_names = list(
+        Clinic.objects.exclude(schema_name='public').values_list('schema_name', flat=True)
+    )
+    counts = _query_user_counts(schema_names)
+    cache.set(TENANT_STATS_CACHE_KEY, counts, TENANT_STATS_CACHE_TTL)
+    return counts
+
+
+def get_clinic_domains(clinics):
+    """Dominios de varias clínicas en una sola consulta: {clinic_id: [Domain, ...]}."""
+    domains = defaultdict(list)
+    for domain in Domain.objects.filter(tenant__in=clinics).order_by('-is_primary', 'domain'):
+        domains[domain.tenant_id].append(domain)
+    return domains
+
+
+def invalidate_tenant_stats():
+    cache.delete(TENANT_STATS_CACHE_KEY)
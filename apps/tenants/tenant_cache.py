@@ -0,0 +1,41 @@
+# apps/tenants/tenant_cache.py
+"""
+Caché en memoria hostname → tenant para CustomTenantMiddleware y el
+WebSocket del chat (apps/chat/middleware.py).
+
+Es un dict por proceso, sin E/S: el camino async del middleware y el
+WebSocket la leen desde el event loop sin saltar a un hilo (a diferencia de `cache.aget`, que con LocMemCache pasa
+por sync_to_async). Los cambios de Clinic/Domain la vacían en el proceso
+actual; el TTL acota la ventana en el resto de workers.
+"""
+import time
+
+from django.conf import settings
+
+TENANT_CACHE_TTL = getattr(settings, 'TENANT_DOMAIN_CACHE_TTL', 300)
+
+# Límite de hostnames recordados (los desconocidos caen en el tenant público)
+TENANT_CACHE_MAX_ENTRIES = 1000
+
+_tenants = {}
+
+
+def get_cached_tenant(hostname):
+    entry = _tenants.get(hostname)
+    if entry is None:
+        return None
+    expires_at, tenant = entry
+    if expires_at < time.monotonic():
+        _tenants.pop(hostname, None)
+        return None
+    return tenant
+
+
+def cache_tenant(hostname, tenant):
+    if len(_tenants) >= TENANT_CACHE_MAX_ENTRIES:
+        _tenants.clear()
+    _tenants[hostname] = (time.monotonic() + TENANT_CACHE_TTL, tenant)
+
+
+def invalidate_tenant_cache():
+    _tenants.clear()
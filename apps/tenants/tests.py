@@ -1,5 +1,126 @@
 # apps/tenants/tests.py
+from types import SimpleNamespace
+from unittest import mock
 
-from django.test import TestCase
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+from django_tenants.utils import get_tenant_model, schema_context
 
-# Create your tests here.
\ No newline at end of file
+from apps.tenants import provisioning
+from apps.tenants.custom_tenant_middleware import CustomTenantMiddleware
+from apps.tenants.management.commands.benchmark_middleware import build_chain
+from apps.tenants.request_tenant import bind_request_tenant, unbind_request_tenant
+from apps.tenants.tenant_cache import cache_tenant, invalidate_tenant_cache
+
+
+def make_tenant(schema_name):
+    return get_tenant_model()(schema_name=schema_name, name=schema_name)
+
+
+class RequestTenantBindingTests(SimpleTestCase):
+    """El backend aplica el tenant del ContextVar a la conexión que lo lee."""
+
+    def setUp(self):
+        # Conexión nueva, sin abrir: no toca la base de datos
+        self.wrapper = connections.create_connection('default')
+
+    def test_bound_tenant_applies_to_connection(self):
+        self.assertEqual(self.wrapper.schema_name, 'public')
+        token = bind_request_tenant(make_tenant('clinica_a'))
+        try:
+            self.assertEqual(self.wrapper.schema_name, 'clinica_a')
+            self.assertEqual(self.wrapper.tenant.schema_name, 'clinica_a')
+        finally:
+            unbind_request_tenant(token)
+
+    def test_explicit_set_tenant_wins_over_binding(self):
+        token = bind_request_tenant(make_tenant('clinica_a'))
+        try:
+            self.wrapper.set_tenant(make_tenant('otra'))
+            self.assertEqual(self.wrapper.schema_name, 'otra')
+        finally:
+            unbind_request_tenant(token)
+
+    def test_new_binding_replaces_previous_request(self):
+        token = bind_request_tenant(make_tenant('clinica_a'))
+        self.assertEqual(self.wrapper.schema_name, 'clinica_a')
+        unbind_request_tenant(token)
+
+        token = bind_request_tenant(make_tenant('clinica_b'))
+        try:
+            self.assertEqual(self.wrapper.schema_name, 'clinica_b')
+        finally:
+            unbind_request_tenant(token)
+
+
+class AsyncTenantMiddlewareTests(SimpleTestCase):
+    hostname = 'bienestar.localhost'
+
+    def setUp(self):
+        cache_tenant(self.hostname, make_tenant('clinica_a'))
+        self.addCleanup(invalidate_tenant_cache)
+
+    def test_async_view_queries_see_request_tenant(self):
+        async def view(request):
+            # Lo que vería una consulta del ORM async
+            schema = await sync_to_async(lambda: connection.schema_name)()
+            return HttpResponse(schema)
+
+        middleware = CustomTenantMiddleware(view)
+        request = RequestFactory().get('/', HTTP_HOST=self.hostname)
+        response = async_to_sync(middleware)(request)
+
+        self.assertEqual(response.content, b'clinica_a')
+        self.assertEqual(request.tenant.schema_name, 'clinica_a')
+        self.assertEqual(request.urlconf, 'config.urls')
+
+    def test_schema_context_inside_async_view(self):
+        def public_schema():
+            with schema_context('public'):
+                return connection.schema_name
+
+        async def view(request):
+            inside = await sync_to_async(public_schema)()
+            after = await sync_to_async(lambda: connection.schema_name)()
+            return HttpResponse(f'{inside},{after}')
+
+        middleware = CustomTenantMiddleware(view)
+        request = RequestFactory().get('/', HTTP_HOST=self.hostname)
+        response = async_to_sync(middleware)(request)
+
+        self.assertEqual(response.content, b'public,clinica_a')
+
+    def test_configured_chain_has_no_sync_boundaries(self):
+        from django.conf import settings
+
+        _, switches = build_chain(settings.MIDDLEWARE)
+        self.assertEqual(switches, [])
+
+
+class ProvisioningJobTests(SimpleTestCase):
+    def test_job_claimed_elsewhere_is_not_run(self):
+        with mock.patch.object(provisioning, 'claim_job', return_value=None), \
+                mock.patch.object(provisioning, 'missing_template_migrations') as missing:
+            self.assertIsNone(provisioning.run_provisioning_job('job-id'))
+        missing.assert_not_called()
+
+    def test_failed_step_discards_partial_clinic(self):
+        job = SimpleNamespace(pk='job-id', subdomain='nueva', clinic_name='Nueva', status='running')
+
+        def update(job, **fields):
+            for name, value in fields.items():
+                setattr(job, name, value)
+
+        with mock.patch.object(provisioning, 'claim_job', return_value=job), \
+                mock.patch.object(provisioning, '_update', side_effect=update), \
+                mock.patch.object(provisioning, 'template_schema_name', return_value=None), \
+                mock.patch('apps.tenants.models.Clinic.save', side_effect=RuntimeError('boom')), \
+                mock.patch.object(provisioning, '_discard_partial_clinic') as discard, \
+                mock.patch.object(provisioning.connection, 'set_schema_to_public'):
+            status = provisioning.run_provisioning_job('job-id')
+
+        self.assertEqual(status, 'failed')
+        self.assertEqual(job.error, 'boom')
+        discard.assert_called_once_with(job)
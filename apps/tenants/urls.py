@@ -7,8 +7,11 @@ from .views import (
     global_admin_stats, 
     clinic_detail_stats,
     register_tenant,
+    register_tenant_status,
     check_subdomain_availability,
-    public_clinic_list  # ⭐ NUEVO
+    public_clinic_list,  # ⭐ NUEVO
+    database_pool_stats,
+    query_profile_report
 )
 
 app_name = 'tenants'
@@ -17,11 +20,14 @@ urlpatterns = [
     # ⭐ Endpoints públicos (NO requieren autenticación) - PRIMERO
     path('', public_clinic_list, name='public-clinic-list'),  # ⭐ GET /api/tenants/
     path('public/register/', register_tenant, name='register-tenant'),
+    path('public/register/<uuid:job_id>/', register_tenant_status, name='register-tenant-status'),
     path('public/check-subdomain/', check_subdomain_availability, name='check-subdomain'),
     
     # Endpoints protegidos (requieren autenticación)
     path('clinics/', ClinicListCreateView.as_view(), name='clinic-list-create'),
     path('clinics/<int:pk>/', ClinicDetailView.as_view(), name='clinic-detail'),
     path('admin/stats/', global_admin_stats, name='global-admin-stats'),
+    path('admin/db-pool/', database_pool_stats, name='database-pool-stats'),
+    path('admin/query-profile/', query_profile_report, name='query-profile-report'),
     path('clinics/<int:clinic_id>/stats/', clinic_detail_stats, name='clinic-detail-stats'),
 ]
\ No newline at end of file
@@ -1,5 +1,6 @@
 # apps/tenants/views.py
 
+from asgiref.sync import sync_to_async
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
@@ -7,6 +8,11 @@ from rest_framework.permissions import IsAuthenticated
 from django_tenants.utils import tenant_context, schema_context
 from .models import Clinic, Domain
 from .serializers import ClinicSerializer, ClinicCreateSerializer
+from django.db.models import Count, Max
+from config.async_api import async_api_view, api_response
+from config.conditional import conditional
+from config.response_cache import cache_response
+from .stats import get_tenant_user_counts, get_clinic_domains, invalidate_tenant_stats
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,6 +36,7 @@ class ClinicListCreateView(generics.ListCreateAPIView):
         
         try:
             clinic = serializer.save()
+            invalidate_tenant_stats()
             # Devolver la respuesta con el serializer de lectura
             response_serializer = ClinicSerializer(clinic)
             return Response(
@@ -65,6 +72,7 @@ class ClinicDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         # Eliminar la clínica (esto también eliminará el esquema)
         self.perform_destroy(instance)
+        invalidate_tenant_stats()
         
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -110,62 +118,35 @@ def global_admin_stats(request):
         total_users_global = 0
         clinic_stats = []
         
-        # Procesar cada clínica REAL para obtener estadísticas de usuarios
+        # Conteos de todos los schemas en una sola consulta UNION ALL (cacheada)
+        # y dominios de todas las clínicas en otra.
+        user_counts = get_tenant_user_counts()
+        domains_by_clinic = get_clinic_domains(all_clinics)
+        
         for clinic in all_clinics:
-            try:
-                with schema_context(clinic.schema_name):
-                    # Importar CustomUser dentro del contexto del schema
-                    from apps.users.models import CustomUser
-                    
-                    # Contar usuarios en este tenant
-                    total_users = CustomUser.objects.count()
-                    patients = CustomUser.objects.filter(user_type='patient').count()
-                    professionals = CustomUser.objects.filter(user_type='professional').count()
-                    admins = CustomUser.objects.filter(user_type='admin').count()
-                    
-                # Fuera del contexto del schema, obtener dominios
-                clinic_domains = Domain.objects.filter(tenant=clinic)
-                domains_list = [domain.domain for domain in clinic_domains]
-                primary_domain = clinic_domains.filter(is_primary=True).first()
-                
-                clinic_data = {
-                    'id': clinic.id,
-                    'name': clinic.name,
-                    'schema_name': clinic.schema_name,
-                    'created_on': clinic.created_on,
-                    'total_users': total_users,
-                    'patients': patients,
-                    'professionals': professionals,
-                    'admins': admins,
-                    'domains': domains_list,
-                    'primary_domain': primary_domain.domain if primary_domain else None,
-                    'admin_url': f"http://{primary_domain.domain}:8000/admin/" if primary_domain else None,
-                    'frontend_url': f"http://{primary_domain.domain}:3000" if primary_domain else None
-                }
-                
-                clinic_stats.append(clinic_data)
-                total_users_global += total_users
-                
-                logger.info(f"Estadísticas obtenidas para {clinic.name}: {total_users} usuarios")
-                
-            except Exception as e:
-                logger.error(f"Error obteniendo estadísticas para {clinic.name}: {str(e)}")
-                # Agregar clínica con datos de error
-                clinic_stats.append({
-                    'id': clinic.id,
-                    'name': clinic.name,
-                    'schema_name': clinic.schema_name,
-                    'created_on': clinic.created_on,
-                    'total_users': 0,
-                    'patients': 0,
-                    'professionals': 0,
-                    'admins': 0,
-                    'domains': [],
-                    'primary_domain': None,
-                    'admin_url': None,
-                    'frontend_url': None,
-                    'error': f"Error: {str(e)}"
-                })
+            counts = user_counts.get(clinic.schema_name, {})
+            clinic_domains = domains_by_clinic.get(clinic.id, [])
+            primary_domain = next((d for d in clinic_domains if d.is_primary), None)
+            
+            clinic_data = {
+                'id': clinic.id,
+                'name': clinic.name,
+                'schema_name': clinic.schema_name,
+                'created_on': clinic.created_on,
+                'total_users': counts.get('total_users', 0),
+                'patients': counts.get('patients', 0),
+                'professionals': counts.get('professionals', 0),
+                'admins': counts.get('admins', 0),
+                'domains': [domain.domain for domain in clinic_domains],
+                'primary_domain': primary_domain.domain if primary_domain else None,
+                'admin_url': f"http://{primary_domain.domain}:8000/admin/" if primary_domain else None,
+                'frontend_url': f"http://{primary_domain.domain}:3000" if primary_domain else None
+            }
+            if 'error' in counts:
+                clinic_data['error'] = f"Error: {counts['error']}"
+            
+            clinic_stats.append(clinic_data)
+            total_users_global += clinic_data['total_users']
         
         # Preparar respuesta con estadísticas globales
         response_data = {
@@ -198,33 +179,10 @@ def clinic_detail_stats(request, clinic_id):
         clinic = Clinic.objects.get(id=clinic_id)
         
         with schema_context(clinic.schema_name):
-            # Importar modelos dentro del contexto
-            from apps.users.models import CustomUser
-            
-            # Estadísticas básicas
-            total_users = CustomUser.objects.count()
-            patients = CustomUser.objects.filter(user_type='patient').count()
-            professionals = CustomUser.objects.filter(user_type='professional').count()
-            admins = CustomUser.objects.filter(user_type='admin').count()
+            # Una sola fila del resumen diario en lugar de contar cada tabla
+            from apps.clinic_admin.metrics import get_today_metrics, trend
             
-            # Estadísticas avanzadas (opcional)
-            try:
-                from apps.appointments.models import Appointment
-                from apps.professionals.models import ProfessionalProfile
-                
-                total_appointments = Appointment.objects.count()
-                pending_appointments = Appointment.objects.filter(status='pending').count()
-                confirmed_appointments = Appointment.objects.filter(status='confirmed').count()
-                
-                total_professionals_profiles = ProfessionalProfile.objects.count()
-                verified_professionals = ProfessionalProfile.objects.filter(is_verified=True).count()
-                
-            except ImportError:
-                total_appointments = 0
-                pending_appointments = 0
-                confirmed_appointments = 0
-                total_professionals_profiles = 0
-                verified_professionals = 0
+            metrics = get_today_metrics()
             
             response_data = {
                 'clinic': {
@@ -234,22 +192,46 @@ def clinic_detail_stats(request, clinic_id):
                     'created_on': clinic.created_on
                 },
                 'users': {
-                    'total': total_users,
-                    'patients': patients,
-                    'professionals': professionals,
-                    'admins': admins
+                    'total': metrics.total_users,
+                    'patients': metrics.patients,
+                    'professionals': metrics.professionals,
+                    'admins': metrics.admins
                 },
                 'appointments': {
-                    'total': total_appointments,
-                    'pending': pending_appointments,
-                    'confirmed': confirmed_appointments
+                    'total': metrics.total_appointments,
+                    'pending': metrics.appointments_pending,
+                    'confirmed': metrics.appointments_confirmed,
+                    'cancelled': metrics.appointments_cancelled,
+                    'completed': metrics.appointments_completed,
+                    'no_show': metrics.appointments_no_show
                 },
                 'professionals': {
-                    'total_profiles': total_professionals_profiles,
-                    'verified': verified_professionals
-                }
+                    'total_profiles': metrics.professional_profiles,
+                    'verified': metrics.verified_professionals
+                },
+                'reviews': metrics.reviews,
+                'documents': metrics.documents,
+                'revenue_today': metrics.revenue,
+                'metrics_date': metrics.date
             }
             
+            # Serie histórica opcional: ?days=30
+            days = request.query_params.get('days')
+            if days and days.isdigit():
+                response_data['trend'] = [
+                    {
+                        'date': row.date,
+                        'total_users': row.total_users,
+                        'patients': row.patients,
+                        'total_appointments': row.total_appointments,
+                        'new_appointments': row.new_appointments,
+                        'revenue': row.revenue,
+                        'reviews': row.reviews,
+                        'documents': row.documents
+                    }
+                    for row in trend(min(int(days), 365))
+                ]
+            
             return Response(response_data, status=status.HTTP_200_OK)
             
     except Clinic.DoesNotExist:
@@ -268,7 +250,11 @@ def clinic_detail_stats(request, clinic_id):
 # ========== VISTAS PÚBLICAS PARA REGISTRO ==========
 
 from rest_framework.permissions import AllowAny
-from .serializers import TenantRegistrationSerializer, SubdomainCheckSerializer
+from .models import TenantProvisioningJob
+from .provisioning import TEMPORARY_ADMIN_PASSWORD
+from .serializers import (
+    TenantRegistrationSerializer, SubdomainCheckSerializer, TenantProvisioningJobSerializer
+)
 
 @api_view(['POST'])
 @permission_classes([AllowAny])  # ⭐ Acceso público
@@ -284,36 +270,42 @@ def register_tenant(request):
         "admin_phone": "+34 600 000 000",  // opcional
         "address": "Calle Principal 123"    // opcional
     }
+
+    La clínica se crea en segundo plano: responde 202 con el id del alta y
+    la URL para consultar su progreso (`status_url`).
     """
     serializer = TenantRegistrationSerializer(data=request.data)
     
     if serializer.is_valid():
         try:
-            result = serializer.save()
+            job = serializer.save()
+            subdomain = job.subdomain
             
             response_data = {
                 'success': True,
-                'message': '¡Clínica creada exitosamente!',
+                'message': 'Estamos creando tu clínica...',
+                'job': TenantProvisioningJobSerializer(job).data,
+                'status_url': request.build_absolute_uri(f"{request.path.rstrip('/')}/{job.id}/"),
                 'data': {
-                    'clinic_name': result['tenant'].name,
-                    'subdomain': result['subdomain'],
-                    'admin_url': f"https://{result['subdomain']}.psicoadmin.xyz/admin/",
-                    'frontend_url': f"https://{result['subdomain']}-app.psicoadmin.xyz/",
-                    'admin_email': result['admin_email'],
-                    'temporary_password': result['temporary_password'],
+                    'clinic_name': job.clinic_name,
+                    'subdomain': subdomain,
+                    'admin_url': f"https://{subdomain}.psicoadmin.xyz/admin/",
+                    'frontend_url': f"https://{subdomain}-app.psicoadmin.xyz/",
+                    'admin_email': job.admin_email,
+                    'temporary_password': TEMPORARY_ADMIN_PASSWORD,
                     'instructions': (
-                        f"Tu clínica ha sido creada exitosamente. "
-                        f"Puedes acceder al panel de administración en: "
-                        f"https://{result['subdomain']}.psicoadmin.xyz/admin/ "
+                        f"Tu clínica se está creando. Cuando el estado sea 'completed' "
+                        f"podrás acceder al panel de administración en: "
+                        f"https://{subdomain}.psicoadmin.xyz/admin/ "
                         f"usando tu email y la contraseña temporal proporcionada. "
                         f"Por favor, cámbiala después del primer acceso."
                     )
                 }
             }
             
-            logger.info(f"✅ Nueva clínica registrada: {result['tenant'].name} ({result['subdomain']})")
+            logger.info("🏗️ Alta de clínica encolada: %s (%s)", job.clinic_name, subdomain)
             
-            return Response(response_data, status=status.HTTP_201_CREATED)
+            return Response(response_data, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
             logger.error(f"❌ Error en registro de tenant: {str(e)}")
@@ -328,6 +320,21 @@ def register_tenant(request):
     )
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])  # ⭐ Acceso público (el id es un UUID no adivinable)
+def register_tenant_status(request, job_id):
+    """
+    Progreso de un alta de clínica.
+
+    GET /api/public/register/<job_id>/
+    Response: {"status": "pending|running|completed|failed", "step": "...", "progress": 0-100, ...}
+    """
+    job = TenantProvisioningJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return Response({'error': 'Alta no encontrada'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(TenantProvisioningJobSerializer(job).data)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])  # ⭐ Acceso público
 def check_subdomain_availability(request):
@@ -372,9 +379,41 @@ def check_subdomain_availability(request):
     )
 
 
-@api_view(['GET'])
-@permission_classes([])  # ⭐ Sin autenticación requerida
-def public_clinic_list(request):
+# schema_context cambia la conexión del hilo que lo ejecuta: las consultas
+# van dentro del mismo sync_to_async para que el schema se aplique en el
+# hilo donde corren (el ORM async lanzaría cada una en otro hilo).
+
+def _public_clinic_versions():
+    with schema_context('public'):
+        clinics = Clinic.objects.exclude(schema_name='public').aggregate(
+            total=Count('id'), last=Max('updated_at')
+        )
+        domains = Domain.objects.filter(is_primary=True).aggregate(
+            total=Count('id'), last_id=Max('id')
+        )
+    return clinics['total'], clinics['last'], domains['total'], domains['last_id']
+
+
+def _public_clinics_with_domains():
+    with schema_context('public'):
+        # Obtener todas las clínicas (excluyendo el schema público)
+        clinics = list(Clinic.objects.exclude(schema_name='public'))
+
+        # Dominios principales de todas las clínicas en una sola consulta
+        domains = dict(
+            Domain.objects.filter(tenant__in=clinics, is_primary=True).values_list('tenant_id', 'domain')
+        )
+    return clinics, domains
+
+
+async def _public_clinic_list_validators(request):
+    return await sync_to_async(_public_clinic_versions)(), None
+
+
+@async_api_view()
+@cache_response(tags=['clinics'], shared=True)
+@conditional(_public_clinic_list_validators)
+async def public_clinic_list(request):
     """
     Vista pública para listar todas las clínicas disponibles.
     Usada por la app móvil para el selector de clínicas.
@@ -382,32 +421,102 @@ def public_clinic_list(request):
     """
     try:
         # Forzar el uso del schema público para acceder a todas las clínicas
-        with schema_context('public'):
-            # Obtener todas las clínicas (excluyendo el schema público)
-            clinics = Clinic.objects.exclude(schema_name='public')
-            
-            clinics_data = []
-            for clinic in clinics:
-                # Obtener el dominio principal
-                domain = Domain.objects.filter(tenant=clinic, is_primary=True).first()
-                
-                clinic_data = {
-                    'id': clinic.id,
-                    'name': clinic.name,
-                    'schema_name': clinic.schema_name,
-                    'description': '',  # El modelo no tiene description
-                    'domain': domain.domain if domain else None
-                }
-                clinics_data.append(clinic_data)
-        
-        return Response({
+        clinics, domains = await sync_to_async(_public_clinics_with_domains)()
+
+        clinics_data = [
+            {
+                'id': clinic.id,
+                'name': clinic.name,
+                'schema_name': clinic.schema_name,
+                'description': '',  # El modelo no tiene description
+                'domain': domains.get(clinic.id)
+            }
+            for clinic in clinics
+        ]
+
+        return api_response({
             'count': len(clinics_data),
             'results': clinics_data
-        }, status=status.HTTP_200_OK)
+        })
         
     except Exception as e:
         logger.error(f"Error listando clínicas públicas: {str(e)}")
-        return Response(
+        return api_response(
             {'error': 'Error al obtener lista de clínicas', 'details': str(e)}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def database_pool_stats(request):
+    """
+    Estado de las conexiones a la base de datos de este proceso: modo
+    PgBouncer, vida de las conexiones y SET search_path enviados/omitidos
+    (la omisión solo actúa con conexiones persistentes, conn_max_age > 0).
+    """
+    if not (request.user.is_superuser or request.user.is_staff):
+        return Response(
+            {'error': 'Permisos insuficientes'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    from django.conf import settings
+    from django.db import connection
+    from .postgresql_backend.base import search_path_stats
+
+    return Response({
+        'pgbouncer_mode': getattr(settings, 'DB_PGBOUNCER_MODE', False),
+        'conn_max_age': connection.settings_dict.get('CONN_MAX_AGE'),
+        'current_schema': connection.schema_name,
+        **search_path_stats.as_dict(),
+    })
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def query_profile_report(request):
+    """
+    Endpoints con más consultas (o más lentos) por clínica, según el
+    perfilado de SQL (requiere QUERY_PROFILING=True).
+
+    Parámetros: ?tenant=<schema> para una sola clínica,
+    ?order_by=avg_queries|avg_db_ms|avg_ms|duplicates_per_request, ?limit=N.
+    DELETE reinicia los datos de la clínica indicada.
+    """
+    if not (request.user.is_superuser or request.user.is_staff):
+        return Response(
+            {'error': 'Permisos insuficientes'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    from django.conf import settings
+    from config.query_profiler import get_worst_endpoints, reset_profile
+
+    specific_tenant = request.query_params.get('tenant')
+    if request.method == 'DELETE':
+        if not specific_tenant:
+            return Response({'error': 'Indique ?tenant=<schema>'}, status=status.HTTP_400_BAD_REQUEST)
+        reset_profile(specific_tenant)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    order_by = request.query_params.get('order_by', 'avg_queries')
+    if order_by not in ('avg_queries', 'avg_db_ms', 'avg_ms', 'duplicates_per_request'):
+        order_by = 'avg_queries'
+    try:
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 100)
+    except ValueError:
+        limit = 10
+
+    if specific_tenant:
+        schemas = [specific_tenant]
+    else:
+        schemas = list(Clinic.objects.values_list('schema_name', flat=True))
+
+    return Response({
+        'profiling_enabled': getattr(settings, 'QUERY_PROFILING', False),
+        'order_by': order_by,
+        'tenants': {
+            schema: get_worst_endpoints(schema, order_by=order_by, limit=limit)
+            for schema in schemas
+        },
+    })
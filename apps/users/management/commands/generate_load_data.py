@@ -0,0 +1,145 @@
+"""
+Comando para generar datos sintéticos de volumen (pruebas de carga).
+
+Usa `bulk_create` por lotes y una semilla determinista por tenant, de modo
+que dos ejecuciones con la misma `--seed` producen los mismos datos. Con
+varios tenants reparte el trabajo entre procesos (`--workers`): cada
+proceso abre su propia conexión y trabaja en un schema distinto.
+
+Ejemplo (≈1M filas por clínica en dos clínicas, en paralelo):
+
+    python manage.py generate_load_data --tenant mindcare --tenant bienestar \\
+        --patients 20000 --psychologists 200 --appointments 300000 --workers 2
+"""
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django_tenants.utils import schema_context
+
+from apps.tenants.models import Clinic
+
+GENERATOR_OPTIONS = (
+    'patients', 'psychologists', 'appointments', 'messages', 'chat_ratio',
+    'review_ratio', 'mood_days', 'audit_logs', 'batch_size', 'seed',
+)
+
+
+def generate_for_tenant(schema_name, params, log=None):
+    """Genera todos los datos de un tenant. Devuelve (conteos, segundos)."""
+    from apps.clinic_admin import metrics
+    from apps.users.synthetic import SyntheticDataGenerator
+
+    start = time.perf_counter()
+    with schema_context(schema_name):
+        generator = SyntheticDataGenerator(
+            seed=params['seed'], batch_size=params['batch_size'], log=log
+        )
+        patient_ids, psychologist_ids, profiles = generator.generate_users(
+            params['patients'], params['psychologists']
+        )
+        generator.generate_availability(psychologist_ids)
+        generator.generate_appointments(
+            params['appointments'], patient_ids, psychologist_ids, profiles
+        )
+        generator.generate_reviews(params['review_ratio'], profiles)
+        generator.generate_chat(params['messages'], params['chat_ratio'])
+        generator.generate_mood_journals(patient_ids, params['mood_days'])
+        generator.generate_audit_logs(
+            params['audit_logs'], patient_ids + psychologist_ids
+        )
+        # bulk_create no dispara las señales que mantienen ClinicMetrics
+        metrics.reconcile()
+    return generator.counts, time.perf_counter() - start
+
+
+def _worker(schema_name, params):
+    # Proceso hijo: no reutilizar la conexión heredada del padre
+    connections.close_all()
+    try:
+        return generate_for_tenant(schema_name, params)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos de volumen (10k–1M filas por tenant) para pruebas de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenant',
+            action='append',
+            dest='tenants',
+            help='Schema del tenant (repetible). Por defecto todas las clínicas.'
+        )
+        parser.add_argument('--workers', type=int, default=1, help='Procesos en paralelo (un tenant por proceso)')
+        parser.add_argument('--patients', type=int, default=5000, help='Pacientes por tenant')
+        parser.add_argument('--psychologists', type=int, default=100, help='Psicólogos por tenant')
+        parser.add_argument('--appointments', type=int, default=50000, help='Citas por tenant')
+        parser.add_argument('--messages', type=int, default=6, help='Mensajes de chat por cita con chat')
+        parser.add_argument('--chat-ratio', type=float, default=0.3, help='Fracción de citas con chat')
+        parser.add_argument('--review-ratio', type=float, default=0.4, help='Fracción de citas completadas con reseña')
+        parser.add_argument('--mood-days', type=int, default=30, help='Días de diario emocional por paciente')
+        parser.add_argument('--audit-logs', type=int, default=20000, help='Entradas de bitácora por tenant')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Filas por INSERT')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla base (se combina con el schema)')
+
+    def handle(self, *args, **options):
+        if options['tenants']:
+            tenants = list(Clinic.objects.filter(schema_name__in=options['tenants']))
+            missing = set(options['tenants']) - {tenant.schema_name for tenant in tenants}
+            if missing:
+                raise CommandError(f'Tenants no encontrados: {", ".join(sorted(missing))}')
+        else:
+            tenants = list(Clinic.objects.exclude(schema_name='public'))
+        if not tenants:
+            raise CommandError('No hay clínicas para poblar')
+
+        schemas = [tenant.schema_name for tenant in tenants]
+        # Solo lo que necesita el generador (las opciones de call_command
+        # pueden traer objetos que no se pueden enviar a otro proceso)
+        params = {key: options[key] for key in GENERATOR_OPTIONS}
+        workers = max(1, min(options['workers'], len(schemas)))
+        self.stdout.write(self.style.SUCCESS(
+            f'🏭 Generando datos de carga en {len(schemas)} tenant(s) con {workers} proceso(s) '
+            f'(seed={options["seed"]})'
+        ))
+
+        failures = 0
+        if workers == 1:
+            for schema_name in schemas:
+                self.stdout.write(f'🏥 {schema_name}')
+                try:
+                    self.report(schema_name, *generate_for_tenant(schema_name, params, log=self.stdout.write))
+                except Exception as e:
+                    failures += 1
+                    self.stdout.write(self.style.ERROR(f'❌ {schema_name}: {e}'))
+        else:
+            # Cerrar antes de crear los procesos: un socket compartido entre
+            # padre e hijos corrompe el protocolo de PostgreSQL
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(_worker, schema_name, params): schema_name
+                    for schema_name in schemas
+                }
+                for future in as_completed(futures):
+                    schema_name = futures[future]
+                    try:
+                        self.report(schema_name, *future.result())
+                    except Exception as e:
+                        failures += 1
+                        self.stdout.write(self.style.ERROR(f'❌ {schema_name}: {e}'))
+
+        if failures:
+            raise CommandError(f'{failures} tenant(s) fallaron')
+        self.stdout.write(self.style.SUCCESS('✅ Datos de carga generados'))
+
+    def report(self, schema_name, counts, elapsed):
+        rows = sum(counts.values())
+        detail = ', '.join(f'{label}={count}' for label, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {schema_name}: {rows} filas en {elapsed:.1f}s ({rows / max(elapsed, 1e-6):,.0f} filas/s)'
+        ))
+        self.stdout.write(f'   {detail}')
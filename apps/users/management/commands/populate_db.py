@@ -30,13 +30,22 @@ def normalize_text(text):
 class Command(BaseCommand):
     help = 'Popula la base de datos con datos de prueba (seeders)'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--patients', type=int, default=50, help='Pacientes a crear')
+        parser.add_argument('--psychologists', type=int, default=10, help='Psicólogos a crear')
+        parser.add_argument('--appointments', type=int, default=100, help='Citas a intentar crear')
+        parser.add_argument('--seed', type=int, default=None, help='Semilla para datos reproducibles')
+
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('Iniciando el proceso de populación...'))
         fake = Faker('es_ES')  # Usar datos en español
+        if options['seed'] is not None:
+            fake.seed_instance(options['seed'])
+            random.seed(options['seed'])
 
         # --- 1. Crear Pacientes ---
         patients = []
-        for _ in range(50):
+        for _ in range(options['patients']):
             # Generamos nombres "sucios"
             first_name_raw = fake.first_name()
             last_name_raw = fake.last_name()
@@ -77,7 +86,7 @@ class Command(BaseCommand):
             return
 
         psychologists = []
-        for _ in range(10):
+        for _ in range(options['psychologists']):
             # Generamos nombres "sucios"
             first_name_raw = fake.first_name()
             last_name_raw = fake.last_name()
@@ -132,7 +141,7 @@ class Command(BaseCommand):
         appointment_count = 0
         possible_times = [time(h, m) for h in range(9, 17) for m in [0, 30]] # Horarios de 9 a 5
 
-        for _ in range(100): # Crear 100 citas
+        for _ in range(options['appointments']): # Por defecto 100 citas
             try:
                 Appointment.objects.create(
                     patient=random.choice(patients),
@@ -204,6 +204,7 @@ class PatientProfile(models.Model):
     
     # Estado del perfil
     profile_completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         db_table = 'patient_profiles'
@@ -0,0 +1,308 @@
+# apps/users/synthetic.py
+"""
+Generador de datos sintéticos a gran escala (10k–1M filas por tenant).
+
+A diferencia de `populate_db`, todo se inserta con `bulk_create` por lotes
+y sin Faker por fila: los nombres salen de un pool pequeño generado una
+vez, y cada tenant usa su propio `random.Random` sembrado, así que la
+misma semilla produce exactamente los mismos datos.
+
+`bulk_create` no llama a `save()` ni envía señales: aquí se calculan a
+mano `end_time`/`consultation_fee` de las citas y el rating de los
+perfiles, y al final se reconcilia ClinicMetrics.
+"""
+import random
+import zlib
+from datetime import date, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.db.models import Avg, Count, DecimalField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from faker import Faker
+
+DEFAULT_SPECIALIZATIONS = [
+    'Psicologia Clinica', 'Psicologia Infantil', 'Terapia de Pareja',
+    'Neuropsicologia', 'Psicologia Cognitivo-Conductual', 'Mindfulness y Bienestar',
+]
+
+# Slots de 60 minutos entre las 09:00 y las 17:00
+DAILY_SLOTS = [time(hour, 0) for hour in range(9, 17)]
+SESSION_MINUTES = 60
+
+
+def tenant_seed(seed, schema_name):
+    """Semilla estable por tenant (no depende del orden ni del proceso)."""
+    return seed + zlib.crc32(schema_name.encode())
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class SyntheticDataGenerator:
+    """Genera los datos de UN tenant (el schema activo de la conexión)."""
+
+    def __init__(self, seed, batch_size=5000, log=None):
+        self.schema = connection.schema_name
+        self.rng = random.Random(tenant_seed(seed, self.schema))
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+        fake = Faker('es_ES')
+        fake.seed_instance(tenant_seed(seed, self.schema))
+        self.first_names = [fake.first_name() for _ in range(200)]
+        self.last_names = [fake.last_name() for _ in range(200)]
+        self.cities = [fake.city() for _ in range(30)]
+        self.sentences = [fake.sentence(nb_words=10) for _ in range(200)]
+        # Un solo hash para todos: hashear por usuario domina el tiempo total
+        self.password = make_password('password123')
+
+    def _bulk(self, model, objects, label, **kwargs):
+        total = 0
+        for batch in chunked(objects, self.batch_size):
+            model.objects.bulk_create(batch, batch_size=self.batch_size, **kwargs)
+            total += len(batch)
+        self.counts[label] = self.counts.get(label, 0) + total
+        self.log(f"   {label}: {total}")
+        return total
+
+    # --- Usuarios y perfiles ---
+
+    def _users(self, user_type, count, prefix):
+        from apps.users.models import CustomUser
+
+        rng = self.rng
+        for i in range(count):
+            first_name = rng.choice(self.first_names)
+            last_name = rng.choice(self.last_names)
+            username = f"{prefix}{i}.{self.schema}"
+            yield CustomUser(
+                username=username,
+                email=f"{username}@loadtest.local",
+                password=self.password,
+                first_name=first_name,
+                last_name=last_name,
+                user_type=user_type,
+                phone=str(rng.randint(6000000, 79999999)),
+                date_of_birth=date(1950, 1, 1) + timedelta(days=rng.randint(0, 365 * 55)),
+            )
+
+    def generate_users(self, patients, psychologists):
+        from apps.users.models import CustomUser, PatientProfile
+        from apps.professionals.models import ProfessionalProfile, Specialization
+
+        # ignore_conflicts: al repetir la carga los usuarios load-* ya existen
+        self._bulk(CustomUser, self._users('patient', patients, 'load-patient'), 'patients', ignore_conflicts=True)
+        self._bulk(CustomUser, self._users('professional', psychologists, 'load-psy'), 'psychologists', ignore_conflicts=True)
+
+        # Ordenados por id: con la misma semilla, el mismo reparto
+        patient_ids = list(CustomUser.objects.filter(
+            user_type='patient', username__startswith='load-patient'
+        ).order_by('id').values_list('id', flat=True))
+        psychologist_ids = list(CustomUser.objects.filter(
+            user_type='professional', username__startswith='load-psy'
+        ).order_by('id').values_list('id', flat=True))
+
+        rng = self.rng
+        self._bulk(PatientProfile, (
+            PatientProfile(user_id=user_id, occupation=rng.choice(['Estudiante', 'Docente', 'Ingeniero/a', 'Comerciante']))
+            for user_id in patient_ids
+        ), 'patient_profiles', ignore_conflicts=True)
+
+        self._bulk(ProfessionalProfile, (
+            ProfessionalProfile(
+                user_id=user_id,
+                license_number=f"LIC-{self.schema}-{user_id}",
+                bio=rng.choice(self.sentences),
+                education=rng.choice(self.sentences),
+                experience_years=rng.randint(1, 30),
+                consultation_fee=Decimal(rng.choice([150, 200, 250, 300])),
+                session_duration=SESSION_MINUTES,
+                city=rng.choice(self.cities),
+                is_verified=rng.random() < 0.7,
+                profile_completed=True,
+            )
+            for user_id in psychologist_ids
+        ), 'professional_profiles', ignore_conflicts=True)
+
+        for name in DEFAULT_SPECIALIZATIONS:
+            Specialization.objects.get_or_create(name=name)
+        specialization_ids = list(Specialization.objects.order_by('id').values_list('id', flat=True))
+        profiles = dict(ProfessionalProfile.objects.filter(
+            user_id__in=psychologist_ids
+        ).order_by('user_id').values_list('user_id', 'id'))
+
+        Through = ProfessionalProfile.specializations.through
+        self._bulk(Through, (
+            Through(professionalprofile_id=profile_id, specialization_id=specialization_id)
+            for profile_id in profiles.values()
+            for specialization_id in rng.sample(specialization_ids, k=rng.randint(1, 3))
+        ), 'profile_specializations', ignore_conflicts=True)
+
+        return patient_ids, psychologist_ids, profiles
+
+    # --- Agenda ---
+
+    def generate_availability(self, psychologist_ids):
+        from apps.appointments.models import PsychologistAvailability
+
+        self._bulk(PsychologistAvailability, (
+            PsychologistAvailability(
+                psychologist_id=user_id, weekday=weekday,
+                start_time=DAILY_SLOTS[0], end_time=time(17, 0)
+            )
+            for user_id in psychologist_ids
+            for weekday in range(5)
+        ), 'availabilities', ignore_conflicts=True)
+
+    def generate_appointments(self, count, patient_ids, psychologist_ids, profiles, days_back=365):
+        """
+        Reparte `count` citas sin colisiones: la cita k va al psicólogo
+        k % P, en el slot k // P contado desde `days_back` días atrás
+        (solo días laborables).
+        """
+        from apps.appointments.models import Appointment
+        from apps.professionals.models import ProfessionalProfile
+
+        if not patient_ids or not psychologist_ids:
+            return
+        fees = dict(ProfessionalProfile.objects.filter(
+            user_id__in=psychologist_ids
+        ).values_list('user_id', 'consultation_fee'))
+
+        rng = self.rng
+        today = date.today()
+        start = today - timedelta(days=days_back)
+        slots_per_day = len(DAILY_SLOTS)
+
+        def workday(n):
+            # n-ésimo día laborable desde `start`
+            weeks, weekday = divmod(n, 5)
+            monday = start - timedelta(days=start.weekday())
+            return monday + timedelta(weeks=weeks, days=weekday)
+
+        def appointments():
+            for k in range(count):
+                psychologist_id = psychologist_ids[k % len(psychologist_ids)]
+                slot = k // len(psychologist_ids)
+                day = workday(slot // slots_per_day)
+                start_time = DAILY_SLOTS[slot % slots_per_day]
+                if day < today:
+                    status = rng.choices(
+                        ['completed', 'cancelled', 'no_show'], weights=[80, 15, 5]
+                    )[0]
+                else:
+                    status = rng.choices(['pending', 'confirmed'], weights=[40, 60])[0]
+                yield Appointment(
+                    patient_id=rng.choice(patient_ids),
+                    psychologist_id=psychologist_id,
+                    appointment_date=day,
+                    start_time=start_time,
+                    end_time=time(start_time.hour + SESSION_MINUTES // 60, 0),
+                    appointment_type=rng.choice(['online', 'in_person']),
+                    status=status,
+                    reason_for_visit=rng.choice(self.sentences),
+                    consultation_fee=fees.get(psychologist_id),
+                    is_paid=status == 'completed',
+                )
+
+        self._bulk(Appointment, appointments(), 'appointments', ignore_conflicts=True)
+
+    def generate_reviews(self, ratio, profiles):
+        """Reseña para una fracción de las citas completadas."""
+        from apps.appointments.models import Appointment
+        from apps.professionals.models import ProfessionalProfile, Review
+
+        rng = self.rng
+        completed = Appointment.objects.filter(
+            status='completed', psychologist_id__in=list(profiles)
+        ).values_list('id', 'patient_id', 'psychologist_id').order_by('id').iterator(chunk_size=self.batch_size)
+
+        self._bulk(Review, (
+            Review(
+                professional_id=profiles[psychologist_id],
+                patient_id=patient_id,
+                appointment_id=appointment_id,
+                rating=rng.choices([1, 2, 3, 4, 5], weights=[3, 5, 12, 35, 45])[0],
+                comment=rng.choice(self.sentences),
+            )
+            for appointment_id, patient_id, psychologist_id in completed
+            if rng.random() < ratio
+        ), 'reviews', ignore_conflicts=True)
+
+        # Review.save() no se ejecuta con bulk_create: rating en una sola UPDATE
+        reviews = Review.objects.filter(professional=OuterRef('pk')).values('professional')
+        ProfessionalProfile.objects.filter(id__in=list(profiles.values())).update(
+            total_reviews=Coalesce(
+                Subquery(reviews.annotate(total=Count('id')).values('total')[:1]), Value(0)
+            ),
+            average_rating=Coalesce(
+                Subquery(reviews.annotate(avg=Avg('rating')).values('avg')[:1]), Value(0.0),
+                output_field=DecimalField(max_digits=3, decimal_places=2)
+            ),
+        )
+
+    # --- Actividad ---
+
+    def generate_chat(self, messages_per_appointment, ratio):
+        from apps.appointments.models import Appointment
+        from apps.chat.models import ChatMessage
+
+        rng = self.rng
+        rows = Appointment.objects.filter(
+            status__in=['confirmed', 'completed']
+        ).values_list('id', 'patient_id', 'psychologist_id').order_by('id').iterator(chunk_size=self.batch_size)
+
+        self._bulk(ChatMessage, (
+            ChatMessage(
+                appointment_id=appointment_id,
+                sender_id=patient_id if i % 2 == 0 else psychologist_id,
+                message=rng.choice(self.sentences),
+            )
+            for appointment_id, patient_id, psychologist_id in rows
+            if rng.random() < ratio
+            for i in range(messages_per_appointment)
+        ), 'chat_messages')
+
+    def generate_mood_journals(self, patient_ids, days, ratio=0.6):
+        from apps.clinical_history.models import MoodJournal
+
+        rng = self.rng
+        today = date.today()
+        moods = [choice for choice, _ in MoodJournal.MOOD_CHOICES]
+        self._bulk(MoodJournal, (
+            MoodJournal(
+                patient_id=patient_id,
+                date=today - timedelta(days=offset),
+                mood=rng.choice(moods),
+                notes=rng.choice(self.sentences) if rng.random() < 0.3 else None,
+            )
+            for patient_id in patient_ids
+            for offset in range(days)
+            if rng.random() < ratio
+        ), 'mood_journals', ignore_conflicts=True)
+
+    def generate_audit_logs(self, count, user_ids):
+        from apps.auditlog.models import LogEntry
+
+        rng = self.rng
+        actions = ['Inicio de sesión', 'Cita creada', 'Cita confirmada', 'Perfil actualizado', 'Pago registrado']
+        self._bulk(LogEntry, (
+            LogEntry(
+                user_id=rng.choice(user_ids) if user_ids and rng.random() < 0.9 else None,
+                ip_address=f"10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                level=rng.choices(['INFO', 'WARNING', 'ERROR'], weights=[90, 8, 2])[0],
+                action=rng.choice(actions),
+            )
+            for _ in range(count)
+        ), 'audit_logs')
@@ -3,7 +3,8 @@
 from rest_framework import status, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
-from .models import PatientProfile
+from config.conditional import conditional, latest
+from .models import CustomUser, PatientProfile
 from .serializers import (
     UserDetailSerializer, 
     UserProfileSerializer, 
@@ -11,8 +12,19 @@ from .serializers import (
     PatientCompleteProfileSerializer
 )
 
+def _user_profile_validators(request):
+    # Usuario y perfiles en una sola consulta, sin serializar nada
+    row = CustomUser.objects.filter(pk=request.user.pk).values_list(
+        'updated_at', 'patient_profile__updated_at', 'professional_profile__updated_at'
+    ).first()
+    if row is None:
+        return None
+    return (request.user.pk, *row), latest(*row)
+
+
 @api_view(['GET', 'PUT', 'PATCH'])
 @permission_classes([permissions.IsAuthenticated])
+@conditional(_user_profile_validators)
 def user_profile_detail(request):
     user = request.user
     
@@ -0,0 +1,38 @@
+"""
+Presupuestos por endpoint: consultas SQL máximas y latencia p50 (ms).
+
+Los presupuestos de consultas no dependen de la escala de los datos: si un
+endpoint los supera al subir BENCHMARK_SCALE, tiene un N+1. Las latencias
+se pueden relajar en máquinas lentas con BENCHMARK_LATENCY_FACTOR.
+
+`known_issue` marca un N+1 conocido: se mide y se reporta, pero el
+presupuesto de consultas no falla hasta que se corrija (y se quite la marca).
+"""
+
+BUDGETS = {
+    # Vistas async: consulta principal + prefetch de especialidades y horarios
+    'directory': {'queries': 8, 'p50_ms': 300},
+    # Acierto de la caché de respuestas: sin consultas de la vista
+    'directory_cached': {'queries': 2, 'p50_ms': 50},
+    'search': {'queries': 8, 'p50_ms': 300},
+    # Perfil + disponibilidades + citas de la semana, y la consulta del ETag
+    'schedule': {'queries': 7, 'p50_ms': 300},
+    'search_available': {
+        'queries': 10, 'p50_ms': 1000,
+        'known_issue': 'Disponibilidades, perfil y slots se consultan por psicólogo',
+    },
+    # Una página por cursor con paciente y psicólogo en la misma consulta,
+    # y el agregado del ETag
+    'appointments_list': {'queries': 7, 'p50_ms': 500},
+    'chat_history': {'queries': 4, 'p50_ms': 200},
+    # Página de .values() con el usuario en la misma consulta, y el COUNT
+    'audit_log': {'queries': 6, 'p50_ms': 400},
+    # Permiso (cita con el paciente), revisión, último snapshot y parches siguientes
+    'clinical_history_revision': {'queries': 6, 'p50_ms': 200},
+    # Una fila de ClinicMetrics
+    'clinic_stats': {'queries': 5, 'p50_ms': 200},
+    # Reserva de pago con PAYMENT_GATEWAY='fake': validación del horario + INSERT de la reserva
+    'checkout': {'queries': 10, 'p50_ms': 300},
+    # Confirmación repetida de una sesión ya registrada
+    'confirm_payment': {'queries': 6, 'p50_ms': 200},
+}
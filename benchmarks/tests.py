@@ -0,0 +1,450 @@
+"""
+Suite de benchmark y regresión de rendimiento de los endpoints principales.
+
+    python manage.py test benchmarks
+
+Crea un tenant sintético (schema `test`), lo puebla con `populate_db` a la
+escala indicada y mide cada endpoint con el cliente de pruebas: número de
+consultas SQL y latencia p50. Falla si se supera el presupuesto de
+`budgets.py` y deja los resultados en JSON para comparar entre commits.
+El flujo de pago (checkout y confirmación) usa la pasarela local
+(PAYMENT_GATEWAY='fake'), así que no necesita red ni claves de Stripe.
+Los listados servidos con ValuesSerializer se comparan con su
+ModelSerializer (mismo JSON) y se reporta el tiempo de cada camino.
+
+Variables de entorno:
+- BENCHMARK_SCALE (1): multiplica pacientes, psicólogos, citas y mensajes.
+- BENCHMARK_REPEAT (5): requests medidas por endpoint (tras un calentamiento).
+- BENCHMARK_LATENCY_FACTOR (1.0): multiplica los presupuestos de latencia.
+- BENCHMARK_SEED (42): semilla de los datos sintéticos.
+- BENCHMARK_RESULTS (benchmark-results.json): ruta del informe.
+"""
+import json
+import os
+import statistics
+import subprocess
+import time
+from datetime import date, time as dtime, timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_tenants.test.cases import TenantTestCase
+from django_tenants.utils import schema_context
+from rest_framework.authtoken.models import Token
+
+from config.renderers import dumps
+
+from .budgets import BUDGETS
+
+SCALE = int(os.environ.get('BENCHMARK_SCALE', 1))
+REPEAT = int(os.environ.get('BENCHMARK_REPEAT', 5))
+LATENCY_FACTOR = float(os.environ.get('BENCHMARK_LATENCY_FACTOR', 1.0))
+SEED = int(os.environ.get('BENCHMARK_SEED', 42))
+RESULTS_PATH = os.environ.get(
+    'BENCHMARK_RESULTS', os.path.join(settings.BASE_DIR, 'benchmark-results.json')
+)
+
+PUBLIC_TEST_DOMAIN = 'public.test.com'
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Se mide el camino sin caché de respuestas (los presupuestos detectan N+1);
+# test_directory_cached mide el acierto
+@override_settings(RESPONSE_CACHE_ENABLED=False)
+class EndpointBenchmarkTests(TenantTestCase):
+    results = {}
+
+    @classmethod
+    def setup_tenant(cls, tenant):
+        tenant.name = 'Clínica Benchmark'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.seed_tenant()
+        cls.seed_public()
+        connection.set_tenant(cls.tenant)
+
+    @classmethod
+    def tearDownClass(cls):
+        report = {
+            'commit': _git_commit(),
+            'timestamp': timezone.now().isoformat(),
+            'scale': SCALE,
+            'repeat': REPEAT,
+            'endpoints': cls.results,
+        }
+        with open(RESULTS_PATH, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2, ensure_ascii=False)
+        super().tearDownClass()
+
+    # --- Datos sintéticos ---
+
+    @classmethod
+    def seed_tenant(cls):
+        from apps.appointments.models import Appointment, PsychologistAvailability
+        from apps.auditlog.models import LogEntry
+        from apps.chat.models import ChatMessage
+        from apps.professionals.models import Specialization
+        from apps.users.models import CustomUser
+
+        Specialization.objects.bulk_create([
+            Specialization(name=name) for name in (
+                'Psicologia Clinica', 'Psicologia Infantil', 'Terapia de Pareja', 'Neuropsicologia'
+            )
+        ], ignore_conflicts=True)
+
+        # Mismos generadores que el seeder de desarrollo, a la escala pedida
+        call_command(
+            'populate_db',
+            patients=50 * SCALE,
+            psychologists=10 * SCALE,
+            appointments=100 * SCALE,
+            seed=SEED,
+            stdout=StringIO(),
+        )
+
+        psychologists = list(CustomUser.objects.filter(user_type='professional'))
+        PsychologistAvailability.objects.bulk_create([
+            PsychologistAvailability(
+                psychologist=psychologist, weekday=weekday,
+                start_time=dtime(9, 0), end_time=dtime(17, 0)
+            )
+            for psychologist in psychologists
+            for weekday in range(7)
+        ], ignore_conflicts=True)
+
+        # El psicólogo con más citas es el protagonista de las mediciones
+        busiest = Appointment.objects.values('psychologist').annotate(
+            total=Count('id')
+        ).order_by('-total').first()
+        cls.psychologist = CustomUser.objects.get(pk=busiest['psychologist'])
+        cls.appointment = Appointment.objects.filter(psychologist=cls.psychologist).first()
+
+        senders = [cls.appointment.patient, cls.psychologist]
+        ChatMessage.objects.bulk_create([
+            ChatMessage(
+                appointment_id=cls.appointment.id,
+                sender=senders[i % 2],
+                message=f'Mensaje de prueba {i}'
+            )
+            for i in range(200 * SCALE)
+        ])
+
+        cls.admin = CustomUser.objects.create_user(
+            email='admin@benchmark.test', password='password123',
+            username='admin-benchmark', first_name='Admin', last_name='Benchmark',
+            user_type='admin'
+        )
+        users = [cls.admin, cls.psychologist, cls.appointment.patient, None]
+        LogEntry.objects.bulk_create([
+            LogEntry(user=users[i % len(users)], level='INFO', action=f'Acción de prueba {i}')
+            for i in range(500 * SCALE)
+        ])
+
+        cls.psychologist_token = Token.objects.create(user=cls.psychologist).key
+        cls.patient_token = Token.objects.create(user=cls.appointment.patient).key
+        cls.admin_token = Token.objects.create(user=cls.admin).key
+
+    @classmethod
+    def seed_public(cls):
+        from apps.tenants.models import Clinic, Domain
+        from apps.users.models import CustomUser
+
+        with schema_context('public'):
+            public, _ = Clinic.objects.get_or_create(
+                schema_name='public', defaults={'name': 'Admin Global'}
+            )
+            Domain.objects.get_or_create(
+                domain=PUBLIC_TEST_DOMAIN, defaults={'tenant': public, 'is_primary': False}
+            )
+            staff = CustomUser.objects.create_user(
+                email='staff@benchmark.test', password='password123',
+                username='staff-benchmark', first_name='Staff', last_name='Benchmark',
+                user_type='admin', is_staff=True
+            )
+            cls.public_token = Token.objects.create(user=staff).key
+
+        if PUBLIC_TEST_DOMAIN not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS += [PUBLIC_TEST_DOMAIN]
+
+    # --- Medición ---
+
+    def request(self, client, method, path, data, extra):
+        if method == 'post':
+            return client.post(path, data=json.dumps(data), content_type='application/json', **extra)
+        return client.get(path, **extra)
+
+    def measure(self, name, path, token=None, host=None, method='get', data=None):
+        budget = BUDGETS[name]
+        client = Client()
+        extra = {'HTTP_HOST': host or self.domain.domain}
+        if token:
+            extra['HTTP_AUTHORIZATION'] = f'Token {token}'
+
+        # Calentamiento: cachés de tenant, token y sala
+        response = self.request(client, method, path, data, extra)
+        self.assertEqual(response.status_code, 200, f'{name}: {response.content[:300]}')
+
+        timings = []
+        queries = 0
+        for _ in range(REPEAT):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = self.request(client, method, path, data, extra)
+                timings.append((time.perf_counter() - start) * 1000)
+            self.assertEqual(response.status_code, 200)
+            queries = max(queries, len(captured))
+
+        p50 = statistics.median(timings)
+        latency_budget = budget['p50_ms'] * LATENCY_FACTOR
+        known_issue = budget.get('known_issue')
+        self.results[name] = {
+            'path': path,
+            'queries': queries,
+            'query_budget': budget['queries'],
+            'p50_ms': round(p50, 1),
+            'max_ms': round(max(timings), 1),
+            'latency_budget_ms': latency_budget,
+            'over_query_budget': queries > budget['queries'],
+            'known_issue': known_issue,
+        }
+
+        if not known_issue:
+            self.assertLessEqual(
+                queries, budget['queries'],
+                f'{name}: {queries} consultas (presupuesto {budget["queries"]})'
+            )
+        self.assertLessEqual(
+            p50, latency_budget,
+            f'{name}: p50 {p50:.0f}ms (presupuesto {latency_budget:.0f}ms)'
+        )
+
+    def test_directory(self):
+        self.measure('directory', '/api/professionals/')
+
+    @override_settings(RESPONSE_CACHE_ENABLED=True)
+    def test_directory_cached(self):
+        self.measure('directory_cached', '/api/professionals/')
+
+    def test_search(self):
+        self.measure('search', '/api/professionals/?search=a&accepts_online=1')
+
+    def test_schedule(self):
+        self.measure(
+            'schedule',
+            f'/api/appointments/psychologist/{self.psychologist.id}/schedule/'
+            f'?week_start={date.today():%Y-%m-%d}',
+            token=self.psychologist_token
+        )
+
+    def test_search_available(self):
+        tomorrow = date.today() + timedelta(days=1)
+        self.measure(
+            'search_available',
+            f'/api/appointments/search-psychologists/?date={tomorrow:%Y-%m-%d}',
+            token=self.psychologist_token
+        )
+
+    def test_appointments_list(self):
+        self.measure('appointments_list', '/api/appointments/appointments/', token=self.psychologist_token)
+
+    def test_chat_history(self):
+        self.measure(
+            'chat_history',
+            f'/api/chat/chat/{self.appointment.id}/messages/',
+            token=self.psychologist_token
+        )
+
+    def test_audit_log(self):
+        self.measure('audit_log', '/api/auditlog/logs/', token=self.admin_token)
+
+    def test_clinic_stats(self):
+        self.measure(
+            'clinic_stats',
+            f'/api/tenants/clinics/{self.tenant.id}/stats/',
+            token=self.public_token,
+            host=PUBLIC_TEST_DOMAIN
+        )
+
+    # --- Historial clínico versionado ---
+
+    def test_clinical_history_revision(self):
+        from apps.clinical_history import revisions
+        from apps.clinical_history.models import ClinicalHistory, ClinicalHistoryRevision
+
+        history = ClinicalHistory.objects.create(patient=self.appointment.patient, created_by=self.psychologist)
+        paragraph = 'El paciente refiere insomnio de conciliación y rumiación nocturna. '
+        total = revisions.snapshot_every() + revisions.snapshot_every() // 2
+        for i in range(total):
+            before = revisions.document(history)
+            history.history_of_illness += f'Sesión {i}: {paragraph * 20}'
+            history.diagnoses = history.diagnoses + [{'code': f'F4{i % 10}', 'label': paragraph}]
+            history.save()
+            revisions.record_revision(history, before, self.psychologist)
+
+        # Lo guardado por revisión crece con lo editado, no con el documento
+        last = ClinicalHistoryRevision.objects.get(history=history, number=total)
+        self.assertIsNone(last.snapshot)
+        self.assertLess(len(dumps(last.patch)), len(dumps(revisions.document(history))) / 10)
+        self.assertEqual(revisions.reconstruct(history.pk, total), revisions.document(history))
+
+        # Revisión a mitad del intervalo: snapshot + snapshot_every - 1 parches
+        self.measure(
+            'clinical_history_revision',
+            f'/api/clinical-history/patient/{history.pk}/revisions/{total}/',
+            token=self.psychologist_token
+        )
+
+    # --- Flujo de reserva con la pasarela local (sin red) ---
+
+    def booking_data(self, days_ahead):
+        # Fuera del rango de citas de populate_db (±30 días)
+        return {
+            'psychologist': self.psychologist.id,
+            'appointment_date': f'{date.today() + timedelta(days=days_ahead):%Y-%m-%d}',
+            'start_time': '09:00',
+        }
+
+    @override_settings(PAYMENT_GATEWAY='fake')
+    def test_checkout(self):
+        # Reintentos del mismo paciente: cada uno renueva su propia reserva
+        self.measure(
+            'checkout', '/api/payments/create-checkout-session/',
+            token=self.patient_token, method='post', data=self.booking_data(60)
+        )
+
+    @override_settings(PAYMENT_GATEWAY='fake')
+    def test_confirm_payment(self):
+        from apps.payment_system.gateway import get_gateway
+
+        response = Client().post(
+            '/api/payments/create-checkout-session/',
+            data=json.dumps(self.booking_data(61)), content_type='application/json',
+            HTTP_HOST=self.domain.domain, HTTP_AUTHORIZATION=f'Token {self.patient_token}'
+        )
+        self.assertEqual(response.status_code, 200, response.content[:300])
+        session_id = response.json()['sessionId']
+        get_gateway().mark_paid(session_id)
+
+        # La primera confirmación crea la cita; las medidas son las repetidas
+        # (el frontend y el webhook confirman la misma sesión)
+        response = Client().post(
+            '/api/payments/confirm-payment/',
+            data=json.dumps({'session_id': session_id}), content_type='application/json',
+            HTTP_HOST=self.domain.domain, HTTP_AUTHORIZATION=f'Token {self.patient_token}'
+        )
+        self.assertEqual(response.status_code, 201, response.content[:300])
+        self.measure(
+            'confirm_payment', '/api/payments/confirm-payment/',
+            token=self.patient_token, method='post', data={'session_id': session_id}
+        )
+
+    # --- Serializadores desde .values(): misma salida, menos CPU ---
+
+    def compare_serializers(self, name, model_path, values_path, normalize=None):
+        """
+        Compara el JSON de un listado serializado con el ModelSerializer y
+        con su ValuesSerializer (consulta + serialización + renderizado) y
+        registra el tiempo de cada camino.
+        """
+        timings = {'model': [], 'values': []}
+        outputs = {}
+        rows = 0
+        for _ in range(REPEAT):
+            for path, build in (('model', model_path), ('values', values_path)):
+                start = time.perf_counter()
+                data = build()
+                content = dumps(data)
+                timings[path].append((time.perf_counter() - start) * 1000)
+                outputs[path] = normalize(data) if normalize else content
+                rows = len(data)
+
+        self.assertGreater(rows, 0, f'{name}: listado vacío')
+        self.assertEqual(outputs['values'], outputs['model'], f'{name}: la salida no coincide')
+        model_ms = statistics.median(timings['model'])
+        values_ms = statistics.median(timings['values'])
+        self.results.setdefault('serializers', {})[name] = {
+            'rows': rows,
+            'model_ms': round(model_ms, 2),
+            'values_ms': round(values_ms, 2),
+            'speedup': round(model_ms / values_ms, 1) if values_ms else None,
+        }
+
+    @staticmethod
+    def values_data(serializer_class, queryset):
+        serializer = serializer_class()
+        return serializer.serialize(serializer.values(queryset))
+
+    def test_values_serializer_appointments(self):
+        from apps.appointments.models import Appointment
+        from apps.appointments.serializers import AppointmentSerializer, AppointmentValuesSerializer
+
+        queryset = Appointment.objects.order_by('-appointment_date', '-start_time', '-id')
+        self.compare_serializers(
+            'appointments',
+            lambda: AppointmentSerializer(queryset.select_related('patient', 'psychologist'), many=True).data,
+            lambda: self.values_data(AppointmentValuesSerializer, queryset),
+        )
+
+    def test_values_serializer_chat(self):
+        from apps.chat.models import ChatMessage
+        from apps.chat.serializers import ChatMessageSerializer, ChatMessageValuesSerializer
+
+        queryset = ChatMessage.objects.filter(appointment_id=self.appointment.id).order_by('timestamp', 'id')
+        self.compare_serializers(
+            'chat_history',
+            lambda: ChatMessageSerializer(queryset.select_related('sender'), many=True).data,
+            lambda: self.values_data(ChatMessageValuesSerializer, queryset),
+        )
+
+    def test_values_serializer_audit_log(self):
+        from apps.auditlog.models import LogEntry
+        from apps.auditlog.serializers import LogEntrySerializer, LogEntryValuesSerializer
+
+        # Incluye registros sin usuario (user_email se omite, como en DRF)
+        queryset = LogEntry.objects.order_by('-timestamp', '-id')
+        self.compare_serializers(
+            'audit_log',
+            lambda: LogEntrySerializer(queryset.select_related('user'), many=True).data,
+            lambda: self.values_data(LogEntryValuesSerializer, queryset),
+        )
+
+    def test_values_serializer_directory(self):
+        from apps.professionals.models import ProfessionalProfile
+        from apps.professionals.serializers import (
+            ProfessionalPublicSerializer, ProfessionalPublicValuesSerializer
+        )
+
+        queryset = ProfessionalProfile.objects.filter(is_active=True).order_by('id')
+
+        def normalize(data):
+            # El prefetch no fija el orden de los anidados: se comparan ordenados
+            return [
+                {**row, **{key: sorted(row[key], key=lambda item: item['id'])
+                           for key in ('specializations', 'working_hours')}}
+                for row in json.loads(dumps(data))
+            ]
+
+        self.compare_serializers(
+            'directory',
+            lambda: ProfessionalPublicSerializer(
+                queryset.select_related('user').prefetch_related('specializations', 'working_hours'), many=True
+            ).data,
+            lambda: self.values_data(ProfessionalPublicValuesSerializer, queryset),
+            normalize=normalize,
+        )
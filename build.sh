@@ -62,7 +62,10 @@ Domain.objects.update_or_create(
 print('🎉 Clínicas y dominios configurados correctamente')
 "
 
-echo "📊 Aplicando migraciones a los tenants..."
-python manage.py migrate_schemas || echo "⚠️ Error en migraciones de tenants"
+echo "📊 Aplicando migraciones a los tenants (solo los pendientes, en paralelo)..."
+python manage.py migrate_tenants_parallel --workers "${TENANT_MIGRATION_WORKERS:-4}" || echo "⚠️ Error en migraciones de tenants"
+
+echo "🧬 Actualizando el schema plantilla de nuevas clínicas..."
+python manage.py prepare_tenant_template || echo "⚠️ Plantilla no actualizada: las altas migrarán desde cero"
 
 echo "✅ Build completado!"
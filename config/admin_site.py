@@ -24,8 +24,7 @@ class PublicAdminSite(admin.AdminSite):
         extra_context = extra_context or {}
         
         try:
-            from django_tenants.utils import schema_context
-            from apps.users.models import CustomUser
+            from apps.tenants.stats import get_tenant_user_counts
             
             # Obtener estadísticas de clínicas reales (excluyendo public)
             real_clinics = Clinic.objects.exclude(schema_name='public')
@@ -38,18 +37,11 @@ class PublicAdminSite(admin.AdminSite):
             total_patients = 0
             total_professionals = 0
             
-            for clinic in real_clinics:
-                try:
-                    with schema_context(clinic.schema_name):
-                        clinic_users = CustomUser.objects.count()
-                        clinic_patients = CustomUser.objects.filter(user_type='patient').count()
-                        clinic_professionals = CustomUser.objects.filter(user_type='professional').count()
-                        
-                        total_users_real_clinics += clinic_users
-                        total_patients += clinic_patients
-                        total_professionals += clinic_professionals
-                except Exception:
-                    pass
+            # Una sola consulta UNION ALL para todos los schemas (cacheada)
+            for counts in get_tenant_user_counts().values():
+                total_users_real_clinics += counts['total_users']
+                total_patients += counts['patients']
+                total_professionals += counts['professionals']
             
             # Agregar estadísticas al contexto
             extra_context.update({
@@ -119,15 +111,14 @@ class ClinicAdmin(admin.ModelAdmin):
     def get_user_count(self, obj):
         """Obtener el conteo real de usuarios para esta clínica"""
         try:
-            from django_tenants.utils import schema_context
-            from apps.users.models import CustomUser
+            from apps.tenants.stats import get_tenant_user_counts
             
-            with schema_context(obj.schema_name):
-                user_count = CustomUser.objects.count()
-                patients = CustomUser.objects.filter(user_type='patient').count()
-                professionals = CustomUser.objects.filter(user_type='professional').count()
-                
-            return f"{user_count} usuarios ({patients}P, {professionals}Pr)"
+            # Todas las filas del listado comparten el mismo resultado cacheado
+            counts = get_tenant_user_counts().get(obj.schema_name)
+            if counts is None or 'error' in counts:
+                return "Error"
+            
+            return f"{counts['total_users']} usuarios ({counts['patients']}P, {counts['professionals']}Pr)"
         except Exception:
             return "Error"
     
@@ -210,10 +201,11 @@ except ImportError:
 
 # 5. Historia Clínica
 try:
-    from apps.clinical_history.models import SessionNote, ClinicalDocument
-    from apps.clinical_history.admin import SessionNoteAdmin, ClinicalDocumentAdmin
+    from apps.clinical_history.models import SessionNote, ClinicalDocument, ClinicalHistoryRevision
+    from apps.clinical_history.admin import SessionNoteAdmin, ClinicalDocumentAdmin, ClinicalHistoryRevisionAdmin
     # Registrar en el admin de tenant (ya no están en admin por defecto)
     tenant_admin_site.register(SessionNote, SessionNoteAdmin)
     tenant_admin_site.register(ClinicalDocument, ClinicalDocumentAdmin)
+    tenant_admin_site.register(ClinicalHistoryRevision, ClinicalHistoryRevisionAdmin)
 except ImportError:
     pass
\ No newline at end of file
@@ -7,17 +7,16 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
-from channels.auth import AuthMiddlewareStack
-from apps.chat.middleware import TokenAuthMiddleware
+from apps.chat.middleware import TenantAuthMiddlewareStack
 import apps.chat.routing
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
-    "websocket": AuthMiddlewareStack(      # Primero intenta con la web (sesiones)
-        TokenAuthMiddleware(              # Después, con el móvil (tokens)
-            URLRouter(
-                apps.chat.routing.websocket_urlpatterns
-            )
+    # Tenant por Host; después la web (sesiones) y el móvil (tokens),
+    # ambos consultados en el schema de la clínica
+    "websocket": TenantAuthMiddlewareStack(
+        URLRouter(
+            apps.chat.routing.websocket_urlpatterns
         )
     ),
 })
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+Soporte mínimo para endpoints JSON async de solo lectura.
+
+DRF no ejecuta vistas async, así que los endpoints de lectura más
+consultados (profesionales, especialidades, clínicas, horarios) son vistas
+async de Django que consultan con el ORM async y reutilizan los
+serializers de DRF sobre instancias ya cargadas. Servidos por uvicorn, no
+ocupan un worker mientras esperan a la base de datos.
+"""
+import functools
+import logging
+
+from django.http import HttpResponse
+
+from apps.authentication.authentication import aauthenticate_token
+from config.renderers import dumps
+
+logger = logging.getLogger(__name__)
+
+
+def api_response(data, status=200):
+    """Respuesta JSON con el mismo renderizado (orjson) que las vistas de DRF."""
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+def async_api_view(methods=('GET',), authenticated=False):
+    """
+    Decorador para vistas async: valida el método HTTP y, si se pide,
+    autentica por Token (misma caché que CachedTokenAuthentication).
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return api_response(
+                    {'detail': f'Método "{request.method}" no permitido.'}, status=405
+                )
+
+            if authenticated:
+                user = await aauthenticate_token(request)
+                if user is None:
+                    response = api_response(
+                        {'detail': 'Las credenciales de autenticación no se proveyeron.'},
+                        status=401
+                    )
+                    response['WWW-Authenticate'] = 'Token'
+                    return response
+                request.user = user
+
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,173 @@
+"""
+Compresión de respuestas (brotli o gzip) según el Accept-Encoding del cliente.
+
+- Se elige brotli si el cliente lo acepta y el paquete `brotli` está
+  instalado; si no, gzip. Sin Accept-Encoding compatible no se toca nada.
+- Las respuestas pequeñas (menos de COMPRESSION_MIN_SIZE bytes) y los
+  formatos ya comprimidos (PDF, imágenes, audio, vídeo, zip...) salen tal
+  cual, igual que las que ya traen Content-Encoding (WhiteNoise).
+- El HTML no se comprime: las páginas con token CSRF (admin) quedarían
+  expuestas a BREACH. El objetivo son las respuestas JSON de la API.
+- Las StreamingHttpResponse (sync o async) se comprimen trozo a trozo con
+  un compresor incremental que vacía su búfer en cada trozo: la respuesta
+  sigue siendo streaming y el cliente recibe los datos según se generan.
+"""
+import gzip
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # opcional: sin el paquete solo se ofrece gzip
+    brotli = None
+
+# Tipos que ya vienen comprimidos o en los que no conviene comprimir
+SKIP_CONTENT_TYPES = (
+    'image/', 'video/', 'audio/', 'font/woff', 'text/html',
+    'application/pdf', 'application/zip', 'application/gzip',
+    'application/x-gzip', 'application/x-bzip2', 'application/x-7z-compressed',
+    'application/octet-stream',
+)
+
+_ENCODING_RE = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def accepted_encodings(header):
+    """{codificación: q} de un Accept-Encoding (q=0 significa rechazada)."""
+    accepted = {}
+    for part in header.lower().split(','):
+        match = _ENCODING_RE.match(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        accepted[match.group(1)] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    """'br', 'gzip' o None, según lo que acepta el cliente y lo disponible."""
+    accepted = accepted_encodings(header or '')
+    quality = {
+        name: accepted.get(name, accepted.get('*', 0))
+        for name in (('br', 'gzip') if brotli else ('gzip',))
+    }
+    options = [name for name, q in quality.items() if q > 0]
+    if not options:
+        return None
+    # Con la misma q, el orden de preferencia del servidor (brotli primero)
+    return max(options, key=quality.get)
+
+
+class _GzipStream:
+    """Compresor gzip incremental: cada trozo sale comprimido y vaciado."""
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: cabecera gzip
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Comprime las respuestas con brotli o gzip; colocarlo al principio de
+    MIDDLEWARE para que vea la respuesta final. En una cadena async,
+    MiddlewareMixin ejecuta `process_response` en un hilo, así que la
+    compresión no bloquea el event loop. Las respuestas streaming async se
+    comprimen trozo a trozo con `_acompress_stream`.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.gzip_level = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+        # Calidad media: la máxima de brotli es demasiado lenta para respuestas dinámicas
+        self.brotli_quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+
+    def _compress_body(self, encoding, content):
+        if encoding == 'br':
+            return brotli.compress(content, quality=self.brotli_quality)
+        return gzip.compress(content, compresslevel=self.gzip_level, mtime=0)
+
+    def _compressor(self, encoding):
+        if encoding == 'br':
+            return _BrotliStream(self.brotli_quality)
+        return _GzipStream(self.gzip_level)
+
+    def should_compress(self, response):
+        if response.status_code in (204, 304) or response.has_header('Content-Encoding'):
+            return False
+        content_type = response.get('Content-Type', '').lower()
+        if any(content_type.startswith(skip) for skip in SKIP_CONTENT_TYPES):
+            return False
+        if response.streaming:
+            return True
+        return len(response.content) >= self.min_size
+
+    def process_response(self, request, response):
+        if not self.should_compress(response):
+            return response
+
+        # La respuesta depende del Accept-Encoding aunque esta vez no se comprima
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            compressor = self._compressor(encoding)
+            if response.is_async:
+                response.streaming_content = self._acompress_stream(compressor, response.streaming_content)
+            else:
+                response.streaming_content = self._compress_stream(compressor, response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = self._compress_body(encoding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # El cuerpo cambia: un ETag fuerte ya no identifica los bytes enviados
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    @staticmethod
+    def _compress_stream(compressor, chunks):
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+    @staticmethod
+    async def _acompress_stream(compressor, chunks):
+        async for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
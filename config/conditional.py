@@ -0,0 +1,115 @@
+"""
+Respuestas condicionales (ETag / Last-Modified -> 304) para endpoints de lectura.
+
+Cada endpoint define un "validador": una función barata que, sin cargar ni
+serializar el recurso, devuelve `(partes, last_modified)` a partir de
+máximos de `updated_at` y recuentos (que detectan borrados). Con las
+partes se calcula un ETag débil; si el cliente manda `If-None-Match` o
+`If-Modified-Since` y coinciden, se responde 304 sin ejecutar la vista.
+Last-Modified solo se da en recursos individuales (perfiles): en los
+listados un borrado no cambia el máximo de `updated_at`, así que esos
+solo validan por ETag.
+
+El decorador `conditional` sirve para vistas síncronas (incluidas las de
+DRF, colocado debajo de @api_view para que corra tras la autenticación)
+y async. A diferencia de `django.views.decorators.http.condition`, en las
+vistas async el validador también es async: así puede usar el ORM async.
+"""
+import functools
+import hashlib
+from datetime import timezone as dt_timezone
+
+from asgiref.sync import iscoroutinefunction
+from django.db.models import Count, Max, Subquery, Value
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """ETag débil a partir de valores simples (ids, fechas, recuentos)."""
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def latest(*values):
+    """El más reciente de varios datetimes (ignora los None)."""
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+
+def count_and_latest(queryset, field):
+    """
+    (recuento, máximo de `field`) de `queryset` como subconsultas escalares,
+    para reunir varios validadores en una sola consulta con annotate().
+    """
+    base = queryset.order_by().annotate(_one=Value(1)).values('_one')
+    return (
+        Subquery(base.annotate(value=Count('*')).values('value')),
+        Subquery(base.annotate(value=Max(field)).values('value')),
+    )
+
+
+def _timestamp(last_modified):
+    if last_modified is None:
+        return None
+    if timezone.is_naive(last_modified):
+        last_modified = timezone.make_aware(last_modified, dt_timezone.utc)
+    return int(last_modified.timestamp())
+
+
+def not_modified(request, parts, last_modified=None):
+    """
+    Devuelve (respuesta 304 o None, etag, timestamp). Solo aplica a GET/HEAD.
+    Las partes incluyen la URL completa: cursores, filtros y `fields=`
+    cambian la respuesta.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return None, None, None
+    etag = make_etag(request.get_full_path(), *parts)
+    modified = _timestamp(last_modified)
+    return get_conditional_response(request, etag=etag, last_modified=modified), etag, modified
+
+
+def add_validators(response, etag, modified):
+    """Añade ETag y Last-Modified a una respuesta 200 o 304."""
+    if etag and response.status_code in (200, 304):
+        response.headers.setdefault('ETag', etag)
+        if modified and not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(modified)
+    return response
+
+
+def conditional(validator):
+    """
+    Decorador: `validator(request, *args, **kwargs)` devuelve
+    `(partes, last_modified)` o None si no se puede validar (p. ej. el
+    recurso no existe; la vista responde como siempre).
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                validators = await validator(request, *args, **kwargs)
+                if validators is None:
+                    return await view(request, *args, **kwargs)
+                response, etag, modified = not_modified(request, *validators)
+                if response is not None:
+                    return add_validators(response, etag, modified)
+                return add_validators(await view(request, *args, **kwargs), etag, modified)
+        else:
+            @functools.wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return view(request, *args, **kwargs)
+                validators = validator(request, *args, **kwargs)
+                if validators is None:
+                    return view(request, *args, **kwargs)
+                response, etag, modified = not_modified(request, *validators)
+                if response is not None:
+                    return add_validators(response, etag, modified)
+                return add_validators(view(request, *args, **kwargs), etag, modified)
+        return wrapper
+    return decorator
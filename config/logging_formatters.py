@@ -0,0 +1,30 @@
+"""
+Formatter JSON para logs estructurados (una línea por registro).
+
+Incluye los campos estándar y, si existen, los datos estructurados que el
+registro trae en `extra` (p. ej. `access` del log de acceso o `profile` del perfilado de SQL).
+"""
+import json
+import logging
+from datetime import datetime, timezone
+
+# Atributos de LogRecord que se añaden como campos propios del JSON
+STRUCTURED_FIELDS = ('access', 'profile', 'ip_address')
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        payload = {
+            'timestamp': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = value
+        if record.exc_info:
+            payload['exception'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
@@ -1,87 +1,143 @@
 """
 Middleware para logging detallado de requests y tenant detection
+
+Ambos middlewares son híbridos sync/async para no forzar un salto de hilo
+por request bajo ASGI.
 """
 import logging
+import random
 import time
-from django.db import connection
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
+# Un registro estructurado por request (ver ACCESS_LOG_* en settings)
+access_logger = logging.getLogger('config.access')
+
 
 class RequestLoggingMiddleware:
     """
-    Middleware que loguea cada request con información detallada:
+    Middleware que emite UN registro de acceso por request con:
     - Método HTTP y path
-    - Tenant detectado
-    - Schema de base de datos usado
-    - Tiempo de respuesta
-    - Status code
+    - Status code y tiempo de respuesta
+    - Tenant / schema de base de datos usado
+
+    Las respuestas 2xx/3xx se muestrean (ACCESS_LOG_SAMPLE_RATE); los
+    errores (>= 400) y las requests lentas (>= ACCESS_LOG_SLOW_MS) se
+    registran siempre. El mensaje se formatea de forma perezosa, solo si
+    algún handler lo llega a escribir.
     """
     
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.sample_rate = getattr(settings, 'ACCESS_LOG_SAMPLE_RATE', 1.0)
+        self.slow_ms = getattr(settings, 'ACCESS_LOG_SLOW_MS', 1000)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        # Capturar tiempo de inicio
-        start_time = time.time()
-        
-        # Información del request
-        method = request.method
-        path = request.path
-        hostname = request.get_host()
-        
-        # Log del inicio del request
-        logger.info(f"🌐 [{method}] {path}")
-        logger.debug(f"   Hostname: {hostname}")
-        logger.debug(f"   User-Agent: {request.META.get('HTTP_USER_AGENT', 'Unknown')[:50]}")
-        
-        # Detectar tenant antes del procesamiento
-        tenant_name = getattr(request, 'tenant', None)
-        if tenant_name:
-            logger.debug(f"   🏢 Tenant detectado: {tenant_name.schema_name}")
-        
-        # Procesar el request
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        start_time = time.perf_counter()
         response = self.get_response(request)
-        
-        # Capturar schema usado (después del procesamiento)
-        schema = connection.schema_name if hasattr(connection, 'schema_name') else 'public'
-        
-        # Calcular tiempo de respuesta
-        duration = time.time() - start_time
-        duration_ms = int(duration * 1000)
-        
-        # Log de la respuesta
-        status_emoji = "✅" if 200 <= response.status_code < 300 else "⚠️" if 300 <= response.status_code < 400 else "❌"
-        logger.info(f"{status_emoji} [{method}] {path} → {response.status_code} ({duration_ms}ms) [Schema: {schema}]")
-        
-        # Log adicional si hay errores
-        if response.status_code >= 400:
-            logger.warning(f"   ⚠️ Error Response: {response.status_code} - Path: {path}")
-            
+        self.log_response(request, response, start_time)
         return response
 
+    async def __acall__(self, request):
+        start_time = time.perf_counter()
+        response = await self.get_response(request)
+        self.log_response(request, response, start_time)
+        return response
+
+    def log_response(self, request, response, start_time):
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        status_code = response.status_code
+
+        # Decidir antes de construir nada: la mayoría de 2xx no se registran
+        if status_code >= 500:
+            level, reason = logging.ERROR, 'error'
+        elif status_code >= 400:
+            level, reason = logging.WARNING, 'error'
+        elif duration_ms >= self.slow_ms:
+            level, reason = logging.WARNING, 'slow'
+        elif self.sample_rate >= 1 or random.random() < self.sample_rate:
+            level, reason = logging.INFO, 'sampled'
+        else:
+            return
+
+        if not access_logger.isEnabledFor(level):
+            return
+
+        tenant = getattr(request, 'tenant', None)
+        access = {
+            'method': request.method,
+            'path': request.path,
+            'status': status_code,
+            'duration_ms': round(duration_ms, 1),
+            # Del tenant de la request: en modo async la conexión de este
+            # hilo no es la que usaron las consultas
+            'schema': getattr(tenant, 'schema_name', None),
+            'tenant_id': getattr(tenant, 'id', None),
+            'host': request.META.get('HTTP_HOST'),
+            'reason': reason,
+        }
+        if reason != 'sampled':
+            # Contexto extra solo para lo que se investiga (errores y lentas)
+            access['user_agent'] = request.META.get('HTTP_USER_AGENT', '')[:200]
+            access['remote_addr'] = request.META.get('REMOTE_ADDR')
+
+        access_logger.log(
+            level, '%s %s → %s (%.0fms) [Schema: %s]',
+            access['method'], access['path'], status_code, duration_ms, access['schema'],
+            extra={'access': access}
+        )
+
 
 class TenantDetectionLoggingMiddleware:
     """
     Middleware especializado en loguear la detección de tenants
     """
     
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        hostname = request.get_host()
-        
-        # Log antes de la detección del tenant
-        logger.debug(f"🔍 [TenantDetection] Hostname: {hostname}")
-        
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        hostname = self.log_detection_start(request)
         response = self.get_response(request)
+        self.log_detection_result(request, hostname)
+        return response
+
+    async def __acall__(self, request):
+        hostname = self.log_detection_start(request)
+        response = await self.get_response(request)
+        self.log_detection_result(request, hostname)
+        return response
+
+    def log_detection_start(self, request):
+        hostname = request.META.get('HTTP_HOST')
         
+        # Log antes de la detección del tenant
+        logger.debug("🔍 [TenantDetection] Hostname: %s", hostname)
+        return hostname
+
+    def log_detection_result(self, request, hostname):
         # Log después de la detección
         if hasattr(request, 'tenant'):
-            tenant = request.tenant
-            logger.debug(f"✅ [TenantDetection] Tenant resuelto: {tenant.schema_name} (ID: {tenant.id})")
+            if logger.isEnabledFor(logging.DEBUG):
+                tenant = request.tenant
+                logger.debug("✅ [TenantDetection] Tenant resuelto: %s (ID: %s)", tenant.schema_name, tenant.id)
         else:
-            logger.warning(f"⚠️ [TenantDetection] No se pudo resolver el tenant para hostname: {hostname}")
-        
-        return response
+            logger.warning("⚠️ [TenantDetection] No se pudo resolver el tenant para hostname: %s", hostname)
@@ -0,0 +1,182 @@
+"""
+Perfilado de SQL por request (opt-in con QUERY_PROFILING=True).
+
+Un `connection.execute_wrapper` cuenta las consultas de cada request, su
+tiempo total y las sentencias repetidas (mismo SQL parametrizado, el
+patrón típico de N+1). El resultado se publica en:
+- la cabecera `Server-Timing` (visible en las DevTools del navegador);
+- el logger `config.profiling` para requests lentas o con muchas consultas
+  (muestreado con QUERY_PROFILING_SLOW_SAMPLE_RATE);
+- un agregado por tenant y endpoint en la caché, que lista el endpoint
+  `admin/query-profile/` del admin global.
+"""
+import hashlib
+import logging
+import random
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger('config.profiling')
+
+PROFILE_CACHE_TTL = 60 * 60 * 24
+# Endpoints distintos guardados por tenant (se descartan los menos costosos)
+PROFILE_MAX_ENDPOINTS = 200
+
+
+def fingerprint(sql):
+    """Huella corta del SQL parametrizado (los valores no forman parte)."""
+    return hashlib.md5(sql.encode()).hexdigest()[:12]
+
+
+class QueryRecorder:
+    """execute_wrapper que acumula las consultas de una request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        self.samples = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            key = fingerprint(sql)
+            self.statements[key] += 1
+            if key not in self.samples:
+                self.samples[key] = sql[:300]
+
+    def duplicates(self, limit=5):
+        """Sentencias ejecutadas más de una vez: [{fingerprint, count, sql}]."""
+        return [
+            {'fingerprint': key, 'count': count, 'sql': self.samples[key]}
+            for key, count in self.statements.most_common(limit)
+            if count > 1
+        ]
+
+    @property
+    def duplicate_count(self):
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+
+def _profile_cache_key(schema):
+    return f"query-profile:{schema}"
+
+
+def record_profile(schema, endpoint, recorder, duration_ms):
+    """Acumula los números de la request en el agregado del tenant."""
+    key = _profile_cache_key(schema)
+    endpoints = cache.get(key) or {}
+    stats = endpoints.get(endpoint) or {
+        'requests': 0, 'queries': 0, 'max_queries': 0,
+        'db_ms': 0.0, 'total_ms': 0.0, 'max_ms': 0.0, 'duplicates': 0,
+    }
+    stats['requests'] += 1
+    stats['queries'] += recorder.count
+    stats['max_queries'] = max(stats['max_queries'], recorder.count)
+    stats['db_ms'] += recorder.duration * 1000
+    stats['total_ms'] += duration_ms
+    stats['max_ms'] = max(stats['max_ms'], duration_ms)
+    stats['duplicates'] += recorder.duplicate_count
+    endpoints[endpoint] = stats
+
+    if len(endpoints) > PROFILE_MAX_ENDPOINTS:
+        worst = sorted(endpoints.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        endpoints = dict(worst[:PROFILE_MAX_ENDPOINTS])
+    cache.set(key, endpoints, PROFILE_CACHE_TTL)
+
+
+def get_worst_endpoints(schema, order_by='avg_queries', limit=20):
+    """Endpoints de un tenant ordenados por consultas o tiempo medio."""
+    rows = []
+    for endpoint, stats in (cache.get(_profile_cache_key(schema)) or {}).items():
+        requests = stats['requests']
+        rows.append({
+            'endpoint': endpoint,
+            'requests': requests,
+            'avg_queries': round(stats['queries'] / requests, 1),
+            'max_queries': stats['max_queries'],
+            'avg_db_ms': round(stats['db_ms'] / requests, 1),
+            'avg_ms': round(stats['total_ms'] / requests, 1),
+            'max_ms': round(stats['max_ms'], 1),
+            'duplicates_per_request': round(stats['duplicates'] / requests, 1),
+        })
+    rows.sort(key=lambda row: row.get(order_by, 0), reverse=True)
+    return rows[:limit]
+
+
+def reset_profile(schema):
+    cache.delete(_profile_cache_key(schema))
+
+
+class QueryProfilingMiddleware:
+    """
+    Instala un QueryRecorder durante la request. Debe ir después de
+    CustomTenantMiddleware para conocer el schema.
+
+    Es solo-sync a propósito: `execute_wrapper` se instala en la conexión
+    del hilo que lo llama. Bajo ASGI, activarlo mete una frontera sync en
+    la cadena y la vista async corre dentro de un async_to_sync; sus
+    sync_to_async (thread_sensitive) vuelven a este mismo hilo, así que el
+    wrapper ve sus consultas. Con QUERY_PROFILING apagado lanza
+    MiddlewareNotUsed y la cadena sigue siendo async de punta a punta.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_PROFILING', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'QUERY_PROFILING_SLOW_MS', 500)
+        self.slow_queries = getattr(settings, 'QUERY_PROFILING_SLOW_QUERIES', 30)
+        self.sample_rate = getattr(settings, 'QUERY_PROFILING_SLOW_SAMPLE_RATE', 1.0)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        self.finish(request, response, recorder, start)
+        return response
+
+    def finish(self, request, response, recorder, start):
+        duration_ms = (time.perf_counter() - start) * 1000
+        db_ms = recorder.duration * 1000
+        schema = getattr(connection, 'schema_name', 'public')
+
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries", '
+            f'app;dur={duration_ms - db_ms:.1f}'
+        )
+        response['X-Query-Count'] = str(recorder.count)
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else request.path
+        endpoint = f"{request.method} /{route.lstrip('/')}"
+        try:
+            record_profile(schema, endpoint, recorder, duration_ms)
+        except Exception:
+            logger.exception("No se pudo guardar el perfil de consultas")
+
+        is_slow = duration_ms >= self.slow_ms or recorder.count >= self.slow_queries
+        if is_slow and (self.sample_rate >= 1 or random.random() < self.sample_rate):
+            logger.warning(
+                '🐢 %s: %d consultas, %.0fms en BD de %.0fms [Schema: %s]',
+                endpoint, recorder.count, db_ms, duration_ms, schema,
+                extra={'profile': {
+                    'endpoint': endpoint,
+                    'path': request.path,
+                    'schema': schema,
+                    'queries': recorder.count,
+                    'db_ms': round(db_ms, 1),
+                    'duration_ms': round(duration_ms, 1),
+                    'duplicates': recorder.duplicates(),
+                }}
+            )
@@ -0,0 +1,227 @@
+"""
+Caché de respuestas de endpoints de lectura, por tenant y con etiquetas.
+
+Las claves llevan siempre el schema del tenant (`rc:<schema>:...`): dos
+clínicas nunca comparten respuestas aunque la URL sea la misma. No se usa
+el KEY_FUNCTION global de django-tenants porque otras cachés (estadísticas
+de tenants, tokens) se invalidan desde un schema distinto al suyo y ya
+llevan el schema en sus claves.
+
+La invalidación es por etiquetas (`professional:12`, `psychologist:7`,
+`clinics`...): cada etiqueta tiene un token de versión y la clave de una
+respuesta incluye los tokens de sus etiquetas. `invalidate_tags` cambia
+el token (al confirmar la transacción) y todas las respuestas con esa
+etiqueta dejan de encontrarse, sin recorrer claves. Las señales de cada
+app (signals.py) invalidan las etiquetas de los modelos que cambian.
+
+El backend se elige en settings (CACHES): memoria local por defecto,
+archivos con CACHE_BACKEND=file o Redis con REDIS_URL. Con memoria local
+cada proceso tiene su caché y una invalidación solo llega al proceso que
+hizo el cambio: con varios workers usar Redis; el TTL acota lo viejo que
+puede estar un dato en el resto.
+
+Uso (una línea por vista, debajo de @api_view/@async_api_view para que
+corra tras la autenticación y encima de @conditional para responder 304
+sin consultas):
+
+    @async_api_view()
+    @cache_response(tags=['professional:{professional_id}'])
+    async def professional_public_detail(request, professional_id): ...
+"""
+import functools
+import hashlib
+import logging
+import uuid
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+# Cabeceras de la respuesta original que se guardan con ella
+STORED_HEADERS = ('ETag', 'Last-Modified')
+
+
+def _cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _default_timeout():
+    return getattr(settings, 'RESPONSE_CACHE_TTL', 60)
+
+
+def _tag_timeout():
+    # Los tokens viven más que las respuestas; si uno caduca solo se pierden aciertos
+    return getattr(settings, 'RESPONSE_CACHE_TAG_TTL', 86400)
+
+
+def _current_schema(request=None):
+    tenant = getattr(request, 'tenant', None)
+    if tenant is not None:
+        return tenant.schema_name
+    return getattr(connection, 'schema_name', 'public')
+
+
+def _tag_key(schema, tag):
+    return f"rc:{schema}:tag:{tag}"
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def _resolve_tags(tags, request, kwargs):
+    if callable(tags):
+        return list(tags(request, **kwargs))
+    return [tag.format(**kwargs) for tag in tags]
+
+
+def _tag_versions(cache, keys):
+    """Tokens actuales de las etiquetas; crea los que no existen."""
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), _tag_timeout())
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def _atag_versions(cache, keys):
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, _new_version(), _tag_timeout())
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def _request_digest(request, user_id):
+    # La URL completa: filtros, cursores y fields= cambian la respuesta. Las
+    # respuestas de DRF se guardan como datos y se renderizan en cada acierto
+    # según el Accept de quien pide.
+    raw = f"{request.get_full_path()}|{user_id or ''}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:20]
+
+
+def _response_key(prefix, request, user_id, versions):
+    digest = hashlib.sha1('|'.join(map(str, versions)).encode('utf-8')).hexdigest()[:12]
+    return f"{prefix}:{_request_digest(request, user_id)}:{digest}"
+
+
+def _freeze(response):
+    """Forma cacheable de una respuesta 200, o None si no se debe cachear."""
+    if response.status_code != 200 or getattr(response, 'streaming', False):
+        return None
+    headers = {name: response[name] for name in STORED_HEADERS if response.has_header(name)}
+    if isinstance(response, Response):
+        return ('data', response.data, headers)
+    return ('raw', response.content, response['Content-Type'], headers)
+
+
+def _thaw(request, entry):
+    headers = entry[-1]
+    # Con los validadores guardados, un 304 no necesita ni el validador
+    last_modified = headers.get('Last-Modified')
+    not_modified = get_conditional_response(
+        request,
+        etag=headers.get('ETag'),
+        last_modified=parse_http_date_safe(last_modified) if last_modified else None,
+    )
+    if not_modified is not None:
+        response = not_modified
+    elif entry[0] == 'data':
+        response = Response(entry[1])
+    else:
+        response = HttpResponse(entry[1], content_type=entry[2])
+    for name, value in headers.items():
+        response[name] = value
+    response['X-Cache'] = 'HIT'
+    return response
+
+
+def cache_response(timeout=None, tags=(), vary_on_user=False, shared=False):
+    """
+    Decorador: cachea las respuestas 200 de GET/HEAD de la vista.
+
+    - timeout: segundos (por defecto RESPONSE_CACHE_TTL)
+    - tags: etiquetas con los kwargs de la URL (`'professional:{professional_id}'`)
+      o una función `(request, **kwargs) -> etiquetas`
+    - vary_on_user: una entrada por usuario (respuestas que dependen de quién pide)
+    - shared: datos del schema público, iguales para todas las clínicas
+    """
+    def decorator(view):
+        view_name = f"{view.__module__}.{view.__name__}"
+
+        def prepare(request, kwargs):
+            schema = 'public' if shared else _current_schema(request)
+            user_id = getattr(getattr(request, 'user', None), 'pk', None) if vary_on_user else None
+            tag_keys = [_tag_key(schema, tag) for tag in _resolve_tags(tags, request, kwargs)]
+            return f"rc:{schema}:{view_name}", user_id, tag_keys
+
+        def cacheable(request):
+            return getattr(settings, 'RESPONSE_CACHE_ENABLED', True) and request.method in ('GET', 'HEAD')
+
+        if iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def wrapper(request, *args, **kwargs):
+                if not cacheable(request):
+                    return await view(request, *args, **kwargs)
+                cache = _cache()
+                prefix, user_id, tag_keys = prepare(request, kwargs)
+                key = _response_key(prefix, request, user_id, await _atag_versions(cache, tag_keys))
+                entry = await cache.aget(key)
+                if entry is not None:
+                    return _thaw(request, entry)
+
+                response = await view(request, *args, **kwargs)
+                frozen = _freeze(response)
+                if frozen is not None:
+                    await cache.aset(key, frozen, timeout or _default_timeout())
+                    response['X-Cache'] = 'MISS'
+                return response
+        else:
+            @functools.wraps(view)
+            def wrapper(request, *args, **kwargs):
+                if not cacheable(request):
+                    return view(request, *args, **kwargs)
+                cache = _cache()
+                prefix, user_id, tag_keys = prepare(request, kwargs)
+                key = _response_key(prefix, request, user_id, _tag_versions(cache, tag_keys))
+                entry = cache.get(key)
+                if entry is not None:
+                    return _thaw(request, entry)
+
+                response = view(request, *args, **kwargs)
+                frozen = _freeze(response)
+                if frozen is not None:
+                    cache.set(key, frozen, timeout or _default_timeout())
+                    response['X-Cache'] = 'MISS'
+                return response
+        return wrapper
+    return decorator
+
+
+def invalidate_tags(*tags, schema=None):
+    """
+    Invalida las respuestas con alguna de las etiquetas en el schema dado
+    (por defecto, el de la conexión actual) al confirmarse la transacción.
+    """
+    tags = [tag for tag in tags if tag]
+    if not tags:
+        return
+    schema = schema or _current_schema()
+    keys = {_tag_key(schema, tag): _new_version() for tag in tags}
+
+    def bump():
+        try:
+            _cache().set_many(keys, _tag_timeout())
+        except Exception:
+            logger.exception(f"No se pudo invalidar la caché de respuestas: {tags}")
+
+    transaction.on_commit(bump)
@@ -62,6 +62,7 @@ SHARED_APPS = (
     'apps.authentication',  # ⚠️ CRÍTICO: Para que /api/auth/ funcione en público
     'rest_framework',       # ⚠️ CRÍTICO: Para que funcione api-auth
     'rest_framework.authtoken',  # ⚠️ CRÍTICO: Para tokens en público
+    'apps.payment_inbox',  # Bandeja de webhooks de Stripe (llegan antes de saber la clínica)
 )
 
 # --- APLICACIONES DEL INQUILINO (TENANT) ---
@@ -95,12 +96,14 @@ INSTALLED_APPS = list(SHARED_APPS) + [app for app in TENANT_APPS if app not in S
 
 MIDDLEWARE = [
     'config.logging_middleware.RequestLoggingMiddleware',  # 📝 Logging detallado de requests
+    'config.compression.CompressionMiddleware',  # 🗜️ brotli/gzip de las respuestas (ve la respuesta final)
     'apps.tenants.custom_tenant_middleware.CustomTenantMiddleware',  # 🔥 REEMPLAZO de TenantMainMiddleware
     'config.logging_middleware.TenantDetectionLoggingMiddleware',  # 📝 Logging de detección de tenants
+    'config.query_profiler.QueryProfilingMiddleware',  # 🐢 Conteo de SQL por request (solo con QUERY_PROFILING)
     # 'django_tenants.middleware.main.TenantMainMiddleware',  # ❌ DESHABILITADO: No funciona en Render
     'apps.auditlog.local.RequestLocalStorageMiddleware',  # Capturar request para logs
     # 'fix_tenant_middleware.FixTenantURLConfMiddleware',  # ❌ DESHABILITADO: Interfiere con django-tenants
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'config.whitenoise_middleware.AsyncWhiteNoiseMiddleware',  # WhiteNoise con camino async (sin saltos de hilo)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  
@@ -136,19 +139,44 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Conexiones persistentes (DB_CONN_MAX_AGE, 600 s por defecto) para los
+# procesos sync: runserver/WSGI, comandos de gestión, el worker de Stripe y
+# los cron. Solo ahí actúa la omisión del SET search_path redundante
+# (TENANT_SKIP_REDUNDANT_SEARCH_PATH): hace falta que la conexión física
+# sobreviva al cambio de tenant.
+# El despliegue web (render.yaml) sirve ASGI con DB_CONN_MAX_AGE=0, como
+# pide Django bajo ASGI (las conexiones persistentes son por hilo y los
+# hilos del executor no las cierran): una conexión por request y un solo
+# SET search_path por request; la omisión no llega a actuar. Para
+# reutilizar conexiones bajo ASGI, usar PgBouncer (DB_PGBOUNCER_MODE).
+# El pool nativo de Django necesitaría psycopg 3 y el proyecto usa psycopg2.
 DATABASES = {
     "default": dj_database_url.config(
         default=config("DATABASE_URL"),
-        conn_max_age=600,
+        conn_max_age=config("DB_CONN_MAX_AGE", default=600, cast=int),
         conn_health_checks=True,
     )
 }
 
-# CRÍTICO: django-tenants requiere este ENGINE específico
-DATABASES['default']['ENGINE'] = 'django_tenants.postgresql_backend'
+# CRÍTICO: django-tenants requiere su backend; se usa una subclase que
+# omite los SET search_path redundantes (apps/tenants/postgresql_backend)
+DATABASES['default']['ENGINE'] = 'apps.tenants.postgresql_backend'
 
-# Configurar el backend específico para django-tenants
-DATABASES['default']['ENGINE'] = 'django_tenants.postgresql_backend'
+# PgBouncer en modo transaction: la sesión del servidor detrás de la
+# conexión cambia entre transacciones, así que el search_path no se puede
+# dar por aplicado. Con DB_PGBOUNCER_MODE se envía SET search_path en cada
+# cursor (TENANT_LIMIT_SET_CALLS=False) y no se reutiliza el recordado.
+DB_PGBOUNCER_MODE = config("DB_PGBOUNCER_MODE", default=False, cast=bool)
+
+# Enviar SET search_path solo una vez por cambio de tenant (nunca con PgBouncer)
+TENANT_LIMIT_SET_CALLS = not DB_PGBOUNCER_MODE
+
+# Reutilizar el search_path ya aplicado en la conexión física
+TENANT_SKIP_REDUNDANT_SEARCH_PATH = not DB_PGBOUNCER_MODE
+
+if DB_PGBOUNCER_MODE:
+    # PgBouncer no soporta cursores con nombre en modo transaction
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
 
 # --- CONFIGURACIÓN DE DJANGO-TENANTS ---
 DATABASE_ROUTERS = (
@@ -164,6 +192,17 @@ TENANT_DOMAIN_MODEL = "tenants.Domain"
 # ⚠️ CRÍTICO: Nombre del esquema público (REQUERIDO por django-tenants)
 PUBLIC_SCHEMA_NAME = 'public'
 
+# Schema plantilla ya migrado que se clona al crear una clínica
+# (`prepare_tenant_template`). Vacío = migrar cada clínica desde cero.
+TENANT_TEMPLATE_SCHEMA = config("TENANT_TEMPLATE_SCHEMA", default="tenant_template")
+# Altas del registro público en segundo plano (hilos por proceso; el cron
+# `process_provisioning_jobs` recoge las que un reinicio dejó a medias)
+TENANT_PROVISIONING_ASYNC = config("TENANT_PROVISIONING_ASYNC", default=True, cast=bool)
+TENANT_PROVISIONING_WORKERS = config("TENANT_PROVISIONING_WORKERS", default=2, cast=int)
+# Un alta 'running' sin avanzar durante este tiempo se da por fallida
+# (`process_provisioning_jobs`, cron de Render)
+TENANT_PROVISIONING_STALE_MINUTES = config("TENANT_PROVISIONING_STALE_MINUTES", default=30, cast=int)
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -231,19 +270,76 @@ AUTHENTICATION_BACKENDS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         #'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        # TokenAuthentication con caché token→usuario por tenant
+        'apps.authentication.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 30,
+    # JSON con orjson (config/renderers.py); la API navegable solo en desarrollo
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
-    ]
+        'config.renderers.ORJSONRenderer',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
+    'DEFAULT_PARSER_CLASSES': [
+        'config.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Caché: memoria local por defecto, archivos con CACHE_BACKEND=file o
+# Redis con REDIS_URL (compartida entre workers; necesaria para que las
+# invalidaciones de config/response_cache.py lleguen a todos los procesos)
+REDIS_URL = config("REDIS_URL", default="")
+CACHE_BACKEND = config("CACHE_BACKEND", default="redis" if REDIS_URL else "locmem")
+if CACHE_BACKEND == "redis":
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'TIMEOUT': 300,
+        }
+    }
+elif CACHE_BACKEND == "file":
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': config("CACHE_LOCATION", default=str(BASE_DIR / '.cache')),
+            'TIMEOUT': 300,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'psico-default',
+            'TIMEOUT': 300,
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# Caché de respuestas de lectura (config/response_cache.py)
+RESPONSE_CACHE_ENABLED = config("RESPONSE_CACHE_ENABLED", default=True, cast=bool)
+RESPONSE_CACHE_TTL = config("RESPONSE_CACHE_TTL", default=60, cast=int)
+
+# Compresión de respuestas (config/compression.py). brotli es opcional:
+# sin el paquete solo se ofrece gzip
+COMPRESSION_MIN_SIZE = config("COMPRESSION_MIN_SIZE", default=1024, cast=int)
+COMPRESSION_GZIP_LEVEL = config("COMPRESSION_GZIP_LEVEL", default=6, cast=int)
+COMPRESSION_BROTLI_QUALITY = config("COMPRESSION_BROTLI_QUALITY", default=5, cast=int)
+
+# Versionado del historial clínico (apps/clinical_history/revisions.py): cada
+# cuántas revisiones se guarda el documento completo además del diff
+CLINICAL_HISTORY_SNAPSHOT_EVERY = config("CLINICAL_HISTORY_SNAPSHOT_EVERY", default=20, cast=int)
+
+# TTL (segundos) de la caché token→usuario usada por REST y WebSocket
+TOKEN_AUTH_CACHE_TTL = config("TOKEN_AUTH_CACHE_TTL", default=60, cast=int)
+
+# TTL (segundos) de la caché en memoria hostname→tenant de CustomTenantMiddleware
+TENANT_DOMAIN_CACHE_TTL = config("TENANT_DOMAIN_CACHE_TTL", default=300, cast=int)
+
 # URLs de producción y desarrollo
 CORS_ALLOWED_ORIGINS = [
     "https://psico-admin-sp1-despliegue-front.vercel.app",
@@ -313,13 +409,27 @@ CORS_ALLOW_METHODS = [
 # Configuración de ASGI para que Django Channels sea el punto de entrada
 ASGI_APPLICATION = 'config.asgi.application'
 
-# Configuración del "Channel Layer" que usará Redis como intermediario
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer',
-   
-    },
-}
+# Configuración del "Channel Layer": Redis con REDIS_URL. En memoria, los
+# mensajes de grupo (chat, expulsión de salas canceladas en
+# apps/chat/membership.py) solo llegan a los sockets del mismo worker:
+# con más de un worker de gunicorn hay que configurar REDIS_URL.
+if REDIS_URL:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {'hosts': [REDIS_URL]},
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        },
+    }
+# Presencia del chat (apps/chat/presence.py): en Redis con REDIS_URL, en
+# memoria del proceso si no. Segundos que una conexión sigue "en línea"
+# sin renovarse (el consumer renueva cada TTL / 3)
+CHAT_PRESENCE_TTL = config("CHAT_PRESENCE_TTL", default=60, cast=int)
 # URL donde corre tu App de React (Vite usa el puerto 5173 por defecto)
 FRONTEND_URL_LOCAL = 'https://psico-admin-sp1-despliegue-front.vercel.app'
 # ---------------------------------------------------------------
@@ -350,6 +460,19 @@ DEFAULT_FROM_EMAIL = 'Equipo de Psico SAS <isaelortiz74@gmail.com>'
 STRIPE_PUBLIC_KEY = config("STRIPE_PUBLIC_KEY", default="")
 STRIPE_SECRET_KEY = config("STRIPE_SECRET_KEY", default="") 
 STRIPE_WEBHOOK_SECRET = config("STRIPE_WEBHOOK_SECRET", default="")
+# Bandeja de webhooks: intentos antes de descartar un evento y procesado
+# inmediato en un hilo del proceso web (el resto lo recoge process_stripe_events)
+STRIPE_EVENT_MAX_ATTEMPTS = config("STRIPE_EVENT_MAX_ATTEMPTS", default=8, cast=int)
+STRIPE_EVENT_INLINE_WORKER = config("STRIPE_EVENT_INLINE_WORKER", default=True, cast=bool)
+# Minutos que un horario queda reservado mientras el paciente paga (Stripe exige
+# sesiones de al menos 30 minutos; la sesión vence 2 minutos antes que la reserva)
+SLOT_HOLD_MINUTES = config("SLOT_HOLD_MINUTES", default=35, cast=int)
+# Pasarela de pagos: 'stripe' o 'fake' (en memoria, sin red; para tests y benchmarks)
+PAYMENT_GATEWAY = config("PAYMENT_GATEWAY", default="stripe")
+# Llamadas a la API de Stripe: timeouts (segundos) y reintentos de red
+STRIPE_CONNECT_TIMEOUT = config("STRIPE_CONNECT_TIMEOUT", default=3.05, cast=float)
+STRIPE_READ_TIMEOUT = config("STRIPE_READ_TIMEOUT", default=10, cast=float)
+STRIPE_MAX_NETWORK_RETRIES = config("STRIPE_MAX_NETWORK_RETRIES", default=2, cast=int)
 
 # Alias para compatibilidad (algunos lugares usan PUBLISHABLE)
 STRIPE_PUBLISHABLE_KEY = STRIPE_PUBLIC_KEY
@@ -357,6 +480,18 @@ STRIPE_PUBLISHABLE_KEY = STRIPE_PUBLIC_KEY
 # ---------------------------------------------------------------
 # CONFIGURACIÓN DE LOGGING Y BITÁCORA
 # ---------------------------------------------------------------
+# Log de acceso (config.logging_middleware.RequestLoggingMiddleware):
+# fracción de respuestas 2xx/3xx registradas; errores y lentas van siempre
+ACCESS_LOG_SAMPLE_RATE = config("ACCESS_LOG_SAMPLE_RATE", default=1.0 if DEBUG else 0.1, cast=float)
+ACCESS_LOG_SLOW_MS = config("ACCESS_LOG_SLOW_MS", default=1000, cast=int)
+ACCESS_LOG_JSON = config("ACCESS_LOG_JSON", default=not DEBUG, cast=bool)
+
+# Perfilado de SQL por request (config.query_profiler), desactivado por defecto
+QUERY_PROFILING = config("QUERY_PROFILING", default=False, cast=bool)
+QUERY_PROFILING_SLOW_MS = config("QUERY_PROFILING_SLOW_MS", default=500, cast=int)
+QUERY_PROFILING_SLOW_QUERIES = config("QUERY_PROFILING_SLOW_QUERIES", default=30, cast=int)
+QUERY_PROFILING_SLOW_SAMPLE_RATE = config("QUERY_PROFILING_SLOW_SAMPLE_RATE", default=1.0, cast=float)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -369,6 +504,9 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'config.logging_formatters.JsonFormatter',
+        },
     },
     'filters': {
         'require_debug_true': {
@@ -394,6 +532,12 @@ LOGGING = {
             'backupCount': 2,
             'formatter': 'verbose',
         },
+        # Handler del log de acceso (una línea JSON por request registrada)
+        'access': {
+            'level': 'INFO',
+            'class': 'logging.StreamHandler',
+            'formatter': 'json' if ACCESS_LOG_JSON else 'simple',
+        },
         # Handler para guardar en la base de datos (nuestra bitácora)
         'database': {
             'level': 'INFO',
@@ -408,6 +552,18 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        # Log de acceso: fuera de la bitácora en BD y del archivo
+        'config.access': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+        # Requests lentas detectadas por el perfilado de SQL
+        'config.profiling': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
         # Logger para capturar todo lo que pasa en nuestras 'apps'
         'apps': {
             'handlers': ['console', 'file', 'database'],
@@ -0,0 +1,238 @@
+# config/tests/test_compression.py
+import gzip
+import os
+import zlib
+from unittest import mock, skipIf
+
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from config import compression
+from config.compression import CompressionMiddleware, accepted_encodings, choose_encoding
+
+JSON_BODY = b'{"results": [' + b','.join(b'{"id": %d, "status": "confirmed"}' % i for i in range(100)) + b']}'
+
+
+class AcceptEncodingTests(SimpleTestCase):
+    def test_parses_q_values(self):
+        self.assertEqual(
+            accepted_encodings('gzip, br;q=0.5, deflate ; q = 0.1, *;q=0'),
+            {'gzip': 1.0, 'br': 0.5, 'deflate': 0.1, '*': 0.0}
+        )
+
+    def test_ignores_malformed_entries(self):
+        self.assertEqual(accepted_encodings('gzip;q=1.2.3, , br;level=1, GZIP'), {'gzip': 1.0})
+
+    def test_no_header_or_only_identity(self):
+        self.assertIsNone(choose_encoding(None))
+        self.assertIsNone(choose_encoding(''))
+        self.assertIsNone(choose_encoding('identity'))
+
+    @skipIf(compression.brotli is None, 'brotli no instalado')
+    def test_prefers_brotli_on_equal_q(self):
+        self.assertEqual(choose_encoding('gzip, br'), 'br')
+        self.assertEqual(choose_encoding('gzip, deflate, br'), 'br')
+
+    @skipIf(compression.brotli is None, 'brotli no instalado')
+    def test_highest_q_wins(self):
+        self.assertEqual(choose_encoding('br;q=0.5, gzip'), 'gzip')
+        self.assertEqual(choose_encoding('br, gzip;q=0.9'), 'br')
+
+    @skipIf(compression.brotli is None, 'brotli no instalado')
+    def test_wildcard(self):
+        self.assertEqual(choose_encoding('*'), 'br')
+        # Lo nombrado explícitamente manda sobre `*`
+        self.assertEqual(choose_encoding('br;q=0, *'), 'gzip')
+        self.assertEqual(choose_encoding('gzip;q=0.2, *;q=0.8'), 'br')
+
+    def test_q_zero_rejects(self):
+        self.assertIsNone(choose_encoding('gzip;q=0'))
+        self.assertIsNone(choose_encoding('*;q=0'))
+        self.assertIsNone(choose_encoding('gzip;q=0, br;q=0'))
+
+    def test_without_brotli_only_gzip(self):
+        with mock.patch.object(compression, 'brotli', None):
+            self.assertEqual(choose_encoding('br, gzip;q=0.1'), 'gzip')
+            self.assertEqual(choose_encoding('*'), 'gzip')
+            self.assertIsNone(choose_encoding('br'))
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200, COMPRESSION_GZIP_LEVEL=6, COMPRESSION_BROTLI_QUALITY=5)
+class CompressionMiddlewareTests(SimpleTestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def process(self, response, accept='gzip'):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(self.factory.get('/', HTTP_ACCEPT_ENCODING=accept))
+
+    def json_response(self, body=JSON_BODY, **kwargs):
+        return HttpResponse(body, content_type='application/json', **kwargs)
+
+    def test_compresses_json_above_threshold(self):
+        response = self.process(self.json_response())
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), JSON_BODY)
+
+    @skipIf(compression.brotli is None, 'brotli no instalado')
+    def test_compresses_with_brotli(self):
+        response = self.process(self.json_response(), accept='gzip, br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(compression.brotli.decompress(response.content), JSON_BODY)
+
+    def test_threshold(self):
+        below = self.process(self.json_response(b'x' * 199))
+        self.assertEqual(below.content, b'x' * 199)
+        self.assertFalse(below.has_header('Content-Encoding'))
+        self.assertFalse(below.has_header('Vary'))
+
+        at_threshold = self.process(self.json_response(b'x' * 200))
+        self.assertEqual(at_threshold['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(at_threshold.content), b'x' * 200)
+
+    def test_incompressible_body_is_left_alone_but_varies(self):
+        body = os.urandom(1000)
+        response = self.process(self.json_response(body))
+
+        self.assertEqual(response.content, body)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_skipped_content_types(self):
+        for content_type in (
+            'image/png', 'text/html; charset=utf-8', 'application/pdf', 'application/zip',
+            'application/octet-stream', 'font/woff2', 'video/mp4',
+        ):
+            with self.subTest(content_type=content_type):
+                response = self.process(HttpResponse(JSON_BODY, content_type=content_type))
+                self.assertEqual(response.content, JSON_BODY)
+                self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_already_encoded_and_empty_statuses(self):
+        encoded = self.json_response()
+        encoded['Content-Encoding'] = 'br'
+        self.assertEqual(self.process(encoded).content, JSON_BODY)
+
+        for status in (204, 304):
+            response = self.process(self.json_response(status=status))
+            self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_client_without_supported_encoding(self):
+        response = self.process(self.json_response(), accept='identity')
+
+        self.assertEqual(response.content, JSON_BODY)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_strong_etag_is_weakened(self):
+        response = self.json_response()
+        response['ETag'] = '"abc"'
+        self.assertEqual(self.process(response)['ETag'], 'W/"abc"')
+
+    def test_weak_etag_is_kept(self):
+        response = self.json_response()
+        response['ETag'] = 'W/"abc"'
+        self.assertEqual(self.process(response)['ETag'], 'W/"abc"')
+
+    def test_etag_untouched_when_not_compressed(self):
+        response = self.json_response()
+        response['ETag'] = '"abc"'
+        self.assertEqual(self.process(response, accept='identity')['ETag'], '"abc"')
+
+    def test_async_get_response(self):
+        async def get_response(request):
+            return self.json_response()
+
+        middleware = CompressionMiddleware(get_response)
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = async_to_sync(middleware)(request)
+
+        self.assertEqual(gzip.decompress(response.content), JSON_BODY)
+
+
+@override_settings(COMPRESSION_MIN_SIZE=200)
+class StreamingCompressionTests(SimpleTestCase):
+    chunks = [b'{"results": [', b'{"id": 1},' * 50, b'{"id": 2}', b']}']
+
+    def process(self, response, accept='gzip'):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept))
+
+    def streaming_response(self, content):
+        response = StreamingHttpResponse(content, content_type='application/json')
+        response['Content-Length'] = '999'
+        response['ETag'] = '"stream"'
+        return response
+
+    def assert_streamed_gzip(self, compressed_chunks):
+        # Cada trozo se puede descomprimir en cuanto llega (Z_SYNC_FLUSH)
+        decompressor = zlib.decompressobj(31)
+        received = []
+        for chunk in compressed_chunks[:-1]:
+            received.append(decompressor.decompress(chunk))
+        self.assertEqual(b''.join(received), b''.join(self.chunks))
+        received.append(decompressor.decompress(compressed_chunks[-1]) + decompressor.flush())
+        self.assertTrue(decompressor.eof)
+        self.assertEqual(b''.join(received), b''.join(self.chunks))
+
+    def test_sync_stream(self):
+        response = self.process(self.streaming_response(iter(self.chunks)))
+
+        self.assertFalse(response.is_async)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], 'W/"stream"')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assert_streamed_gzip(list(response.streaming_content))
+
+    def test_async_stream(self):
+        async def content():
+            for chunk in self.chunks:
+                yield chunk
+
+        response = self.process(self.streaming_response(content()))
+
+        async def collect():
+            return [chunk async for chunk in response.streaming_content]
+
+        self.assertTrue(response.is_async)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        self.assert_streamed_gzip(async_to_sync(collect)())
+
+    def test_async_stream_in_async_chain(self):
+        async def content():
+            for chunk in self.chunks:
+                yield chunk
+
+        async def get_response(request):
+            return self.streaming_response(content())
+
+        middleware = CompressionMiddleware(get_response)
+
+        async def run():
+            response = await middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+            return response, [chunk async for chunk in response.streaming_content]
+
+        response, chunks = async_to_sync(run)()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assert_streamed_gzip(chunks)
+
+    @skipIf(compression.brotli is None, 'brotli no instalado')
+    def test_brotli_stream(self):
+        response = self.process(self.streaming_response(iter(self.chunks)), accept='br')
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        decompressor = compression.brotli.Decompressor()
+        body = b''.join(decompressor.process(chunk) for chunk in response.streaming_content)
+        self.assertEqual(body, b''.join(self.chunks))
+
+    def test_streams_ignore_threshold(self):
+        # No se conoce el tamaño de antemano: se comprime siempre
+        response = self.process(self.streaming_response(iter([b'{}'])))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b'{}')
@@ -0,0 +1,28 @@
+from asgiref.sync import sync_to_async
+from django.core.handlers.base import BaseHandler
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from config.query_profiler import QueryProfilingMiddleware
+
+
+@override_settings(
+    QUERY_PROFILING=True,
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+)
+class QueryProfilingAsyncViewTests(SimpleTestCase):
+    def test_async_view_queries_run_under_the_recorder(self):
+        async def view(request):
+            # Lo que vería una consulta del ORM async
+            wrapped = await sync_to_async(lambda: len(connection.execute_wrappers))()
+            return HttpResponse(str(wrapped))
+
+        # Misma adaptación que load_middleware: el middleware es solo-sync
+        adapted = BaseHandler().adapt_method_mode(False, view, True)
+        middleware = QueryProfilingMiddleware(adapted)
+
+        response = middleware(RequestFactory().get('/'))
+
+        self.assertEqual(response.content, b'1')
+        self.assertEqual(response['X-Query-Count'], '0')
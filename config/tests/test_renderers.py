@@ -0,0 +1,38 @@
+# config/tests/test_renderers.py
+import json
+import uuid
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from rest_framework.utils.encoders import JSONEncoder
+
+from config.renderers import dumps
+
+
+class ORJSONDumpsTests(SimpleTestCase):
+    """Mismo contenido que json.dumps con el JSONEncoder de DRF."""
+
+    def assertSameAsDRF(self, data):
+        self.assertEqual(json.loads(dumps(data)), json.loads(json.dumps(data, cls=JSONEncoder)))
+
+    def test_utc_datetimes_end_in_z(self):
+        value = datetime(2026, 10, 18, 12, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        self.assertEqual(dumps({'at': value}), b'{"at":"2026-10-18T12:30:15.123456Z"}')
+        self.assertSameAsDRF({'at': value})
+
+    def test_dates_times_and_offsets(self):
+        self.assertSameAsDRF({
+            'naive': datetime(2026, 10, 18, 12, 30, 15, 999999),
+            'offset': datetime(2026, 10, 18, 12, 30, tzinfo=dt_timezone(timedelta(hours=-4))),
+            'day': date(2026, 10, 18),
+            'time': time(9, 15, 30, 250500),
+        })
+
+    def test_other_types(self):
+        self.assertSameAsDRF({
+            'fee': Decimal('150.50'),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'text': 'línea nueva',
+            1: 'clave numérica',
+        })
@@ -0,0 +1,97 @@
+# config/tests/test_response_cache.py
+from types import SimpleNamespace
+from unittest import mock
+
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from config.response_cache import cache_response, invalidate_tags
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'response-cache-tests'}},
+    RESPONSE_CACHE_ENABLED=True,
+)
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.calls = 0
+
+        @cache_response(tags=['professional:{professional_id}'])
+        def view(request, professional_id):
+            self.calls += 1
+            response = HttpResponse(f'{request.tenant.schema_name}:{professional_id}:{self.calls}')
+            response['ETag'] = f'"v{self.calls}"'
+            return response
+
+        self.view = view
+
+    def get(self, schema='clinica_a', professional_id=1, **headers):
+        request = RequestFactory().get(f'/professionals/{professional_id}/', **headers)
+        request.tenant = SimpleNamespace(schema_name=schema)
+        return self.view(request, professional_id=professional_id)
+
+    def invalidate(self, *tags, schema='clinica_a'):
+        callbacks = []
+        with mock.patch('config.response_cache.transaction.on_commit', side_effect=callbacks.append):
+            invalidate_tags(*tags, schema=schema)
+        return callbacks
+
+    def test_second_request_is_a_hit(self):
+        first = self.get()
+        second = self.get()
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(self.calls, 1)
+
+    def test_invalidating_a_tag_drops_its_responses_only(self):
+        self.get(professional_id=1)
+        self.get(professional_id=2)
+
+        for bump in self.invalidate('professional:1'):
+            bump()
+
+        self.assertEqual(self.get(professional_id=1)['X-Cache'], 'MISS')
+        self.assertEqual(self.get(professional_id=2)['X-Cache'], 'HIT')
+        self.assertEqual(self.calls, 3)
+
+    def test_tag_version_bumps_on_commit(self):
+        self.get()
+        callbacks = self.invalidate('professional:1')
+
+        # Hasta el commit las respuestas siguen vigentes
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.get()['X-Cache'], 'HIT')
+
+        callbacks[0]()
+        self.assertEqual(self.get()['X-Cache'], 'MISS')
+
+    def test_responses_are_namespaced_by_schema(self):
+        self.assertEqual(self.get(schema='clinica_a').content, b'clinica_a:1:1')
+        self.assertEqual(self.get(schema='clinica_b').content, b'clinica_b:1:2')
+        self.assertEqual(self.get(schema='clinica_a')['X-Cache'], 'HIT')
+
+        # Invalidar en una clínica no toca la otra
+        for bump in self.invalidate('professional:1', schema='clinica_b'):
+            bump()
+        self.assertEqual(self.get(schema='clinica_a')['X-Cache'], 'HIT')
+        self.assertEqual(self.get(schema='clinica_b')['X-Cache'], 'MISS')
+
+    def test_stored_etag_is_replayed_as_304(self):
+        etag = self.get()['ETag']
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(self.calls, 1)
+
+    def test_other_etag_gets_the_cached_body(self):
+        self.get()
+        response = self.get(HTTP_IF_NONE_MATCH='"otro"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'clinica_a:1:1')
@@ -0,0 +1,208 @@
+# config/tests/test_values_serializer.py
+"""
+Plan de ValuesSerializer sin base de datos: las filas son diccionarios con
+la forma de `.values()` y los modelos se instancian en memoria para
+comparar con la salida del ModelSerializer.
+"""
+from datetime import date, datetime, time, timezone as dt_timezone
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.appointments.models import Appointment
+from apps.appointments.serializers import AppointmentSerializer, AppointmentValuesSerializer
+from apps.auditlog.models import LogEntry
+from apps.auditlog.serializers import LogEntrySerializer, LogEntryValuesSerializer
+from apps.professionals.serializers import (
+    ProfessionalPublicValuesSerializer,
+    SpecializationValuesSerializer,
+    WorkingHoursValuesSerializer,
+)
+from apps.users.models import CustomUser
+
+
+def get_request(**params):
+    return Request(APIRequestFactory().get('/', params))
+
+
+class RowsQuerySet:
+    """Lo mínimo de un QuerySet que usa `_related_querysets`, con filas fijas."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def prefetch_related(self, *lookups):
+        return self
+
+    def values(self, *fields):
+        self.calls.append(('values', fields))
+        return self
+
+    def order_by(self, *fields):
+        self.calls.append(('order_by', fields))
+        return self
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class AppointmentPlanTests(SimpleTestCase):
+    def setUp(self):
+        self.patient = CustomUser(id=3, first_name='Ana', last_name='Pérez', email='ana@test.com')
+        self.psychologist = CustomUser(id=4, first_name='Luis', last_name='Gómez', email='luis@test.com')
+        created = datetime(2026, 3, 1, 9, 30, tzinfo=dt_timezone.utc)
+        self.appointment = Appointment(
+            id=7, patient=self.patient, psychologist=self.psychologist,
+            appointment_date=date(2026, 3, 2), start_time=time(10, 0), end_time=time(11, 0),
+            appointment_type='online', status='confirmed', reason_for_visit='Ansiedad',
+            notes='', consultation_fee=Decimal('50.00'), is_paid=True, meeting_link='',
+            created_at=created, updated_at=created,
+        )
+        self.row = {
+            'id': 7, 'patient': 3, 'psychologist': 4,
+            'patient__first_name': 'Ana', 'patient__last_name': 'Pérez',
+            'psychologist__first_name': 'Luis', 'psychologist__last_name': 'Gómez',
+            'appointment_date': date(2026, 3, 2), 'start_time': time(10, 0), 'end_time': time(11, 0),
+            'appointment_type': 'online', 'status': 'confirmed', 'reason_for_visit': 'Ansiedad',
+            'notes': '', 'consultation_fee': Decimal('50.00'), 'is_paid': True, 'meeting_link': '',
+            'created_at': created, 'updated_at': created,
+        }
+
+    def test_matches_model_serializer(self):
+        context = {'request': get_request()}
+        expected = AppointmentSerializer(self.appointment, context=context).data
+        serializer = AppointmentValuesSerializer(context=context)
+
+        self.assertEqual(serializer.serialize([self.row]), [expected])
+        self.assertEqual(set(serializer.lookups), set(self.row))
+
+    def test_sparse_fieldset_limits_plan_and_lookups(self):
+        serializer = AppointmentValuesSerializer(
+            context={'request': get_request(fields='status_display,id,patient_name,desconocido')}
+        )
+
+        # Orden del serializer, no el de ?fields=; los desconocidos se ignoran
+        self.assertEqual([name for name, *_ in serializer.plan], ['id', 'patient_name', 'status_display'])
+        self.assertEqual(
+            set(serializer.lookups),
+            {'id', 'status', 'patient__first_name', 'patient__last_name',
+             'psychologist__first_name', 'psychologist__last_name'}
+        )
+        self.assertEqual(
+            serializer.to_representation(self.row),
+            {'id': 7, 'patient_name': 'Ana Pérez', 'status_display': self.appointment.get_status_display()}
+        )
+
+    def test_display_fields_use_model_choices(self):
+        serializer = AppointmentValuesSerializer(
+            context={'request': get_request(fields='status_display,appointment_type_display')}
+        )
+        for value, _ in Appointment.STATUS_CHOICES:
+            data = serializer.to_representation(dict(self.row, status=value))
+            self.assertEqual(data['status_display'], Appointment(status=value).get_status_display())
+
+        self.assertEqual(
+            serializer.to_representation(self.row)['appointment_type_display'],
+            self.appointment.get_appointment_type_display()
+        )
+        # Un valor fuera de las opciones se devuelve tal cual, como el modelo
+        self.assertEqual(serializer.to_representation(dict(self.row, status='otro'))['status_display'], 'otro')
+
+
+class NullRelationTests(SimpleTestCase):
+    def setUp(self):
+        self.timestamp = datetime(2026, 3, 1, 9, 30, tzinfo=dt_timezone.utc)
+        self.row = {
+            'id': 1, 'timestamp': self.timestamp, 'user': None, 'user_id': None, 'user__email': None,
+            'user__first_name': None, 'user__last_name': None, 'ip_address': '10.0.0.1',
+            'level': 'WARNING', 'action': 'Inicio de sesión fallido', 'details': {},
+        }
+
+    def entry(self, user=None):
+        return LogEntry(
+            id=1, timestamp=self.timestamp, user=user, ip_address='10.0.0.1',
+            level='WARNING', action='Inicio de sesión fallido',
+        )
+
+    def test_null_foreign_key_skips_related_fields(self):
+        serializer = LogEntryValuesSerializer()
+        data = serializer.to_representation(self.row)
+
+        # La FK anulable de `user.email` se lee para saber si omitir el campo
+        self.assertEqual(set(serializer.lookups), set(self.row))
+
+        # Como DRF (SkipField): sin usuario no hay `user_email`
+        self.assertNotIn('user_email', data)
+        self.assertEqual(data['user_name'], 'Sistema')
+        self.assertEqual(data, dict(LogEntrySerializer(self.entry()).data))
+
+    def test_present_foreign_key_keeps_related_fields(self):
+        user = CustomUser(id=9, email='root@test.com', first_name='Admin', last_name='Clínica')
+        row = dict(self.row, user=9, user_id=9, user__email='root@test.com',
+                   user__first_name='Admin', user__last_name='Clínica')
+        data = LogEntryValuesSerializer().to_representation(row)
+
+        self.assertEqual(data['user_email'], 'root@test.com')
+        self.assertEqual(data, dict(LogEntrySerializer(self.entry(user)).data))
+
+
+class NestedListTests(SimpleTestCase):
+    def setUp(self):
+        self.working_hours = RowsQuerySet([
+            {'id': 11, 'professional_id': 1, 'day_of_week': 0, 'start_time': time(9, 0),
+             'end_time': time(13, 0), 'is_active': True},
+            {'id': 12, 'professional_id': 1, 'day_of_week': 2, 'start_time': time(15, 0),
+             'end_time': time(19, 0), 'is_active': False},
+        ])
+        self.specializations = RowsQuerySet([
+            {'id': 5, 'professionalprofile': 1, 'name': 'Ansiedad', 'description': ''},
+            {'id': 5, 'professionalprofile': 2, 'name': 'Ansiedad', 'description': ''},
+        ])
+        self.related_ids = []
+        test = self
+
+        class DirectorySerializer(ProfessionalPublicValuesSerializer):
+            def related(self, ids):
+                test.related_ids.append(ids)
+                return {
+                    'specializations': (SpecializationValuesSerializer(), test.specializations, 'professionalprofile'),
+                    'working_hours': (WorkingHoursValuesSerializer(), test.working_hours, 'professional_id'),
+                }
+
+        self.serializer = DirectorySerializer(context={'request': get_request()})
+
+    def profile_row(self, pk):
+        return {
+            'id': pk, 'user': 20 + pk, 'user__id': 20 + pk, 'user__first_name': 'Psi', 'user__last_name': str(pk),
+            'bio': '', 'education': '', 'experience_years': 3, 'consultation_fee': Decimal('40.00'),
+            'session_duration': 60, 'accepts_online_sessions': True, 'accepts_in_person_sessions': True,
+            'city': 'La Paz', 'state': '', 'average_rating': Decimal('4.50'), 'total_reviews': 2,
+        }
+
+    def test_children_are_grouped_under_their_parent(self):
+        data = self.serializer.serialize([self.profile_row(1), self.profile_row(2), self.profile_row(3)])
+
+        self.assertEqual(self.related_ids, [[1, 2, 3]])
+        self.assertEqual([item['id'] for item in data[0]['working_hours']], [11, 12])
+        self.assertEqual(data[0]['working_hours'][0]['day_name'], 'Lunes')
+        self.assertEqual(data[0]['working_hours'][0]['start_time'], '09:00:00')
+        self.assertEqual(data[1]['working_hours'], [])
+        self.assertEqual(data[0]['specializations'], [{'id': 5, 'name': 'Ansiedad', 'description': ''}])
+        self.assertEqual(data[1]['specializations'], data[0]['specializations'])
+        # Sin hijos: lista vacía, no ausente
+        self.assertEqual(data[2]['specializations'], [])
+
+    def test_child_query_reads_the_parent_column_in_model_order(self):
+        self.serializer.serialize([self.profile_row(1)])
+
+        (_, fields), (_, ordering) = self.working_hours.calls
+        self.assertIn('professional_id', fields)
+        self.assertNotIn('professional', fields)
+        self.assertTrue(ordering)
+
+    def test_no_rows_no_child_queries(self):
+        self.assertEqual(self.serializer.serialize([]), [])
+        self.assertEqual(self.related_ids, [])
@@ -41,6 +41,7 @@ def api_root_tenant(request):
                 'lista': '/api/clinical-history/',
                 'notas': '/api/clinical-history/notes/',
                 'documentos': '/api/clinical-history/documents/',
+                'revisiones': '/api/clinical-history/patient/<id>/revisions/',
             },
             'chat': {
                 'mensajes': '/api/chat/messages/',
@@ -0,0 +1,37 @@
+"""
+WhiteNoise híbrido sync/async.
+
+WhiteNoiseMiddleware es solo-sync: bajo ASGI parte la cadena en dos y
+cada request paga dos saltos de hilo (a sync en WhiteNoise y de vuelta a
+async en los middlewares de Django que van detrás), aunque no sea un
+estático. Esta subclase añade el camino async: la búsqueda en
+`self.files` es un dict en memoria y se hace en el event loop; solo se
+salta a un hilo para servir el fichero o, con autorefresh (DEBUG), para
+buscarlo en disco.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)